@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the scripts of `bin/` on synthetic inputs (see `syntheticData.py`) at several scales.
+
+Each stage is run as a subprocess, as in the pipeline. Its wall time, CPU time (user and system) and peak RSS are
+recorded, and appended as JSON lines to the output file with the run metadata (date, git commit, host), so the runs
+can be compared over time. Everything runs offline.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python benchmarkStages.py --sizes 1000 10000 100000 --motifSizes 10 100 --output benchmarkResults.jsonl
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import pathlib
+import tempfile
+import subprocess
+
+from typing import Callable, Dict, List, NamedTuple
+
+BIN_DIR=pathlib.Path(__file__).resolve().parent.parent / "bin"
+
+BENCHMARK_STR_CLASS="AC"
+"""
+BENCHMARK_STR_CLASS: str
+    STR class used by the sequence stages.
+"""
+
+class Stage(NamedTuple):
+    """
+    A benchmarked stage: its name, the kind of scale ("seq": number of sequences, "motif": number of motifs) and a
+    function returning its command line from the dataset directory and the output directory.
+    """
+    name:str
+    scaleKind:str
+    getCommand:Callable[[pathlib.Path, pathlib.Path], List[str]]
+
+def getScript(scriptName:str)->List[str]:
+    """
+    Get the command line prefix running a script of `bin/` with the current interpreter.
+    """
+    return [sys.executable, str(BIN_DIR / scriptName)]
+
+def getModelPaths(dataDir:pathlib.Path)->List[str]:
+    """
+    Get the hyper-parameters and parameters paths of the model of the benchmarked STR class.
+    """
+    modelsDir=dataDir / "mnnModels"
+    return [str(modelsDir / "MNN_ranks_{}_params.npy".format(BENCHMARK_STR_CLASS)), str(modelsDir / "MNN_ranks_{}_.pt".format(BENCHMARK_STR_CLASS))]
+
+STAGES=[
+    Stage("filterSeqNameAndOneHotSeq", "seq", lambda dataDir, outDir: getScript("filterSeqNameAndOneHotSeq.py")+[
+        str(dataDir / "hg38all_names_raw.npy"), str(dataDir / "hg38all_seqs_raw.npy"), str(dataDir / "merged_results.txt"),
+        str(outDir / "seqNames.npy"), str(outDir / "oneHotSeqs.npy"), "--strClass", BENCHMARK_STR_CLASS
+    ]),
+    Stage("seqNameDict", "seq", lambda dataDir, outDir: getScript("seqNameDict.py")+[
+        str(dataDir / "hg38all_names_raw.npy"), "-o", str(outDir / "seqNameDict.npz")
+    ]),
+    Stage("getMnnResults", "seq", lambda dataDir, outDir: getScript("getMnnResults.py")+[
+        str(outDir / "oneHotSeqs.npy"), str(outDir / "seqNames.npy"), *getModelPaths(dataDir), "--output", str(outDir / "mnnResultsArray.npy")
+    ]),
+    Stage("mnnNullModel", "seq", lambda dataDir, outDir: getScript("mnnNullModel.py")+[
+        str(outDir / "oneHotSeqs.npy"), *getModelPaths(dataDir), "-o", str(outDir / "mnnNullThresholds.tsv"), "--nbShuffle", "20", "--seed", "0"
+    ]),
+    Stage("mnnFilterPvalue", "seq", lambda dataDir, outDir: getScript("mnnFilterPvalue.py")+[
+        str(outDir / "oneHotSeqs.npy"), *getModelPaths(dataDir), "-o", str(outDir / "mnnFilterPvalues.npz")
+    ]),
+    Stage("mnnResultBedFilsGenerator", "seq", lambda dataDir, outDir: getScript("mnnResultBedFilsGenerator.py")+[
+        "--outputDir", str(outDir / "bed"), str(outDir / "mnnResultsArray.npy"), str(outDir / "seqNames.npy"), *getModelPaths(dataDir),
+        "--margin", "0", "--offset", "450", "--allNegHits"
+    ]),
+    Stage("kmerPrescreen", "seq", lambda dataDir, outDir: getScript("kmerPrescreen.py")+[
+        str(outDir / "bed" / "positiveMnnHits.bed"), str(outDir / "seqNames.npy"), str(outDir / "oneHotSeqs.npy"), *getModelPaths(dataDir),
+        "--offset", "450", "-o", str(outDir / "kmerPrescreen.tsv")
+    ]),
+    Stage("plotMnnScore", "seq", lambda dataDir, outDir: getScript("plotMnnScore.py")+[
+        "--mnnResultsArray", str(outDir / "mnnResultsArray.npy"), "--mnnHParams", getModelPaths(dataDir)[0], "--mnnParams", getModelPaths(dataDir)[1],
+        "--fig", str(outDir / "plot" / "{moduleId}_{poolFunction}.svg"), "--poolFunction", "mean", "median"
+    ]),
+    Stage("chunkedResults", "seq", lambda dataDir, outDir: getScript("chunkedResults.py")+[
+        str(outDir / "mnnResultsArray.npy"), str(outDir / "mnnResultsArray.mnnc"), "--chunkSize", "10000", "--chunkDtype", "float16"
+    ]),
+    Stage("plotMnnScoreChunked", "seq", lambda dataDir, outDir: getScript("plotMnnScore.py")+[
+        "--mnnResultsArray", str(outDir / "mnnResultsArray.mnnc"), "--moduleId", "0", "--mnnHParams", getModelPaths(dataDir)[0], "--mnnParams", getModelPaths(dataDir)[1],
+        "--fig", str(outDir / "plotChunked" / "{moduleId}_{poolFunction}.svg"), "--poolFunction", "mean", "median"
+    ]),
+    Stage("analyzeStrClass", "seq", lambda dataDir, outDir: getScript("analyzeStrClass.py")+[
+        str(outDir / "oneHotSeqs.npy"), str(outDir / "seqNames.npy"), *getModelPaths(dataDir), "--outputDir", str(outDir / "fused"),
+        "--margin", "0", "--offset", "450", "--allNegHits", "--fig", str(outDir / "fused" / "{moduleId}" / "{poolFunction}.svg"),
+        "--poolFunction", "mean", "median", "--renderer", "matplotlib"
+    ]),
+    Stage("pwm2homer", "motif", lambda dataDir, outDir: getScript("pwm2homer.py")+[
+        "-i", str(dataDir / "motifs.meme"), "-f", "MINIMAL", "-o", str(outDir / "motifs.homer")
+    ]),
+    Stage("homerResultsToCsv", "motif", lambda dataDir, outDir: getScript("homerResultsToCsv.py")+[
+        str(dataDir / "homer"), "-o", str(outDir / "homerResults.csv")
+    ]),
+]
+"""
+STAGES: list
+    The benchmarked stages, in the order of the pipeline (a stage can use the outputs of the previous ones).
+"""
+
+def runCommand(command:List[str], cwd:os.PathLike=None)->Dict[str, float]:
+    """
+    Run a command and measure its resources.
+
+    Parameters
+    ----------
+    command : List[str]
+        The command line.
+    cwd : PathLike, optional
+        The working directory, by default None.
+
+    Returns
+    -------
+    Dict[str, float]
+        "wallTime", "userTime", "systemTime" (seconds), "maxRssKb" (peak resident memory of the process and of its
+        waited children) and "returnCode". "stderr" holds the end of the error output of a failed command.
+    """
+    start=time.perf_counter()
+    process=subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # stderr is read before waiting : a full pipe would block the process
+    stderr=process.stderr.read()
+    process.stderr.close()
+    # wait4 gives the resources of this process only
+    _, status, rusage=os.wait4(process.pid, 0)
+    wallTime=time.perf_counter()-start
+    process.returncode=os.waitstatus_to_exitcode(status)
+    measure={
+        "wallTime":wallTime,
+        "userTime":rusage.ru_utime,
+        "systemTime":rusage.ru_stime,
+        "maxRssKb":rusage.ru_maxrss,
+        "returnCode":process.returncode,
+    }
+    if process.returncode!=0:
+        measure["stderr"]=stderr.decode(errors="replace")[-2000:]
+    return measure
+
+def getRunMetadata()->Dict[str, str]:
+    """
+    Get the metadata identifying a benchmark run: date, git commit of the repository, host and python version.
+    """
+    try:
+        gitCommit=subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BIN_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        gitCommit=None
+    return {
+        "runDate":datetime.datetime.now().isoformat(timespec="seconds"),
+        "gitCommit":gitCommit,
+        "host":platform.node(),
+        "cpuCount":os.cpu_count(),
+        "python":platform.python_version(),
+    }
+
+def writeDataset(dataDir:pathlib.Path, scaleKind:str, size:int, seed:int=0)->None:
+    """
+    Generate a synthetic dataset in a subprocess: the benchmark process stays small, and its memory is not counted in
+    the peak RSS of the stages (a forked child starts with the memory of its parent).
+    """
+    if scaleKind=="seq":
+        sizeArgs=["--nbSeq", str(size), "--nbMotif", "0"]
+    else :
+        sizeArgs=["--nbSeq", "0", "--nbMotif", str(size)]
+    subprocess.run(
+        [sys.executable, str(pathlib.Path(__file__).resolve().parent / "syntheticData.py"), str(dataDir), "--seed", str(seed), *sizeArgs],
+        check=True
+    )
+
+def runBenchmark(
+    workDir:pathlib.Path,
+    sizes:List[int],
+    motifSizes:List[int],
+    stageNames:List[str]=None,
+    repeat:int=1,
+    seed:int=0
+)->List[Dict]:
+    """
+    Generate the synthetic datasets and run the stages on each of them.
+
+    Parameters
+    ----------
+    workDir : pathlib.Path
+        Directory of the datasets and of the outputs.
+    sizes : List[int]
+        Numbers of sequences of the "seq" stages.
+    motifSizes : List[int]
+        Numbers of motifs of the "motif" stages.
+    stageNames : List[str], optional
+        Names of the stages to run, by default None (all).
+    repeat : int, optional
+        Number of runs of each stage at each size, by default 1.
+    seed : int, optional
+        Random seed of the datasets, by default 0.
+
+    Returns
+    -------
+    List[Dict]
+        A record by run of a stage.
+    """
+    stageList=[stage for stage in STAGES if stageNames is None or stage.name in stageNames]
+    records=[]
+    for scaleKind, scaleList in (("seq", sizes), ("motif", motifSizes)):
+        scaleStageList=[stage for stage in stageList if stage.scaleKind==scaleKind]
+        if len(scaleStageList)==0:
+            continue
+        for size in scaleList:
+            dataDir=workDir / "{}_{}".format(scaleKind, size)
+            writeDataset(dataDir, scaleKind, size, seed=seed)
+            for repeatIdx in range(repeat):
+                outDir=dataDir / "out_{}".format(repeatIdx)
+                outDir.mkdir(parents=True, exist_ok=True)
+                for stage in scaleStageList:
+                    measure=runCommand(stage.getCommand(dataDir, outDir), cwd=outDir)
+                    records.append(dict(stage=stage.name, scaleKind=scaleKind, size=size, repeat=repeatIdx, **measure))
+                    print("{}\t{}={}\t{:.2f}s\t{} kB\t{}".format(
+                        stage.name, scaleKind, size, measure["wallTime"], measure["maxRssKb"],
+                        "ok" if measure["returnCode"]==0 else "FAILED"
+                    ), file=sys.stderr)
+    return records
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser=argparse.ArgumentParser(description="Benchmark the scripts of bin/ on synthetic inputs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Numbers of sequences (default: 1000 10000).")
+    parser.add_argument("--motifSizes", type=int, nargs="+", default=[10, 100], help="Numbers of motifs (default: 10 100).")
+    parser.add_argument("--stages", type=str, nargs="+", default=None, choices=[stage.name for stage in STAGES], help="Stages to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs of each stage at each size (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the datasets (default: 0).")
+    parser.add_argument("--workDir", type=pathlib.Path, default=None, help="Directory of the datasets and outputs, kept after the run. Default: a temporary directory, removed.")
+    parser.add_argument("-o", "--output", type=pathlib.Path, default="benchmarkResults.jsonl", help="JSON lines file where the records are appended (default: benchmarkResults.jsonl).")
+    return parser.parse_args()
+
+def main():
+    args=parseArgs()
+    workDir=args.workDir if args.workDir is not None else pathlib.Path(tempfile.mkdtemp(prefix="benchmark_"))
+    try:
+        records=runBenchmark(workDir, args.sizes, args.motifSizes, stageNames=args.stages, repeat=args.repeat, seed=args.seed)
+    finally:
+        if args.workDir is None:
+            shutil.rmtree(workDir, ignore_errors=True)
+    metadata=getRunMetadata()
+    with open(args.output, "a") as outputFile:
+        for record in records:
+            outputFile.write(json.dumps(dict(metadata, **record))+"\n")
+    import pandas as pd
+    summaryDf=pd.DataFrame(records)
+    print(summaryDf.groupby(["stage", "size"], sort=False)[["wallTime", "userTime", "maxRssKb"]].median().to_string(), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
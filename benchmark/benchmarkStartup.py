@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the startup time of the subcommands of `bin/mnnTools.py`.
+
+Each subcommand is started with `--help` in a new interpreter, with the lazy imports (`lazyImport.py`) and with its
+heavy dependencies imported first, as the scripts did at their import before. The difference is the startup time
+saved by the subcommand when it does not need them. The heavy modules loaded in each case are recorded.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python benchmarkStartup.py --repeat 5 --output startupResults.jsonl
+
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+from typing import Dict, List
+
+from benchmarkStages import BIN_DIR, getRunMetadata, runCommand
+
+HEAVY_MODULES=["torch", "pandas", "matplotlib.pyplot", "seaborn", "Bio.motifs", "bs4", "requests"]
+"""
+HEAVY_MODULES: list
+    The heavy dependencies whose loading is recorded.
+"""
+
+EAGER_IMPORTS={
+    "aggregateProfiles":["pandas"],
+    "analyzeStrClass":["torch", "pandas", "matplotlib.pyplot"],
+    "chunkedResults":[],
+    "filterMotifComparison":["torch", "pandas"],
+    "filterSeqNameAndOneHotSeq":["pandas"],
+    "getMnnHitPfm":["torch", "pandas"],
+    "getMnnResults":["torch", "pandas"],
+    "homerResultsToCsv":["pandas", "bs4"],
+    "homerScheduler":[],
+    "kmerPrescreen":["torch", "pandas"],
+    "memoryEstimate":["pandas"],
+    "mnnFilterPvalue":["torch", "pandas"],
+    "mnnModelCatalog":["pandas"],
+    "mnnNullModel":["torch", "pandas"],
+    "mnnResultBedFilsGenerator":["torch", "pandas"],
+    "mnnScoreMatrix":["pandas"],
+    "motifOccupancy":["torch", "pandas"],
+    "plotMnnScore":["torch", "pandas", "matplotlib.pyplot"],
+    "pwm2homer":["Bio.motifs", "pandas"],
+    "requestJasparDatabase":["requests"],
+    "selectForeground":[],
+    "seqNameDict":["pandas"],
+}
+"""
+EAGER_IMPORTS: Dict[str, List[str]]
+    The heavy dependencies imported by each subcommand at its import, before the lazy imports.
+"""
+
+STARTUP_CODE="""
+import sys, os, json, importlib
+sys.path.insert(0, {binDir!r})
+for moduleName in {eagerImports!r}:
+    importlib.import_module(moduleName)
+import mnnTools
+sys.argv=["mnnTools.py", {subcommand!r}, "--help"]
+stdout=sys.stdout
+sys.stdout=open(os.devnull, "w")
+try:
+    mnnTools.main()
+except SystemExit:
+    pass
+sys.stdout=stdout
+print(json.dumps([moduleName for moduleName in {heavyModules!r} if moduleName in sys.modules]))
+"""
+"""
+STARTUP_CODE: str
+    The code run in a new interpreter: import the eager dependencies, run `mnnTools.py <subcommand> --help` and print
+    the loaded heavy modules.
+"""
+
+def getAvailableModules(moduleNames:List[str])->List[str]:
+    """
+    Get the modules which can be imported in this environment (checked in a new interpreter).
+    """
+    availableModules=[]
+    for moduleName in moduleNames:
+        process=subprocess.run([sys.executable, "-c", "import {}".format(moduleName)], capture_output=True)
+        if process.returncode==0:
+            availableModules.append(moduleName)
+    return availableModules
+
+def measureStartup(subcommand:str, eagerImports:List[str])->Dict:
+    """
+    Start a subcommand with `--help` in a new interpreter and measure it (see `benchmarkStages.runCommand`). The
+    heavy modules loaded are in "loadedModules".
+    """
+    code=STARTUP_CODE.format(binDir=str(BIN_DIR), eagerImports=eagerImports, subcommand=subcommand, heavyModules=HEAVY_MODULES)
+    measure=runCommand([sys.executable, "-c", code])
+    # the loaded modules are printed : run it again to read them, the measure is done without capture
+    process=subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    lines=process.stdout.strip().splitlines()
+    measure["loadedModules"]=json.loads(lines[-1]) if process.returncode==0 and lines else None
+    return measure
+
+def runBenchmark(subcommands:List[str], repeat:int=3)->List[Dict]:
+    """
+    Measure the startup of the subcommands, with the lazy imports ("lazy") and with their heavy dependencies imported
+    first ("eager").
+
+    Parameters
+    ----------
+    subcommands : List[str]
+        The subcommands.
+    repeat : int, optional
+        The number of runs in each mode, by default 3.
+
+    Returns
+    -------
+    List[Dict]
+        A record by run.
+    """
+    availableModules=set(getAvailableModules(HEAVY_MODULES))
+    records=[]
+    for subcommand in subcommands:
+        eagerImports=[moduleName for moduleName in EAGER_IMPORTS[subcommand] if moduleName in availableModules]
+        for mode, imports in (("lazy", []), ("eager", eagerImports)):
+            for repeatIdx in range(repeat):
+                measure=measureStartup(subcommand, imports)
+                records.append(dict(subcommand=subcommand, mode=mode, repeat=repeatIdx, eagerImports=imports, **measure))
+        lazyTime=statistics.median(record["wallTime"] for record in records[-2*repeat:-repeat])
+        eagerTime=statistics.median(record["wallTime"] for record in records[-repeat:])
+        print("{}\tlazy {:.3f}s\teager {:.3f}s\tsaved {:.3f}s\t{}".format(
+            subcommand, lazyTime, eagerTime, eagerTime-lazyTime, ",".join(records[-2*repeat]["loadedModules"] or []) or "-"
+        ), file=sys.stderr)
+    return records
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser=argparse.ArgumentParser(description="Benchmark the startup time of the subcommands of bin/mnnTools.py.")
+    parser.add_argument("--subcommands", type=str, nargs="+", default=list(EAGER_IMPORTS), choices=list(EAGER_IMPORTS), help="Subcommands to start (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each subcommand in each mode (default: 3).")
+    parser.add_argument("-o", "--output", type=str, default="startupResults.jsonl", help="JSON lines file where the records are appended (default: startupResults.jsonl).")
+    return parser.parse_args()
+
+def main():
+    args=parseArgs()
+    records=runBenchmark(args.subcommands, repeat=args.repeat)
+    metadata=getRunMetadata()
+    with open(args.output, "a") as outputFile:
+        for record in records:
+            outputFile.write(json.dumps(dict(metadata, **record))+"\n")
+
+if __name__ == "__main__":
+    main()
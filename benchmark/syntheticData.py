@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Generate synthetic inputs for the scripts of `bin/`, at a configurable scale and without network access: one-hot
+encoded sequences and their `motifId;seq;strand` names, random MNN models saved as `MNN_ranks_<strClass>_.pt` and
+`MNN_ranks_<strClass>_params.npy`, a `merged_results.txt` table, a MEME motif file and HOMER results directories.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python syntheticData.py outputDir --nbSeq 10000 --nbMotif 100
+
+import os
+import sys
+import argparse
+import pathlib
+
+import numpy as np
+
+from typing import Sequence
+
+BIN_DIR=pathlib.Path(__file__).resolve().parent.parent / "bin"
+sys.path.insert(0, str(BIN_DIR))
+
+from miscFct import rcDnaSeq
+
+ALPHABET=("A", "C", "G", "T")
+"""
+ALPHABET: tuple
+    Order of the bases in the one-hot encoded sequences.
+"""
+
+STR_CLASSES=("AC", "AG", "AAAG", "AAAT")
+"""
+STR_CLASSES: tuple
+    STR classes of the synthetic sequences.
+"""
+
+SEQ_SIZE=101
+"""
+SEQ_SIZE: int
+    Size of the sequences given to the MNN models.
+"""
+
+def getSeqNames(nbSeq:int, strClasses:Sequence[str]=STR_CLASSES, rng:np.random.Generator=None)->np.ndarray:
+    """
+    Get `motifId;seq;strand` sequence names. A sequence of the minus strand carries the reverse complement of its STR
+    class, as in `filterSeqNameAndOneHotSeq.filterSeqNames`.
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    classIdx=rng.integers(0, len(strClasses), nbSeq)
+    isMinus=rng.random(nbSeq)<0.5
+    return np.array([
+        "chr{}_{};{};{}".format(
+            i%22+1, 1000+10*i,
+            rcDnaSeq(strClasses[c]) if minus else strClasses[c],
+            "-" if minus else "+"
+        )
+        for i, (c, minus) in enumerate(zip(classIdx, isMinus))
+    ])
+
+def getOneHotSeqs(nbSeq:int, seqSize:int=SEQ_SIZE, rng:np.random.Generator=None)->np.ndarray:
+    """
+    Get random one-hot encoded sequences, 3D array (seq, pos, alphabet) of float32.
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    return np.eye(len(ALPHABET), dtype=np.float32)[rng.integers(0, len(ALPHABET), (nbSeq, seqSize))]
+
+def writeMergedResults(path:os.PathLike, seqNames:Sequence[str], fraction:float=0.8, rng:np.random.Generator=None)->None:
+    """
+    Write a `merged_results.txt` table associating a fraction of the sequences to a gene.
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    with open(path, "w") as mergedFile:
+        for seqName in seqNames:
+            if rng.random()<fraction:
+                mergedFile.write("{}:ENSG{:011d}\t{:.3f}\n".format(seqName, rng.integers(0, 10**6), rng.random()))
+
+def writeMnnModel(modelsDir:os.PathLike, strClass:str, filterLengthList:Sequence[int], seed:int=0)->None:
+    """
+    Save a MNN model with random weights in the layout of the real models.
+    """
+    import torch
+    import mnnPseudoModel
+    torch.manual_seed(seed)
+    hParams=np.array([[filterLength, 0.] for filterLength in filterLengthList])
+    os.makedirs(modelsDir, exist_ok=True)
+    np.save(os.path.join(modelsDir, "MNN_ranks_{}_params.npy".format(strClass)), hParams)
+    torch.save(mnnPseudoModel.build_modular(hParams).state_dict(), os.path.join(modelsDir, "MNN_ranks_{}_.pt".format(strClass)))
+
+def writeMemeMotifs(path:os.PathLike, nbMotif:int, rng:np.random.Generator=None)->None:
+    """
+    Write random motifs (length 6 to 20) in the MEME format.
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    with open(path, "w") as memeFile:
+        memeFile.write("MEME version 4\n\nALPHABET= ACGT\n\nstrands: + -\n\nBackground letter frequencies\nA 0.25 C 0.25 G 0.25 T 0.25\n\n")
+        for motifIdx in range(nbMotif):
+            pwm=rng.dirichlet(np.full(len(ALPHABET), 0.5), size=rng.integers(6, 21))
+            memeFile.write("MOTIF MA{:04d}.1 SYN{}\n".format(motifIdx, motifIdx))
+            memeFile.write("letter-probability matrix: alength= 4 w= {} nsites= 20 E= 0\n".format(len(pwm)))
+            for row in pwm:
+                memeFile.write(" ".join("{:.6f}".format(p) for p in row)+"\n")
+            memeFile.write("\n")
+
+def getHomerMotifInfoHtml(motifIdx:int, nbMatch:int, rng:np.random.Generator=None)->str:
+    """
+    Get a `motif<i>.info.html` page with the structure of the HOMER ones (motif statistics and best matches).
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    consensus="".join(rng.choice(ALPHABET, size=10))
+    logP=-rng.uniform(5, 100)
+    target, background=rng.uniform(5, 50), rng.uniform(1, 20)
+    html=["<HTML><HEAD><TITLE>{}</TITLE></HEAD><BODY>".format(consensus)]
+    html.append("<H2>Information for {}-{} (Motif {})</H2>".format(motifIdx, consensus, motifIdx))
+    html.append("<TABLE>")
+    for label, value in (
+        ("p-value:", "1e-{}".format(int(-logP/np.log(10)))),
+        ("log p-value:", "{:.3e}".format(logP)),
+        ("Information Content per bp:", "{:.3f}".format(rng.uniform(1, 2))),
+        ("Number of Target Sequences with motif", "{:.1f}".format(target*10)),
+        ("Percentage of Target Sequences with motif", "{:.2f}%".format(target)),
+        ("Number of Background Sequences with motif", "{:.1f}".format(background*10)),
+        ("Percentage of Background Sequences with motif", "{:.2f}%".format(background)),
+    ):
+        html.append("<TR><TD>{}</TD><TD>{}</TD></TR>".format(label, value))
+    html.append("</TABLE>")
+    html.append("<TABLE>")
+    for matchRank in range(1, nbMatch+1):
+        html.append("<TR><TD><H4>MA{:04d}.1/SYN/Jaspar</H4>".format(rng.integers(0, 1000)))
+        html.append("<TABLE><TR><TD><TABLE>")
+        for label, value in (
+            ("Match Rank:", matchRank),
+            ("Score:", "{:.2f}".format(rng.uniform(0.5, 1))),
+            ("Offset:", rng.integers(-3, 4)),
+            ("Orientation:", "forward strand" if rng.random()<0.5 else "reverse strand"),
+        ):
+            html.append("<TR><TD>{}</TD><TD>{}</TD></TR>".format(label, value))
+        html.append("</TABLE></TD></TR></TABLE></TD></TR>")
+    html.append("</TABLE></BODY></HTML>")
+    return "\n".join(html)
+
+def writeHomerResultsDir(homerDir:os.PathLike, nbMotif:int, nbMatch:int=10, rng:np.random.Generator=None)->None:
+    """
+    Write a HOMER results directory (`<homerDir>/homerResults/motif<i>.info.html`).
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    homerResultsDir=pathlib.Path(homerDir) / "homerResults"
+    homerResultsDir.mkdir(parents=True, exist_ok=True)
+    for motifIdx in range(1, nbMotif+1):
+        (homerResultsDir / "motif{}.info.html".format(motifIdx)).write_text(getHomerMotifInfoHtml(motifIdx, nbMatch, rng=rng))
+
+def writeSequenceDataset(outputDir:os.PathLike, nbSeq:int, seed:int=0)->None:
+    """
+    Write the sequence inputs of the pipeline in `outputDir`: `hg38all_names_raw.npy`, `hg38all_seqs_raw.npy`,
+    `merged_results.txt` and a model by STR class in `mnnModels/`.
+    """
+    rng=np.random.default_rng(seed)
+    os.makedirs(outputDir, exist_ok=True)
+    seqNames=getSeqNames(nbSeq, rng=rng)
+    np.save(os.path.join(outputDir, "hg38all_names_raw.npy"), seqNames)
+    np.save(os.path.join(outputDir, "hg38all_seqs_raw.npy"), getOneHotSeqs(nbSeq, rng=rng))
+    writeMergedResults(os.path.join(outputDir, "merged_results.txt"), seqNames, rng=rng)
+    for classIdx, strClass in enumerate(STR_CLASSES):
+        filterLengthList=rng.integers(5, 21, rng.integers(2, 9))
+        writeMnnModel(os.path.join(outputDir, "mnnModels"), strClass, filterLengthList, seed=seed+classIdx)
+
+def writeMotifDataset(outputDir:os.PathLike, nbMotif:int, seed:int=0)->None:
+    """
+    Write the motif inputs in `outputDir`: `motifs.meme` and the HOMER results directory `homer/`.
+    """
+    rng=np.random.default_rng(seed)
+    os.makedirs(outputDir, exist_ok=True)
+    writeMemeMotifs(os.path.join(outputDir, "motifs.meme"), nbMotif, rng=rng)
+    writeHomerResultsDir(os.path.join(outputDir, "homer"), nbMotif, rng=rng)
+
+def main():
+    parser=argparse.ArgumentParser(description="Generate synthetic inputs for the scripts of bin/.")
+    parser.add_argument("outputDir", type=pathlib.Path, help="Output directory.")
+    parser.add_argument("--nbSeq", type=int, default=10000, help="Number of sequences, 0 for no sequence dataset (default: 10000).")
+    parser.add_argument("--nbMotif", type=int, default=100, help="Number of motifs, 0 for no motif dataset (default: 100).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    args=parser.parse_args()
+    if args.nbSeq>0:
+        writeSequenceDataset(args.outputDir, args.nbSeq, seed=args.seed)
+    if args.nbMotif>0:
+        writeMotifDataset(args.outputDir, args.nbMotif, seed=args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Join the JSON reports of the tasks (`--profile` option of the scripts, see `stageProfiler.py`) into tables: the
+resources by STR class and stage, and the resources by STR class, stage and phase.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python aggregateProfiles.py results/profiles -o profileStages.tsv --phases profilePhases.tsv
+
+import os
+import sys
+import json
+import argparse
+import pathlib
+
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+from typing import Dict, Iterable, List
+
+import stageProfiler
+
+GROUP_LABEL="strClass"
+"""
+GROUP_LABEL: str
+    Label grouping the tasks in the tables. Tasks without this label (e.g. the JASPAR download) are grouped under "".
+"""
+
+def listReportPaths(paths:Iterable[os.PathLike])->List[pathlib.Path]:
+    """
+    List the reports: the given files, and the `*.json` files of the given directories (recursively).
+    """
+    reportPathList=[]
+    for path in map(pathlib.Path, paths):
+        if path.is_dir():
+            reportPathList.extend(sorted(path.rglob("*.json")))
+        else :
+            reportPathList.append(path)
+    return reportPathList
+
+def loadReports(reportPaths:Iterable[os.PathLike])->List[Dict]:
+    """
+    Load the reports. The files which are not reports of the current version are skipped with a warning.
+    """
+    reportList=[]
+    for reportPath in reportPaths:
+        try:
+            with open(reportPath) as reportFile:
+                report=json.load(reportFile)
+        except (OSError, ValueError) as error:
+            print("skip {}: {}".format(reportPath, error), file=sys.stderr)
+            continue
+        if not isinstance(report, dict) or report.get("version")!=stageProfiler.PROFILE_VERSION or "stage" not in report:
+            print("skip {}: not a profile report".format(reportPath), file=sys.stderr)
+            continue
+        reportList.append(report)
+    return reportList
+
+def getTaskDf(reportList:List[Dict])->pd.DataFrame:
+    """
+    Get a table with a row by task: the labels, the stage, the total resources and the sizes of the inputs and outputs.
+    """
+    return pd.DataFrame([
+        dict(
+            report["labels"],
+            stage=report["stage"],
+            host=report["host"],
+            wallTime=report["wallTime"],
+            cpuTime=report["cpuTime"],
+            childrenCpuTime=report["childrenCpuTime"],
+            maxRssKb=report["maxRssKb"],
+            inputBytes=sum(report["inputs"].values()),
+            outputBytes=sum(report["outputs"].values()),
+        )
+        for report in reportList
+    ])
+
+def getPhaseDf(reportList:List[Dict])->pd.DataFrame:
+    """
+    Get a table with a row by (task, phase): the labels, the stage and the resources of the phase.
+    """
+    return pd.DataFrame([
+        dict(report["labels"], stage=report["stage"], **phase)
+        for report in reportList for phase in report["phases"]
+    ])
+
+def getStageTable(taskDf:pd.DataFrame, groupLabel:str=GROUP_LABEL)->pd.DataFrame:
+    """
+    Aggregate the tasks by (group label, stage): number of tasks, sums of the times and of the sizes, max of the
+    peak RSS.
+    """
+    taskDf=taskDf.assign(**{groupLabel:taskDf.get(groupLabel, pd.Series("", index=taskDf.index)).fillna("")})
+    return taskDf.groupby([groupLabel, "stage"]).agg(
+        tasks=("wallTime", "size"),
+        wallTime=("wallTime", "sum"),
+        maxTaskWallTime=("wallTime", "max"),
+        cpuTime=("cpuTime", "sum"),
+        childrenCpuTime=("childrenCpuTime", "sum"),
+        maxRssKb=("maxRssKb", "max"),
+        inputBytes=("inputBytes", "sum"),
+        outputBytes=("outputBytes", "sum"),
+    ).reset_index()
+
+def getPhaseTable(phaseDf:pd.DataFrame, groupLabel:str=GROUP_LABEL)->pd.DataFrame:
+    """
+    Aggregate the phases by (group label, stage, phase): number of tasks, sums of the times, max of the peak RSS and
+    of its increase during the phase.
+    """
+    phaseDf=phaseDf.assign(**{groupLabel:phaseDf.get(groupLabel, pd.Series("", index=phaseDf.index)).fillna("")})
+    return phaseDf.groupby([groupLabel, "stage", "phase"], sort=False).agg(
+        tasks=("wallTime", "size"),
+        wallTime=("wallTime", "sum"),
+        cpuTime=("cpuTime", "sum"),
+        childrenCpuTime=("childrenCpuTime", "sum"),
+        maxRssKb=("maxRssKb", "max"),
+        maxRssIncreaseKb=("maxRssIncreaseKb", "max"),
+    ).reset_index().sort_values([groupLabel, "stage"], kind="stable")
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Join the profile reports of the tasks into tables by STR class and stage.")
+    parser.add_argument("reports", type=pathlib.Path, nargs="+", help="Report files, or directories containing report files (*.json).")
+    parser.add_argument("-o", "--output", type=str, default="-", help="Output TSV table by STR class and stage. Use '-' for stdout. Default: stdout")
+    parser.add_argument("--phases", type=str, default=None, help="Output TSV table by STR class, stage and phase. Default: no table")
+    parser.add_argument("--tasks", type=str, default=None, help="Output TSV table with a line by task. Default: no table")
+    parser.add_argument("--groupLabel", type=str, default=GROUP_LABEL, help="Label grouping the tasks (default: {}).".format(GROUP_LABEL))
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("aggregateProfiles", args)
+    with profiler.phase("load reports"):
+        reportPathList=listReportPaths(args.reports)
+        reportList=loadReports(reportPathList)
+    if len(reportList)==0:
+        sys.exit("no profile report found")
+    with profiler.phase("DataFrame build"):
+        taskDf=getTaskDf(reportList)
+        stageDf=getStageTable(taskDf, groupLabel=args.groupLabel)
+        phaseDf=None if args.phases is None else getPhaseTable(getPhaseDf(reportList), groupLabel=args.groupLabel)
+    output=args.output if args.output != "-" else sys.stdout
+    with profiler.phase("CSV write"):
+        stageDf.to_csv(output, sep="\t", index=False)
+        if phaseDf is not None:
+            phaseDf.to_csv(args.phases, sep="\t", index=False)
+        if args.tasks is not None:
+            taskDf.to_csv(args.tasks, sep="\t", index=False)
+    profiler.addInputs(*reportPathList)
+    profiler.addOutputs(None if args.output=="-" else args.output, args.phases, args.tasks)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Analyze a STR class in a single process: MNN inference, bed files of the hits and non-hits, activation score plots
+and, optionally, the PFM of the hits of each module, the activation summary and the score matrix.
+
+The inputs and the model are loaded once and the MNN results array stays in memory: it is written only if
+`--mnnResultsArray` is given. The outputs are those of `getMnnResults.py`, `mnnResultBedFilsGenerator.py`,
+`plotMnnScore.py` and `getMnnHitPfm.py`; the activation summary (`--summary`) is the one of `getMnnResults.py`, the plots
+are drawn from the results array.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python analyzeStrClass.py AC_oneHotSeqs.npy AC_seqNames.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt --allNegHits --offset 450 --poolFunction mean median
+
+import argparse
+import pathlib
+
+import numpy as np
+
+import chunkedResults
+import getMnnResults
+import getMnnHitPfm
+import mnnFilterPvalue
+import mnnNullModel
+import mnnProcess
+import mnnPseudoModel
+import mnnResultBedFilsGenerator
+import mnnScoreMatrix
+import plotMnnScore
+import seqNameDict
+import stageProfiler
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Analyze a STR class in a single process: MNN inference, bed files and activation score plots.")
+    parser.add_argument("oneHotSeqFilePath", type=str, help="Path to the file containing the one-hot encoded sequences of the class.")
+    parser.add_argument("namesFilePath", type=str, help="Path to the file containing the sequence names of the class.")
+    parser.add_argument("hParamsPath", type=str, help="Path to the file containing the hyperparameters of the MNN model.")
+    parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
+    parser.add_argument("--seqNameDict", type=str, default=None, help="Path to the dictionary of the sequence names (see seqNameDict.py), when the names file holds sequence IDs. The IDs are turned into names only in the score matrix and the written bed lines.")
+    parser.add_argument("--outputDir", type=pathlib.Path, default=pathlib.Path.cwd(), help="Output directory of the bed files (positiveMnnHits.bed and negativeMnnHits.bed) and of the PFM files (see --mnnHitPfm).")
+    parser.add_argument("--margin", type=int, nargs="+", default=[0], help="Margin to add on both sides of the match positions (default is 0).")
+    parser.add_argument("--offset", type=int, nargs="+", default=[0], help="Offset to add to the match positions (default is 0).")
+    parser.add_argument("--allNegHits", action="store_true", help="Return all negative hits instead of a subset.")
+    parser.add_argument("--compactHits", type=str, default="none", choices=mnnProcess.HIT_COMPACTION_MODES, help="Compaction of the positive hits of each (module, sequence), see mnnResultBedFilsGenerator.py (default: none).")
+    parser.add_argument("--fig", type=str, default="{moduleId}/moduleActivation_{poolFunction}.svg", help="Output figure path, with the '{moduleId}' and '{poolFunction}' fields (default: {moduleId}/moduleActivation_{poolFunction}.svg).")
+    parser.add_argument("--poolFunction", type=str, nargs="+", default=["mean", "median"], choices=list(plotMnnScore.poolFunctionDict.keys()), help="The pooling functions of the plots (default: mean median).")
+    parser.add_argument("--renderer", type=str, default="seaborn", choices=["seaborn", "matplotlib"], help="Library used to draw the histograms (default: seaborn). 'matplotlib' is faster.")
+    parser.add_argument("--mnnHitPfm", type=str, default=None, help="Name of the PFM file of the hits of each module, written in '<outputDir>/<moduleId>/'. Default: no PFM")
+    parser.add_argument("--mnnResultsArray", type=str, default=None, help="Path to an output file with the dense MNN results array (module, seq, pos), .npy or chunked (see --chunkSize). Default: not written")
+    parser.add_argument("--summary", type=str, default=None, help="Path to an output .npz file summarizing the results by module and position, as getMnnResults.py --summary. Default: no summary")
+    parser.add_argument("--scoreMatrix", type=str, default=None, help="Path to an output parquet file with the max score and its position for each (sequence, module) (see mnnScoreMatrix.py). Default: no matrix")
+    chunkedResults.addChunkArguments(parser)
+    mnnNullModel.addThresholdArguments(parser)
+    mnnFilterPvalue.addPvalueArguments(parser)
+    stageProfiler.addProfileArguments(parser)
+    args=parser.parse_args()
+    if "{moduleId}" not in args.fig or "{poolFunction}" not in args.fig:
+        parser.error("--fig should contain the '{moduleId}' and '{poolFunction}' fields.")
+    return args
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("analyzeStrClass", args)
+    profiler.addInputs(args.oneHotSeqFilePath, args.namesFilePath, args.hParamsPath, args.paramsPath, args.seqNameDict, args.thresholds, args.filterPvalues)
+
+    with profiler.phase("load names and one-hot"):
+        seqNames, oneHotSeqs = getMnnResults.loadData(args.oneHotSeqFilePath, args.namesFilePath)
+    seqNameDictionary=None
+    if args.seqNameDict is not None and seqNameDict.isSeqIdArray(seqNames):
+        seqNameDictionary=seqNameDict.SeqNameDict.load(args.seqNameDict)
+    with profiler.phase("load model"):
+        mnnModel = getMnnResults.loadModel(args.hParamsPath, args.paramsPath)
+        filterLengthList = mnnPseudoModel.getFilterLengthList(mnnPseudoModel.getBlockList(mnnModel))
+    with profiler.phase("convolution"):
+        mnnResultsArray, mnnMaxResultsArray = getMnnResults.getMnnResults(oneHotSeqs, mnnModel)
+    outputPathList=[]
+    if args.mnnResultsArray is not None:
+        with profiler.phase("save results"):
+            chunkedResults.saveMnnResultsArray(args.mnnResultsArray, mnnResultsArray, args)
+        outputPathList.append(args.mnnResultsArray)
+    if args.scoreMatrix is not None:
+        with profiler.phase("score matrix"):
+            scoreMatrixSeqNames=seqNames if seqNameDictionary is None else seqNameDictionary.getNames(seqNames)
+            scoreMatrixDf=mnnScoreMatrix.getScoreMatrixDf(mnnMaxResultsArray, np.argmax(mnnResultsArray, axis=-1), scoreMatrixSeqNames)
+            mnnScoreMatrix.saveScoreMatrix(scoreMatrixDf, args.scoreMatrix)
+            del scoreMatrixDf, scoreMatrixSeqNames
+        outputPathList.append(args.scoreMatrix)
+    del mnnMaxResultsArray
+    if args.summary is not None:
+        with profiler.phase("activation summary"):
+            np.savez_compressed(args.summary, **getMnnResults.getMnnActivationSummary(mnnResultsArray, mnnModel))
+        outputPathList.append(args.summary)
+
+    moduleIdList=list(range(mnnResultsArray.shape[0]))
+    thresholds=mnnNullModel.getArgsThresholds(args, len(moduleIdList))
+    thresholds=mnnFilterPvalue.getArgsPvalueThresholds(args, thresholds)
+    with profiler.phase("pool and plot"):
+        plotMnnScore.plotModulesActivationScore(
+            mnnResultsArray,
+            mnnModel,
+            moduleIdList,
+            args.poolFunction,
+            figPathTemplate=args.fig,
+            renderer=args.renderer,
+            thresholds=thresholds
+        )
+    outputPathList.extend(args.fig.format(moduleId=moduleId, poolFunction=poolFunction) for moduleId in moduleIdList for poolFunction in args.poolFunction)
+    if args.mnnHitPfm is not None:
+        with profiler.phase("accumulate PFM"):
+            pfmCounts=mnnProcess.getMnnHitPfmArray(
+                mnnResultsArray,
+                mnnProcess.getOneHotBaseIdx(oneHotSeqs),
+                filterLengthList,
+                alphabetSize=len(getMnnHitPfm.ALPHABET)
+            )
+            for moduleId, filterLength in enumerate(filterLengthList):
+                pfmPath=args.outputDir / str(moduleId) / args.mnnHitPfm
+                pfmPath.parent.mkdir(parents=True, exist_ok=True)
+                getMnnHitPfm.writePfm(pfmCounts[moduleId, :filterLength], pfmPath, name="module_{}".format(moduleId))
+                outputPathList.append(pfmPath)
+    # the bed files are the largest step : the sequences and the model are not needed anymore
+    del oneHotSeqs, mnnModel
+
+    with profiler.phase("nonzero and DataFrame build"):
+        posBedDf, negBedDf = mnnResultBedFilsGenerator.generateMnnResultBedFiles(
+            mnnResultsArray, filterLengthList, margin=args.margin, offset=args.offset, seqNames=seqNames,
+            allNegHits=args.allNegHits, compaction=args.compactHits, thresholds=thresholds,
+            distributions=None if args.filterPvalues is None else mnnFilterPvalue.loadFilterDistributions(args.filterPvalues)
+        )
+        del mnnResultsArray
+        posBedDf=seqNameDict.decodeBedChrom(posBedDf, seqNameDictionary)
+        negBedDf=seqNameDict.decodeBedChrom(negBedDf, seqNameDictionary)
+    args.outputDir.mkdir(parents=True, exist_ok=True)
+    with profiler.phase("CSV write"):
+        posBedDf.to_csv(args.outputDir / "positiveMnnHits.bed", sep="\t", index=False, header=False)
+        del posBedDf
+        negBedDf.to_csv(args.outputDir / "negativeMnnHits.bed", sep="\t", index=False, header=False)
+        del negBedDf
+    outputPathList.extend([args.outputDir / "positiveMnnHits.bed", args.outputDir / "negativeMnnHits.bed"])
+    profiler.addOutputs(*outputPathList)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
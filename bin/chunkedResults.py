@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Chunked storage of the MNN results array (module, seq, pos), read by module or by range of sequences.
+
+The array is cut into module-major chunks of `chunkSize` sequences: the chunk (module, i) holds the scores of the
+sequences [i*chunkSize, (i+1)*chunkSize[ for this module. Each chunk is stored as float32, float16 or quantized on
+int16/int8 (symmetric, a scale by chunk: 0 stays 0), and optionally compressed with zlib. The file is:
+
+    MAGIC | chunk 0 | chunk 1 | ... | JSON index | index length (uint64) | MAGIC
+
+The index gives the shape, the storage options and the offset, size and scale of each chunk. `ChunkedResults` reads
+only the chunks of the requested modules and sequences, and can be indexed like the array.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python chunkedResults.py mnnResultsArray.npy mnnResultsArray.mnnc --chunkSize 10000 --chunkDtype float16 --chunkCompression zlib
+
+import os
+import json
+import zlib
+import struct
+import argparse
+
+import numpy as np
+import stageProfiler
+
+from typing import BinaryIO, Dict, Sequence, Tuple, Union
+
+MAGIC=b"MNNCHUNK"
+"""
+MAGIC: bytes
+    First and last bytes of a chunked results file.
+"""
+
+FORMAT_VERSION=1
+"""
+FORMAT_VERSION: int
+    Version of the index format.
+"""
+
+FOOTER=struct.Struct("<Q8s")
+"""
+FOOTER: struct.Struct
+    Footer of the file: length of the JSON index and MAGIC.
+"""
+
+STORAGE_DTYPES={
+    "float32":np.float32,
+    "float16":np.float16,
+    "int16":np.int16,
+    "int8":np.int8,
+}
+"""
+STORAGE_DTYPES: dict
+    Storage types of the chunks. The integer types are quantized: a score below half a quantization step (max absolute
+    score of the chunk / 32767 or 127) is stored as 0.
+"""
+
+COMPRESSIONS=("none", "zlib")
+"""
+COMPRESSIONS: tuple
+    Compressions of the chunks.
+"""
+
+def isChunkedResults(path:Union[str, os.PathLike])->bool:
+    """
+    Whether a file is a chunked results file (and not a `.npy` file).
+    """
+    with open(path, "rb") as inputFile:
+        return inputFile.read(len(MAGIC))==MAGIC
+
+def encodeChunk(chunk:np.ndarray, dtype:str="float32", compression:str="zlib", compressionLevel:int=1)->Tuple[bytes, float]:
+    """
+    Encode a chunk (seq, pos) of scores.
+
+    Parameters
+    ----------
+    chunk : np.ndarray
+        The scores.
+    dtype : str, optional
+        The storage type (see `STORAGE_DTYPES`), by default "float32".
+    compression : str, optional
+        The compression (see `COMPRESSIONS`), by default "zlib".
+    compressionLevel : int, optional
+        The zlib level, by default 1.
+
+    Returns
+    -------
+    Tuple[bytes, float]
+        The encoded chunk and its quantization scale (1 for the float types).
+    """
+    storageDtype=np.dtype(STORAGE_DTYPES[dtype])
+    scale=1.
+    if storageDtype.kind=="i":
+        maxAbs=float(np.max(np.abs(chunk))) if chunk.size>0 else 0.
+        scale=maxAbs/np.iinfo(storageDtype).max if maxAbs>0 else 1.
+        chunk=np.rint(chunk/scale)
+    buffer=np.ascontiguousarray(chunk, dtype=storageDtype.newbyteorder("<")).tobytes()
+    if compression=="zlib":
+        buffer=zlib.compress(buffer, compressionLevel)
+    return buffer, scale
+
+def decodeChunk(buffer:bytes, shape:Tuple[int, int], dtype:str="float32", compression:str="zlib", scale:float=1.)->np.ndarray:
+    """
+    Decode a chunk encoded by `encodeChunk` into a float32 array of shape `shape`.
+    """
+    if compression=="zlib":
+        buffer=zlib.decompress(buffer)
+    chunk=np.frombuffer(buffer, dtype=np.dtype(STORAGE_DTYPES[dtype]).newbyteorder("<")).reshape(shape)
+    if chunk.dtype.kind=="i":
+        return chunk.astype(np.float32)*np.float32(scale)
+    return chunk.astype(np.float32)
+
+def writeChunkedResults(
+    output:Union[str, os.PathLike, BinaryIO],
+    mnnResultsArray:np.ndarray,
+    chunkSize:int=10000,
+    dtype:str="float32",
+    compression:str="zlib",
+    compressionLevel:int=1
+)->None:
+    """
+    Write a results array in the chunked format. The file is written sequentially: `output` can be a pipe.
+
+    Parameters
+    ----------
+    output : PathLike or binary file
+        The output path or binary file.
+    mnnResultsArray : np.ndarray
+        The results array (module, seq, pos). It can be memory-mapped.
+    chunkSize : int, optional
+        The number of sequences by chunk, by default 10000.
+    dtype : str, optional
+        The storage type (see `STORAGE_DTYPES`), by default "float32".
+    compression : str, optional
+        The compression (see `COMPRESSIONS`), by default "zlib".
+    compressionLevel : int, optional
+        The zlib level, by default 1.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, "wb") as outputFile:
+            return writeChunkedResults(outputFile, mnnResultsArray, chunkSize=chunkSize, dtype=dtype, compression=compression, compressionLevel=compressionLevel)
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError("unknown storage type {}, expected one of {}".format(dtype, ", ".join(STORAGE_DTYPES)))
+    if compression not in COMPRESSIONS:
+        raise ValueError("unknown compression {}, expected one of {}".format(compression, ", ".join(COMPRESSIONS)))
+    nbModule, nbSeq, seqSize=np.shape(mnnResultsArray)
+    output.write(MAGIC)
+    offset=len(MAGIC)
+    chunkList=[]
+    for moduleId in range(nbModule):
+        for seqStart in range(0, nbSeq, chunkSize):
+            buffer, scale=encodeChunk(np.asarray(mnnResultsArray[moduleId, seqStart:seqStart+chunkSize]), dtype=dtype, compression=compression, compressionLevel=compressionLevel)
+            output.write(buffer)
+            chunkList.append([offset, len(buffer), scale])
+            offset+=len(buffer)
+    index=json.dumps({
+        "version":FORMAT_VERSION,
+        "shape":[nbModule, nbSeq, seqSize],
+        "chunkSize":chunkSize,
+        "dtype":dtype,
+        "compression":compression,
+        "chunks":chunkList,
+    }).encode()
+    output.write(index)
+    output.write(FOOTER.pack(len(index), MAGIC))
+
+class ChunkedResults:
+    """
+    Read a chunked results file. The scores are returned as float32 arrays, only the chunks covering the requested
+    modules and sequences are read.
+
+    It can be indexed like the results array: `results[moduleId]` (seq, pos), `results[:, seqStart:seqStop]`, ...,
+    and converted with `np.asarray` (reads everything).
+
+    Parameters
+    ----------
+    path : PathLike
+        The chunked results file.
+    """
+    def __init__(self, path:Union[str, os.PathLike]):
+        self.path=path
+        self._fd=os.open(path, os.O_RDONLY)
+        fileSize=os.fstat(self._fd).st_size
+        # the magic header and the footer, without the index
+        if fileSize<len(MAGIC)+FOOTER.size:
+            self.close()
+            raise ValueError("{} is not a chunked results file".format(path))
+        indexLength, magic=FOOTER.unpack(os.pread(self._fd, FOOTER.size, fileSize-FOOTER.size))
+        if magic!=MAGIC or os.pread(self._fd, len(MAGIC), 0)!=MAGIC or indexLength>fileSize-len(MAGIC)-FOOTER.size:
+            self.close()
+            raise ValueError("{} is not a chunked results file".format(path))
+        index=json.loads(os.pread(self._fd, indexLength, fileSize-FOOTER.size-indexLength))
+        if index["version"]!=FORMAT_VERSION:
+            self.close()
+            raise ValueError("{}: unsupported format version {}".format(path, index["version"]))
+        self.shape=tuple(index["shape"])
+        self.chunkSize=index["chunkSize"]
+        self.storageDtype=index["dtype"]
+        self.compression=index["compression"]
+        self._chunks=index["chunks"]
+        self.nbChunk=-(-self.shape[1]//self.chunkSize)
+
+    _fd=None # default of the instances, close and __del__ do nothing when os.open fails in __init__
+    dtype=np.dtype(np.float32)
+    ndim=3
+
+    def __len__(self)->int:
+        return self.shape[0]
+
+    def close(self)->None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd=None
+
+    def __enter__(self)->"ChunkedResults":
+        return self
+
+    def __exit__(self, *exc)->None:
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def readChunk(self, moduleId:int, chunkIdx:int)->np.ndarray:
+        """
+        Read the chunk `chunkIdx` of a module, float32 array (seq, pos).
+        """
+        offset, length, scale=self._chunks[moduleId*self.nbChunk+chunkIdx]
+        seqStart=chunkIdx*self.chunkSize
+        nbSeq=min(self.chunkSize, self.shape[1]-seqStart)
+        return decodeChunk(os.pread(self._fd, length, offset), (nbSeq, self.shape[2]), dtype=self.storageDtype, compression=self.compression, scale=scale)
+
+    def getSlice(self, moduleIds:Sequence[int], seqStart:int=0, seqStop:int=None)->np.ndarray:
+        """
+        Get the scores of some modules for the sequences [seqStart, seqStop[.
+
+        Parameters
+        ----------
+        moduleIds : Sequence[int]
+            The modules.
+        seqStart : int, optional
+            The first sequence, by default 0.
+        seqStop : int, optional
+            The sequence after the last one, by default None (the last sequence).
+
+        Returns
+        -------
+        np.ndarray
+            A float32 array (module, seq, pos).
+        """
+        seqStop=self.shape[1] if seqStop is None else min(seqStop, self.shape[1])
+        seqStop=max(seqStop, seqStart)
+        sliceArray=np.empty((len(moduleIds), seqStop-seqStart, self.shape[2]), dtype=np.float32)
+        if seqStop==seqStart:
+            return sliceArray
+        for i, moduleId in enumerate(moduleIds):
+            for chunkIdx in range(seqStart//self.chunkSize, (seqStop-1)//self.chunkSize+1):
+                chunkStart=chunkIdx*self.chunkSize
+                chunk=self.readChunk(moduleId, chunkIdx)
+                # part of the chunk in [seqStart, seqStop[
+                start, stop=max(seqStart, chunkStart), min(seqStop, chunkStart+len(chunk))
+                sliceArray[i, start-seqStart:stop-seqStart]=chunk[start-chunkStart:stop-chunkStart]
+        return sliceArray
+
+    def __getitem__(self, key)->np.ndarray:
+        key=key if isinstance(key, tuple) else (key,)
+        moduleKey=key[0] if len(key)>0 else slice(None)
+        seqKey=key[1] if len(key)>1 else slice(None)
+        moduleIds=np.arange(self.shape[0])[moduleKey]
+        if isinstance(seqKey, slice):
+            seqIds=np.arange(self.shape[1])[seqKey]
+            seqStart, seqStop=(int(seqIds.min()), int(seqIds.max())+1) if len(seqIds)>0 else (0, 0)
+            localSeqKey=seqIds-seqStart if seqKey.step not in (None, 1) else slice(None)
+        else :
+            seqIds=np.arange(self.shape[1])[seqKey]
+            seqStart, seqStop=(int(np.min(seqIds)), int(np.max(seqIds))+1) if np.size(seqIds)>0 else (0, 0)
+            localSeqKey=seqIds-seqStart
+        sliceArray=self.getSlice(np.atleast_1d(moduleIds), seqStart, seqStop)
+        return sliceArray[(0 if np.ndim(moduleIds)==0 else slice(None), localSeqKey, *key[2:])]
+
+    def __array__(self, dtype=None, copy=None)->np.ndarray:
+        array=self.getSlice(range(self.shape[0]))
+        return array if dtype is None else array.astype(dtype)
+
+def loadMnnResultsArray(path:Union[str, os.PathLike], mmap_mode:str=None)->Union[np.ndarray, ChunkedResults]:
+    """
+    Open a results array: a `ChunkedResults` for a chunked results file, else `np.load` of the `.npy` file.
+    """
+    if isChunkedResults(path):
+        return ChunkedResults(path)
+    return np.load(path, mmap_mode=mmap_mode)
+
+def addChunkArguments(parser:argparse.ArgumentParser)->None:
+    """
+    Add the options of the chunked format to a script writing results.
+    """
+    parser.add_argument("--chunkSize", type=int, default=None, help="Write the results in the chunked format (see chunkedResults.py) with CHUNKSIZE sequences by chunk. Default: .npy format")
+    parser.add_argument("--chunkDtype", type=str, default="float32", choices=list(STORAGE_DTYPES), help="Storage type of the chunks, int16 and int8 are quantized (default: float32).")
+    parser.add_argument("--chunkCompression", type=str, default="zlib", choices=COMPRESSIONS, help="Compression of the chunks (default: zlib).")
+
+def saveMnnResultsArray(output:Union[str, os.PathLike, BinaryIO], mnnResultsArray:np.ndarray, args:argparse.Namespace)->None:
+    """
+    Write a results array in the format given by the options of `addChunkArguments`.
+    """
+    if args.chunkSize is None:
+        np.save(output, mnnResultsArray)
+    else :
+        writeChunkedResults(output, mnnResultsArray, chunkSize=args.chunkSize, dtype=args.chunkDtype, compression=args.chunkCompression)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Convert a MNN results array between the .npy and the chunked formats.")
+    parser.add_argument("input", type=str, help="The input results array (.npy or chunked).")
+    parser.add_argument("output", type=str, help="The output results array.")
+    addChunkArguments(parser)
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("chunkedResults", args)
+    with profiler.phase("load results"):
+        mnnResultsArray=loadMnnResultsArray(args.input, mmap_mode="r")
+        if isinstance(mnnResultsArray, ChunkedResults) and args.chunkSize is None:
+            mnnResultsArray=np.asarray(mnnResultsArray)
+    with profiler.phase("save results"):
+        saveMnnResultsArray(args.output, mnnResultsArray, args)
+    profiler.addInputs(args.input)
+    profiler.addOutputs(args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
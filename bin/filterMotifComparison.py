@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+All-vs-all comparison of the convolution filters of the MNN modules of all the classes with the JASPAR motifs and with
+each other.
+
+The weights of each filter (`BlockNet.conv`, see `mnnPseudoModel.getFilterWeightList`) are turned into a normalized
+PWM by a softmax over the bases of each position. The similarity of two matrices is the mean similarity of their
+aligned columns, the best over all the offsets (with at least `minOverlap` aligned columns) and both orientations of the
+target:
+- "pearson": Pearson correlation of the columns;
+- "kl": opposite of the symmetric Kullback-Leibler divergence of the columns (nats, with a pseudocount).
+
+The column similarities of a batch of queries against all the targets are a single matrix product ((query, position) x
+(target, position)), the sum over each offset is a diagonal of it, so all the pairs and offsets are computed with a
+few batched tensor operations. The batches are sized by `maxElements`.
+
+Outputs:
+- the match table (TSV): for each filter, its `topN` best JASPAR motifs and its `topN` best filters of the other
+  classes, with the offset (start of the target relative to the start of the filter), the strand of the target and the
+  number of aligned columns;
+- the cluster table (TSV): the modules of all the classes grouped by single linkage, two filters are linked if their
+  similarity is >= `clusterMinSimilarity`, with the best JASPAR motif of each filter.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python filterMotifComparison.py jaspar.motif --model AC MNN_ranks_AC_params.npy MNN_ranks_AC_.pt --model AG MNN_ranks_AG_params.npy MNN_ranks_AG_.pt --metric pearson --topN 5 -o filterMotifMatches.tsv --clusters filterClusters.tsv
+
+import sys
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+torch=lazyImport.lazyModule("torch")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import pwm2homer
+import stageProfiler
+
+from typing import Dict, List, Sequence, Tuple
+
+METRICS=("pearson", "kl")
+"""
+METRICS: tuple
+    The column similarities: Pearson correlation or opposite of the symmetric Kullback-Leibler divergence.
+"""
+
+CLUSTER_MIN_SIMILARITY={"pearson":0.8, "kl":-0.5}
+"""
+CLUSTER_MIN_SIMILARITY: Dict[str, float]
+    Default min similarity of two linked filters in the clustering, by metric.
+"""
+
+MATCH_COLUMNS=["strClass", "moduleId", "targetKind", "target", "rank", "similarity", "offset", "strand", "overlap"]
+"""
+MATCH_COLUMNS: list
+    Columns of the match table. `targetKind` is "jaspar" or "filter" (the target is then "<strClass>:<moduleId>").
+"""
+
+CLUSTER_COLUMNS=["strClass", "moduleId", "filterLength", "cluster", "clusterSize", "clusterNbClass", "bestMotif", "bestMotifSimilarity"]
+"""
+CLUSTER_COLUMNS: list
+    Columns of the cluster table: one line by module, the clusters are numbered by decreasing size.
+"""
+
+def filterToPwm(filterWeight:npt.NDArray, temperature:float=1.)->npt.NDArray[np.float32]:
+    """
+    Turn the weights of a convolution filter, of shape (filterLength, 4), into a PWM (softmax over the bases).
+    """
+    logits=np.asarray(filterWeight, dtype=np.float64)/temperature
+    probs=np.exp(logits-np.max(logits, axis=1, keepdims=True))
+    return (probs/np.sum(probs, axis=1, keepdims=True)).astype(np.float32)
+
+def getPaddedPwmArray(pwmList:Sequence[npt.NDArray])->Tuple[npt.NDArray[np.float32], npt.NDArray[np.int64]]:
+    """
+    Stack PWMs of shape (length, 4) in an array of shape (nbPwm, maxLength, 4) padded with zeros, with their lengths.
+    """
+    lengths=np.array([len(pwm) for pwm in pwmList], dtype=np.int64)
+    pwmArray=np.zeros((len(pwmList), max(lengths, default=0), 4), dtype=np.float32)
+    for pwmIdx, pwm in enumerate(pwmList):
+        pwmArray[pwmIdx, :len(pwm)]=pwm
+    return pwmArray, lengths
+
+def getReverseComplementArray(pwmArray:npt.NDArray, lengths:npt.NDArray[np.integer])->npt.NDArray[np.float32]:
+    """
+    Get the reverse complements of padded PWMs (ACGT -> TGCA), still aligned on the first position.
+    """
+    reverseArray=np.zeros_like(pwmArray)
+    for pwmIdx, length in enumerate(lengths):
+        reverseArray[pwmIdx, :length]=pwmArray[pwmIdx, :length][::-1, ::-1]
+    return reverseArray
+
+def getColumnFeatures(
+    pwmArray:npt.NDArray,
+    lengths:npt.NDArray[np.integer],
+    metric:str="pearson",
+    pseudocount:float=0.01
+)->Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.bool_]]:
+    """
+    Get the features of the columns of padded PWMs: the similarity of a query column and a target column is the dot
+    product of the query features and of the target features plus the bias of each column.
+
+    Returns
+    -------
+    Tuple[NDArray, NDArray, NDArray, NDArray]
+        The query features and the target features, of shape (nbPwm, maxLength, nbFeature), the bias of each column
+        and the mask of the real columns, of shape (nbPwm, maxLength).
+    """
+    mask=np.arange(pwmArray.shape[1])[None, :]<np.asarray(lengths)[:, None]
+    if metric=="pearson":
+        # centered and scaled columns : the dot product is the correlation, a uniform column correlates with nothing
+        centered=pwmArray-0.25
+        norms=np.linalg.norm(centered, axis=-1, keepdims=True)
+        features=np.divide(centered, norms, out=np.zeros_like(centered), where=norms>0)*mask[..., None]
+        return features.astype(np.float32), features.astype(np.float32), np.zeros(mask.shape, dtype=np.float32), mask
+    if metric=="kl":
+        # -(KL(p|q)+KL(q|p)) = p.log(q) + log(p).q - p.log(p) - q.log(q)
+        probs=(pwmArray+pseudocount)/(1+4*pseudocount)
+        logProbs=np.log(probs)
+        queryFeatures=np.concatenate([probs, logProbs], axis=-1)*mask[..., None]
+        targetFeatures=np.concatenate([logProbs, probs], axis=-1)*mask[..., None]
+        bias=-np.sum(probs*logProbs, axis=-1)*mask
+        return queryFeatures.astype(np.float32), targetFeatures.astype(np.float32), bias.astype(np.float32), mask
+    raise ValueError("unknown metric : {} (expected one of {})".format(metric, ", ".join(METRICS)))
+
+def compareMotifs(
+    queryPwmList:Sequence[npt.NDArray],
+    targetPwmList:Sequence[npt.NDArray],
+    metric:str="pearson",
+    minOverlap:int=5,
+    maxElements:int=1<<25
+)->Dict[str, npt.NDArray]:
+    """
+    Compare all the query PWMs with all the target PWMs, over all the offsets and both orientations of the targets.
+
+    Parameters
+    ----------
+    queryPwmList : Sequence[NDArray]
+        The query PWMs, of shape (length, 4) (ACGT).
+    targetPwmList : Sequence[NDArray]
+        The target PWMs, of shape (length, 4) (ACGT).
+    metric : str, optional
+        The column similarity, "pearson" or "kl", by default "pearson".
+    minOverlap : int, optional
+        The min number of aligned columns, by default 5 (or the length of the shortest PWM of the pair).
+    maxElements : int, optional
+        The max number of column similarities computed at once, by default 2^25.
+
+    Returns
+    -------
+    Dict[str, NDArray]
+        "similarity" (mean similarity of the aligned columns), "offset" (start of the target relative to the start of
+        the query), "isReverse" (best on the reverse complement of the target) and "overlap" (number of aligned
+        columns), of shape (nbQuery, nbTarget).
+    """
+    queryArray, queryLengths=getPaddedPwmArray(queryPwmList)
+    targetArray, targetLengths=getPaddedPwmArray(targetPwmList)
+    nbQuery, nbTarget=len(queryLengths), len(targetLengths)
+    # both orientations of the targets
+    targetArray=np.concatenate([targetArray, getReverseComplementArray(targetArray, targetLengths)])
+    targetLengths=np.concatenate([targetLengths, targetLengths])
+    queryFeatures, _, queryBias, queryMask=getColumnFeatures(queryArray, queryLengths, metric=metric)
+    _, targetFeatures, targetBias, targetMask=getColumnFeatures(targetArray, targetLengths, metric=metric)
+    queryLength, targetLength, nbFeature=queryArray.shape[1], targetArray.shape[1], queryFeatures.shape[-1]
+    targetFeatureMatrix=torch.from_numpy(targetFeatures.reshape(-1, nbFeature)).T
+    targetBias=torch.from_numpy(targetBias)[None, :, None, :]
+    targetMask=torch.from_numpy(targetMask)[None, :, None, :]
+    targetLengthTensor=torch.from_numpy(targetLengths)[None, :]
+    similarity=np.empty((nbQuery, 2*nbTarget), dtype=np.float32)
+    offsets=np.empty((nbQuery, 2*nbTarget), dtype=np.int64)
+    overlaps=np.empty((nbQuery, 2*nbTarget), dtype=np.int64)
+    batchSize=max(1, maxElements//max(2*nbTarget*queryLength*targetLength, 1))
+    with torch.no_grad():
+        for queryStart in range(0, nbQuery, batchSize):
+            batch=slice(queryStart, queryStart+batchSize)
+            batchQueryFeatures=torch.from_numpy(queryFeatures[batch])
+            nbBatchQuery=len(batchQueryFeatures)
+            # column similarities : (query, target, query position, target position)
+            columnSimilarity=(batchQueryFeatures.reshape(-1, nbFeature)@targetFeatureMatrix).reshape(nbBatchQuery, queryLength, 2*nbTarget, targetLength).permute(0, 2, 1, 3)
+            columnSimilarity=(columnSimilarity+torch.from_numpy(queryBias[batch])[:, None, :, None]+targetBias)*(torch.from_numpy(queryMask[batch])[:, None, :, None]&targetMask)
+            batchQueryLengths=torch.from_numpy(queryLengths[batch])[:, None]
+            minPairOverlap=torch.minimum(torch.minimum(batchQueryLengths, targetLengthTensor), torch.tensor(minOverlap))
+            bestSimilarity=torch.full((nbBatchQuery, 2*nbTarget), -np.inf)
+            bestOffset=torch.zeros((nbBatchQuery, 2*nbTarget), dtype=torch.int64)
+            bestOverlap=torch.zeros((nbBatchQuery, 2*nbTarget), dtype=torch.int64)
+            for offset in range(-(queryLength-1), targetLength):
+                # the aligned columns (target position = query position + offset) are a diagonal
+                diagonalSum=torch.diagonal(columnSimilarity, offset=offset, dim1=2, dim2=3).sum(-1)
+                overlap=torch.minimum(batchQueryLengths, targetLengthTensor-offset)-max(0, -offset)
+                offsetSimilarity=torch.where(overlap>=minPairOverlap, diagonalSum/overlap.clamp(min=1), torch.tensor(-np.inf))
+                isBetter=offsetSimilarity>bestSimilarity
+                bestSimilarity=torch.where(isBetter, offsetSimilarity, bestSimilarity)
+                # the start of the target relative to the start of the query
+                bestOffset=torch.where(isBetter, torch.tensor(-offset), bestOffset)
+                bestOverlap=torch.where(isBetter, overlap, bestOverlap)
+            similarity[batch]=bestSimilarity.numpy()
+            offsets[batch]=bestOffset.numpy()
+            overlaps[batch]=bestOverlap.numpy()
+    isReverse=similarity[:, nbTarget:]>similarity[:, :nbTarget]
+    return {
+        "similarity":np.where(isReverse, similarity[:, nbTarget:], similarity[:, :nbTarget]),
+        "offset":np.where(isReverse, offsets[:, nbTarget:], offsets[:, :nbTarget]),
+        "isReverse":isReverse,
+        "overlap":np.where(isReverse, overlaps[:, nbTarget:], overlaps[:, :nbTarget]),
+    }
+
+def clusterFilters(similarity:npt.NDArray, minSimilarity:float)->npt.NDArray[np.int64]:
+    """
+    Cluster the filters by single linkage: the clusters are the connected components of the graph linking two filters
+    with a similarity >= `minSimilarity` (symmetrized by the max).
+
+    Returns
+    -------
+    NDArray[np.int64]
+        The cluster of each filter, numbered by decreasing size.
+    """
+    nbFilter=len(similarity)
+    adjacency=np.maximum(similarity, similarity.T)>=minSimilarity
+    np.fill_diagonal(adjacency, True)
+    labels=np.arange(nbFilter)
+    # propagate the smallest label of the neighbours until it is stable
+    while True:
+        newLabels=np.min(np.where(adjacency, labels[None, :], nbFilter), axis=1)
+        newLabels=newLabels[newLabels]
+        if np.array_equal(newLabels, labels):
+            break
+        labels=newLabels
+    _, clusterIdx, clusterSizes=np.unique(labels, return_inverse=True, return_counts=True)
+    rank=np.empty(len(clusterSizes), dtype=np.int64)
+    rank[np.argsort(-clusterSizes, kind="stable")]=np.arange(len(clusterSizes))
+    return rank[clusterIdx]
+
+def getMatchDf(
+    filterDf:pd.DataFrame,
+    comparison:Dict[str, npt.NDArray],
+    targetNames:Sequence[str],
+    targetKind:str,
+    topN:int=5,
+    excludedMask:npt.NDArray[np.bool_]=None
+)->pd.DataFrame:
+    """
+    Get the `topN` best targets of each filter (see `MATCH_COLUMNS`).
+
+    Parameters
+    ----------
+    filterDf : pd.DataFrame
+        The filters (columns "strClass" and "moduleId").
+    comparison : Dict[str, NDArray]
+        The comparison of the filters with the targets (see `compareMotifs`).
+    targetNames : Sequence[str]
+        The target names.
+    targetKind : str
+        The kind of the targets ("jaspar" or "filter").
+    topN : int, optional
+        The number of targets by filter, by default 5.
+    excludedMask : NDArray[np.bool_], optional
+        The (filter, target) pairs not reported, by default None.
+    """
+    similarity=comparison["similarity"] if excludedMask is None else np.where(excludedMask, -np.inf, comparison["similarity"])
+    nbTop=min(topN, similarity.shape[1])
+    topIdx=np.argsort(-similarity, axis=1, kind="stable")[:, :nbTop]
+    filterIdx=np.repeat(np.arange(len(similarity)), nbTop)
+    targetIdx=topIdx.ravel()
+    matchDf=pd.DataFrame(dict(
+        strClass=filterDf["strClass"].to_numpy()[filterIdx],
+        moduleId=filterDf["moduleId"].to_numpy()[filterIdx],
+        targetKind=targetKind,
+        target=np.asarray(targetNames, dtype=object)[targetIdx],
+        rank=np.tile(np.arange(1, nbTop+1), len(similarity)),
+        similarity=similarity[filterIdx, targetIdx],
+        offset=comparison["offset"][filterIdx, targetIdx],
+        strand=np.where(comparison["isReverse"][filterIdx, targetIdx], "-", "+"),
+        overlap=comparison["overlap"][filterIdx, targetIdx]
+    ), columns=MATCH_COLUMNS)
+    # less than topN possible targets
+    return matchDf[np.isfinite(matchDf["similarity"])]
+
+def loadFilterDf(modelList:Sequence[Tuple[str, str, str]], temperature:float=1.)->Tuple[pd.DataFrame, List[npt.NDArray]]:
+    """
+    Load the filters of the modules of the MNN models of the classes.
+
+    Parameters
+    ----------
+    modelList : Sequence[Tuple[str, str, str]]
+        The class, the hyperparameters path and the parameters path of each model.
+    temperature : float, optional
+        The temperature of the softmax of the weights, by default 1.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, List[NDArray]]
+        The filters (columns "strClass", "moduleId", "filterLength") and their PWM.
+    """
+    rowList=[]
+    pwmList=[]
+    for strClass, hParamsPath, paramsPath in modelList:
+        blockList=mnnPseudoModel.getBlockList(mnnPseudoModel.load_model(hParamsPath, paramsPath))
+        for moduleId, filterWeight in enumerate(mnnPseudoModel.getFilterWeightList(blockList)):
+            rowList.append(dict(strClass=strClass, moduleId=moduleId, filterLength=len(filterWeight)))
+            pwmList.append(filterToPwm(filterWeight, temperature=temperature))
+    return pd.DataFrame(rowList, columns=["strClass", "moduleId", "filterLength"]), pwmList
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compare the convolution filters of the modules of all the classes with the JASPAR motifs and with each other, and cluster the modules.")
+    parser.add_argument("motifs", type=str, help="The motifs in the Homer format (pwm2homer.py).")
+    parser.add_argument("--model", type=str, nargs=3, action="append", required=True, metavar=("STR_CLASS", "HPARAMS", "PARAMS"), help="The class and the hyperparameters and parameters paths of a MNN model (repeated for each class).")
+    parser.add_argument("--metric", type=str, default="pearson", choices=METRICS, help="Column similarity (default: pearson).")
+    parser.add_argument("--minOverlap", type=int, default=5, help="Min number of aligned columns, or the length of the shortest matrix (default: 5).")
+    parser.add_argument("--temperature", type=float, default=1., help="Temperature of the softmax turning the filter weights into PWMs (default: 1).")
+    parser.add_argument("--topN", type=int, default=5, help="Number of JASPAR motifs and of filters reported by filter (default: 5).")
+    parser.add_argument("--clusterMinSimilarity", type=float, default=None, help="Min similarity of two linked filters in the clustering (default: {}).".format(", ".join("{} for {}".format(value, metric) for metric, value in CLUSTER_MIN_SIMILARITY.items())))
+    parser.add_argument("--maxElements", type=int, default=1<<25, help="Max number of column similarities computed at once (default: 2^25).")
+    parser.add_argument("-o", "--output", type=str, default="filterMotifMatches.tsv", help="Match table (default: filterMotifMatches.tsv).")
+    parser.add_argument("--clusters", type=str, default="filterClusters.tsv", help="Cluster table (default: filterClusters.tsv).")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("filterMotifComparison", args)
+    clusterMinSimilarity=CLUSTER_MIN_SIMILARITY[args.metric] if args.clusterMinSimilarity is None else args.clusterMinSimilarity
+    with profiler.phase("load"):
+        filterDf, filterPwmList=loadFilterDf(args.model, temperature=args.temperature)
+        with open(args.motifs) as motifFile:
+            motifNames, motifPwmList, _=pwm2homer.readHomerMotifFile(motifFile)
+    filterNames=["{}:{}".format(strClass, moduleId) for strClass, moduleId in zip(filterDf["strClass"], filterDf["moduleId"])]
+    with profiler.phase("comparison"):
+        # a single pass against the motifs and the filters
+        comparison=compareMotifs(filterPwmList, list(motifPwmList)+filterPwmList, metric=args.metric, minOverlap=args.minOverlap, maxElements=args.maxElements)
+        motifComparison={key:value[:, :len(motifPwmList)] for key, value in comparison.items()}
+        filterComparison={key:value[:, len(motifPwmList):] for key, value in comparison.items()}
+    with profiler.phase("matches and clusters"):
+        strClassArray=filterDf["strClass"].to_numpy()
+        matchDf=pd.concat([
+            getMatchDf(filterDf, motifComparison, motifNames, "jaspar", topN=args.topN),
+            getMatchDf(filterDf, filterComparison, filterNames, "filter", topN=args.topN, excludedMask=strClassArray[:, None]==strClassArray[None, :]),
+        ]).sort_values(["strClass", "moduleId", "targetKind", "rank"], kind="stable")
+        clusterDf=filterDf.copy()
+        clusterDf["cluster"]=clusterFilters(filterComparison["similarity"], clusterMinSimilarity)
+        clusterDf["clusterSize"]=clusterDf.groupby("cluster")["moduleId"].transform("size")
+        clusterDf["clusterNbClass"]=clusterDf.groupby("cluster")["strClass"].transform("nunique")
+        if len(motifNames)>0:
+            bestMotifIdx=np.argmax(motifComparison["similarity"], axis=1)
+            clusterDf["bestMotif"]=np.asarray(motifNames, dtype=object)[bestMotifIdx]
+            clusterDf["bestMotifSimilarity"]=motifComparison["similarity"][np.arange(len(clusterDf)), bestMotifIdx]
+        clusterDf=clusterDf.reindex(columns=CLUSTER_COLUMNS).sort_values(["cluster", "strClass", "moduleId"], kind="stable")
+    matchDf.to_csv(args.output, sep="\t", index=False)
+    clusterDf.to_csv(args.clusters, sep="\t", index=False)
+    print("{} filters of {} classes, {} motifs, {} clusters".format(len(filterDf), filterDf["strClass"].nunique(), len(motifNames), clusterDf["cluster"].nunique()), file=sys.stderr)
+    profiler.addInputs(args.motifs, *[path for _, hParamsPath, paramsPath in args.model for path in (hParamsPath, paramsPath)])
+    profiler.addOutputs(args.output, args.clusters)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@
 """
 Filter sequenceNames file (hg38all_names_raw.npy) and oneHot sequences file (hg38all_seqs_raw.npy) to keep only the sequences sequences for a given STR class.
 
+The filter has no incremental mode (see `getMnnResults.py --incrementalStore`): the sequences are already one-hot
+encoded in hg38all_seqs_raw.npy, so the filter encodes nothing and only reads the rows of the class (memory-mapped).
+Its cost is the parsing of merged_results.txt and this read, which a store of the previous rows would not save.
+
 Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 08/02/2024
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '08/02/2024'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -16,8 +22,11 @@ __version__ = "0.0.1"
 
 import argparse
 import numpy as np
-import pandas as pd
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
 from miscFct import splitEStrHeader, rcDnaSeq
+import seqNameDict
+import stageProfiler
 
 def filterSeqNames(
     seqNamesArray:np.ndarray,
@@ -47,6 +56,32 @@ def filterSeqNames(
     )
     return np.unique(seqNamesArray[strClassMask])
 
+def filterSeqIds(
+    seqIdsArray:np.ndarray,
+    strClass:str,
+    seqNameDictionary:seqNameDict.SeqNameDict
+)->np.ndarray:
+    """
+    Filter sequence IDs to keep only the sequences of a given STR class, with the canonical classes of the dictionary
+    (same rule as `filterSeqNames`, the headers are not parsed again).
+
+    Parameters
+    ----------
+    seqIdsArray : np.ndarray
+        The sequence IDs array.
+    strClass : str
+        The STR class sequence of the STR class to keep.
+    seqNameDictionary : seqNameDict.SeqNameDict
+        The dictionary of the sequence names.
+
+    Returns
+    -------
+    np.ndarray
+        The filtered sequence IDs array.
+
+    """
+    return np.unique(seqIdsArray[seqNameDictionary.getClassMask(strClass, seqIdsArray)])
+
 def getSeqNamesArray(mergedResultsFilePath:str)->np.ndarray:
     """
     Get the sequence names array from the merged results file.
@@ -112,6 +147,30 @@ def filterSeqNamesAndOneHotSeqArray(allSeqNamesArray:np.ndarray, allOneHotSeqArr
     mask = getStrMask(allSeqNamesArray, strSeqNames)
     return allSeqNamesArray[mask], allOneHotSeqArray[mask]
 
+def filterSeqIdsAndOneHotSeqArray(allSeqIdsArray:np.ndarray, allOneHotSeqArray:np.ndarray, strSeqIds:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+    """
+    Filter sequence IDs and oneHotSeq file to keep only the sequences of a given STR class (see
+    `filterSeqNamesAndOneHotSeqArray`).
+
+    Parameters
+    ----------
+    allSeqIdsArray : np.ndarray
+        The sequence IDs array for all STR classes.
+    allOneHotSeqArray : np.ndarray
+        The oneHotSeq array for all STR classes.
+    strSeqIds : np.ndarray
+        The sequence IDs array for the STR class.
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray)
+        The filtered sequence IDs array and the filtered oneHotSeq array.
+
+    """
+    # np.isin sorts the integer IDs, no python set is needed
+    mask = np.isin(allSeqIdsArray, strSeqIds)
+    return allSeqIdsArray[mask].astype(seqNameDict.SEQ_ID_DTYPE), allOneHotSeqArray[mask]
+
 def main():
     #parse arguments
     parser=argparse.ArgumentParser(description="Filter sequenceNames file to keep only the sequences for a given STR class.")
@@ -121,24 +180,49 @@ def main():
     parser.add_argument("--strClass", type=str, default=None, help="The STR class sequence to keep. If not provided, the script will keep all STR sequences that are in the mergedResults file.")
     parser.add_argument("outputSeqNamesFilePath", type=str, help="Path to the output sequenceNames file.")
     parser.add_argument("outputOneHotSeqFilePath", type=str, help="Path to the output oneHotSeq file.")
+    parser.add_argument("--seqNameDict", type=str, default=None, help="Path to the dictionary of the sequence names (see seqNameDict.py). If provided, the classes are read from the dictionary and the output sequenceNames file holds int32 sequence IDs. The input sequenceNames file can hold names or IDs.")
+    stageProfiler.addProfileArguments(parser)
     args=parser.parse_args()
+    profiler=stageProfiler.StageProfiler.fromArgs("filterSeqNameAndOneHotSeq", args)
 
     # get the sequence names array for all STR classes
     #load data
-    mergedResultsSeqNamesArray=getSeqNamesArray(args.mergedResultsFilePath)
+    with profiler.phase("load merged results"):
+        mergedResultsSeqNamesArray=getSeqNamesArray(args.mergedResultsFilePath)
     #filter data
-    if args.strClass is None:
-        unSortedUniqStrSeqNames=mergedResultsSeqNamesArray
-    else:
-        unSortedUniqStrSeqNames=filterSeqNames(mergedResultsSeqNamesArray, args.strClass)
+    if args.seqNameDict is not None:
+        with profiler.phase("load names dictionary"):
+            seqNameDictionary=seqNameDict.SeqNameDict.load(args.seqNameDict)
+            mergedResultsSeqIdsArray=seqNameDictionary.getIds(mergedResultsSeqNamesArray)
+            # the names of merged_results.txt without sequence are dropped, as with the names
+            mergedResultsSeqIdsArray=mergedResultsSeqIdsArray[mergedResultsSeqIdsArray>=0]
+    with profiler.phase("filter STR class names"):
+        if args.seqNameDict is not None:
+            unSortedUniqStrSeqNames=mergedResultsSeqIdsArray if args.strClass is None else filterSeqIds(mergedResultsSeqIdsArray, args.strClass, seqNameDictionary)
+        elif args.strClass is None:
+            unSortedUniqStrSeqNames=mergedResultsSeqNamesArray
+        else:
+            unSortedUniqStrSeqNames=filterSeqNames(mergedResultsSeqNamesArray, args.strClass)
     # get the seqNamesArray and oneHotSeqArray for the STR class
-    allSeqNamesArray=np.load(args.allSeqNamesFilePath)
-    allOneHotSeqArray=np.load(args.allOneHotSeqFilePath)
+    with profiler.phase("load names"):
+        allSeqNamesArray=np.load(args.allSeqNamesFilePath)
+        if args.seqNameDict is not None and not seqNameDict.isSeqIdArray(allSeqNamesArray):
+            allSeqNamesArray=seqNameDictionary.getIds(allSeqNamesArray)
+    # memory-mapped: only the one-hot sequences which are kept are read
+    allOneHotSeqArray=np.load(args.allOneHotSeqFilePath, mmap_mode="r")
     #filter data
-    seqNamesArray, oneHotSeqArray = filterSeqNamesAndOneHotSeqArray(allSeqNamesArray, allOneHotSeqArray, unSortedUniqStrSeqNames)
+    with profiler.phase("load one-hot"):
+        if args.seqNameDict is not None:
+            seqNamesArray, oneHotSeqArray = filterSeqIdsAndOneHotSeqArray(allSeqNamesArray, allOneHotSeqArray, unSortedUniqStrSeqNames)
+        else:
+            seqNamesArray, oneHotSeqArray = filterSeqNamesAndOneHotSeqArray(allSeqNamesArray, allOneHotSeqArray, unSortedUniqStrSeqNames)
     #save data
-    np.save(args.outputSeqNamesFilePath, seqNamesArray)
-    np.save(args.outputOneHotSeqFilePath, oneHotSeqArray)
+    with profiler.phase("save"):
+        np.save(args.outputSeqNamesFilePath, seqNamesArray)
+        np.save(args.outputOneHotSeqFilePath, oneHotSeqArray)
+    profiler.addInputs(args.allSeqNamesFilePath, args.allOneHotSeqFilePath, args.mergedResultsFilePath, args.seqNameDict)
+    profiler.addOutputs(args.outputSeqNamesFilePath, args.outputOneHotSeqFilePath)
+    profiler.write()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compute the position frequency matrix (PFM) of the hits of each module of a MNN model and write one PFM file by module.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python getMnnHitPfm.py mnnResultsArray.npy strClass_oneHotSeqs.npy mnnHParams mnnParams --outputDir . --weightByScore
+
+import argparse
+import pathlib
+
+import numpy as np
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import chunkedResults
+import stageProfiler
+
+ALPHABET=("A", "C", "G", "T")
+"""
+ALPHABET: tuple
+    Order of the bases in the one-hot encoded sequences and in the PFM columns.
+"""
+
+def writePfm(pfm:np.ndarray, outputPath:pathlib.Path, name:str=None)->None:
+    """
+    Write a PFM in the JASPAR "pfm-four-columns" format (one row by position, columns A, C, G, T).
+
+    Parameters
+    ----------
+    pfm : np.ndarray
+        The PFM, 2D array (pos, alphabet).
+    outputPath : pathlib.Path
+        The output file path.
+    name : str, optional
+        The name of the matrix, written in a '>' header line, by default None (no header).
+    """
+    with open(outputPath, "w") as outputFile:
+        if name is not None:
+            outputFile.write(">{}\n".format(name))
+        pd.DataFrame(pfm).to_csv(outputFile, header=None, index=None, sep="\t")
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compute the position frequency matrix of the hits (score > 0) of each module.")
+    parser.add_argument("mnnResultsArray", type=pathlib.Path, help="Path to the .npy or chunked file (see chunkedResults.py) containing the MNN results array.")
+    parser.add_argument("oneHotSeqs", type=pathlib.Path, help="Path to the .npy file containing the one-hot encoded sequences (same order as the results).")
+    parser.add_argument("modelHParam", type=pathlib.Path, help="path to hyper-parameters of the MNN model")
+    parser.add_argument("modelParam", type=pathlib.Path, help="path to parameters of the MNN model")
+    parser.add_argument("--outputDir", type=pathlib.Path, default=pathlib.Path.cwd(), help="Output directory. The PFM of a module is written in '<outputDir>/<moduleId>/<fileName>'.")
+    parser.add_argument("--fileName", type=str, default="mnnHitPfm.txt", help="Name of the PFM files (default: mnnHitPfm.txt).")
+    parser.add_argument("--weightByScore", action="store_true", help="Weight each hit by its score.")
+    parser.add_argument("--seqChunkSize", type=int, default=10000, help="Number of sequences read at once (default: 10000).")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("getMnnHitPfm", args)
+    # the results are read by chunks of sequences
+    mnnResultsArray=chunkedResults.loadMnnResultsArray(args.mnnResultsArray, mmap_mode="r")
+    with profiler.phase("load one-hot"):
+        baseIdxSeqs=mnnProcess.getOneHotBaseIdx(np.load(args.oneHotSeqs))
+    with profiler.phase("load model"):
+        model = mnnPseudoModel.load_model(args.modelHParam, args.modelParam)
+        filterLengthList = mnnPseudoModel.getFilterLengthList(mnnPseudoModel.getBlockList(model))
+        del model
+    with profiler.phase("accumulate PFM"):
+        pfmCounts=mnnProcess.getMnnHitPfmArray(
+            mnnResultsArray,
+            baseIdxSeqs,
+            filterLengthList,
+            weightByScore=args.weightByScore,
+            seqChunkSize=args.seqChunkSize,
+            alphabetSize=len(ALPHABET)
+        )
+    with profiler.phase("write"):
+        for moduleId, filterLength in enumerate(filterLengthList):
+            moduleDir=args.outputDir / str(moduleId)
+            moduleDir.mkdir(parents=True, exist_ok=True)
+            writePfm(pfmCounts[moduleId, :filterLength], moduleDir / args.fileName, name="module_{}".format(moduleId))
+    profiler.addInputs(args.mnnResultsArray, args.oneHotSeqs, args.modelHParam, args.modelParam)
+    profiler.addOutputs(*[args.outputDir / str(moduleId) / args.fileName for moduleId in range(len(filterLengthList))])
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
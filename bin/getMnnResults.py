@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 07/04/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '07/04/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -15,14 +17,24 @@ __status__ = 'Prototype'
 __version__ = "0.0.1"
 
 import os
+import sys
 import argparse
-import mnnProcess
-import mnnPseudoModel
+import uuid
+import shutil
+import hashlib
+import lazyImport
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+mnnScoreMatrix=lazyImport.lazyModule("mnnScoreMatrix")
+import chunkedResults
+import seqNameDict
+import resultCache
+import stageProfiler
 
 import numpy.typing as npt
 from typing import Union
 import numpy as np
-import pandas as pd
+pd=lazyImport.lazyModule("pandas")
 
 def loadData(
     oneHotSeqFilePath:os.PathLike,
@@ -100,7 +112,234 @@ def getMnnResults(
     mnnResultsArray, mnnMaxResultsArray=mnnProcess.getBlocksResultsArray(blockList, oneHotSeqs, filterLengthList)
     return mnnResultsArray, mnnMaxResultsArray
 
+INCREMENTAL_RUN_FILE="run.txt"
+"""
+INCREMENTAL_RUN_FILE: str
+    Name of the file holding the id of the current run of an incremental store. The files of a run are only read
+    through it: replacing it (a single rename) commits the run.
+"""
+
+INCREMENTAL_SEQ_NAMES_FILE="seqNames.{runId}.npy"
+"""
+INCREMENTAL_SEQ_NAMES_FILE: str
+    Name of the file of the sequence names of a run in an incremental store.
+"""
+
+INCREMENTAL_RESULTS_FILE="mnnResultsArray.{runId}.npy"
+"""
+INCREMENTAL_RESULTS_FILE: str
+    Name of the file of the MNN results (same order as the sequence names) of a run in an incremental store.
+"""
+
+def getModelChecksum(
+    hParamsPath:os.PathLike,
+    paramsPath:os.PathLike,
+    bufferSize:int=1<<20
+)->str:
+    """
+    Get the checksum (sha256) of the files of a MNN model.
+
+    Parameters
+    ----------
+    hParamsPath : PathLike
+        Path to the file containing the hyperparameters of the MNN model.
+    paramsPath : PathLike
+        Path to the file containing the parameters of the MNN model.
+    bufferSize : int, optional
+        Size of the blocks read, by default 1 MiB.
+
+    Returns
+    -------
+    str
+        The hexadecimal checksum.
+    """
+    checksum=hashlib.sha256()
+    for path in (hParamsPath, paramsPath):
+        with open(path, "rb") as modelFile:
+            for buffer in iter(lambda: modelFile.read(bufferSize), b""):
+                checksum.update(buffer)
+    return checksum.hexdigest()
+
+def loadIncrementalStore(
+    storeDir:os.PathLike,
+    seqSize:int
+)->tuple[Union[None, npt.NDArray[np.str_]], Union[None, npt.NDArray[np.floating]]]:
+    """
+    Load the sequence names and the (memory-mapped) MNN results of the current run of an incremental store.
 
+    Parameters
+    ----------
+    storeDir : PathLike
+        The store directory of a model (see `getModelChecksum`).
+    seqSize : int
+        The size of the sequences. A store of another size is missing (the model checksum does not cover it).
+
+    Returns
+    -------
+    Tuple[NDArray[np.str_], NDArray[np.floating]]
+        The stored sequence names and results array, (None, None) if the store is missing or inconsistent.
+    """
+    try:
+        with open(os.path.join(storeDir, INCREMENTAL_RUN_FILE)) as runFile:
+            runId=runFile.read().strip()
+    except FileNotFoundError:
+        return None, None
+    seqNamesPath=os.path.join(storeDir, INCREMENTAL_SEQ_NAMES_FILE.format(runId=runId))
+    resultsPath=os.path.join(storeDir, INCREMENTAL_RESULTS_FILE.format(runId=runId))
+    if not (os.path.isfile(seqNamesPath) and os.path.isfile(resultsPath)):
+        return None, None
+    storedSeqNames=np.load(seqNamesPath)
+    storedResultsArray=np.load(resultsPath, mmap_mode="r")
+    if storedResultsArray.ndim!=3 or storedResultsArray.shape[1]!=len(storedSeqNames) or storedResultsArray.shape[2]!=seqSize:
+        return None, None
+    return storedSeqNames, storedResultsArray
+
+def saveIncrementalStore(
+    storeDir:os.PathLike,
+    seqNames:npt.NDArray[np.str_],
+    mnnResultsArray:npt.NDArray[np.floating]
+)->None:
+    """
+    Replace the content of an incremental store. The sequence names and the results are written in the files of a new
+    run, which is then made current by renaming a single file (`INCREMENTAL_RUN_FILE`): an interrupted update leaves
+    the previous run current, never the names of a run with the results of another. The files of the other runs are
+    then deleted.
+
+    Parameters
+    ----------
+    storeDir : PathLike
+        The store directory of a model.
+    seqNames : NDArray[np.str_]
+        The sequence names.
+    mnnResultsArray : NDArray[np.floating]
+        The MNN results array of shape (nbBlock, nbSeq, seqSize), in the order of `seqNames`.
+    """
+    os.makedirs(storeDir, exist_ok=True)
+    runId=uuid.uuid4().hex
+    runFileNames={INCREMENTAL_RESULTS_FILE.format(runId=runId), INCREMENTAL_SEQ_NAMES_FILE.format(runId=runId), INCREMENTAL_RUN_FILE}
+    for fileName, array in ((INCREMENTAL_RESULTS_FILE, mnnResultsArray), (INCREMENTAL_SEQ_NAMES_FILE, seqNames)):
+        with open(os.path.join(storeDir, fileName.format(runId=runId)), "wb") as runFile:
+            np.save(runFile, array)
+    runPath=os.path.join(storeDir, INCREMENTAL_RUN_FILE)
+    tmpRunPath="{}.{}.tmp".format(runPath, runId)
+    with open(tmpRunPath, "w") as tmpRunFile:
+        tmpRunFile.write(runId+"\n")
+    os.replace(tmpRunPath, runPath)
+    # files of the previous runs and of the interrupted updates
+    storePrefixes=tuple(fileName.split("{")[0] for fileName in (INCREMENTAL_RESULTS_FILE, INCREMENTAL_SEQ_NAMES_FILE, INCREMENTAL_RUN_FILE))
+    for fileName in os.listdir(storeDir):
+        if fileName.startswith(storePrefixes) and fileName not in runFileNames:
+            os.remove(os.path.join(storeDir, fileName))
+
+def getIncrementalMnnResults(
+    seqNames:npt.NDArray[np.str_],
+    oneHotSeqs:npt.NDArray[np.integer],
+    mnnModel:mnnPseudoModel.Net,
+    storedSeqNames:Union[None, npt.NDArray[np.str_]]=None,
+    storedResultsArray:Union[None, npt.NDArray[np.floating]]=None
+)->tuple[npt.NDArray[np.floating], npt.NDArray[np.floating], int]:
+    """
+    Get the MNN results of the sequences, reusing the stored results of the sequences already computed with the same
+    model. Only the new sequences go through the model; the stored sequences which are not in `seqNames` are dropped.
+
+    Parameters
+    ----------
+    seqNames : NDArray[np.str_]
+        The sequence names.
+    oneHotSeqs : NDArray[np.integer]
+        Array of one-hot encoded sequences, in the order of `seqNames`.
+    mnnModel : mnnPseudoModel.Net
+        MNN model.
+    storedSeqNames : NDArray[np.str_], optional
+        The sequence names of the store, by default None (empty store).
+    storedResultsArray : NDArray[np.floating], optional
+        The results array of the store, by default None (empty store).
+
+    Returns
+    -------
+    Tuple[NDArray[np.floating], NDArray[np.floating], int]
+        The MNN results array and the MNN max results array, in the order of `seqNames` (as `getMnnResults`), and the
+        number of sequences computed.
+    """
+    storedSeqNameIndex=pd.Index([] if storedSeqNames is None else storedSeqNames)
+    # duplicated names can not be matched to a single stored sequence
+    if len(storedSeqNameIndex)==0 or not storedSeqNameIndex.is_unique:
+        mnnResultsArray, mnnMaxResultsArray=getMnnResults(oneHotSeqs, mnnModel)
+        return mnnResultsArray, mnnMaxResultsArray, len(seqNames)
+    # position of each sequence in the store, -1 for the new sequences
+    storedIdx=storedSeqNameIndex.get_indexer(seqNames)
+    isStored=storedIdx>=0
+    newIdx=np.flatnonzero(~isStored)
+    mnnResultsArray=np.empty((storedResultsArray.shape[0], len(seqNames), storedResultsArray.shape[2]), dtype=storedResultsArray.dtype)
+    # sorted indices read the memory-mapped store sequentially
+    storedOrder=np.argsort(storedIdx[isStored], kind="stable")
+    mnnResultsArray[:, np.flatnonzero(isStored)[storedOrder]]=storedResultsArray[:, storedIdx[isStored][storedOrder]]
+    if len(newIdx)>0:
+        newResultsArray, _=getMnnResults(oneHotSeqs[newIdx], mnnModel)
+        mnnResultsArray[:, newIdx]=newResultsArray
+        del newResultsArray
+    return mnnResultsArray, mnnResultsArray.max(axis=-1), len(newIdx)
+
+def getMnnActivationSummary(
+    mnnResultsArray:npt.NDArray[np.floating],
+    mnnModel:mnnPseudoModel.Net
+)->dict[str, npt.NDArray]:
+    """
+    Summarize the MNN results by module and position (see `mnnProcess.getActivationSummary`).
+
+    Parameters
+    ----------
+    mnnResultsArray : NDArray[np.floating]
+        The MNN results array of shape (nbBlock, nbSeq, seqSize).
+    mnnModel : mnnPseudoModel.Net
+        MNN model.
+
+    Returns
+    -------
+    dict[str, NDArray]
+        The summary arrays by name.
+    """
+    seqSize=np.shape(mnnResultsArray)[-1]
+    posCoefMatrix, posBiasArray, blockWeightArray=mnnPseudoModel.getModuleWeightArrays(mnnModel, seqSize=seqSize)
+    filterLengthList=mnnPseudoModel.getFilterLengthList(mnnPseudoModel.getBlockList(mnnModel))
+    return mnnProcess.getActivationSummary(mnnResultsArray, posCoefMatrix, posBiasArray, blockWeightArray, filterLengthList=filterLengthList)
+
+RESULTS_ARTIFACT="mnnResultsArray.npy"
+SUMMARY_ARTIFACT="mnnActivationSummary.npz"
+SCORE_MATRIX_ARTIFACT="mnnScoreMatrix.parquet"
+"""
+Names of the outputs in the result cache (see `resultCache`).
+"""
+
+RESULT_SOURCE_MODULES=("getMnnResults", "mnnProcess", "mnnPseudoModel", "mnnScoreMatrix", "chunkedResults", "seqNameDict")
+"""
+RESULT_SOURCE_MODULES: tuple
+    Modules whose source is part of the result cache key: a change of the code computing or writing the outputs
+    invalidates the cached entries.
+"""
+
+def getResultCacheKey(
+    oneHotSeqFilePath:os.PathLike,
+    namesFilePath:os.PathLike,
+    hParamsPath:os.PathLike,
+    paramsPath:os.PathLike,
+    seqNameListPath:Union[None, os.PathLike]=None,
+    resultsFormat:tuple=(),
+    seqNameDictPath:Union[None, os.PathLike]=None
+)->str:
+    """
+    Get the result cache key of the inputs: the hash of the sequences, the sequence names, the model files, the
+    optional list of sequence names and the optional dictionary of the sequence names, and of the source of the
+    modules computing the outputs (`RESULT_SOURCE_MODULES`). `resultsFormat` holds the storage options of the results
+    array (see `chunkedResults.addChunkArguments`).
+    """
+    inputPaths=[oneHotSeqFilePath, namesFilePath, hParamsPath, paramsPath]
+    if seqNameListPath is not None:
+        inputPaths.append(seqNameListPath)
+    if seqNameDictPath is not None:
+        inputPaths.append(seqNameDictPath)
+    inputPaths.extend(resultCache.getModuleSourcePaths(RESULT_SOURCE_MODULES))
+    return resultCache.getFilesKey(inputPaths, extra=("getMnnResults", __version__, *resultsFormat))
 
 def parseArgs() -> argparse.Namespace:
     """
@@ -118,6 +357,14 @@ def parseArgs() -> argparse.Namespace:
     parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
     parser.add_argument("-l","--seqNameList", type=str, help="Path to a file containing a list of sequence names to filter the data.")
     parser.add_argument("-o","--output", type=argparse.FileType('wb'), default="-", help="Path to the output file. Use '-' for stdout. Default: stdout")
+    parser.add_argument("-c","--cacheDir", type=str, default=None, help="Path to a result cache directory shared between runs. The outputs are keyed by the hash of the inputs; on a hit they are hardlinked (or reflinked, or copied) instead of computed. Default: no cache")
+    parser.add_argument("--cacheMaxSize", type=resultCache.parseSize, default="50G", help="Size budget of the result cache, with an optional suffix K, M, G or T. The least recently used entries are evicted above it. Default: 50G")
+    parser.add_argument("-i","--incrementalStore", type=str, default=None, help="Path to a directory keeping the results by sequence name and model checksum between runs. Only the sequences which are not in the store are computed, the sequences which are not in the input anymore are dropped from the store. Default: no store")
+    parser.add_argument("-m","--scoreMatrix", type=str, default=None, help="Path to an output parquet file with the max score and its position for each (sequence, module), indexed by sequence name (see mnnScoreMatrix.py). Default: no matrix")
+    parser.add_argument("-d","--seqNameDict", type=str, default=None, help="Path to the dictionary of the sequence names (see seqNameDict.py), to write the names of the sequence IDs of namesFilePath in the score matrix and the incremental store. Default: the names file holds names")
+    parser.add_argument("-s","--summary", type=str, default=None, help="Path to an output .npz file summarizing the results by module and position (hit count, score moments and pooled activation scores). Default: no summary")
+    chunkedResults.addChunkArguments(parser)
+    stageProfiler.addProfileArguments(parser)
     return parser.parse_args()
 
 def main():
@@ -127,6 +374,33 @@ def main():
     hParamsPath=args.hParamsPath
     paramsPath=args.paramsPath
     seqNameListPath=args.seqNameList
+    profiler=stageProfiler.StageProfiler.fromArgs("getMnnResults", args)
+    profiler.addInputs(oneHotSeqFilePath, namesFilePath, hParamsPath, paramsPath, seqNameListPath, args.seqNameDict)
+
+    # outputs by cache artifact name (None: stdout)
+    outputPath=None if args.output is sys.stdout.buffer else args.output.name
+    outputPaths={RESULTS_ARTIFACT:outputPath, SUMMARY_ARTIFACT:args.summary, SCORE_MATRIX_ARTIFACT:args.scoreMatrix}
+    outputPaths={artifactName:path for artifactName, path in outputPaths.items() if path is not None or artifactName==RESULTS_ARTIFACT}
+    if args.cacheDir is not None:
+        with profiler.phase("cache lookup"):
+            # the .npy and the chunked results are different artifacts
+            resultsFormat=() if args.chunkSize is None else (args.chunkSize, args.chunkDtype, args.chunkCompression)
+            cacheKey=getResultCacheKey(oneHotSeqFilePath, namesFilePath, hParamsPath, paramsPath, seqNameListPath, resultsFormat=resultsFormat, seqNameDictPath=args.seqNameDict)
+            cachedPaths=resultCache.getCachedArtifacts(args.cacheDir, cacheKey, outputPaths.keys())
+        if cachedPaths is not None:
+            if outputPath is not None:
+                # replaced by the cached file
+                args.output.close()
+            for artifactName, path in outputPaths.items():
+                if path is None:
+                    with open(cachedPaths[artifactName], "rb") as cachedFile:
+                        shutil.copyfileobj(cachedFile, sys.stdout.buffer)
+                else :
+                    resultCache.exportFile(cachedPaths[artifactName], path)
+            print("result cache hit {}".format(cacheKey), file=sys.stderr)
+            profiler.addOutputs(*outputPaths.values())
+            profiler.write()
+            return
 
     if seqNameListPath is not None:
         if seqNameListPath.endswith((".npy", ".npz")):
@@ -135,10 +409,58 @@ def main():
             seqNameList = pd.read_csv(seqNameList, sep="\t", header=None)[0].to_numpy()
     else :
         seqNameList=None
-    seqNames, oneHotSeqs = loadData(oneHotSeqFilePath, namesFilePath, seqNameList=seqNameList)
-    mnnModel = loadModel(hParamsPath, paramsPath)
-    mnnResultsArray, _ = getMnnResults(oneHotSeqs, mnnModel)
-    np.save(args.output, mnnResultsArray)
+    seqNameDictionary=None if args.seqNameDict is None else seqNameDict.SeqNameDict.load(args.seqNameDict)
+    if seqNameDictionary is not None and seqNameList is not None:
+        # the list holds names and the names file IDs
+        seqNameList=seqNameDictionary.getIds(seqNameList)
+    with profiler.phase("load names and one-hot"):
+        seqNames, oneHotSeqs = loadData(oneHotSeqFilePath, namesFilePath, seqNameList=seqNameList)
+    if seqNameDictionary is not None and seqNameDict.isSeqIdArray(seqNames):
+        # the names are only needed by the store and the score matrix
+        if args.incrementalStore is not None or args.scoreMatrix is not None:
+            seqNames=seqNameDictionary.getNames(seqNames)
+        del seqNameDictionary
+    with profiler.phase("load model"):
+        mnnModel = loadModel(hParamsPath, paramsPath)
+    if args.incrementalStore is not None:
+        storeDir=os.path.join(args.incrementalStore, getModelChecksum(hParamsPath, paramsPath))
+        with profiler.phase("load incremental store"):
+            storedSeqNames, storedResultsArray=loadIncrementalStore(storeDir, oneHotSeqs.shape[1])
+        with profiler.phase("convolution"):
+            mnnResultsArray, mnnMaxResultsArray, nbComputed = getIncrementalMnnResults(seqNames, oneHotSeqs, mnnModel, storedSeqNames, storedResultsArray)
+        nbStored=0 if storedSeqNames is None else len(storedSeqNames)
+        print("incremental store {}: {} sequences reused, {} computed, {} dropped".format(
+            storeDir, len(seqNames)-nbComputed, nbComputed, nbStored-(len(seqNames)-nbComputed)), file=sys.stderr)
+        del storedSeqNames, storedResultsArray
+        with profiler.phase("save incremental store"):
+            saveIncrementalStore(storeDir, seqNames, mnnResultsArray)
+    else :
+        with profiler.phase("convolution"):
+            mnnResultsArray, mnnMaxResultsArray = getMnnResults(oneHotSeqs, mnnModel)
+    with profiler.phase("save results"):
+        chunkedResults.saveMnnResultsArray(args.output, mnnResultsArray, args)
+    if args.scoreMatrix is not None:
+        with profiler.phase("score matrix"):
+            mnnArgMaxResultsArray=np.argmax(mnnResultsArray, axis=-1)
+            scoreMatrixDf=mnnScoreMatrix.getScoreMatrixDf(mnnMaxResultsArray, mnnArgMaxResultsArray, seqNames)
+            mnnScoreMatrix.saveScoreMatrix(scoreMatrixDf, args.scoreMatrix)
+            del scoreMatrixDf
+    if args.summary is not None:
+        # summarize while the results are still in memory
+        with profiler.phase("activation summary"):
+            np.savez_compressed(args.summary, **getMnnActivationSummary(mnnResultsArray, mnnModel))
+    if args.cacheDir is not None:
+        if outputPath is not None:
+            # flush the results before copying them
+            args.output.close()
+        with profiler.phase("cache store"):
+            resultCache.storeArtifacts(args.cacheDir, cacheKey, {artifactName:path for artifactName, path in outputPaths.items() if path is not None})
+            resultCache.evictCache(args.cacheDir, args.cacheMaxSize, keepKeys=[cacheKey])
+    if outputPath is not None and not args.output.closed:
+        # the output size is read from the file
+        args.output.flush()
+    profiler.addOutputs(*outputPaths.values())
+    profiler.write()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
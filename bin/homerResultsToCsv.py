@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 08/02/2024
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '08/02/2024'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -22,8 +24,10 @@ import pathlib
 import re
 
 import numpy as np
-import pandas as pd
-from bs4 import BeautifulSoup
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+bs4=lazyImport.lazyModule("bs4")
+import stageProfiler
 from typing import List, Tuple, Dict, Union
 
 PathLike=Union[str, pathlib.Path, os.PathLike]
@@ -42,7 +46,7 @@ def parseMotifInfoHtml(htmlFilePath: PathLike) -> Tuple[dict, List[dict]]:
     Tuple[dict, List[dict]]
         A tuple containing a dictionary with motif information and a list of dictionaries with match information.
     """
-    soup=BeautifulSoup(open(htmlFilePath), features="lxml")
+    soup=bs4.BeautifulSoup(open(htmlFilePath), features="lxml")
     #get info table
     motifTitle=soup.select("html > body > h2")[0].text
     motifNameRegex=re.compile(r"Information for (.*) \(.*\)")
@@ -172,14 +176,21 @@ def main():
     parser.add_argument("-o", "--output", type=str, default="-", help="Path to the output CSV file. Use '-' for stdout. Default: stdout")
     parser.add_argument("--strClass", type=str, default=None, help="STR class of the results")
     parser.add_argument("--moduleId", type=str, default=None, help="Module ID of the results")
+    stageProfiler.addProfileArguments(parser)
     args = parser.parse_args()
-    matchDf=readMatchDfInHomerResultsDir(args.homerResultsDirPath)
+    profiler=stageProfiler.StageProfiler.fromArgs("homerResultsToCsv", args)
+    with profiler.phase("HTML parse"):
+        matchDf=readMatchDfInHomerResultsDir(args.homerResultsDirPath)
     if args.moduleId is not None:
         matchDf.insert(0, "moduleId", args.moduleId)
     if args.strClass is not None:
         matchDf.insert(0, "strClass", args.strClass)
     output=args.output if args.output != "-" else sys.stdout
-    matchDf.to_csv(output, index=False, sep='\t')
+    with profiler.phase("CSV write"):
+        matchDf.to_csv(output, index=False, sep='\t')
+    profiler.addInputs(args.homerResultsDirPath)
+    profiler.addOutputs(None if args.output == "-" else args.output)
+    profiler.write()
 
 
 if __name__ == "__main__":
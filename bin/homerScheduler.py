@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Size-aware scheduling of the HOMER jobs (`findMotifs.pl`).
+
+The cost of a job is estimated from the size of its foreground and background fasta files and from its `-len` list:
+HOMER counts the oligos of each length in all the sequences, so the cost is (foreground bytes + background bytes) x
+sum of the lengths. The threads (`-p`) are handed out in proportion to the cost: the most expensive job gets
+`maxThreads`, the others their share, at least 1. The jobs are started by decreasing cost (longest processing time
+first), so that a giant module does not start last and make the tail of the run.
+
+The pipeline applies the same model (`getHomerCost` and `scheduleHomerJobs` in `main.nf`). Outside Nextflow, `run`
+starts the jobs of a table as asynchronous subprocesses, with at most `maxThreads` threads used at once:
+
+    homerScheduler.py plan homerJobs.tsv --maxThreads 16 -o homerPlan.tsv
+    homerScheduler.py run homerJobs.tsv --maxThreads 16 --jaspar jaspar.motifs
+
+The job table has the columns `name`, `foreground`, `background`, `len` (e.g. "5,6,7,8") and `outDir`.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+import os
+import sys
+import csv
+import math
+import time
+import asyncio
+import argparse
+
+from typing import Dict, List, Sequence
+
+import stageProfiler
+
+JOB_COLUMNS=["name", "foreground", "background", "len", "outDir"]
+"""
+JOB_COLUMNS: list
+    Columns of the job table.
+"""
+
+PLAN_COLUMNS=JOB_COLUMNS+["cost", "threads", "rank"]
+"""
+PLAN_COLUMNS: list
+    Columns of the plan: the job, its estimated cost, its threads and its start rank.
+"""
+
+def parseLenParam(lenParam:str)->List[int]:
+    """
+    Parse the `-len` option of HOMER ("5,6,7").
+    """
+    return [int(motifLength) for motifLength in str(lenParam).split(",") if motifLength.strip()]
+
+def getHomerCost(foregroundSize:int, backgroundSize:int, motifLengths:Sequence[int])->float:
+    """
+    Estimate the cost of a HOMER job: (foreground bytes + background bytes) x sum of the motif lengths.
+    """
+    return float((foregroundSize+backgroundSize)*sum(motifLengths))
+
+def allocateThreads(costs:Sequence[float], maxThreads:int)->List[int]:
+    """
+    Hand out the threads in proportion to the costs: the most expensive job gets `maxThreads`, each job at least 1.
+    """
+    maxCost=max(costs, default=0)
+    if maxCost<=0:
+        return [1]*len(costs)
+    return [min(maxThreads, max(1, math.ceil(maxThreads*cost/maxCost))) for cost in costs]
+
+def getPlan(jobs:List[Dict[str, str]], maxThreads:int)->List[Dict]:
+    """
+    Get the plan of the jobs: their cost and threads, sorted by decreasing cost (LPT order).
+
+    Parameters
+    ----------
+    jobs : List[Dict[str, str]]
+        The jobs (rows of the job table).
+    maxThreads : int
+        The max number of threads of a job, and of the jobs running at once.
+
+    Returns
+    -------
+    List[Dict]
+        The jobs with their "cost", "threads" and "rank", in the start order.
+    """
+    costs=[
+        getHomerCost(os.path.getsize(job["foreground"]), os.path.getsize(job["background"]), parseLenParam(job["len"]))
+        for job in jobs
+    ]
+    threads=allocateThreads(costs, maxThreads)
+    plan=[dict(job, cost=cost, threads=jobThreads) for job, cost, jobThreads in zip(jobs, costs, threads)]
+    plan.sort(key=lambda job: job["cost"], reverse=True)
+    for rank, job in enumerate(plan):
+        job["rank"]=rank
+    return plan
+
+def getHomerCommand(job:Dict, jasparDatabaseHomer:str, extraArgs:Sequence[str]=())->List[str]:
+    """
+    Get the `findMotifs.pl` command line of a job, as FIND_MOTIFS_HOMER.
+    """
+    return [
+        "findMotifs.pl", job["foreground"], "fasta", job["outDir"], "-fasta", job["background"], "-len", job["len"],
+        "-norevopp", "-mcheck", jasparDatabaseHomer, "-mknown", jasparDatabaseHomer, "-p", str(job["threads"]), *extraArgs
+    ]
+
+async def runPlan(plan:List[Dict], maxThreads:int, jasparDatabaseHomer:str, extraArgs:Sequence[str]=())->List[Dict]:
+    """
+    Run the jobs of a plan as asynchronous subprocesses, in the order of the plan, with at most `maxThreads` threads
+    used at once. A job waits until its threads are free: the jobs do not overtake each other. A job which cannot be
+    started (`findMotifs.pl` not found, output directory or log not writable) fails with the return code 127 (command
+    not found) or 126, as in a shell, and its threads are handed back.
+
+    Returns
+    -------
+    List[Dict]
+        The jobs with their "returnCode" and "wallTime".
+    """
+    freeThreads=maxThreads
+    condition=asyncio.Condition()
+
+    async def runJob(job:Dict)->Dict:
+        nonlocal freeThreads
+        start=time.perf_counter()
+        try:
+            os.makedirs(job["outDir"], exist_ok=True)
+            with open(os.path.join(job["outDir"], "homer.log"), "w") as logFile:
+                process=await asyncio.create_subprocess_exec(*getHomerCommand(job, jasparDatabaseHomer, extraArgs), stdout=logFile, stderr=asyncio.subprocess.STDOUT)
+                returnCode=await process.wait()
+        except OSError as error:
+            print("{}\t{}".format(job["name"], error), file=sys.stderr)
+            returnCode=127 if isinstance(error, FileNotFoundError) else 126
+        finally:
+            async with condition:
+                freeThreads+=job["threads"]
+                condition.notify_all()
+        print("{}\t{} threads\t{:.1f}s\t{}".format(job["name"], job["threads"], time.perf_counter()-start, "ok" if returnCode==0 else "FAILED"), file=sys.stderr)
+        return dict(job, returnCode=returnCode, wallTime=time.perf_counter()-start)
+
+    tasks=[]
+    for job in plan:
+        async with condition:
+            await condition.wait_for(lambda: freeThreads>=job["threads"])
+            freeThreads-=job["threads"]
+        tasks.append(asyncio.create_task(runJob(job)))
+    return list(await asyncio.gather(*tasks))
+
+def readJobs(path:str)->List[Dict[str, str]]:
+    """
+    Read a job table (tab separated, with a header).
+    """
+    with open(path, newline="") as jobFile:
+        jobs=list(csv.DictReader(jobFile, delimiter="\t"))
+    missingColumns=[column for column in JOB_COLUMNS if len(jobs)>0 and column not in jobs[0]]
+    if missingColumns:
+        raise ValueError("missing columns in {} : {}".format(path, ", ".join(missingColumns)))
+    return jobs
+
+def writeTable(rows:List[Dict], columns:List[str], output)->None:
+    """
+    Write rows as a tab separated table.
+    """
+    writer=csv.DictWriter(output, fieldnames=columns, delimiter="\t", extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Plan the HOMER jobs by estimated cost (threads and longest first order) and run them.")
+    parser.add_argument("mode", type=str, choices=["plan", "run"], help="'plan': write the plan, 'run': run the jobs of the plan.")
+    parser.add_argument("jobs", type=str, help="The job table (tab separated, columns: {}).".format(", ".join(JOB_COLUMNS)))
+    parser.add_argument("--maxThreads", type=int, default=os.cpu_count(), help="Max threads of a job and of the jobs running at once (default: number of CPUs).")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Output table: the plan, or the plan with the exit codes for 'run' (default: stdout).")
+    parser.add_argument("--jaspar", type=str, default=None, help="The JASPAR database in the HOMER format (-mcheck, -mknown), required by 'run'.")
+    stageProfiler.addProfileArguments(parser)
+    parser.add_argument("--homerArgs", type=str, nargs=argparse.REMAINDER, default=[], help="Extra options of findMotifs.pl (last).")
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("homerScheduler", args)
+    with profiler.phase("plan"):
+        jobs=readJobs(args.jobs)
+        plan=getPlan(jobs, args.maxThreads)
+    columns=PLAN_COLUMNS
+    if args.mode=="run":
+        if args.jaspar is None:
+            raise ValueError("--jaspar is required by 'run'")
+        # the CPU time of the HOMER jobs is in the childrenCpuTime of the phase
+        with profiler.phase("run HOMER jobs"):
+            plan=asyncio.run(runPlan(plan, args.maxThreads, args.jaspar, args.homerArgs))
+        columns=PLAN_COLUMNS+["returnCode", "wallTime"]
+    if args.output is None:
+        writeTable(plan, columns, sys.stdout)
+    else:
+        with open(args.output, "w", newline="") as outputFile:
+            writeTable(plan, columns, outputFile)
+    profiler.addInputs(args.jobs, *(path for job in jobs for path in (job["foreground"], job["background"])))
+    profiler.addOutputs(args.output, *(job["outDir"] for job in plan if args.mode=="run"))
+    profiler.write()
+    if args.mode=="run" and any(job["returnCode"]!=0 for job in plan):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fast k-mer enrichment pre-screen of the modules of a class before HOMER.
+
+The k-mers (k from `minLength`, or less for a shorter filter, to the filter length of the module and at most
+`MAX_KMER_LENGTH`, optionally with a central gap) are counted directly
+from the base indices of the one-hot sequences of the class: the code of a k-mer is its base-4 integer, computed for
+all the positions at once, and the counts are a `bincount` (or a `unique` for the long k-mers). The k-mers of all the
+positions of the class are counted once by length and shared by the modules: the foreground of a module is the k-mers
+inside its positive hits, its background all the other k-mers of the class sequences, as the non-hit background of
+HOMER.
+
+The enrichment of a k-mer is tested with the normal approximation of the binomial test of its foreground count
+against its total count (one-sided), with a Bonferroni correction over the k-mers tested for the module. A module
+without significant k-mer can be skipped by HOMER, and the lengths with a significant k-mer give a reduced `-len` list
+(`homerLen`). A module without tested k-mer (no hit, or no k-mer counted `minCount` times in its hits) is not
+screened: it is not enriched, but it should not be skipped.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python kmerPrescreen.py positiveMnnHits.bed AC_seqNames.npy AC_oneHotSeqs.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt --offset 450 -o kmerPrescreen.tsv
+
+import sys
+import math
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import seqNameDict
+import stageProfiler
+
+from typing import List, Sequence, Tuple
+
+ALPHABET="ACGT"
+"""
+ALPHABET: str
+    Order of the bases in the one-hot encoded sequences.
+"""
+
+MAX_KMER_LENGTH=31
+"""
+MAX_KMER_LENGTH: int
+    Max number of bases of the k-mers: their base-4 codes are int64 (4^31 = 2^62).
+"""
+
+MAX_BINCOUNT_LENGTH=11
+"""
+MAX_BINCOUNT_LENGTH: int
+    Max number of bases of the k-mers counted with a `bincount` (4^11 counts), the longer ones are counted with a
+    `unique`.
+"""
+
+PRESCREEN_COLUMNS=[
+    "moduleId", "filterLength", "nbHitPosition", "bestKmer", "bestLength", "bestLog10Pvalue", "bestFoldEnrichment",
+    "nbSignificantKmer", "homerLen", "enriched", "screened"
+]
+"""
+PRESCREEN_COLUMNS: list
+    Columns of the pre-screen table: one line by module. `homerLen` lists the lengths with a significant k-mer,
+    `screened` is False for the modules without tested k-mer.
+"""
+
+def getKmerOffsets(kmerLength:int, gap:int=0)->List[int]:
+    """
+    Get the offsets of the bases of a k-mer from its start: the gap is between its two halves.
+    """
+    leftLength=kmerLength//2
+    return list(range(leftLength))+list(range(leftLength+gap, kmerLength+gap))
+
+def getKmerCodes(baseIdxSeqs:npt.NDArray[np.integer], kmerLength:int, gap:int=0)->Tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+    """
+    Get the code (base-4 integer) of the k-mer starting at each position of the sequences.
+
+    Parameters
+    ----------
+    baseIdxSeqs : NDArray[np.integer]
+        The base index of each position (see `mnnProcess.getOneHotBaseIdx`), of shape (nbSeq, seqSize).
+    kmerLength : int
+        The number of bases of the k-mers, at most `MAX_KMER_LENGTH` (ValueError otherwise).
+    gap : int, optional
+        The number of ignored positions in the middle of the k-mers, by default 0.
+
+    Returns
+    -------
+    Tuple[NDArray[np.int64], NDArray[np.bool_]]
+        The codes and whether the k-mer has only A, C, G or T, of shape (nbSeq, seqSize-span+1) with span the
+        length of the k-mer with its gap.
+    """
+    if not 0<kmerLength<=MAX_KMER_LENGTH:
+        raise ValueError("the k-mer length should be between 1 and {} (int64 codes), got {}".format(MAX_KMER_LENGTH, kmerLength))
+    baseIdxSeqs=np.asarray(baseIdxSeqs)
+    nbPos=max(baseIdxSeqs.shape[1]-(kmerLength+gap)+1, 0)
+    codes=np.zeros((baseIdxSeqs.shape[0], nbPos), dtype=np.int64)
+    validMask=np.ones(codes.shape, dtype=bool)
+    if nbPos==0:
+        return codes, validMask
+    for offset in getKmerOffsets(kmerLength, gap):
+        bases=baseIdxSeqs[:, offset:offset+nbPos]
+        validMask&=bases<len(ALPHABET)
+        codes=codes*len(ALPHABET)+np.minimum(bases, len(ALPHABET)-1)
+    return codes, validMask
+
+def decodeKmer(code:int, kmerLength:int, gap:int=0)->str:
+    """
+    Get the sequence of a k-mer code, the gap is written with 'N'.
+    """
+    bases=[]
+    for _ in range(kmerLength):
+        code, baseIdx=divmod(int(code), len(ALPHABET))
+        bases.append(ALPHABET[baseIdx])
+    bases=bases[::-1]
+    leftLength=kmerLength//2
+    return "".join(bases[:leftLength])+"N"*gap+"".join(bases[leftLength:])
+
+def countKmers(codes:npt.NDArray[np.int64], kmerLength:int)->Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Count the k-mer codes.
+
+    Returns
+    -------
+    Tuple[NDArray[np.int64], NDArray[np.int64]]
+        The observed codes (sorted) and their counts.
+    """
+    if kmerLength<=MAX_BINCOUNT_LENGTH:
+        counts=np.bincount(codes, minlength=len(ALPHABET)**kmerLength)
+        observedCodes=np.flatnonzero(counts)
+        return observedCodes, counts[observedCodes]
+    return np.unique(codes, return_counts=True)
+
+def getHitCoverage(seqIdx:npt.NDArray, starts:npt.NDArray, ends:npt.NDArray, nbSeq:int, seqSize:int)->npt.NDArray[np.int32]:
+    """
+    Get the cumulative coverage of the sequences by the hits: `coverage[i, p]` is the number of covered positions
+    before `p` in the sequence `i`, of shape (nbSeq, seqSize+1).
+    """
+    delta=np.zeros((nbSeq, seqSize+1), dtype=np.int32)
+    np.add.at(delta, (seqIdx, np.clip(starts, 0, seqSize)), 1)
+    np.add.at(delta, (seqIdx, np.clip(ends, 0, seqSize)), -1)
+    covered=np.cumsum(delta, axis=1)[:, :seqSize]>0
+    coverage=np.zeros((nbSeq, seqSize+1), dtype=np.int32)
+    np.cumsum(covered, axis=1, out=coverage[:, 1:])
+    return coverage
+
+def getLog10Pvalues(fgCounts:npt.NDArray, totalCounts:npt.NDArray, fgFraction:float)->npt.NDArray[np.float64]:
+    """
+    Get the log10 p-values of the one-sided binomial test of the foreground counts, with the normal approximation.
+    The tail of the large z-scores uses the asymptotic expansion (no underflow).
+    """
+    fgCounts=np.asarray(fgCounts, dtype=np.float64)
+    totalCounts=np.asarray(totalCounts, dtype=np.float64)
+    variance=np.maximum(totalCounts*fgFraction*(1-fgFraction), 1e-12)
+    zScores=(fgCounts-totalCounts*fgFraction)/np.sqrt(variance)
+    log10Pvalues=np.empty(len(zScores))
+    isTail=zScores>8
+    erfc=np.frompyfunc(math.erfc, 1, 1)
+    log10Pvalues[~isTail]=np.log10(np.maximum(0.5*erfc(zScores[~isTail]/math.sqrt(2)).astype(np.float64), 1e-300))
+    tailZ=zScores[isTail]
+    log10Pvalues[isTail]=-tailZ**2/2/math.log(10)-np.log10(tailZ*math.sqrt(2*math.pi))
+    return log10Pvalues
+
+def getModulePrescreen(
+    baseIdxSeqs:npt.NDArray[np.integer],
+    hitCoverages:Sequence[npt.NDArray[np.int32]],
+    filterLengthList:Sequence[int],
+    minLength:int=5,
+    gaps:Sequence[int]=(0,),
+    alpha:float=0.01,
+    minFold:float=1.5,
+    minCount:int=5
+)->pd.DataFrame:
+    """
+    Test the enrichment of the k-mers in the hits of each module of a class.
+
+    Parameters
+    ----------
+    baseIdxSeqs : NDArray[np.integer]
+        The base indices of the class sequences, of shape (nbSeq, seqSize).
+    hitCoverages : Sequence[NDArray[np.int32]]
+        The cumulative coverage of the sequences by the hits of each module (see `getHitCoverage`).
+    filterLengthList : Sequence[int]
+        The filter length of each module: the longest k-mers (at most `MAX_KMER_LENGTH`).
+    minLength : int, optional
+        The shortest k-mers, by default 5 (as the `-len` list of HOMER). A module with a shorter filter is tested with
+        the k-mers of its filter length.
+    gaps : Sequence[int], optional
+        The central gaps of the k-mers, by default (0,) (ungapped).
+    alpha : float, optional
+        The family-wise error rate of each module (Bonferroni), by default 0.01.
+    minFold : float, optional
+        The min fold enrichment of a significant k-mer, by default 1.5.
+    minCount : int, optional
+        The min foreground count of a tested k-mer, by default 5.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One line by module, columns `PRESCREEN_COLUMNS`.
+    """
+    nbModule=len(filterLengthList)
+    moduleTests=[[] for _ in range(nbModule)]
+    # the k-mer lengths of each module: [min(minLength, filterLength), filterLength], at most MAX_KMER_LENGTH
+    moduleMaxLengths=[min(filterLength, MAX_KMER_LENGTH) for filterLength in filterLengthList]
+    moduleMinLengths=[min(minLength, maxLength) for maxLength in moduleMaxLengths]
+    for kmerLength in range(max(min(moduleMinLengths, default=1), 1), max(moduleMaxLengths, default=0)+1):
+        for gap in gaps:
+            codes, validMask=getKmerCodes(baseIdxSeqs, kmerLength, gap)
+            span=kmerLength+gap
+            nbPos=codes.shape[1]
+            if nbPos<=0:
+                continue
+            # k-mers of all the positions, shared by the modules
+            allCodes, allCounts=countKmers(codes[validMask], kmerLength)
+            nbAllKmer=int(np.sum(allCounts))
+            for moduleId in range(nbModule):
+                if not moduleMinLengths[moduleId]<=kmerLength<=moduleMaxLengths[moduleId]:
+                    continue
+                coverage=hitCoverages[moduleId]
+                # the k-mer is inside the hits if all its positions are covered
+                fgMask=validMask&((coverage[:, span:span+nbPos]-coverage[:, :nbPos])==span)
+                fgCodes, fgCounts=countKmers(codes[fgMask], kmerLength)
+                nbFgKmer=int(np.sum(fgCounts))
+                if nbFgKmer==0 or nbFgKmer==nbAllKmer:
+                    continue
+                testedMask=fgCounts>=minCount
+                fgCodes, fgCounts=fgCodes[testedMask], fgCounts[testedMask]
+                totalCounts=allCounts[np.searchsorted(allCodes, fgCodes)]
+                fgFraction=nbFgKmer/nbAllKmer
+                log10Pvalues=getLog10Pvalues(fgCounts, totalCounts, fgFraction)
+                bgCounts=totalCounts-fgCounts
+                foldEnrichments=(fgCounts/nbFgKmer)/((bgCounts+1)/(nbAllKmer-nbFgKmer+1))
+                moduleTests[moduleId].append((kmerLength, gap, fgCodes, log10Pvalues, foldEnrichments))
+    rows=[]
+    for moduleId, filterLength in enumerate(filterLengthList):
+        tests=moduleTests[moduleId]
+        nbTested=sum(len(testCodes) for _, _, testCodes, _, _ in tests)
+        log10Threshold=math.log10(alpha/max(nbTested, 1))
+        row=dict(moduleId=moduleId, filterLength=filterLength, nbHitPosition=int(hitCoverages[moduleId][:, -1].sum()), bestKmer="", bestLength=0, bestLog10Pvalue=0., bestFoldEnrichment=np.nan, nbSignificantKmer=0)
+        significantLengths=set()
+        for kmerLength, gap, testCodes, log10Pvalues, foldEnrichments in tests:
+            significantMask=(log10Pvalues<=log10Threshold)&(foldEnrichments>=minFold)
+            row["nbSignificantKmer"]+=int(np.sum(significantMask))
+            if np.any(significantMask):
+                significantLengths.add(kmerLength+gap)
+            if len(log10Pvalues)>0 and np.min(log10Pvalues)<row["bestLog10Pvalue"]:
+                bestIdx=np.argmin(log10Pvalues)
+                row.update(
+                    bestKmer=decodeKmer(testCodes[bestIdx], kmerLength, gap),
+                    bestLength=kmerLength+gap,
+                    bestLog10Pvalue=float(log10Pvalues[bestIdx]),
+                    bestFoldEnrichment=float(foldEnrichments[bestIdx])
+                )
+        row["homerLen"]=",".join(str(length) for length in sorted(significantLengths))
+        row["enriched"]=row["nbSignificantKmer"]>0
+        row["screened"]=nbTested>0
+        rows.append(row)
+    return pd.DataFrame(rows, columns=PRESCREEN_COLUMNS)
+
+def loadHitCoverages(
+    bedPath:str,
+    seqNames:npt.NDArray,
+    nbModule:int,
+    seqSize:int,
+    offset:int=0
+)->List[npt.NDArray[np.int32]]:
+    """
+    Read the positive hits of a class (bed file of `mnnResultBedFilsGenerator.py`, the module in the name column) and
+    get the cumulative coverage of the sequences by the hits of each module.
+    """
+    bedDf=pd.read_csv(bedPath, sep="\t", header=None, usecols=[0, 1, 2, 3], names=["chrom", "chromStart", "chromEnd", "name"], dtype={"chrom":str})
+    seqIdx=pd.Index(np.asarray(seqNames, dtype=str)).get_indexer(bedDf["chrom"])
+    if np.any(seqIdx<0):
+        raise ValueError("{} hits of {} are on unknown sequences".format(int(np.sum(seqIdx<0)), bedPath))
+    starts=bedDf["chromStart"].to_numpy()-offset
+    ends=bedDf["chromEnd"].to_numpy()-offset
+    moduleIds=bedDf["name"].to_numpy()
+    return [
+        getHitCoverage(seqIdx[moduleIds==moduleId], starts[moduleIds==moduleId], ends[moduleIds==moduleId], len(seqNames), seqSize)
+        for moduleId in range(nbModule)
+    ]
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Test the enrichment of the k-mers in the hits of each module of a class, to skip the modules without enriched k-mer in HOMER.")
+    parser.add_argument("positiveHits", type=str, help="The bed file of the positive hits of the class (mnnResultBedFilsGenerator.py).")
+    parser.add_argument("seqNames", type=str, help="The sequence names of the class (.npy, or the sequence IDs with --seqNameDict).")
+    parser.add_argument("oneHotSeqFilePath", type=str, help="The one-hot encoded sequences of the class (.npy).")
+    parser.add_argument("hParamsPath", type=str, help="Path to the file containing the hyperparameters of the MNN model.")
+    parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
+    parser.add_argument("--seqNameDict", type=str, default=None, help="The dictionary of the sequence names (see seqNameDict.py).")
+    parser.add_argument("--offset", type=int, default=0, help="Offset of the bed positions from the positions of the one-hot sequences (default: 0, 450 in the pipeline).")
+    parser.add_argument("--minLength", type=int, default=5, help="Shortest k-mers, at most 31 (default: 5).")
+    parser.add_argument("--gaps", type=int, nargs="+", default=[0], help="Central gaps of the k-mers (default: 0, ungapped).")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Family-wise error rate of each module, Bonferroni corrected (default: 0.01).")
+    parser.add_argument("--minFold", type=float, default=1.5, help="Min fold enrichment of a significant k-mer (default: 1.5).")
+    parser.add_argument("--minCount", type=int, default=5, help="Min foreground count of a tested k-mer (default: 5).")
+    parser.add_argument("-o", "--output", type=str, default="kmerPrescreen.tsv", help="Output table, one line by module (default: kmerPrescreen.tsv).")
+    stageProfiler.addProfileArguments(parser)
+    args=parser.parse_args()
+    if not 0<args.minLength<=MAX_KMER_LENGTH:
+        parser.error("--minLength should be between 1 and {} (int64 k-mer codes)".format(MAX_KMER_LENGTH))
+    return args
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("kmerPrescreen", args)
+    with profiler.phase("load"):
+        seqNameDictionary=None if args.seqNameDict is None else seqNameDict.SeqNameDict.load(args.seqNameDict)
+        seqNames=seqNameDict.loadSeqNames(args.seqNames, seqNameDictionary)
+        del seqNameDictionary
+        baseIdxSeqs=mnnProcess.getOneHotBaseIdx(np.load(args.oneHotSeqFilePath, mmap_mode="r"))
+        filterLengthList=mnnPseudoModel.getFilterLengthList(mnnPseudoModel.getBlockList(mnnPseudoModel.load_model(args.hParamsPath, args.paramsPath)))
+    with profiler.phase("hit coverage"):
+        hitCoverages=loadHitCoverages(args.positiveHits, seqNames, len(filterLengthList), baseIdxSeqs.shape[1], offset=args.offset)
+    with profiler.phase("count and test"):
+        prescreenDf=getModulePrescreen(
+            baseIdxSeqs,
+            hitCoverages,
+            filterLengthList,
+            minLength=args.minLength,
+            gaps=args.gaps,
+            alpha=args.alpha,
+            minFold=args.minFold,
+            minCount=args.minCount
+        )
+    prescreenDf.to_csv(args.output, sep="\t", index=False)
+    print("{}/{} modules with an enriched k-mer, {} not screened".format(int(prescreenDf["enriched"].sum()), len(prescreenDf), int((~prescreenDf["screened"]).sum())), file=sys.stderr)
+    profiler.addInputs(args.positiveHits, args.seqNames, args.oneHotSeqFilePath, args.hParamsPath, args.paramsPath, args.seqNameDict)
+    profiler.addOutputs(args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
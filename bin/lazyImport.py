@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lazy import of the heavy dependencies (torch, pandas, matplotlib, Biopython, ...) and of the scripts which import them.
+
+A module imported with `lazyModule` is imported at the first access to one of its attributes, so a script pays only
+for the dependencies of the code path it runs (nothing for `--help`):
+
+    pd=lazyImport.lazyModule("pandas")
+    nn=lazyImport.lazyModule("torch.nn")
+    mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+
+The annotations of the functions must not be evaluated at their definition: the modules using it start with
+`from __future__ import annotations`.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+import sys
+import types
+import importlib
+
+from typing import Any
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder of a module, imported at the first access to one of its attributes. Use `lazyModule`.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module (e.g. "torch.nn").
+    """
+    def __init__(self, name:str):
+        super().__init__(name)
+        self.__dict__["_lazyModule"]=None
+
+    def _load(self)->types.ModuleType:
+        module=self.__dict__["_lazyModule"]
+        if module is None:
+            module=importlib.import_module(self.__name__)
+            self.__dict__["_lazyModule"]=module
+        return module
+
+    def __getattr__(self, attribute:str)->Any:
+        # only called for the attributes which are not in the placeholder itself
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self)->str:
+        state="loaded" if self.__dict__["_lazyModule"] is not None else "not loaded"
+        return "<lazy module '{}' ({})>".format(self.__name__, state)
+
+def lazyModule(name:str)->types.ModuleType:
+    """
+    Get a module imported at its first use. The module is returned directly if it is already imported.
+    """
+    module=sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def isLoaded(name:str)->bool:
+    """
+    Whether a module has been imported (by its first use or an explicit import).
+    """
+    return name in sys.modules
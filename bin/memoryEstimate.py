@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Estimate the peak memory of the heavy stages of each STR class from the shapes of the arrays, read in the `.npy`
+headers (the arrays are not loaded): number of sequences of the class, sequence size, number of modules.
+
+The estimates are written as a TSV table (one line by class, one column by stage, in bytes) used by the pipeline to
+request the memory of each task (`estimateMemory` option).
+
+The models are linear in the size of the arrays. Their coefficients are rough estimates of the memory used by the
+objects of each stage, rounded up, not fitted values: compare them with the `--profile` reports (see
+`stageProfiler.py`) of your data, and raise `--margin` (`memoryEstimateMargin` option) if the tasks run out of memory.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python memoryEstimate.py prefiltered_seqNames.npy prefiltered_oneHotSeqs.npy strClassCatalog.tsv -o memoryEstimate.tsv
+
+import os
+import sys
+import argparse
+
+import numpy as np
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+from typing import Dict, Tuple, Union
+
+from miscFct import splitEStrHeader, rcDnaSeq
+import seqNameDict
+import stageProfiler
+
+MIB=1<<20
+
+BASE_MEMORY={
+    "python":160*MIB,
+    "torch":800*MIB,
+}
+"""
+BASE_MEMORY: dict
+    Rough estimate of the resident memory of the interpreter after the imports: numpy and pandas ("python"), and
+    torch ("torch").
+"""
+
+BYTES_PER_SEQ_NAME=1024
+"""
+BYTES_PER_SEQ_NAME: int
+    Rough estimate of the memory used by a sequence name while filtering: numpy array, python strings of the merged
+    results and of the split header, set of the names of the class.
+"""
+
+BYTES_PER_BED_LINE=200
+"""
+BYTES_PER_BED_LINE: int
+    Rough estimate of the memory used by a position of the results array while writing the bed files: indices of
+    the hits and of the non-hits (`np.nonzero`) and the lines of the bed DataFrames (python strings of the names).
+"""
+
+STAGES=("filterSeqNameAndOneHotSeq", "getMnnResults", "mnnResultBedFilsGenerator", "plotMnnScore", "analyzeStrClass")
+"""
+STAGES: tuple
+    The estimated stages, columns of the table.
+"""
+
+FLOAT_SIZE=np.dtype(np.float32).itemsize
+
+def getNpyShape(path:Union[str, os.PathLike])->Tuple[Tuple[int, ...], np.dtype]:
+    """
+    Get the shape and the dtype of the array of a `.npy` file, from its header.
+    """
+    array=np.load(path, mmap_mode="r")
+    return array.shape, array.dtype
+
+def getClassSizes(seqNamesArray:np.ndarray)->pd.Series:
+    """
+    Count the sequences of each STR class, with the rule of `filterSeqNameAndOneHotSeq.filterSeqNames`: a sequence of
+    the minus strand belongs to the reverse complement of its STR sequence.
+
+    Parameters
+    ----------
+    seqNamesArray : np.ndarray
+        The `motifId;seq;strand` sequence names.
+
+    Returns
+    -------
+    pd.Series
+        The number of distinct sequences, indexed by STR class.
+    """
+    seqHeaderDf=splitEStrHeader(np.unique(seqNamesArray))
+    isMinus=(seqHeaderDf["strand"]=="-").to_numpy()
+    strClassArray=seqHeaderDf["seq"].to_numpy(dtype=object)
+    strClassArray[isMinus]=[rcDnaSeq(seq) for seq in strClassArray[isMinus]]
+    return pd.Series(strClassArray).value_counts()
+
+def getFilterMemory(nbAllSeq:int, nbSeq:int, seqSize:int, oneHotBytes:int, oneHotItemSize:int)->int:
+    """
+    Estimate the peak memory of `filterSeqNameAndOneHotSeq.py` for a class: the names of all the sequences, the pages of
+    the memory-mapped one-hot array which are read (up to the whole file) and the one-hot sequences of the class.
+    """
+    return BASE_MEMORY["python"]+nbAllSeq*BYTES_PER_SEQ_NAME+oneHotBytes+nbSeq*seqSize*4*oneHotItemSize
+
+def getMnnResultsMemory(nbSeq:int, seqSize:int, nbModule:int, oneHotItemSize:int)->int:
+    """
+    Estimate the peak memory of `getMnnResults.py`: the one-hot sequences and their float32 copy, the convolution
+    output of each module, padded, and their stack (module, seq, pos).
+    """
+    resultsBytes=nbModule*nbSeq*seqSize*FLOAT_SIZE
+    return BASE_MEMORY["torch"]+nbSeq*seqSize*4*(oneHotItemSize+FLOAT_SIZE)+3*resultsBytes
+
+def getBedFilesMemory(nbSeq:int, seqSize:int, nbModule:int)->int:
+    """
+    Estimate the peak memory of `mnnResultBedFilsGenerator.py --allNegHits`: the results array, and a bed line by
+    position (a position is either a hit or a non-hit).
+    """
+    nbPos=nbModule*nbSeq*seqSize
+    return BASE_MEMORY["torch"]+nbPos*(FLOAT_SIZE+BYTES_PER_BED_LINE)
+
+def getPlotMnnScoreMemory(nbSeq:int, seqSize:int, chunkSize:int=None)->int:
+    """
+    Estimate the peak memory of `plotMnnScore.py` for a module: the scores of the module (memory-mapped) and the
+    weighted scores, or a batch of `chunkSize` sequences and the histograms of the median if `chunkSize` is given.
+    The modules of a class are plotted one after the other: the estimate is the same for a class.
+    """
+    if chunkSize is not None:
+        return BASE_MEMORY["torch"]+4*min(nbSeq, chunkSize)*seqSize*FLOAT_SIZE+1024*seqSize*8
+    return BASE_MEMORY["torch"]+4*nbSeq*seqSize*FLOAT_SIZE
+
+def getAnalyzeStrClassMemory(nbSeq:int, seqSize:int, nbModule:int, oneHotItemSize:int)->int:
+    """
+    Estimate the peak memory of `analyzeStrClass.py`: the inference, then the bed lines while the results array is
+    still in memory (the plots use less memory).
+    """
+    return getMnnResultsMemory(nbSeq, seqSize, nbModule, oneHotItemSize)+nbModule*nbSeq*seqSize*BYTES_PER_BED_LINE
+
+def getClassMemoryEstimate(
+    nbAllSeq:int,
+    nbSeq:int,
+    seqSize:int,
+    nbModule:int,
+    oneHotBytes:int,
+    oneHotItemSize:int,
+    margin:float=1.2,
+    plotChunkSize:int=None
+)->Dict[str, int]:
+    """
+    Estimate the peak memory of the stages (`STAGES`) for a class.
+
+    Parameters
+    ----------
+    nbAllSeq : int
+        Number of sequences of all the classes (filtering input).
+    nbSeq : int
+        Number of sequences of the class.
+    seqSize : int
+        Size of the sequences.
+    nbModule : int
+        Number of modules of the model of the class.
+    oneHotBytes : int
+        Size of the one-hot array of all the classes, in bytes.
+    oneHotItemSize : int
+        Size of an element of the one-hot array, in bytes.
+    margin : float, optional
+        Factor applied to the estimates, by default 1.2.
+    plotChunkSize : int, optional
+        The `--chunkSize` of `plotMnnScore.py`, by default None.
+
+    Returns
+    -------
+    Dict[str, int]
+        The estimate in bytes by stage.
+    """
+    estimate={
+        "filterSeqNameAndOneHotSeq":getFilterMemory(nbAllSeq, nbSeq, seqSize, oneHotBytes, oneHotItemSize),
+        "getMnnResults":getMnnResultsMemory(nbSeq, seqSize, nbModule, oneHotItemSize),
+        "mnnResultBedFilsGenerator":getBedFilesMemory(nbSeq, seqSize, nbModule),
+        "plotMnnScore":getPlotMnnScoreMemory(nbSeq, seqSize, chunkSize=plotChunkSize),
+        "analyzeStrClass":getAnalyzeStrClassMemory(nbSeq, seqSize, nbModule, oneHotItemSize),
+    }
+    return {stage:int(np.ceil(memory*margin)) for stage, memory in estimate.items()}
+
+def getMemoryEstimateDf(
+    seqNamesPath:Union[str, os.PathLike],
+    oneHotSeqPath:Union[str, os.PathLike],
+    classCatalogPath:Union[str, os.PathLike],
+    margin:float=1.2,
+    plotChunkSize:int=None,
+    seqNameDictPath:Union[None, str, os.PathLike]=None
+)->pd.DataFrame:
+    """
+    Estimate the peak memory of the stages of each class of a catalog.
+
+    Parameters
+    ----------
+    seqNamesPath : PathLike
+        The sequence names of all the classes (`.npy`).
+    oneHotSeqPath : PathLike
+        The one-hot sequences of all the classes (`.npy`, only the header is read).
+    classCatalogPath : PathLike
+        The TSV catalog of the classes (see `mnnModelCatalog.py`).
+    margin : float, optional
+        Factor applied to the estimates, by default 1.2.
+    plotChunkSize : int, optional
+        The `--chunkSize` of `plotMnnScore.py`, by default None.
+    seqNameDictPath : PathLike, optional
+        The dictionary of the sequence names (see `seqNameDict`), when `seqNamesPath` holds sequence IDs. The classes
+        are then read from the dictionary, by default None.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns "strClass", "nbSeq", "seqSize", "nbModule" and an estimate in bytes by stage (`STAGES`).
+    """
+    (nbAllSeq, seqSize, _), oneHotDtype=getNpyShape(oneHotSeqPath)
+    seqNamesArray=np.load(seqNamesPath)
+    if seqNameDictPath is not None and seqNameDict.isSeqIdArray(seqNamesArray):
+        classSizes=seqNameDict.SeqNameDict.load(seqNameDictPath).getClassSizes(seqNamesArray)
+    else :
+        classSizes=getClassSizes(seqNamesArray)
+    del seqNamesArray
+    classCatalogDf=pd.read_csv(classCatalogPath, sep="\t", usecols=["strClass", "nbModule"])
+    rowList=[]
+    for strClass, nbModule in zip(classCatalogDf["strClass"], classCatalogDf["nbModule"]):
+        nbSeq=int(classSizes.get(strClass, 0))
+        rowList.append(dict(
+            strClass=strClass, nbSeq=nbSeq, seqSize=seqSize, nbModule=nbModule,
+            **getClassMemoryEstimate(
+                nbAllSeq, nbSeq, seqSize, nbModule, os.path.getsize(oneHotSeqPath), oneHotDtype.itemsize,
+                margin=margin, plotChunkSize=plotChunkSize
+            )
+        ))
+    return pd.DataFrame(rowList, columns=["strClass", "nbSeq", "seqSize", "nbModule", *STAGES])
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Estimate the peak memory of the heavy stages of each STR class from the shapes of the arrays.")
+    parser.add_argument("seqNames", type=str, help="The sequence names of all the classes (.npy).")
+    parser.add_argument("oneHotSeqs", type=str, help="The one-hot sequences of all the classes (.npy), only the header is read.")
+    parser.add_argument("classCatalog", type=str, help="The TSV catalog of the classes (strClassCatalog.tsv, see mnnModelCatalog.py).")
+    parser.add_argument("-o", "--output", type=str, default="-", help="Output TSV table. Use '-' for stdout. Default: stdout")
+    parser.add_argument("--margin", type=float, default=1.2, help="Factor applied to the estimates (default: 1.2).")
+    parser.add_argument("--seqNameDict", type=str, default=None, help="The dictionary of the sequence names (see seqNameDict.py), when seqNames holds sequence IDs. Default: none")
+    parser.add_argument("--plotChunkSize", type=int, default=None, help="The --chunkSize of plotMnnScore.py. Default: no chunk")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("memoryEstimate", args)
+    with profiler.phase("estimate"):
+        memoryEstimateDf=getMemoryEstimateDf(args.seqNames, args.oneHotSeqs, args.classCatalog, margin=args.margin, plotChunkSize=args.plotChunkSize, seqNameDictPath=args.seqNameDict)
+    memoryEstimateDf.to_csv(args.output if args.output!="-" else sys.stdout, sep="\t", index=False)
+    profiler.addInputs(args.seqNames, args.classCatalog, args.seqNameDict)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 06/13/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '06/13/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -15,7 +17,8 @@ __status__ = 'Prototype'
 __version__ = "0.0.1"
 
 import numpy as np
-import pandas as pd
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
 
 import numpy.typing as npt
 from typing import Sequence
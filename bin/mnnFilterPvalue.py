@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Exact null distribution of the scores of the MNN filters and p-values of the hits.
+
+The convolution filter of a module is a position weight matrix (filterLength, alphabetSize): its score on a window is
+the sum of the weights of the bases. Under a background of independent bases with the base frequencies of the class,
+the distribution of the score is computed exactly on a grid of `nBins` scores, as `Bio.motifs` does for the JASPAR
+motifs (`pssm.distribution`, used by `pwm2homer.py`), by convolving the distributions of the positions. The p-value of
+a score is then a lookup of the survival function, vectorized over all the hits.
+
+The distributions of the modules of a class are written in a `.npz` file: `scoreMin` and `scoreStep` (module) define the
+grid and `survival` (module, nBins) gives P(score >= scoreMin + k*scoreStep). The discretization error of a score is at
+most `filterLength*scoreStep/2`.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnFilterPvalue.py AC_oneHotSeqs.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt -o mnnFilterPvalues.npz
+
+import os
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+
+import lazyImport
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import stageProfiler
+
+from typing import Dict, Sequence, Union
+
+def getBackground(oneHotSeqs:npt.NDArray, seqChunkSize:int=10000, pseudocount:float=1.)->npt.NDArray[np.float64]:
+    """
+    Get the base frequencies of one-hot encoded sequences. The positions without base ('N') are not counted.
+
+    Parameters
+    ----------
+    oneHotSeqs : NDArray
+        The one-hot encoded sequences, of shape (nbSeq, seqSize, alphabetSize). It can be memory-mapped.
+    seqChunkSize : int, optional
+        The number of sequences read at once, by default 10000.
+    pseudocount : float, optional
+        The pseudocount added to the count of each base, by default 1.
+
+    Returns
+    -------
+    NDArray[np.float64]
+        The frequency of each base, 1D array (alphabetSize).
+    """
+    counts=np.full(np.shape(oneHotSeqs)[-1], pseudocount, dtype=np.float64)
+    for seqStart in range(0, len(oneHotSeqs), seqChunkSize):
+        counts+=np.sum(np.asarray(oneHotSeqs[seqStart:seqStart+seqChunkSize]), axis=(0, 1), dtype=np.float64)
+    return counts/np.sum(counts)
+
+def getScoreDistribution(
+    weights:npt.NDArray[np.floating],
+    background:npt.NDArray[np.floating],
+    nBins:int=10000
+)->tuple[float, float, npt.NDArray[np.float64]]:
+    """
+    Get the exact distribution of the score of a position weight matrix on a grid of scores.
+
+    Parameters
+    ----------
+    weights : NDArray[np.floating]
+        The filter, 2D array (filterLength, alphabetSize).
+    background : NDArray[np.floating]
+        The frequency of each base, 1D array (alphabetSize).
+    nBins : int, optional
+        The number of scores of the grid, by default 10000.
+
+    Returns
+    -------
+    tuple[float, float, NDArray[np.float64]]
+        The min score, the step of the grid and the probability of each score of the grid, 1D array (nBins).
+    """
+    weights=np.asarray(weights, dtype=np.float64)
+    rowMin=np.min(weights, axis=1)
+    scoreMin=float(np.sum(rowMin))
+    scoreRange=float(np.sum(np.max(weights, axis=1)))-scoreMin
+    scoreStep=scoreRange/(nBins-1) if scoreRange>0 else 1.
+    # shift of each (position, base) on the grid, the min of each position is 0
+    shifts=np.rint((weights-rowMin[:, None])/scoreStep).astype(np.intp)
+    distribution=np.zeros(nBins, dtype=np.float64)
+    distribution[0]=1.
+    for posShifts in shifts:
+        newDistribution=np.zeros(nBins, dtype=np.float64)
+        for shift, frequency in zip(posShifts, background):
+            newDistribution[shift:]+=frequency*distribution[:nBins-shift]
+        distribution=newDistribution
+    return scoreMin, scoreStep, distribution
+
+def getFilterDistributions(
+    filterWeightList:Sequence[npt.NDArray[np.floating]],
+    background:npt.NDArray[np.floating],
+    nBins:int=10000
+)->Dict[str, np.ndarray]:
+    """
+    Get the score distributions of the filters of the modules, in the format of the `.npz` file.
+
+    Parameters
+    ----------
+    filterWeightList : Sequence[NDArray]
+        The filter of each module (see `mnnPseudoModel.getFilterWeightList`).
+    background : NDArray[np.floating]
+        The frequency of each base.
+    nBins : int, optional
+        The number of scores of the grid, by default 10000.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        "scoreMin" and "scoreStep" (module), "survival" (module, nBins) and "background" (alphabetSize).
+    """
+    scoreMin=np.empty(len(filterWeightList))
+    scoreStep=np.empty(len(filterWeightList))
+    survival=np.empty((len(filterWeightList), nBins))
+    for moduleId, weights in enumerate(filterWeightList):
+        scoreMin[moduleId], scoreStep[moduleId], distribution=getScoreDistribution(weights, background, nBins=nBins)
+        # P(score >= grid[k]), clipped for the rounding errors of the sum
+        survival[moduleId]=np.clip(np.cumsum(distribution[::-1])[::-1], 0, 1)
+    return dict(scoreMin=scoreMin, scoreStep=scoreStep, survival=survival, background=np.asarray(background))
+
+def getGridIdx(distributions:Dict[str, np.ndarray], blockIdx:npt.ArrayLike, scores:npt.ArrayLike)->npt.NDArray[np.intp]:
+    """
+    Get the index of the nearest score of the grid of each (block, score).
+    """
+    blockIdx=np.asarray(blockIdx)
+    gridIdx=np.rint((np.asarray(scores, dtype=np.float64)-distributions["scoreMin"][blockIdx])/distributions["scoreStep"][blockIdx])
+    return np.clip(gridIdx, 0, distributions["survival"].shape[1]-1).astype(np.intp)
+
+def getHitPvalues(distributions:Dict[str, np.ndarray], blockIdx:npt.ArrayLike, scores:npt.ArrayLike)->npt.NDArray[np.float64]:
+    """
+    Get the p-value of each hit: the probability of a score greater or equal under the background.
+
+    Parameters
+    ----------
+    distributions : Dict[str, np.ndarray]
+        The score distributions (see `getFilterDistributions`).
+    blockIdx : ArrayLike
+        The block of each hit.
+    scores : ArrayLike
+        The score of each hit.
+
+    Returns
+    -------
+    NDArray[np.float64]
+        The p-value of each hit.
+    """
+    blockIdx=np.asarray(blockIdx)
+    return distributions["survival"][blockIdx, getGridIdx(distributions, blockIdx, scores)]
+
+def getPvalueThresholds(distributions:Dict[str, np.ndarray], maxPvalue:float)->npt.NDArray[np.float32]:
+    """
+    Get the score threshold of each module at a p-value: a score above the threshold has a p-value <= `maxPvalue`.
+    The thresholds can be used as the thresholds of the null model (see `mnnNullModel`).
+    """
+    survival=distributions["survival"]
+    nbBin=survival.shape[1]
+    # first score of the grid with a p-value <= maxPvalue (the survival is decreasing), nbBin if none
+    firstIdx=np.sum(survival>maxPvalue, axis=1)
+    # halfway to the previous score of the grid: the scores above it are rounded to firstIdx or more
+    thresholds=distributions["scoreMin"]+(firstIdx-0.5)*distributions["scoreStep"]
+    return np.where(firstIdx<nbBin, thresholds, np.inf).astype(np.float32)
+
+def loadFilterDistributions(path:Union[str, os.PathLike])->Dict[str, np.ndarray]:
+    """
+    Load the score distributions written by this script.
+    """
+    with np.load(path) as npz:
+        return {key:npz[key] for key in npz.files}
+
+def addPvalueArguments(parser:argparse.ArgumentParser)->None:
+    """
+    Add the options reading the score distributions to a script writing hits.
+    """
+    parser.add_argument("--filterPvalues", type=str, default=None, help="Score distributions of the filters (see mnnFilterPvalue.py). The positive hits are then written as BED8+1, with the p-value of each hit in the 9th column. Default: no p-value")
+    parser.add_argument("--maxPvalue", type=float, default=None, help="With --filterPvalues, a hit is a score with a p-value <= MAXPVALUE (combined with --thresholds, the highest threshold is used). Default: a hit is a score > 0")
+
+def getArgsPvalueThresholds(args:argparse.Namespace, thresholds:npt.NDArray=None)->Union[None, npt.NDArray]:
+    """
+    Combine the thresholds at the p-value of the options of `addPvalueArguments` with other thresholds (None: none).
+    The combined thresholds are >= 0, as the hits without threshold.
+    """
+    if args.maxPvalue is None:
+        return thresholds
+    if args.filterPvalues is None:
+        raise ValueError("--filterPvalues is required with --maxPvalue")
+    pvalueThresholds=getPvalueThresholds(loadFilterDistributions(args.filterPvalues), args.maxPvalue)
+    if thresholds is not None:
+        pvalueThresholds=np.maximum(thresholds, pvalueThresholds)
+    # at a loose p-value the threshold can be negative : the zero padding of the results (positions after
+    # seqSize-filterLength) would be hits
+    return np.maximum(pvalueThresholds, 0).astype(np.float32)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compute the exact score distribution of the filter of each module under the base frequencies of the class.")
+    parser.add_argument("oneHotSeqFilePath", type=str, help="Path to the file containing the one-hot encoded sequences of the class (background frequencies).")
+    parser.add_argument("hParamsPath", type=str, help="Path to the file containing the hyperparameters of the MNN model.")
+    parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
+    parser.add_argument("-o", "--output", type=str, default="mnnFilterPvalues.npz", help="Output .npz file (default: mnnFilterPvalues.npz).")
+    parser.add_argument("--nBins", type=int, default=10000, help="Number of scores of the grid of each distribution (default: 10000).")
+    parser.add_argument("--pseudocount", type=float, default=1., help="Pseudocount added to the count of each base of the background (default: 1).")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnFilterPvalue", args)
+    with profiler.phase("background"):
+        # only the counts are needed: read by chunks
+        background=getBackground(np.load(args.oneHotSeqFilePath, mmap_mode="r"), pseudocount=args.pseudocount)
+    with profiler.phase("load model"):
+        mnnModel=mnnPseudoModel.load_model(args.hParamsPath, args.paramsPath)
+        filterWeightList=mnnPseudoModel.getFilterWeightList(mnnPseudoModel.getBlockList(mnnModel))
+        del mnnModel
+    with profiler.phase("distributions"):
+        distributions=getFilterDistributions(filterWeightList, background, nBins=args.nBins)
+    np.savez(args.output, **distributions)
+    profiler.addInputs(args.oneHotSeqFilePath, args.hParamsPath, args.paramsPath)
+    profiler.addOutputs(args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Index the MNN models of a directory: the STR classes with the paths and the checksums of their files, and the modules
+of each class with their filter length, the length of their positional weights and their weight in the model.
+
+The catalog is written as a JSON manifest, and as two TSV files (classes and modules) for Nextflow. When a previous
+manifest is given, the classes whose model files did not change (same size and modification time) are copied from it
+without loading the models.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnModelCatalog.py data/mnnModels --json mnnModelCatalog.json --classes strClassCatalog.tsv --modules strModuleCatalog.tsv
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import pathlib
+
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+import stageProfiler
+
+from typing import Dict, List, Union
+
+CATALOG_VERSION=1
+"""
+CATALOG_VERSION: int
+    Version of the manifest format. A previous manifest of another version is ignored.
+"""
+
+MODEL_FILE_PATTERN=re.compile(r"^MNN_ranks_(?P<strClass>.+)_\.pt$")
+"""
+MODEL_FILE_PATTERN: re.Pattern
+    Name of the parameters file of the model of a STR class. The hyper-parameters are in `MNN_ranks_<strClass>_params.npy`.
+"""
+
+CLASS_COLUMNS=["strClass", "hParamsPath", "paramsPath", "hParamsSha256", "paramsSha256", "nbModule"]
+"""
+CLASS_COLUMNS: list
+    Columns of the TSV catalog of the classes.
+"""
+
+MODULE_COLUMNS=["strClass", "moduleId", "filterLength", "posWeightLength", "moduleWeight", "posBias"]
+"""
+MODULE_COLUMNS: list
+    Columns of the TSV catalog of the modules.
+"""
+
+def getHParamsPath(modelsDir:os.PathLike, strClass:str)->str:
+    """
+    Get the path of the hyper-parameters file of the model of a STR class.
+    """
+    return os.path.join(modelsDir, "MNN_ranks_{}_params.npy".format(strClass))
+
+def getParamsPath(modelsDir:os.PathLike, strClass:str)->str:
+    """
+    Get the path of the parameters file of the model of a STR class.
+    """
+    return os.path.join(modelsDir, "MNN_ranks_{}_.pt".format(strClass))
+
+def listStrClasses(modelsDir:os.PathLike)->List[str]:
+    """
+    List the STR classes with a model (parameters and hyper-parameters files) in a directory, sorted.
+    """
+    strClassList=[]
+    for fileName in os.listdir(modelsDir):
+        match=MODEL_FILE_PATTERN.match(fileName)
+        if match is not None and os.path.isfile(getHParamsPath(modelsDir, match.group("strClass"))):
+            strClassList.append(match.group("strClass"))
+    return sorted(strClassList)
+
+def getFileChecksum(path:os.PathLike, bufferSize:int=1<<20)->str:
+    """
+    Get the sha256 of a file.
+    """
+    checksum=hashlib.sha256()
+    with open(path, "rb") as inputFile:
+        for buffer in iter(lambda: inputFile.read(bufferSize), b""):
+            checksum.update(buffer)
+    return checksum.hexdigest()
+
+def getFileStamp(path:os.PathLike)->Dict[str, int]:
+    """
+    Get the size and the modification time (ns) of a file, used to detect the changes.
+    """
+    fileStat=os.stat(path)
+    return {"size":fileStat.st_size, "mtimeNs":fileStat.st_mtime_ns}
+
+def getModuleCatalog(hParamsPath:os.PathLike, paramsPath:os.PathLike)->List[Dict[str, Union[int, float]]]:
+    """
+    Load a model and describe its modules.
+
+    Parameters
+    ----------
+    hParamsPath : PathLike
+        Path to the hyper-parameters of the model.
+    paramsPath : PathLike
+        Path to the parameters of the model.
+
+    Returns
+    -------
+    List[Dict[str, int or float]]
+        For each module: "moduleId", "filterLength", "posWeightLength" (number of positions of the convolution
+        output weighted by the dense layer), "moduleWeight" (weight of the module in the model) and "posBias".
+    """
+    import mnnPseudoModel
+    model=mnnPseudoModel.load_model(hParamsPath, paramsPath)
+    blockList=mnnPseudoModel.getBlockList(model)
+    filterLengthList=mnnPseudoModel.getFilterLengthList(blockList)
+    _, posBiasArray, blockWeightArray=mnnPseudoModel.getModuleWeightArrays(model)
+    return [
+        {
+            "moduleId":moduleId,
+            "filterLength":int(filterLength),
+            "posWeightLength":int(block.dense.in_features),
+            "moduleWeight":float(blockWeightArray[moduleId]),
+            "posBias":float(posBiasArray[moduleId]),
+        }
+        for moduleId, (block, filterLength) in enumerate(zip(blockList, filterLengthList))
+    ]
+
+def getClassCatalog(modelsDir:os.PathLike, strClass:str, previousClassCatalog:Union[Dict, None]=None)->Dict:
+    """
+    Describe the model of a STR class. The previous description is reused if the model files did not change.
+
+    Parameters
+    ----------
+    modelsDir : PathLike
+        The models directory.
+    strClass : str
+        The STR class.
+    previousClassCatalog : dict, optional
+        The description of the class in a previous manifest, by default None.
+
+    Returns
+    -------
+    dict
+        The description of the class: "strClass", the absolute paths, the stamps and the checksums of the files,
+        "nbModule" and "modules" (see `getModuleCatalog`).
+    """
+    hParamsPath=os.path.realpath(getHParamsPath(modelsDir, strClass))
+    paramsPath=os.path.realpath(getParamsPath(modelsDir, strClass))
+    hParamsStamp, paramsStamp=getFileStamp(hParamsPath), getFileStamp(paramsPath)
+    if (
+        previousClassCatalog is not None
+        and previousClassCatalog["hParamsPath"]==hParamsPath and previousClassCatalog["hParamsStamp"]==hParamsStamp
+        and previousClassCatalog["paramsPath"]==paramsPath and previousClassCatalog["paramsStamp"]==paramsStamp
+    ):
+        return previousClassCatalog
+    modules=getModuleCatalog(hParamsPath, paramsPath)
+    return {
+        "strClass":strClass,
+        "hParamsPath":hParamsPath,
+        "paramsPath":paramsPath,
+        "hParamsStamp":hParamsStamp,
+        "paramsStamp":paramsStamp,
+        "hParamsSha256":getFileChecksum(hParamsPath),
+        "paramsSha256":getFileChecksum(paramsPath),
+        "nbModule":len(modules),
+        "modules":modules,
+    }
+
+def loadCatalog(path:os.PathLike)->Union[Dict, None]:
+    """
+    Load a JSON manifest. Return None if it is missing, unreadable or of another version.
+    """
+    try:
+        with open(path) as catalogFile:
+            catalog=json.load(catalogFile)
+    except (OSError, ValueError):
+        return None
+    if catalog.get("version")!=CATALOG_VERSION:
+        return None
+    return catalog
+
+def getCatalog(modelsDir:os.PathLike, previousCatalog:Union[Dict, None]=None)->Dict:
+    """
+    Index the models of a directory.
+
+    Parameters
+    ----------
+    modelsDir : PathLike
+        The models directory.
+    previousCatalog : dict, optional
+        A previous manifest (see `loadCatalog`), by default None.
+
+    Returns
+    -------
+    dict
+        The manifest: "version", "modelsDir" and "classes" (see `getClassCatalog`), sorted by STR class.
+    """
+    previousClassDict={} if previousCatalog is None else {classCatalog["strClass"]:classCatalog for classCatalog in previousCatalog["classes"]}
+    return {
+        "version":CATALOG_VERSION,
+        "modelsDir":os.path.realpath(modelsDir),
+        "classes":[
+            getClassCatalog(modelsDir, strClass, previousClassDict.get(strClass))
+            for strClass in listStrClasses(modelsDir)
+        ],
+    }
+
+def getClassCatalogDf(catalog:Dict)->pd.DataFrame:
+    """
+    Get the table of the classes of a manifest (columns `CLASS_COLUMNS`).
+    """
+    return pd.DataFrame([{column:classCatalog[column] for column in CLASS_COLUMNS} for classCatalog in catalog["classes"]], columns=CLASS_COLUMNS)
+
+def getModuleCatalogDf(catalog:Dict)->pd.DataFrame:
+    """
+    Get the table of the modules of a manifest (columns `MODULE_COLUMNS`).
+    """
+    return pd.DataFrame(
+        [dict(strClass=classCatalog["strClass"], **module) for classCatalog in catalog["classes"] for module in classCatalog["modules"]],
+        columns=MODULE_COLUMNS
+    )
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Index the MNN models (MNN_ranks_<strClass>_.pt and MNN_ranks_<strClass>_params.npy) of a directory.")
+    parser.add_argument("modelsDir", type=pathlib.Path, help="The MNN models directory.")
+    parser.add_argument("--json", type=pathlib.Path, default="mnnModelCatalog.json", help="Output JSON manifest (default: mnnModelCatalog.json).")
+    parser.add_argument("--classes", type=pathlib.Path, default="strClassCatalog.tsv", help="Output TSV catalog of the classes (default: strClassCatalog.tsv).")
+    parser.add_argument("--modules", type=pathlib.Path, default="strModuleCatalog.tsv", help="Output TSV catalog of the modules (default: strModuleCatalog.tsv).")
+    parser.add_argument("--previous", type=pathlib.Path, default=None, help="A previous JSON manifest. The classes whose model files did not change are not reloaded.")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnModelCatalog", args)
+    previousCatalog=loadCatalog(args.previous) if args.previous is not None else None
+    with profiler.phase("index models"):
+        catalog=getCatalog(args.modelsDir, previousCatalog=previousCatalog)
+    if len(catalog["classes"])==0:
+        print("no MNN model in {}".format(args.modelsDir), file=sys.stderr)
+    with open(args.json, "w") as catalogFile:
+        json.dump(catalog, catalogFile, indent=1)
+    getClassCatalogDf(catalog).to_csv(args.classes, sep="\t", index=False)
+    getModuleCatalogDf(catalog).to_csv(args.modules, sep="\t", index=False)
+    profiler.addInputs(args.modelsDir, args.previous)
+    profiler.addOutputs(args.json, args.classes, args.modules)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Null model of the MNN module scores: empirical score thresholds of each module at chosen false-positive rates.
+
+The sequences of a class are shuffled while preserving their dinucleotide counts (Altschul-Erikson shuffle, vectorized
+over a batch of sequences and shuffles), go through the same inference as the real sequences
+(`mnnProcess.getBlocksResultsArray`) and the threshold of a module at a false positive rate `fpr` is the score exceeded
+by at most `fpr` of the valid positions of the shuffled sequences. A hit is then a score `> threshold` instead of
+`> 0`.
+
+The sequences are processed by batches of `batchSize` shuffled sequences and only the largest null scores needed by the
+largest rate are kept: about `2*fpr*nbSeq*nbShuffle*nbPos` scores by module at most, so the memory grows with the
+number of shuffles through the number of kept scores, but not with the size of the batches of shuffled sequences.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnNullModel.py AC_oneHotSeqs.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt -o mnnNullThresholds.tsv --nbShuffle 20 --fpr 0.01 0.001
+
+import os
+import sys
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import stageProfiler
+
+from typing import Sequence, Union
+
+THRESHOLD_COLUMNS=["moduleId", "filterLength", "fpr", "threshold", "nbNullPosition", "nbNullHit"]
+"""
+THRESHOLD_COLUMNS: list
+    Columns of the threshold table: one line by (module, false positive rate). `nbNullHit` is the number of positions
+    of the shuffled sequences with a score > 0.
+"""
+
+def dinucleotideShuffle(
+    baseIdxSeqs:npt.NDArray[np.integer],
+    nbShuffle:int=1,
+    alphabetSize:int=4,
+    rng:np.random.Generator=None
+)->npt.NDArray[np.int8]:
+    """
+    Shuffle sequences while preserving their dinucleotide counts (and their first and last bases), with the
+    Altschul-Erikson algorithm, vectorized over all the shuffles.
+
+    The sequence is an Eulerian path in the graph of its dinucleotides. A last exit edge is drawn for each base (the
+    draws which do not form a tree rooted at the last base are drawn again), the other edges of each base are put in a
+    random order before it, and the walk from the first base gives the shuffled sequence. The bases form at most
+    `alphabetSize+1` vertices, so the loops are over the vertices and the positions, never over the sequences.
+
+    Parameters
+    ----------
+    baseIdxSeqs : NDArray[np.integer]
+        The base index of each position (see `mnnProcess.getOneHotBaseIdx`), of shape (nbSeq, seqSize). The index
+        `alphabetSize` ('N') is a base like the others.
+    nbShuffle : int, optional
+        The number of shuffles of each sequence, by default 1.
+    alphabetSize : int, optional
+        The size of the alphabet, by default 4.
+    rng : np.random.Generator, optional
+        The random generator, by default a new unseeded generator.
+
+    Returns
+    -------
+    NDArray[np.int8]
+        The shuffled base indices, of shape (nbSeq*nbShuffle, seqSize). The shuffles of the sequence `i` are the lines
+        `i*nbShuffle` to `(i+1)*nbShuffle-1`.
+    """
+    rng=np.random.default_rng() if rng is None else rng
+    seqs=np.repeat(np.asarray(baseIdxSeqs, dtype=np.intp), nbShuffle, axis=0)
+    nbRow, seqSize=seqs.shape
+    if seqSize<3:
+        return seqs.astype(np.int8)
+    nbVertex=alphabetSize+1
+    rows=np.arange(nbRow)
+    src, dst, lastBase=seqs[:, :-1], seqs[:, 1:], seqs[:, -1]
+    keys=rng.random(src.shape)
+    isLastEdge=np.zeros(src.shape, dtype=bool)
+    # draw the last exit edges: the edge with the smallest key of each vertex, drawn again until they form a tree
+    todo=rows
+    while len(todo)>0:
+        todoSrc, todoKeys=src[todo], keys[todo]
+        lastEdgeIdx=np.empty((len(todo), nbVertex), dtype=np.intp)
+        hasEdge=np.empty((len(todo), nbVertex), dtype=bool)
+        for vertex in range(nbVertex):
+            vertexKeys=np.where(todoSrc==vertex, todoKeys, np.inf)
+            lastEdgeIdx[:, vertex]=np.argmin(vertexKeys, axis=1)
+            hasEdge[:, vertex]=np.isfinite(vertexKeys[np.arange(len(todo)), lastEdgeIdx[:, vertex]])
+        isTreeVertex=hasEdge & (np.arange(nbVertex)!=lastBase[todo, None])
+        # the root and the vertices without edge point to themselves
+        nextVertex=np.where(isTreeVertex, np.take_along_axis(dst[todo], lastEdgeIdx, axis=1), np.arange(nbVertex))
+        reached=np.broadcast_to(np.arange(nbVertex), nextVertex.shape)
+        for _ in range(nbVertex):
+            reached=np.take_along_axis(nextVertex, reached, axis=1)
+        isTree=np.all(~isTreeVertex | (reached==lastBase[todo, None]), axis=1)
+        treeRows, treeVertex=np.nonzero(isTreeVertex & isTree[:, None])
+        isLastEdge[todo[treeRows], lastEdgeIdx[treeRows, treeVertex]]=True
+        todo=todo[~isTree]
+        keys[todo]=rng.random((len(todo), seqSize-1))
+    # edges of each vertex in a random order, the last exit edge at the end
+    order=np.argsort(src*2+isLastEdge+keys, axis=1, kind="stable")
+    sortedDst=np.take_along_axis(dst, order, axis=1)
+    del order, keys, isLastEdge
+    edgeCounts=np.stack([np.count_nonzero(src==vertex, axis=1) for vertex in range(nbVertex)], axis=1)
+    edgePointer=np.cumsum(edgeCounts, axis=1)-edgeCounts
+    shuffledSeqs=np.empty((nbRow, seqSize), dtype=np.int8)
+    vertex=seqs[:, 0]
+    shuffledSeqs[:, 0]=vertex
+    for pos in range(1, seqSize):
+        edgeIdx=edgePointer[rows, vertex]
+        edgePointer[rows, vertex]+=1
+        vertex=sortedDst[rows, edgeIdx]
+        shuffledSeqs[:, pos]=vertex
+    return shuffledSeqs
+
+def baseIdxToOneHot(baseIdxSeqs:npt.NDArray[np.integer], alphabetSize:int=4, dtype:npt.DTypeLike=np.float32)->npt.NDArray:
+    """
+    Convert base indices into one-hot encoded sequences (the index `alphabetSize` gives a null vector), the inverse of
+    `mnnProcess.getOneHotBaseIdx`.
+    """
+    return np.eye(alphabetSize+1, alphabetSize, dtype=dtype)[baseIdxSeqs]
+
+def getLargestScores(scores:npt.NDArray, nbKept:int)->npt.NDArray:
+    """
+    Get the `nbKept` largest scores (unordered), all the scores if there are fewer.
+    """
+    if len(scores)<=nbKept:
+        return scores
+    return np.partition(scores, len(scores)-nbKept)[len(scores)-nbKept:]
+
+def getNullThresholdDf(
+    oneHotSeqs:npt.NDArray,
+    mnnModel:mnnPseudoModel.Net,
+    fprList:Sequence[float]=(0.01, 0.001),
+    nbShuffle:int=20,
+    batchSize:int=10000,
+    seed:int=None
+)->pd.DataFrame:
+    """
+    Compute the empirical score threshold of each module at each false positive rate, on dinucleotide shuffles of the
+    sequences.
+
+    Parameters
+    ----------
+    oneHotSeqs : NDArray
+        The one-hot encoded sequences, of shape (nbSeq, seqSize, alphabetSize). It can be memory-mapped.
+    mnnModel : mnnPseudoModel.Net
+        The MNN model.
+    fprList : Sequence[float], optional
+        The false positive rates (by position), by default (0.01, 0.001).
+    nbShuffle : int, optional
+        The number of shuffles of each sequence, by default 20.
+    batchSize : int, optional
+        The number of shuffled sequences going through the model at once, by default 10000.
+    seed : int, optional
+        The seed of the shuffles, by default None.
+
+    Returns
+    -------
+    pd.DataFrame
+        The threshold table (see `THRESHOLD_COLUMNS`).
+    """
+    rng=np.random.default_rng(seed)
+    nbSeq, seqSize, alphabetSize=np.shape(oneHotSeqs)
+    blockList=mnnPseudoModel.getBlockList(mnnModel)
+    filterLengthList=mnnPseudoModel.getFilterLengthList(blockList)
+    nbBlock=len(filterLengthList)
+    # the positions after seqSize-filterLength are the padding of the convolution
+    nbValidPos=np.array([seqSize-filterLength+1 for filterLength in filterLengthList])
+    nbNullPosition=nbSeq*nbShuffle*nbValidPos
+    # the threshold at a rate is the k-th largest null score, k=floor(fpr*nbNullPosition): keep the k+1 largest
+    nbKept=np.floor(max(fprList)*nbNullPosition).astype(np.int64)+1
+    # the kept scores of each block : the batches are appended and cut to the nbKept largest once the buffer exceeds
+    # 2*nbKept, so each score is partitioned a bounded number of times (linear in nbSeq)
+    topScoreList=[[] for _ in range(nbBlock)]
+    bufferSizes=np.zeros(nbBlock, dtype=np.int64)
+    nbNullHit=np.zeros(nbBlock, dtype=np.int64)
+    seqBatchSize=max(1, batchSize//nbShuffle)
+    for seqStart in range(0, nbSeq, seqBatchSize):
+        baseIdxSeqs=mnnProcess.getOneHotBaseIdx(np.asarray(oneHotSeqs[seqStart:seqStart+seqBatchSize]))
+        shuffledSeqs=baseIdxToOneHot(dinucleotideShuffle(baseIdxSeqs, nbShuffle=nbShuffle, alphabetSize=alphabetSize, rng=rng), alphabetSize=alphabetSize)
+        nullResultsArray, _=mnnProcess.getBlocksResultsArray(blockList, shuffledSeqs, filterLengthList)
+        del shuffledSeqs
+        for blockIdx in range(nbBlock):
+            # only the positive scores can exceed a threshold (the thresholds are >= 0)
+            scores=nullResultsArray[blockIdx, :, :nbValidPos[blockIdx]]
+            scores=scores[scores>0]
+            nbNullHit[blockIdx]+=len(scores)
+            topScoreList[blockIdx].append(scores)
+            bufferSizes[blockIdx]+=len(scores)
+            if bufferSizes[blockIdx]>2*nbKept[blockIdx]:
+                topScoreList[blockIdx]=[getLargestScores(np.concatenate(topScoreList[blockIdx]), nbKept[blockIdx])]
+                bufferSizes[blockIdx]=len(topScoreList[blockIdx][0])
+        del nullResultsArray
+    rowList=[]
+    for blockIdx, filterLength in enumerate(filterLengthList):
+        topScores=np.sort(getLargestScores(np.concatenate(topScoreList[blockIdx]+[np.empty(0, dtype=np.float32)]), nbKept[blockIdx]))[::-1]
+        for fpr in fprList:
+            # at most k null positions have a score > the (k+1)-th largest score
+            k=int(np.floor(fpr*nbNullPosition[blockIdx]))
+            threshold=float(topScores[k]) if k<len(topScores) else 0.
+            rowList.append(dict(
+                moduleId=blockIdx, filterLength=filterLength, fpr=fpr, threshold=threshold,
+                nbNullPosition=nbNullPosition[blockIdx], nbNullHit=nbNullHit[blockIdx]
+            ))
+    return pd.DataFrame(rowList, columns=THRESHOLD_COLUMNS)
+
+def loadModuleThresholds(path:Union[str, os.PathLike], fpr:float, nbModule:int=None)->np.ndarray:
+    """
+    Read the thresholds of the modules at a false positive rate from a threshold table.
+
+    Parameters
+    ----------
+    path : PathLike
+        The threshold table (TSV, see `THRESHOLD_COLUMNS`).
+    fpr : float
+        The false positive rate, one of the rates of the table.
+    nbModule : int, optional
+        The number of modules, by default the number of modules of the table.
+
+    Returns
+    -------
+    np.ndarray
+        The threshold of each module, 1D array (module). A module missing from the table gets 0.
+    """
+    thresholdDf=pd.read_csv(path, sep="\t")
+    thresholdDf=thresholdDf[np.isclose(thresholdDf["fpr"], fpr, rtol=1e-6, atol=0)]
+    if len(thresholdDf)==0:
+        raise ValueError("{}: no threshold at the false positive rate {}".format(path, fpr))
+    nbModule=int(thresholdDf["moduleId"].max())+1 if nbModule is None else nbModule
+    thresholds=np.zeros(nbModule, dtype=np.float32)
+    thresholds[thresholdDf["moduleId"].to_numpy()]=thresholdDf["threshold"].to_numpy()
+    return thresholds
+
+def addThresholdArguments(parser:argparse.ArgumentParser)->None:
+    """
+    Add the options reading the null model thresholds to a script using the hits.
+    """
+    parser.add_argument("--thresholds", type=str, default=None, help="Threshold table of the null model (see mnnNullModel.py): a hit of a module is a score above its threshold. Default: a hit is a score > 0")
+    parser.add_argument("--fpr", type=float, default=None, help="False positive rate of the thresholds read in --thresholds (required with --thresholds).")
+
+def getArgsThresholds(args:argparse.Namespace, nbModule:int)->Union[None, np.ndarray]:
+    """
+    Get the thresholds of the options of `addThresholdArguments`, None without threshold table.
+    """
+    if args.thresholds is None:
+        return None
+    if args.fpr is None:
+        raise ValueError("--fpr is required with --thresholds")
+    return loadModuleThresholds(args.thresholds, args.fpr, nbModule=nbModule)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Compute the score threshold of each module at false positive rates, on dinucleotide shuffles of the sequences.")
+    parser.add_argument("oneHotSeqFilePath", type=str, help="Path to the file containing the one-hot encoded sequences of the class.")
+    parser.add_argument("hParamsPath", type=str, help="Path to the file containing the hyperparameters of the MNN model.")
+    parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
+    parser.add_argument("-o", "--output", type=str, default="-", help="Output TSV threshold table. Use '-' for stdout. Default: stdout")
+    parser.add_argument("--fpr", type=float, nargs="+", default=[0.01, 0.001], help="False positive rates, by position (default: 0.01 0.001).")
+    parser.add_argument("--nbShuffle", type=int, default=20, help="Number of shuffles of each sequence (default: 20).")
+    parser.add_argument("--batchSize", type=int, default=10000, help="Number of shuffled sequences going through the model at once (default: 10000).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the shuffles. Default: random")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnNullModel", args)
+    with profiler.phase("load one-hot"):
+        # the sequences are read by batches
+        oneHotSeqs=np.load(args.oneHotSeqFilePath, mmap_mode="r")
+    with profiler.phase("load model"):
+        mnnModel=mnnPseudoModel.load_model(args.hParamsPath, args.paramsPath)
+    with profiler.phase("shuffle and convolution"):
+        thresholdDf=getNullThresholdDf(oneHotSeqs, mnnModel, fprList=args.fpr, nbShuffle=args.nbShuffle, batchSize=args.batchSize, seed=args.seed)
+    thresholdDf.to_csv(args.output if args.output!="-" else sys.stdout, sep="\t", index=False)
+    profiler.addInputs(args.oneHotSeqFilePath, args.hParamsPath, args.paramsPath)
+    profiler.addOutputs(None if args.output=="-" else args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 06/13/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '06/13/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -26,13 +28,14 @@ PathLikeOrBuffer=typing.Union[os.PathLike, io.TextIOWrapper]
 
 
 import numpy as np
-import pandas as pd
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
 
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
+torch=lazyImport.lazyModule("torch")
+nn=lazyImport.lazyModule("torch.nn")
+F=lazyImport.lazyModule("torch.nn.functional")
 
-import mnnPseudoModel 
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
 
 # model:Net=load_model(paramsPath, keysPath)
 # blockList:nn.ModuleList=getBlockList(model)
@@ -142,11 +145,105 @@ def getBlocksResultsArray(
     mnnMaxResultsArray=mnnResultsMaxTorch.detach().cpu().numpy()
     return mnnResultsArray, mnnMaxResultsArray
 
+HIT_COMPACTION_MODES=("none", "merge", "nms")
+"""
+HIT_COMPACTION_MODES: tuple
+    Modes of `compactMnnHits`:
+    - "none" : every positive position is a hit.
+    - "merge" : the overlapping windows of a block in a sequence are merged into a single interval.
+    - "nms" : non-maximum suppression, only the windows with the best score within the filter length are kept.
+"""
+
+def compactMnnHits(
+    blockIdx:npt.NDArray[np.integer],
+    seqIdx:npt.NDArray[np.integer],
+    matchIdx:npt.NDArray[np.integer],
+    scores:npt.NDArray[np.floating],
+    filterLengthList:Sequence[int],
+    mode:str="merge"
+)->tuple[npt.NDArray, npt.NDArray, npt.NDArray, npt.NDArray, npt.NDArray, npt.NDArray]:
+    """
+    Compact the hits of each (block, sequence): merge the overlapping windows or keep only the local maxima.
+
+    The hits should be sorted by block, sequence and position, as returned by `np.nonzero(mnnResultsArray>0)`. The 
+    groups and the runs of overlapping windows are found with differences between consecutive hits, so no loop over 
+    the hits is done.
+
+    Parameters
+    ----------
+    blockIdx : NDArray[np.integer]
+        The block index of each hit.
+    seqIdx : NDArray[np.integer]
+        The sequence index of each hit.
+    matchIdx : NDArray[np.integer]
+        The position of each hit (start of the window).
+    scores : NDArray[np.floating]
+        The score of each hit.
+    filterLengthList : Sequence[int]
+        List of filter lengths for each block.
+    mode : str, optional
+        The compaction mode, by default "merge". See `HIT_COMPACTION_MODES`.
+        - "merge" : windows of a run of overlapping windows (distance between consecutive positions lower than the 
+        filter length) are merged into [first position, last position + filter length[.
+        - "nms" : a window is kept if its score is strictly greater than the scores of the windows starting in the 
+        filter length before it and greater or equal than the scores of the windows starting in the filter length after
+        it (ties are resolved in favor of the leftmost window).
+
+    Returns
+    -------
+    tuple[NDArray, NDArray, NDArray, NDArray, NDArray, NDArray]
+        For each compacted interval : the block index, the sequence index, the start, the stop (excluded), the max score
+        and the summit (position of the window with the max score).
+    """
+    blockIdx, seqIdx, matchIdx, scores=np.asarray(blockIdx), np.asarray(seqIdx), np.asarray(matchIdx), np.asarray(scores)
+    filterLengths=np.asarray(filterLengthList)[blockIdx]
+    if mode=="none" or len(blockIdx)==0:
+        return blockIdx, seqIdx, matchIdx, matchIdx+filterLengths, scores, matchIdx
+    sameGroup=(np.diff(blockIdx)==0) & (np.diff(seqIdx)==0)
+    distance=np.diff(matchIdx)
+    if mode=="merge":
+        # a new interval starts when the block or the sequence changes or when the windows do not overlap
+        newInterval=np.concatenate([[True], ~(sameGroup & (distance<filterLengths[1:]))])
+        intervalStarts=np.flatnonzero(newInterval)
+        intervalEnds=np.append(intervalStarts[1:], len(blockIdx))-1
+        intervalIdx=np.cumsum(newInterval)-1
+        maxScores=np.maximum.reduceat(scores, intervalStarts)
+        # first hit of each interval reaching the max score
+        isMax=scores==maxScores[intervalIdx]
+        maxHitIdx=np.flatnonzero(isMax)
+        _, firstMaxIdx=np.unique(intervalIdx[maxHitIdx], return_index=True)
+        summits=matchIdx[maxHitIdx[firstMaxIdx]]
+        return (
+            blockIdx[intervalStarts],
+            seqIdx[intervalStarts],
+            matchIdx[intervalStarts],
+            matchIdx[intervalEnds]+filterLengths[intervalEnds],
+            maxScores,
+            summits
+        )
+    if mode=="nms":
+        nbHit=len(blockIdx)
+        leftMax=np.full(nbHit, -np.inf)
+        rightMax=np.full(nbHit, -np.inf)
+        # compare each hit with its k-th next hit: at most filterLength-1 hits can start in the window
+        for k in range(1, int(np.max(filterLengths))):
+            if k>=nbHit:
+                break
+            neighbour=(blockIdx[k:]==blockIdx[:-k]) & (seqIdx[k:]==seqIdx[:-k]) & (matchIdx[k:]-matchIdx[:-k]<filterLengths[k:])
+            if not np.any(neighbour):
+                break
+            rightMax[:-k]=np.where(neighbour, np.maximum(rightMax[:-k], scores[k:]), rightMax[:-k])
+            leftMax[k:]=np.where(neighbour, np.maximum(leftMax[k:], scores[:-k]), leftMax[k:])
+        keep=(scores>leftMax) & (scores>=rightMax)
+        return blockIdx[keep], seqIdx[keep], matchIdx[keep], matchIdx[keep]+filterLengths[keep], scores[keep], matchIdx[keep]
+    raise ValueError("unknown compaction mode : {}. Available modes : {}".format(mode, ", ".join(HIT_COMPACTION_MODES)))
+
 def getMnnIntervals(
     mnnResultsArray:npt.NDArray,
     filterLengthList:Sequence[int],
     sequenceNames:Sequence[str]=None,
-    blockNames:Sequence[str]=None
+    blockNames:Sequence[str]=None,
+    compaction:str="none"
 ):
     """
     Compute the hit intervals of MNN results based on the maximum results array.
@@ -161,6 +258,10 @@ def getMnnIntervals(
         Array of sequence names, by default None.
     blockNames : ArrayLike[str], optional
         Array of block names, by default None.
+    compaction : str, optional
+        Compaction of the hits of each (block, sequence), by default "none" (one interval by positive position). See 
+        `compactMnnHits`. With compaction, the score is the max score of the interval and a "summit" column gives the 
+        position of the window with this score.
     """
     if sequenceNames is None :
         sequenceNames = [str(i) for i in range(np.shape(mnnResultsArray)[1])]
@@ -169,22 +270,20 @@ def getMnnIntervals(
         blockNames=[str(i) for i in range (len(mnnResultsArray))]
     blockNames=np.asarray(blockNames)
     blockIdx, seqIdx, matchIdx=np.nonzero(mnnResultsArray>0)
+    score=mnnResultsArray[(blockIdx, seqIdx, matchIdx)].reshape(-1)
+    blockIdx, seqIdx, begin, end, score, summit=compactMnnHits(blockIdx, seqIdx, matchIdx, score, filterLengthList, mode=compaction)
     sequences=sequenceNames[seqIdx]
     blocks=blockNames[blockIdx]
-    filterLengthList=np.asarray(filterLengthList)
-    filterLengths=filterLengthList[blockIdx]
-    begin=matchIdx
-    end=matchIdx+filterLengths
-    score=mnnResultsArray[(blockIdx, seqIdx, matchIdx)].reshape(-1)
-    return pd.DataFrame(
-        data={
-            "sequence_name":sequences,
-            "start":begin,
-            "stop":end,
-            "block":blocks,
-            "score":score
-        }
-    )
+    data={
+        "sequence_name":sequences,
+        "start":begin,
+        "stop":end,
+        "block":blocks,
+        "score":score
+    }
+    if compaction!="none":
+        data["summit"]=summit
+    return pd.DataFrame(data=data)
 
 
 def getMnnScoreMatrix(
@@ -203,28 +302,273 @@ def getMnnScoreMatrix(
     )
 
 
+def getOneHotBaseIdx(oneHotSeqs:npt.NDArray)->npt.NDArray[np.int8]:
+    """
+    Convert one-hot encoded sequences into base indices.
+
+    Parameters
+    ----------
+    oneHotSeqs : NDArray
+        Array of one-hot encoded sequences of shape (nbSeq, seqSize, alphabetSize).
+
+    Returns
+    -------
+    NDArray[np.int8]
+        The index of the base in the alphabet for each position, of shape (nbSeq, seqSize). Positions without base (e.g. 
+        'N', encoded by a null vector) get the index `alphabetSize`.
+    """
+    alphabetSize=np.shape(oneHotSeqs)[-1]
+    baseIdx=np.argmax(oneHotSeqs, axis=-1).astype(np.int8)
+    baseIdx[np.max(oneHotSeqs, axis=-1)<=0]=alphabetSize
+    return baseIdx
+
+def accumulateHitPfm(
+    pfmCounts:npt.NDArray[np.floating],
+    baseIdxSeqs:npt.NDArray[np.integer],
+    blockIdx:npt.NDArray[np.integer],
+    seqIdx:npt.NDArray[np.integer],
+    startIdx:npt.NDArray[np.integer],
+    hitLengths:npt.NDArray[np.integer],
+    weights:npt.NDArray[np.floating]=None,
+    chunkSize:int=100000
+)->npt.NDArray[np.floating]:
+    """
+    Add the bases covered by hits to position frequency matrices, in place.
+
+    The hits are processed by chunks of `chunkSize`: for each chunk, the (block, offset, base) of every covered position
+    is turned into a flat index and counted with `np.bincount`. No sequence is copied.
+
+    Parameters
+    ----------
+    pfmCounts : NDArray[np.floating]
+        The counts to update, of shape (nbBlock, maxFilterLength, alphabetSize).
+    baseIdxSeqs : NDArray[np.integer]
+        The base indices of the sequences, of shape (nbSeq, seqSize). See `getOneHotBaseIdx`.
+    blockIdx : NDArray[np.integer]
+        The block index of each hit.
+    seqIdx : NDArray[np.integer]
+        The sequence index of each hit.
+    startIdx : NDArray[np.integer]
+        The start position of each hit.
+    hitLengths : NDArray[np.integer]
+        The length of each hit (filter length of its block).
+    weights : NDArray[np.floating], optional
+        The weight of each hit (e.g. the score), by default None (weight of 1).
+    chunkSize : int, optional
+        The number of hits processed at once, by default 100000.
+
+    Returns
+    -------
+    NDArray[np.floating]
+        `pfmCounts`, updated.
+    """
+    nbBlock, maxFilterLength, alphabetSize=np.shape(pfmCounts)
+    seqSize=np.shape(baseIdxSeqs)[1]
+    offsets=np.arange(maxFilterLength)
+    flatCounts=pfmCounts.reshape(-1)
+    for chunkStart in range(0, len(blockIdx), chunkSize):
+        chunk=slice(chunkStart, chunkStart+chunkSize)
+        positions=np.asarray(startIdx[chunk])[:, np.newaxis]+offsets
+        valid=(offsets<np.asarray(hitLengths[chunk])[:, np.newaxis]) & (positions<seqSize)
+        bases=baseIdxSeqs[np.asarray(seqIdx[chunk])[:, np.newaxis], np.minimum(positions, seqSize-1)]
+        valid&=(bases<alphabetSize)
+        flatIdx=((np.asarray(blockIdx[chunk])[:, np.newaxis]*maxFilterLength+offsets)*alphabetSize+bases)[valid]
+        flatWeights=None
+        if weights is not None:
+            flatWeights=np.broadcast_to(np.asarray(weights[chunk], dtype=np.float64)[:, np.newaxis], valid.shape)[valid]
+        flatCounts+=np.bincount(flatIdx, weights=flatWeights, minlength=flatCounts.size)
+    return pfmCounts
+
+def getMnnHitPfmArray(
+    mnnResultsArray:npt.NDArray,
+    baseIdxSeqs:npt.NDArray[np.integer],
+    filterLengthList:Sequence[int],
+    weightByScore:bool=False,
+    seqChunkSize:int=10000,
+    alphabetSize:int=4
+)->npt.NDArray[np.floating]:
+    """
+    Compute the position frequency matrix of the hits (score > 0) of every block in a single pass over the results.
+
+    The results are read by chunks of `seqChunkSize` sequences, so `mnnResultsArray` can be memory-mapped.
+
+    Parameters
+    ----------
+    mnnResultsArray : NDArray
+        The MNN results array of shape (nbBlock, nbSeq, seqSize).
+    baseIdxSeqs : NDArray[np.integer]
+        The base indices of the sequences, of shape (nbSeq, seqSize). See `getOneHotBaseIdx`.
+    filterLengthList : Sequence[int]
+        List of filter lengths for each block.
+    weightByScore : bool, optional
+        If True, weight each hit by its score, by default False.
+    seqChunkSize : int, optional
+        The number of sequences read at once, by default 10000.
+    alphabetSize : int, optional
+        The size of the alphabet, by default 4.
+
+    Returns
+    -------
+    NDArray[np.floating]
+        The counts of shape (nbBlock, maxFilterLength, alphabetSize). Offsets beyond the filter length of a block are 0.
+    """
+    filterLengthArray=np.asarray(filterLengthList)
+    nbBlock, nbSeq, _=np.shape(mnnResultsArray)
+    pfmCounts=np.zeros((nbBlock, np.max(filterLengthArray), alphabetSize))
+    for seqStart in range(0, nbSeq, seqChunkSize):
+        resultsChunk=np.asarray(mnnResultsArray[:, seqStart:seqStart+seqChunkSize])
+        blockIdx, seqIdx, matchIdx=np.nonzero(resultsChunk>0)
+        weights=resultsChunk[blockIdx, seqIdx, matchIdx] if weightByScore else None
+        accumulateHitPfm(pfmCounts, baseIdxSeqs, blockIdx, seqIdx+seqStart, matchIdx, filterLengthArray[blockIdx], weights=weights)
+    return pfmCounts
+
 def getMnnHitPfm(
     mnnIntervalsDf:pd.DataFrame,
     seqNames:npt.ArrayLike, 
     oneHotSeqs:npt.NDArray[np.str_],
     weightByScore=False
 ):
+    """
+    Compute the position frequency matrix of the hits of each block.
+
+    Parameters
+    ----------
+    mnnIntervalsDf : pd.DataFrame
+        The hit intervals (see `getMnnIntervals`). It is not modified.
+    seqNames : ArrayLike
+        Array of sequence names.
+    oneHotSeqs : NDArray
+        Array of one-hot encoded sequences.
+    weightByScore : bool, optional
+        If True, weight each hit by its score, by default False.
+
+    Returns
+    -------
+    dict
+        The position frequency matrix (2D array (pos, alphabet)) of each block name.
+    """
+    seqNames=np.asarray(seqNames)
     sorter=np.argsort(seqNames)
-    mnnIntervalsSeqIndex=sorter[np.searchsorted(seqNames, mnnIntervalsDf["sequence_name"], sorter=sorter)]
-    mnnIntervalsDf["seqIdx"]=mnnIntervalsSeqIndex
-    def getMnnHitPfmPerBlock_(grp:pd.DataFrame):
-        indices=np.asarray([np.arange(start,stop) for start,stop in zip(grp["start"], grp["stop"])])
-        weight=grp["score"].to_numpy()  if weightByScore else np.asarray([1])
-        return np.sum(
-            np.take_along_axis(
-                oneHotSeqs[grp["seqIdx"]]*weight[..., np.newaxis, np.newaxis], 
-                indices=indices[...,np.newaxis], 
-                axis=1
-            ),
-            axis=0
-        )
-    blockIdArray=mnnIntervalsDf["block"].unique()
+    seqIdx=sorter[np.searchsorted(seqNames, mnnIntervalsDf["sequence_name"], sorter=sorter)]
+    blockCodes, blockIdArray=pd.factorize(mnnIntervalsDf["block"])
+    startIdx=mnnIntervalsDf["start"].to_numpy()
+    hitLengths=mnnIntervalsDf["stop"].to_numpy()-startIdx
+    if len(hitLengths)==0:
+        return {}
+    pfmCounts=np.zeros((len(blockIdArray), np.max(hitLengths), np.shape(oneHotSeqs)[-1]))
+    weights=mnnIntervalsDf["score"].to_numpy() if weightByScore else None
+    accumulateHitPfm(pfmCounts, getOneHotBaseIdx(oneHotSeqs), blockCodes, seqIdx, startIdx, hitLengths, weights=weights)
     pfmList={}
-    for blockId in blockIdArray :
-        pfmList[blockId]=getMnnHitPfmPerBlock_(mnnIntervalsDf.loc[mnnIntervalsDf["block"]==blockId])
-    return pfmList
\ No newline at end of file
+    for blockCode, blockId in enumerate(blockIdArray):
+        blockLength=np.max(hitLengths[blockCodes==blockCode])
+        pfmList[blockId]=pfmCounts[blockCode, :blockLength]
+    return pfmList
+
+
+SUMMARY_POOL_FUNCTIONS=("mean", "median", "min", "max")
+"""
+SUMMARY_POOL_FUNCTIONS: tuple
+    Pooling functions of the positional activation score stored in the activation summary.
+"""
+
+def getSummaryActivationKey(poolFunction:str, bias:bool=False)->str:
+    """
+    Get the key of a pooled positional activation score in the activation summary.
+
+    Parameters
+    ----------
+    poolFunction : str
+        The pooling function, one of `SUMMARY_POOL_FUNCTIONS`.
+    bias : bool, optional
+        If True, the key of the score with the bias, by default False.
+
+    Returns
+    -------
+    str
+        The key, e.g. "activation_mean" or "activationBias_median".
+    """
+    prefix="activationBias" if bias else "activation"
+    return "{}_{}".format(prefix, poolFunction)
+
+def getActivationSummary(
+    mnnResultsArray:npt.NDArray,
+    posCoefMatrix:npt.NDArray,
+    posBiasArray:npt.NDArray,
+    blockWeightArray:npt.NDArray,
+    filterLengthList:Sequence[int]=None
+)->dict[str, npt.NDArray]:
+    """
+    Summarize the MNN results of a class by block and position.
+
+    The summary contains:
+    - `seqCount` : the number of sequences.
+    - `hitCount` : the number of sequences with a score > 0, 2D array (block, pos).
+    - `scoreSum`, `scoreSumSq`, `scoreMin`, `scoreMax` : the sum, the sum of squares, the min and the max of the 
+    convolution scores, 2D arrays (block, pos).
+    - `activation_<pool>` and `activationBias_<pool>` for each pool of `SUMMARY_POOL_FUNCTIONS` : the positional 
+    activation score (ReLU(score) x position coefficient x block weight, optionally with the position bias spread over
+    the positions) pooled over the sequences, 2D arrays (block, pos). These are the values plotted by plotMnnScore.py.
+    - `filterLengths` : the filter length of each block, if given.
+
+    The activation score is an affine function of ReLU(score) at each position, so it is pooled exactly from the pools 
+    of ReLU(score) (min and max are swapped for negative coefficients). Only one block is expanded in memory at a time.
+
+    Parameters
+    ----------
+    mnnResultsArray : NDArray
+        The MNN results array of shape (nbBlock, nbSeq, seqSize).
+    posCoefMatrix : NDArray
+        The position coefficients of the blocks, 2D array (block, seqSize). See `mnnPseudoModel.getModuleWeightArrays`.
+    posBiasArray : NDArray
+        The position biases of the blocks, 1D array (block).
+    blockWeightArray : NDArray
+        The weights of the blocks, 1D array (block).
+    filterLengthList : Sequence[int], optional
+        List of filter lengths for each block, by default None.
+
+    Returns
+    -------
+    dict[str, NDArray]
+        The summary arrays by name.
+    """
+    nbBlock, nbSeq, seqSize=np.shape(mnnResultsArray)
+    summary={
+        "seqCount":np.asarray(nbSeq),
+        "hitCount":np.zeros((nbBlock, seqSize), dtype=np.int64),
+        "scoreSum":np.zeros((nbBlock, seqSize)),
+        "scoreSumSq":np.zeros((nbBlock, seqSize)),
+        "scoreMin":np.zeros((nbBlock, seqSize)),
+        "scoreMax":np.zeros((nbBlock, seqSize)),
+    }
+    reluPoolDict={poolFunction:np.zeros((nbBlock, seqSize)) for poolFunction in SUMMARY_POOL_FUNCTIONS}
+    for blockIdx in range(nbBlock):
+        # copy : ReLU is applied in place below
+        scores=np.array(mnnResultsArray[blockIdx], dtype=np.float64)
+        summary["hitCount"][blockIdx]=np.count_nonzero(scores>0, axis=0)
+        summary["scoreSum"][blockIdx]=scores.sum(axis=0)
+        summary["scoreSumSq"][blockIdx]=np.square(scores).sum(axis=0)
+        summary["scoreMin"][blockIdx]=scores.min(axis=0)
+        summary["scoreMax"][blockIdx]=scores.max(axis=0)
+        relu=np.maximum(scores, 0, out=scores)
+        reluPoolDict["mean"][blockIdx]=relu.mean(axis=0)
+        reluPoolDict["median"][blockIdx]=np.median(relu, axis=0)
+        reluPoolDict["min"][blockIdx]=relu.min(axis=0)
+        reluPoolDict["max"][blockIdx]=relu.max(axis=0)
+        del scores, relu
+    # activation = ReLU(score) * (posCoef*blockWeight) + [posBias/seqSize*blockWeight]
+    slope=posCoefMatrix[:, :seqSize]*blockWeightArray[:, np.newaxis]
+    intercept=(posBiasArray/seqSize*blockWeightArray)[:, np.newaxis]
+    negativeSlope=slope<0
+    for bias in (False, True):
+        offset=intercept if bias else 0
+        activationPoolDict={
+            "mean":slope*reluPoolDict["mean"]+offset,
+            "median":slope*reluPoolDict["median"]+offset,
+            "min":slope*np.where(negativeSlope, reluPoolDict["max"], reluPoolDict["min"])+offset,
+            "max":slope*np.where(negativeSlope, reluPoolDict["min"], reluPoolDict["max"])+offset,
+        }
+        for poolFunction, activationPool in activationPoolDict.items():
+            summary[getSummaryActivationKey(poolFunction, bias=bias)]=activationPool
+    if filterLengthList is not None:
+        summary["filterLengths"]=np.asarray(filterLengthList)
+    return summary
@@ -139,4 +139,51 @@ def getFilterLengthList(blockList:nn.ModuleList)->list[int]:
         The list of filter lengths.
     """
     filterLengthList=[block.conv.kernel_size[0] for block in blockList]
-    return filterLengthList
\ No newline at end of file
+    return filterLengthList
+
+def getFilterWeightList(blockList:nn.ModuleList)->list[npt.NDArray[np.floating]]:
+    """
+    Get the convolution filters of the given block list as position weight matrices.
+
+    Parameters
+    ----------
+    blockList : nn.ModuleList
+        The list of blocks.
+
+    Returns
+    -------
+    List[NDArray]
+        The filter of each block, 2D array (filterLength, alphabetSize).
+    """
+    # the convolution weight has the shape (out channel=1, in channel=1, filterLength, alphabetSize)
+    return [block.conv.weight.detach().cpu().numpy()[0, 0] for block in blockList]
+
+def getModuleWeightArrays(
+    model:Net,
+    seqSize:int=101
+)->Tuple[npt.NDArray[np.floating], npt.NDArray[np.floating], npt.NDArray[np.floating]]:
+    """
+    Get the weights applied on the convolution scores of each block as numpy arrays.
+
+    Parameters
+    ----------
+    model : Net
+        The neural network model.
+    seqSize : int, optional
+        The sequence size, by default 101.
+
+    Returns
+    -------
+    Tuple[NDArray, NDArray, NDArray]
+        - The position coefficients (dense layer weights) of the blocks, 2D array (block, pos) padded with 0 up to `seqSize`.
+        - The position biases (dense layer biases) of the blocks, 1D array (block).
+        - The weights of the blocks (linear layer of the model), 1D array (block).
+    """
+    blockList=getBlockList(model)
+    posCoefList=[block.dense.weight.detach().cpu().numpy().flatten() for block in blockList]
+    posCoefMatrix=np.zeros((len(posCoefList), seqSize))
+    for blockId, posCoef in enumerate(posCoefList):
+        posCoefMatrix[blockId, 0:len(posCoef)]=posCoef
+    posBiasArray=np.asarray([block.dense.bias.detach().cpu().numpy() for block in blockList]).flatten()
+    blockWeightArray=model.linear.weight.detach().cpu().numpy().flatten()
+    return posCoefMatrix, posBiasArray, blockWeightArray
@@ -7,6 +7,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 07/13/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '07/19/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -19,12 +21,19 @@ import warnings
 import numpy as np
 #setup a random generator with a fix seed
 npRandomGen=np.random.default_rng(seed=42)
-import pandas as pd
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
 
 from typing import Any, Sequence, Union
 import numpy.typing as npt
 
-import mnnPseudoModel
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+import chunkedResults
+import seqNameDict
+import mnnNullModel
+import mnnFilterPvalue
+import stageProfiler
 
 def getScore(mnnResultsArray: np.ndarray, blockIdx: np.ndarray, seqIdx: np.ndarray, matchIdx: np.ndarray) -> np.ndarray:
     """
@@ -48,7 +57,15 @@ def getScore(mnnResultsArray: np.ndarray, blockIdx: np.ndarray, seqIdx: np.ndarr
     """
     return mnnResultsArray[blockIdx, seqIdx, matchIdx]
 
-def getMnnHitPos(mnnResultsArray: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+def getHitThresholds(mnnResultsArray: np.ndarray, thresholds: Sequence[float] = None) -> Union[float, np.ndarray]:
+    """
+    Get the hit thresholds broadcastable against the MNN results: 0, or the threshold of each block.
+    """
+    if thresholds is None:
+        return 0
+    return np.asarray(thresholds, dtype=mnnResultsArray.dtype)[:, None, None]
+
+def getMnnHitPos(mnnResultsArray: np.ndarray, thresholds: Sequence[float] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Get the indices of positive hits from the MNN results.
 
@@ -56,16 +73,18 @@ def getMnnHitPos(mnnResultsArray: np.ndarray) -> tuple[np.ndarray, np.ndarray, n
     ----------
     mnnResultsArray : numpy.ndarray
         The 3D NumPy array representing the MNN results.
+    thresholds : Sequence[float], optional
+        The hit threshold of each block (see `mnnNullModel`), default None (a hit is a score > 0).
 
     Returns
     -------
     tuple[np.ndarray, np.ndarray, np.ndarray]
         A tuple containing three arrays representing block indices, sequence indices, and match indices of positive hits.
     """
-    blockIdx, seqIdx, matchIdx=np.nonzero(mnnResultsArray>0)
+    blockIdx, seqIdx, matchIdx=np.nonzero(mnnResultsArray>getHitThresholds(mnnResultsArray, thresholds))
     return blockIdx, seqIdx, matchIdx
 
-def getMnnNonHitPos(mnnResultsArray: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+def getMnnNonHitPos(mnnResultsArray: np.ndarray, thresholds: Sequence[float] = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
     Get the indices of non-hit positions from the MNN results.
 
@@ -73,13 +92,15 @@ def getMnnNonHitPos(mnnResultsArray: np.ndarray) -> tuple[np.ndarray, np.ndarray
     ----------
     mnnResultsArray : numpy.ndarray
         The 3D NumPy array representing the MNN results.
+    thresholds : Sequence[float], optional
+        The hit threshold of each block (see `mnnNullModel`), default None (a hit is a score > 0).
 
     Returns
     -------
     tuple[np.ndarray, np.ndarray, np.ndarray]
         A tuple containing three arrays representing block indices, sequence indices, and match indices of non-hit positions.
     """
-    blockIdx, seqIdx, matchIdx=np.nonzero(mnnResultsArray<=0)
+    blockIdx, seqIdx, matchIdx=np.nonzero(mnnResultsArray<=getHitThresholds(mnnResultsArray, thresholds))
     return blockIdx, seqIdx, matchIdx
 
 def _randomDrawByBlock(
@@ -252,7 +273,9 @@ def getBed(
     offset: Union[int, tuple[int, int]] = 0,
     scores: Any = 0,
     blockNames: Any = None,
-    seqNames: Any = None
+    seqNames: Any = None,
+    hitLengths: Any = None,
+    summitIdx: Any = None
 ) -> pd.DataFrame:
     """
     Generate a DataFrame in BED format containing the positions of matches. Return an empty DataFrame if there's no entry.
@@ -279,6 +302,11 @@ def getBed(
         Names for each block (default is None).
     seqNames : Any, optional
         Names for each sequence (default is None).
+    hitLengths : Any, optional
+        Length of each match, used instead of the filter length of its block (default is None). For merged hits.
+    summitIdx : Any, optional
+        Position of the best window of each match (default is None). If given, the window is written in the thickStart 
+        and thickEnd columns (BED8).
 
     Returns
     -------
@@ -316,7 +344,8 @@ def getBed(
     # verify if not overflow
     chromStart=matchIdx-leftMargin+leftOffset 
     chromStart=np.maximum(chromStart, minStart)
-    chromEnd=matchIdx+filterLengths[blockIdx]+rightMargin+leftOffset
+    hitLengths=filterLengths[blockIdx] if hitLengths is None else np.asarray(hitLengths)
+    chromEnd=matchIdx+hitLengths+rightMargin+leftOffset
     chromEnd=np.minimum(chromEnd, maxEnd)
     names=blockNames[blockIdx]
     bedDf=pd.DataFrame(
@@ -338,6 +367,11 @@ def getBed(
             "strand":str
         }
     )
+    if summitIdx is not None:
+        # the best window of the match, inside [chromStart, chromEnd[
+        summitIdx=np.asarray(summitIdx)
+        bedDf["thickStart"]=np.maximum(summitIdx+leftOffset, chromStart)
+        bedDf["thickEnd"]=np.minimum(summitIdx+filterLengths[blockIdx]+leftOffset, chromEnd)
     return bedDf
 
 def generateMnnResultBedFiles(
@@ -346,7 +380,10 @@ def generateMnnResultBedFiles(
     seqNames: Sequence[str] = None,
     margin: Union[int, tuple[int, int]] = 0,
     offset: Union[int, tuple[int, int]] = 0,
-    allNegHits=False
+    allNegHits=False,
+    compaction: str = "none",
+    thresholds: Sequence[float] = None,
+    distributions: dict = None
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generate BED files for positive and randomly selected negative hits from the MNN results.
@@ -363,6 +400,18 @@ def generateMnnResultBedFiles(
         Margin to add on both sides of the match positions (default is 0).
     offset : int or tuple[int, int], optional
         Offset to add to the match positions (default is 0).
+    allNegHits : bool, optional
+        Return all negative hits instead of a random subset (default is False).
+    compaction : str, optional
+        Compaction of the positive hits of each (block, sequence) (default is "none"). See `mnnProcess.compactMnnHits`.
+        With compaction, the score is the max score of the hit and the best window is written in the thickStart and 
+        thickEnd columns.
+    thresholds : Sequence[float], optional
+        The hit threshold of each block, from the null model (see `mnnNullModel`) (default is None: a hit is a score > 0).
+    distributions : dict, optional
+        The score distributions of the filters (see `mnnFilterPvalue`). If given, the positive hits are written as
+        BED8+1: the thickStart and thickEnd columns (the whole hit without compaction), then the p-value of the hit in
+        a column "pValue", always the 9th (default is None).
 
     Returns
     -------    
@@ -372,10 +421,16 @@ def generateMnnResultBedFiles(
         - The second DataFrame contains the BED data for randomly selected negative hits.
     """
     # get positive mnnResult hits
-    posBlockIdx, posSeqIdx, posMatchIdx=getMnnHitPos(mnnResultsArray)
+    posBlockIdx, posSeqIdx, posMatchIdx=getMnnHitPos(mnnResultsArray, thresholds=thresholds)
     posScores=getScore(mnnResultsArray, posBlockIdx, posSeqIdx, posMatchIdx)
+    posHitLengths=posSummitIdx=None
+    if compaction!="none":
+        posBlockIdx, posSeqIdx, posMatchIdx, posEndIdx, posScores, posSummitIdx=mnnProcess.compactMnnHits(
+            posBlockIdx, posSeqIdx, posMatchIdx, posScores, filterLengthList, mode=compaction
+        )
+        posHitLengths=posEndIdx-posMatchIdx
     # get all negative mnnResult hits
-    allNegBlockIdx, allNegSeqIdx, allNegMatchIdx=getMnnNonHitPos(mnnResultsArray)
+    allNegBlockIdx, allNegSeqIdx, allNegMatchIdx=getMnnNonHitPos(mnnResultsArray, thresholds=thresholds)
     # draw negative mnnResults hits
     sequenceLength=mnnResultsArray.shape[2]
     if allNegHits :
@@ -395,8 +450,17 @@ def generateMnnResultBedFiles(
         margin=margin,
         offset=offset,
         scores=posScores,
-        seqNames=seqNames
+        seqNames=seqNames,
+        hitLengths=posHitLengths,
+        summitIdx=posSummitIdx
     )
+    if distributions is not None:
+        # BED8+1: the 7th and 8th columns are integers (thickStart, thickEnd) with or without compaction, so the
+        # p-value is always the 9th
+        if "thickStart" not in posBedDf:
+            posBedDf["thickStart"]=posBedDf["chromStart"]
+            posBedDf["thickEnd"]=posBedDf["chromEnd"]
+        posBedDf["pValue"]=mnnFilterPvalue.getHitPvalues(distributions, posBlockIdx, posScores)
     negBedDf=getBed(
         negBlockIdx,
         negSeqIdx,
@@ -413,43 +477,66 @@ def generateMnnResultBedFiles(
 
 def parseArgs():
     parser = argparse.ArgumentParser(description="Generate BED files for positive and randomly selected negative hits from MNN results.")
-    parser.add_argument("mnnResultsArray", type=pathlib.Path, help="Path to the .npy file containing the MNN results array.")
-    parser.add_argument("seqNames", type=pathlib.Path, help="Path to the .npy file containing the sequence names.")
+    parser.add_argument("mnnResultsArray", type=pathlib.Path, help="Path to the .npy or chunked file (see chunkedResults.py) containing the MNN results array.")
+    parser.add_argument("seqNames", type=pathlib.Path, help="Path to the .npy file containing the sequence names (or the sequence IDs with --seqNameDict).")
+    parser.add_argument("--seqNameDict", type=pathlib.Path, default=None, help="Path to the dictionary of the sequence names (see seqNameDict.py). The sequence IDs are turned into names only for the written lines.")
     parser.add_argument("modelHParam", type=pathlib.Path, help="path to hyper-parameters of the MNN model")
     parser.add_argument("modelParam", type=pathlib.Path, help="path to parameters of the MNN model")
     parser.add_argument("--outputDir", type=pathlib.Path, default=pathlib.Path.cwd(), help="Path to the output directory for saving the BED files.")
     parser.add_argument("--margin", type=int, nargs="+", default=[0], help="Margin to add on both sides of the match positions (default is 0).")
     parser.add_argument("--offset", type=int, nargs="+", default=[0], help="Offset to add to the match positions (default is 0).")
     parser.add_argument("--allNegHits", action="store_true", help="Return all negative hits instead of a subset.")
+    mnnNullModel.addThresholdArguments(parser)
+    mnnFilterPvalue.addPvalueArguments(parser)
+    stageProfiler.addProfileArguments(parser)
+    parser.add_argument("--compactHits", type=str, default="none", choices=mnnProcess.HIT_COMPACTION_MODES, help="Compaction of the positive hits of each (module, sequence): 'merge' overlapping windows or keep local maxima ('nms'). The best window is written in the thickStart and thickEnd columns (default: none).")
     return parser.parse_args()
 
 def main():
     args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnResultBedFilsGenerator", args)
 
     # Load data from files
-    mnnResultsArray = np.load(args.mnnResultsArray)
-    seqNames = np.load(args.seqNames)
+    with profiler.phase("load results"):
+        mnnResultsArray = np.asarray(chunkedResults.loadMnnResultsArray(args.mnnResultsArray))
+    with profiler.phase("load names"):
+        seqNames = np.load(args.seqNames)
 
     # Load model and get filter length list
-    model = mnnPseudoModel.load_model(args.modelHParam, args.modelParam)
-    blockList = mnnPseudoModel.getBlockList(model)
-    filterLengthList = mnnPseudoModel.getFilterLengthList(blockList)
-    del blockList
-    del model
+    with profiler.phase("load model"):
+        model = mnnPseudoModel.load_model(args.modelHParam, args.modelParam)
+        blockList = mnnPseudoModel.getBlockList(model)
+        filterLengthList = mnnPseudoModel.getFilterLengthList(blockList)
+        del blockList
+        del model
 
     # Generate BED files
     margin = args.margin
     offset = args.offset
     allNegHits=args.allNegHits
-    posBedDf, negBedDf = generateMnnResultBedFiles(mnnResultsArray, filterLengthList, margin=margin, offset=offset, seqNames=seqNames, allNegHits=allNegHits)
+    thresholds=mnnNullModel.getArgsThresholds(args, len(filterLengthList))
+    thresholds=mnnFilterPvalue.getArgsPvalueThresholds(args, thresholds)
+    distributions=None if args.filterPvalues is None else mnnFilterPvalue.loadFilterDistributions(args.filterPvalues)
+    with profiler.phase("nonzero and DataFrame build"):
+        posBedDf, negBedDf = generateMnnResultBedFiles(mnnResultsArray, filterLengthList, margin=margin, offset=offset, seqNames=seqNames, allNegHits=allNegHits, compaction=args.compactHits, thresholds=thresholds, distributions=distributions)
+    if args.seqNameDict is not None and seqNameDict.isSeqIdArray(seqNames):
+        with profiler.phase("decode names"):
+            seqNameDictionary=seqNameDict.SeqNameDict.load(args.seqNameDict)
+            posBedDf=seqNameDict.decodeBedChrom(posBedDf, seqNameDictionary)
+            negBedDf=seqNameDict.decodeBedChrom(negBedDf, seqNameDictionary)
+            del seqNameDictionary
 
     # Save the BED files
     outputDir=args.outputDir
     outputDir.mkdir(parents=True, exist_ok=True)
-    posBedDf.to_csv(outputDir / "positiveMnnHits.bed", sep="\t", index=False, header=False)
-    del posBedDf
-    negBedDf.to_csv(outputDir / "negativeMnnHits.bed", sep="\t", index=False, header=False)
-    del negBedDf
+    with profiler.phase("CSV write"):
+        posBedDf.to_csv(outputDir / "positiveMnnHits.bed", sep="\t", index=False, header=False)
+        del posBedDf
+        negBedDf.to_csv(outputDir / "negativeMnnHits.bed", sep="\t", index=False, header=False)
+        del negBedDf
+    profiler.addInputs(args.mnnResultsArray, args.seqNames, args.modelHParam, args.modelParam, args.seqNameDict, args.thresholds, args.filterPvalues)
+    profiler.addOutputs(outputDir / "positiveMnnHits.bed", outputDir / "negativeMnnHits.bed")
+    profiler.write()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Store and query the (sequence x module) matrix of the max MNN score of each module in each sequence.
+
+The matrix is stored in a parquet file indexed by the sequence name, sorted by sequence name, with two columns by
+module: `max_<moduleId>` (max score, float32) and `argmax_<moduleId>` (position of the max score, int16). A query only
+reads the columns it needs, and the row groups are pruned with their statistics when looking for a sequence, so the
+dense results array is never read.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnScoreMatrix.py mnnScoreMatrix.parquet --moduleId 3 --top 10
+# python mnnScoreMatrix.py mnnScoreMatrix.parquet --sequenceName "chr1_10000;AC;+"
+
+import os
+import sys
+import argparse
+import pathlib
+
+import numpy as np
+import numpy.typing as npt
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+import stageProfiler
+
+from typing import Sequence, Union
+PathLike=Union[str, pathlib.Path, os.PathLike]
+
+INDEX_NAME="sequence_name"
+"""
+INDEX_NAME: str
+    Name of the index (sequence names) of the score matrix.
+"""
+
+ROW_GROUP_SIZE=10000
+"""
+ROW_GROUP_SIZE: int
+    Number of sequences by row group in the parquet file. Small row groups allow to read a single sequence quickly.
+"""
+
+def getMaxColumn(moduleId:Union[int, str])->str:
+    """
+    Get the name of the max score column of a module.
+    """
+    return "max_{}".format(moduleId)
+
+def getArgMaxColumn(moduleId:Union[int, str])->str:
+    """
+    Get the name of the position of the max score column of a module.
+    """
+    return "argmax_{}".format(moduleId)
+
+def getScoreMatrixDf(
+    mnnMaxResultsArray:npt.NDArray,
+    mnnArgMaxResultsArray:npt.NDArray,
+    sequenceNames:Sequence[str],
+    blockNames:Sequence[str]=None
+)->pd.DataFrame:
+    """
+    Build the score matrix DataFrame, sorted by sequence name.
+
+    Parameters
+    ----------
+    mnnMaxResultsArray : NDArray
+        The max score of each block in each sequence, of shape (nbBlock, nbSeq).
+    mnnArgMaxResultsArray : NDArray
+        The position of the max score of each block in each sequence, of shape (nbBlock, nbSeq).
+    sequenceNames : Sequence[str]
+        The sequence names.
+    blockNames : Sequence[str], optional
+        The block names, by default None (block indices).
+
+    Returns
+    -------
+    pd.DataFrame
+        The score matrix indexed by sequence name, with the columns `max_<block>` and `argmax_<block>`.
+    """
+    if blockNames is None :
+        blockNames=[str(i) for i in range (len(mnnMaxResultsArray))]
+    columns={}
+    for blockIdx, blockName in enumerate(blockNames):
+        columns[getMaxColumn(blockName)]=np.asarray(mnnMaxResultsArray[blockIdx], dtype=np.float32)
+        columns[getArgMaxColumn(blockName)]=np.asarray(mnnArgMaxResultsArray[blockIdx], dtype=np.int16)
+    scoreMatrixDf=pd.DataFrame(columns, index=pd.Index(np.asarray(sequenceNames, dtype=str), name=INDEX_NAME))
+    return scoreMatrixDf.sort_index()
+
+def saveScoreMatrix(scoreMatrixDf:pd.DataFrame, path:PathLike)->None:
+    """
+    Save the score matrix in a parquet file.
+
+    Parameters
+    ----------
+    scoreMatrixDf : pd.DataFrame
+        The score matrix (see `getScoreMatrixDf`).
+    path : PathLike
+        The output path.
+    """
+    scoreMatrixDf.to_parquet(path, index=True, row_group_size=ROW_GROUP_SIZE)
+
+def getModuleIdList(columnNames:Sequence[str])->list[str]:
+    """
+    Get the module ids from the column names of a score matrix.
+    """
+    prefix=getMaxColumn("")
+    return [columnName[len(prefix):] for columnName in columnNames if columnName.startswith(prefix)]
+
+def getTopSequences(path:PathLike, moduleId:Union[int, str], n:int=10)->pd.DataFrame:
+    """
+    Get the sequences with the best max score for a module. Only the columns of the module are read.
+
+    Parameters
+    ----------
+    path : PathLike
+        Path to the score matrix file.
+    moduleId : int or str
+        The module id.
+    n : int, optional
+        The number of sequences, by default 10.
+
+    Returns
+    -------
+    pd.DataFrame
+        The `n` best sequences (index), with the columns "max" and "argmax", sorted by decreasing score.
+    """
+    maxColumn, argMaxColumn=getMaxColumn(moduleId), getArgMaxColumn(moduleId)
+    moduleDf=pd.read_parquet(path, columns=[maxColumn, argMaxColumn])
+    return moduleDf.nlargest(n, maxColumn).rename(columns={maxColumn:"max", argMaxColumn:"argmax"})
+
+def getFiringModules(path:PathLike, sequenceName:str, threshold:float=0)->pd.DataFrame:
+    """
+    Get the modules with a max score above a threshold in a sequence. Only the row groups which can contain the
+    sequence are read.
+
+    Parameters
+    ----------
+    path : PathLike
+        Path to the score matrix file.
+    sequenceName : str
+        The sequence name.
+    threshold : float, optional
+        The threshold, by default 0 (hits).
+
+    Returns
+    -------
+    pd.DataFrame
+        The modules (index "moduleId") with the columns "max" and "argmax", sorted by decreasing score. Empty if the
+        sequence is not in the matrix.
+    """
+    sequenceDf=pd.read_parquet(path, filters=[(INDEX_NAME, "==", sequenceName)])
+    moduleIdList=getModuleIdList(sequenceDf.columns)
+    if len(sequenceDf)==0:
+        return pd.DataFrame({"max":pd.Series(dtype=np.float32), "argmax":pd.Series(dtype=np.int16)}, index=pd.Index([], name="moduleId"))
+    modulesDf=pd.DataFrame(
+        {
+            "max":sequenceDf[[getMaxColumn(moduleId) for moduleId in moduleIdList]].to_numpy()[0],
+            "argmax":sequenceDf[[getArgMaxColumn(moduleId) for moduleId in moduleIdList]].to_numpy()[0],
+        },
+        index=pd.Index(moduleIdList, name="moduleId")
+    )
+    return modulesDf.loc[modulesDf["max"]>threshold].sort_values("max", ascending=False)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Query the (sequence x module) max score matrix (getMnnResults.py --scoreMatrix).")
+    parser.add_argument("scoreMatrix", type=pathlib.Path, help="Path to the score matrix parquet file.")
+    queryGroup = parser.add_mutually_exclusive_group(required=True)
+    queryGroup.add_argument("-m", "--moduleId", type=str, help="Return the sequences with the best scores for this module.")
+    queryGroup.add_argument("-s", "--sequenceName", type=str, help="Return the modules firing on this sequence.")
+    parser.add_argument("-n", "--top", type=int, default=10, help="Number of sequences returned with --moduleId (default: 10).")
+    parser.add_argument("-t", "--threshold", type=float, default=0, help="Min score of a firing module with --sequenceName (default: 0).")
+    parser.add_argument("-o", "--output", type=str, default="-", help="Path to the output TSV file. Use '-' for stdout. Default: stdout")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnScoreMatrix", args)
+    with profiler.phase("query"):
+        if args.moduleId is not None:
+            resultsDf=getTopSequences(args.scoreMatrix, args.moduleId, n=args.top)
+        else :
+            resultsDf=getFiringModules(args.scoreMatrix, args.sequenceName, threshold=args.threshold)
+    output=args.output if args.output != "-" else sys.stdout
+    with profiler.phase("CSV write"):
+        resultsDf.to_csv(output, sep="\t")
+    profiler.addInputs(args.scoreMatrix)
+    profiler.addOutputs(None if args.output == "-" else args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Single entry point of the scripts of `bin/`: `mnnTools.py <subcommand> [options]` runs `<subcommand>.py [options]`.
+
+Only the module of the subcommand is imported, and the scripts import their heavy dependencies (torch, pandas,
+matplotlib, Biopython, bs4, requests) at their first use (see `lazyImport.py`), so a subcommand pays only for what it
+runs. The scripts are still run directly by the pipeline (Nextflow puts `bin/` in the PATH) and can be imported as
+modules with `bin/` in `sys.path`. With `--worker`, the subcommand runs in a warm worker (see `mnnWorker.py`).
+
+The options of `mnnTools.py` come before the subcommand, the options of the subcommand after it: `mnnTools.py
+--profile dispatch.json plotMnnScore --profile plot.json ...` writes the report of the dispatch (startup, worker round
+trip) and the report of the phases of the script.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnTools.py getMnnResults AC_oneHotSeqs.npy AC_seqNames.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt -o mnnResultsArray.npy
+
+import os
+import sys
+import argparse
+import importlib
+
+import mnnWorker
+import stageProfiler
+
+from typing import List
+
+SUBCOMMANDS={
+    "aggregateProfiles":"Join the profile reports of the tasks into tables.",
+    "analyzeStrClass":"Analyze a STR class in a single process (inference, bed files, plots).",
+    "chunkedResults":"Convert a MNN results array between the .npy and the chunked formats.",
+    "filterMotifComparison":"Compare the filters of all the classes with the JASPAR motifs and cluster them.",
+    "filterSeqNameAndOneHotSeq":"Filter the sequence names and one-hot sequences of a STR class.",
+    "getMnnHitPfm":"Compute the position frequency matrix of the hits of each module.",
+    "getMnnResults":"Compute the MNN results array of a STR class.",
+    "homerResultsToCsv":"Compile a HOMER results directory into a CSV file.",
+    "homerScheduler":"Plan the HOMER jobs by estimated cost and run them.",
+    "kmerPrescreen":"Test the enrichment of the k-mers in the hits of each module before HOMER.",
+    "memoryEstimate":"Estimate the peak memory of the heavy stages of each STR class.",
+    "mnnFilterPvalue":"Compute the exact score distribution of the filter of each module.",
+    "mnnModelCatalog":"Index the MNN models of a directory.",
+    "mnnNullModel":"Compute the module thresholds on dinucleotide shuffled sequences.",
+    "mnnResultBedFilsGenerator":"Generate the bed files of the positive and negative hits.",
+    "mnnScoreMatrix":"Query the (sequence x module) max score matrix.",
+    "motifOccupancy":"Scan a class with the known motifs and compare them to the module hits.",
+    "plotMnnScore":"Plot the activation score of the modules.",
+    "pwm2homer":"Convert motifs to the HOMER format with log-odds thresholds.",
+    "requestJasparDatabase":"Write the JASPAR motif database.",
+    "selectForeground":"Select a ranked and capped foreground of a module for HOMER.",
+    "seqNameDict":"Build the dictionary of the sequence names.",
+}
+"""
+SUBCOMMANDS: dict[str, str]
+    The subcommands (module names in `bin/`) and their short help. The help is written here so that listing the
+    subcommands does not import them.
+"""
+
+def runSubcommand(subcommand:str, argv:List[str])->None:
+    """
+    Run the `main` of the module of a subcommand with the command-line arguments `argv`.
+    """
+    module=importlib.import_module(subcommand)
+    # the scripts parse sys.argv, the program name gives the usage "mnnTools.py <subcommand>"
+    sys.argv=["{} {}".format(sys.argv[0], subcommand), *argv]
+    module.main()
+
+def parseArgs(argv:List[str]=None)->tuple[argparse.Namespace, List[str]]:
+    """
+    Parse the subcommand. The other arguments are left to the subcommand.
+
+    Returns
+    -------
+    tuple[argparse.Namespace, List[str]]
+        The parsed arguments and the arguments of the subcommand.
+    """
+    parser=argparse.ArgumentParser(
+        description="Run a script of the pipeline. 'mnnTools.py <subcommand> --help' gives the options of a subcommand.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="subcommands:\n"+"\n".join("  {:<28}{}".format(name, helpText) for name, helpText in SUBCOMMANDS.items())
+    )
+    parser.add_argument("subcommand", type=str, choices=list(SUBCOMMANDS), metavar="subcommand", help="The script to run (see below).")
+    parser.add_argument("--version", action="version", version="%(prog)s {}".format(__version__))
+    parser.add_argument("--worker", type=str, default=os.environ.get(mnnWorker.WORKER_SOCKET_ENV), help="Run the subcommand in the warm worker listening on this Unix socket (see mnnWorker.py), or in this process if it is not reachable. Default: ${}, else in this process.".format(mnnWorker.WORKER_SOCKET_ENV))
+    stageProfiler.addProfileArguments(parser)
+    # the options of the subcommand (including its --help) are after the subcommand
+    argv=sys.argv[1:] if argv is None else argv
+    subcommandIdx=0
+    while subcommandIdx<len(argv) and argv[subcommandIdx].startswith("-"):
+        if argv[subcommandIdx] in ("--worker", "--profile"):
+            subcommandIdx+=2
+        elif argv[subcommandIdx]=="--profileLabel":
+            subcommandIdx+=1
+            while subcommandIdx<len(argv) and "=" in argv[subcommandIdx] and not argv[subcommandIdx].startswith("-"):
+                subcommandIdx+=1
+        else :
+            subcommandIdx+=1
+    # the subcommand first: the labels (nargs="+") do not take it
+    args=parser.parse_args(argv[subcommandIdx:subcommandIdx+1]+argv[:subcommandIdx])
+    return args, argv[subcommandIdx+1:]
+
+def main():
+    args, subcommandArgv=parseArgs()
+    # the CPU time of a subcommand run in the worker is not in this report, but in the report of the subcommand
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnTools", args)
+    profiler.labels.setdefault("subcommand", args.subcommand)
+    try:
+        if args.worker:
+            with profiler.phase("run in worker"):
+                returnCode=mnnWorker.runRemote(args.worker, args.subcommand, subcommandArgv)
+            if returnCode is not None:
+                sys.exit(returnCode)
+            # no worker: run in this process
+        with profiler.phase("run in process"):
+            runSubcommand(args.subcommand, subcommandArgv)
+    finally:
+        profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Warm worker of the subcommands of `mnnTools.py`, one per node, reachable over a Unix socket.
+
+The small per-module tasks (plots of a module, PFM, parsing of the HOMER results, foreground selection) each start an
+interpreter, import numpy, pandas and torch and reload the model and the arrays of their class. The worker imports them
+once, then forks a child process for each request: the children share the warm imports copy-on-write, run in parallel
+(at most `maxWorkers` at once) and exit after their request, so no module state (patched functions, caches, random
+generators) leaks from a request to the next.
+
+The worker process keeps an LRU cache of the MNN models (`mnnPseudoModel.load_model`) and of the read-only
+memory-mapped arrays (`np.load(..., mmap_mode="r")`), keyed by the real path, size and modification time of the files:
+the symbolic links staged by Nextflow for the tasks of a class hit the same entry. The children inherit the cache. A
+child reports the files it loaded itself (cache misses) before answering its client, and the worker loads them into
+its cache before the next fork: the next requests of the class find the model and the arrays already loaded.
+
+A request is a JSON line {"subcommand", "argv", "cwd"} sent with the standard output and error file descriptors of the
+client. The child runs the subcommand with the working directory and the output of the client, and answers
+{"returnCode"}. Start the worker with:
+
+    mnnWorker.py --socket /tmp/mnnWorker.sock &
+
+and run the subcommands with `mnnTools.py --worker /tmp/mnnWorker.sock <subcommand> [options]`. When the worker is
+absent, `mnnTools.py` runs the subcommand in its own process.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python mnnWorker.py --socket /tmp/mnnWorker.sock --maxWorkers 8 --maxModels 16 --maxArrays 64
+
+import os
+import sys
+import json
+import socket
+import argparse
+import functools
+import importlib
+import selectors
+import traceback
+import collections
+
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import stageProfiler
+
+WORKER_SOCKET_ENV="MNN_WORKER_SOCKET"
+"""
+WORKER_SOCKET_ENV: str
+    Environment variable giving the socket of the worker to `mnnTools.py` (as `--worker`).
+"""
+
+MAX_REQUEST_SIZE=1<<20
+"""
+MAX_REQUEST_SIZE: int
+    Max size of a request (bytes).
+"""
+
+class LruCache:
+    """
+    Least recently used cache of a bounded number of entries. The keys loaded by `get` (misses) are recorded in
+    `missList` with the arguments of their loading.
+
+    Parameters
+    ----------
+    maxSize : int
+        The max number of entries, 0 disables the cache.
+    """
+    def __init__(self, maxSize:int):
+        self.maxSize=maxSize
+        self.entries=collections.OrderedDict()
+        self.missList=[]
+        self.nbHit=0
+        self.nbMiss=0
+
+    def get(self, key:Any, load:Callable[[], Any], loadArgs:List[str]=None)->Any:
+        """
+        Get the entry of a key, loaded with `load` if it is not in the cache.
+        """
+        if key in self.entries:
+            self.nbHit+=1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.nbMiss+=1
+        value=load()
+        if self.maxSize>0:
+            self.entries[key]=value
+            self.missList.append(loadArgs)
+            while len(self.entries)>self.maxSize:
+                self.entries.popitem(last=False)
+        return value
+
+def getFileKey(path:Union[str, os.PathLike])->Tuple[str, int, int]:
+    """
+    Get the cache key of a file: its real path, its size and its modification time.
+    """
+    realPath=os.path.realpath(path)
+    fileStat=os.stat(realPath)
+    return realPath, fileStat.st_size, fileStat.st_mtime_ns
+
+def installCaches(maxModels:int, maxArrays:int)->Dict[str, LruCache]:
+    """
+    Route the loading of the MNN models and of the read-only memory-mapped arrays of the scripts through LRU caches.
+    The arrays are shared between the requests: only the read-only mode ("r") is cached. A cache of size 0 is not
+    installed.
+
+    Returns
+    -------
+    Dict[str, LruCache]
+        The caches, by kind ("models", "arrays").
+    """
+    caches={}
+    if maxModels>0:
+        import mnnPseudoModel
+        modelCache=caches["models"]=LruCache(maxModels)
+        loadModel=mnnPseudoModel.load_model
+
+        @functools.wraps(loadModel)
+        def cachedLoadModel(paramsPath, keysPath):
+            loadArgs=[os.path.realpath(paramsPath), os.path.realpath(keysPath)]
+            return modelCache.get((getFileKey(paramsPath), getFileKey(keysPath)), lambda: loadModel(paramsPath, keysPath), loadArgs)
+
+        mnnPseudoModel.load_model=cachedLoadModel
+    if maxArrays>0:
+        import numpy as np
+        arrayCache=caches["arrays"]=LruCache(maxArrays)
+        loadArray=np.load
+
+        @functools.wraps(loadArray)
+        def cachedLoadArray(file, mmap_mode=None, *args, **kwargs):
+            if mmap_mode!="r" or args or kwargs or not isinstance(file, (str, os.PathLike)):
+                return loadArray(file, mmap_mode, *args, **kwargs)
+            return arrayCache.get(getFileKey(file), lambda: loadArray(file, mmap_mode="r"), [os.path.realpath(file)])
+
+        np.load=cachedLoadArray
+    return caches
+
+def warmCaches(caches:Dict[str, LruCache], missDict:Dict[str, List[List[str]]])->None:
+    """
+    Load into the caches of this process the files loaded by a child (its cache misses, see `LruCache`), so that the
+    next children inherit them. A file which cannot be loaded anymore is skipped.
+    """
+    loaders={}
+    if "models" in caches:
+        import mnnPseudoModel
+        loaders["models"]=mnnPseudoModel.load_model
+    if "arrays" in caches:
+        import numpy as np
+        loaders["arrays"]=lambda path: np.load(path, mmap_mode="r")
+    for kind, loadArgsList in missDict.items():
+        for loadArgs in loadArgsList:
+            try:
+                loaders[kind](*loadArgs)
+            except Exception as error:
+                print("mnnWorker: cannot cache {}: {}".format(loadArgs, error), file=sys.stderr)
+    for cache in caches.values():
+        cache.missList.clear()
+
+def runRequest(request:Dict, outputFds:List[int])->int:
+    """
+    Run the subcommand of a request in this process, with the working directory and the output of the client.
+
+    Returns
+    -------
+    int
+        The exit code of the subcommand.
+    """
+    import mnnTools
+    if request["subcommand"] not in mnnTools.SUBCOMMANDS:
+        os.write(outputFds[-1], "unknown subcommand : {}\n".format(request["subcommand"]).encode())
+        return 2
+    sys.stdout.flush()
+    sys.stderr.flush()
+    savedFds=[os.dup(1), os.dup(2)]
+    savedCwd=os.getcwd()
+    savedArgv=sys.argv
+    returnCode=0
+    try:
+        os.dup2(outputFds[0], 1)
+        os.dup2(outputFds[1], 2)
+        os.chdir(request["cwd"])
+        sys.argv=["mnnTools.py"]
+        mnnTools.runSubcommand(request["subcommand"], request["argv"])
+    except SystemExit as exit:
+        # as the interpreter: None is a success, a message is printed and is a failure
+        if exit.code is None or isinstance(exit.code, int):
+            returnCode=0 if exit.code is None else exit.code
+        else:
+            print(exit.code, file=sys.stderr)
+            returnCode=1
+    except Exception:
+        traceback.print_exc()
+        returnCode=1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(savedFds[0], 1)
+        os.dup2(savedFds[1], 2)
+        for fd in savedFds:
+            os.close(fd)
+        os.chdir(savedCwd)
+        sys.argv=savedArgv
+    return returnCode
+
+def readLine(connection:socket.socket, firstData:bytes=b"")->bytes:
+    """
+    Read a line from a socket.
+    """
+    data=firstData
+    while not data.endswith(b"\n"):
+        if len(data)>MAX_REQUEST_SIZE:
+            raise ValueError("request too large")
+        chunk=connection.recv(65536)
+        if not chunk:
+            break
+        data+=chunk
+    return data
+
+def handleConnection(connection:socket.socket, caches:Dict[str, LruCache], reportFd:int)->int:
+    """
+    Read a request from a connection, run it, report the cache misses to the worker on `reportFd` (closed) and answer
+    the exit code (in the child process of the request). The misses are reported before the answer: the next request of
+    the client finds them in the cache of the worker.
+
+    Returns
+    -------
+    int
+        The exit code of the subcommand, 1 for a bad request.
+    """
+    outputFds=[]
+    try:
+        # the output file descriptors of the client come with the first message
+        firstData, outputFds, _, _=socket.recv_fds(connection, 65536, 2)
+        request=json.loads(readLine(connection, firstData))
+        if len(outputFds)!=2:
+            raise ValueError("the request should come with the stdout and stderr file descriptors")
+        returnCode=runRequest(request, outputFds)
+        reportMisses(caches, reportFd)
+        connection.sendall((json.dumps({"returnCode":returnCode})+"\n").encode())
+        return returnCode
+    except (OSError, ValueError) as error:
+        print("mnnWorker: bad request: {}".format(error), file=sys.stderr)
+        return 1
+    finally:
+        for fd in outputFds:
+            os.close(fd)
+
+def reportMisses(caches:Dict[str, LruCache], reportFd:int)->None:
+    """
+    Write the cache misses of this process to the worker (a JSON object {kind: [load arguments]}) and close `reportFd`.
+    """
+    with open(reportFd, "w") as reportFile:
+        json.dump({kind:cache.missList for kind, cache in caches.items()}, reportFile)
+
+def serve(socketPath:str, maxWorkers:int, caches:Dict[str, LruCache])->None:
+    """
+    Serve the requests on a Unix socket, each in a forked child process, at most `maxWorkers` at once. The socket is
+    only accessible by the user. The cache misses of a child come back on a pipe, read until the child closes it, and
+    are loaded into `caches` before the next fork.
+    """
+    if os.path.exists(socketPath):
+        os.unlink(socketPath)
+    server=socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    previousUmask=os.umask(0o077)
+    try:
+        server.bind(socketPath)
+    finally:
+        os.umask(previousUmask)
+    server.listen()
+    print("mnnWorker listening on {} ({} workers)".format(socketPath, maxWorkers), file=sys.stderr)
+    selector=selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    children={} # read end of the report pipe -> [pid, report]
+    try:
+        while True:
+            # the reports first: a finished child warms the cache before the next fork
+            for key, _ in sorted(selector.select(), key=lambda event: event[0].fileobj is server):
+                if key.fileobj is not server:
+                    reportFd=key.fd
+                    data=os.read(reportFd, 65536)
+                    if data:
+                        children[reportFd][1]+=data
+                        continue
+                    # end of the report : the child is done
+                    selector.unregister(reportFd)
+                    os.close(reportFd)
+                    pid, report=children.pop(reportFd)
+                    os.waitpid(pid, 0)
+                    if report:
+                        warmCaches(caches, json.loads(report))
+                    if len(children)==maxWorkers-1:
+                        selector.register(server, selectors.EVENT_READ)
+                    continue
+                connection, _=server.accept()
+                reportFd, childReportFd=os.pipe()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid=os.fork()
+                if pid==0:
+                    # child : run the request and exit, without the cleanup of the server
+                    returnCode=1
+                    try:
+                        selector.close()
+                        server.close()
+                        os.close(reportFd)
+                        with connection:
+                            returnCode=handleConnection(connection, caches, childReportFd)
+                    except BaseException:
+                        traceback.print_exc()
+                    finally:
+                        sys.stdout.flush()
+                        sys.stderr.flush()
+                        os._exit(0 if returnCode==0 else 1)
+                os.close(childReportFd)
+                connection.close()
+                children[reportFd]=[pid, b""]
+                selector.register(reportFd, selectors.EVENT_READ)
+                # all the workers are busy : stop accepting until a child is done
+                if len(children)==maxWorkers:
+                    selector.unregister(server)
+    finally:
+        selector.close()
+        server.close()
+        os.unlink(socketPath)
+        for reportFd, (pid, _) in children.items():
+            os.close(reportFd)
+            os.waitpid(pid, 0)
+        print("mnnWorker: cache hits {}".format(
+            ", ".join("{} {}/{}".format(kind, cache.nbHit, cache.nbHit+cache.nbMiss) for kind, cache in caches.items())
+        ), file=sys.stderr)
+
+def runRemote(socketPath:str, subcommand:str, argv:List[str])->Union[int, None]:
+    """
+    Run a subcommand in the worker listening on a socket. The output of the subcommand goes to the standard output
+    and error of this process.
+
+    Returns
+    -------
+    int or None
+        The exit code of the subcommand, None if the worker is not reachable (the subcommand was not run).
+    """
+    client=socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socketPath)
+    except OSError:
+        client.close()
+        return None
+    with client:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        request=json.dumps({"subcommand":subcommand, "argv":argv, "cwd":os.getcwd()})+"\n"
+        socket.send_fds(client, [request.encode()], [sys.stdout.fileno(), sys.stderr.fileno()])
+        answer=readLine(client)
+    if not answer:
+        raise RuntimeError("the worker {} closed the connection without answer".format(socketPath))
+    return json.loads(answer)["returnCode"]
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Run the subcommands of mnnTools.py in forked children of a warm process listening on a Unix socket, with a cache of the models and memory-mapped arrays.")
+    parser.add_argument("--socket", type=str, default=os.environ.get(WORKER_SOCKET_ENV), required=os.environ.get(WORKER_SOCKET_ENV) is None, help="Path of the Unix socket (default: ${}).".format(WORKER_SOCKET_ENV))
+    parser.add_argument("--maxWorkers", type=int, default=os.cpu_count(), help="Max number of requests running at once, each in a forked process (default: number of CPUs).")
+    parser.add_argument("--maxModels", type=int, default=16, help="Number of MNN models kept in the cache (default: 16).")
+    parser.add_argument("--maxArrays", type=int, default=64, help="Number of memory-mapped arrays kept in the cache (default: 64).")
+    parser.add_argument("--preload", type=str, nargs="*", default=["numpy", "pandas", "torch", "matplotlib.pyplot"], help="Modules imported at the start (default: numpy pandas torch matplotlib.pyplot).")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    # the report of the worker is written when it stops, the requests write their own (--profile of the subcommand)
+    profiler=stageProfiler.StageProfiler.fromArgs("mnnWorker", args)
+    with profiler.phase("preload"):
+        # non interactive backend, as the scripts, before the preload of matplotlib
+        os.environ["MPLBACKEND"]="Agg"
+        for moduleName in args.preload:
+            importlib.import_module(moduleName)
+        caches=installCaches(args.maxModels, args.maxArrays)
+    try:
+        with profiler.phase("serve"):
+            serve(args.socket, args.maxWorkers, caches)
+    finally:
+        profiler.write()
+
+if __name__ == "__main__":
+    main()
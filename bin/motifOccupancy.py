@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Occupancy of the known motifs (JASPAR in the Homer format) in the sequences of a class, and its co-occurrence with the
+MNN hits.
+
+The log-odds matrices of the motifs and their reverse complements are stacked in a single bank of convolution filters
+(padded with zeros to the longest motif) and scanned on the one-hot sequences as the MNN blocks
+(`mnnPseudoModel.BlockNet`: a 2D convolution of the (seq, 1, letter, alphabet) tensor), by batches of sequences. The
+log-odds are in bits (as the Biopython PSSM used by `pwm2homer.py`) so the thresholds of the Homer file apply: a motif
+hit is a score >= its threshold, on the best strand. The MNN modules go through the same batches
+(`mnnProcess.getBlocksResultsArray`), and a module hit is a score > 0 (or > its null model threshold).
+
+Outputs:
+- the sparse occupancy table (parquet): one line by motif hit, `sequence_name`, `motif`, `position` (start on the
+  forward strand, plus `offset`), `strand` and `score`;
+- the co-occurrence table (TSV): one line by (module, motif), the number of sequences hit by the module, by the
+  motif, by both, the expected number under independence, the log2 enrichment, the number of sequences where a motif
+  hit overlaps the best window of the module and the Pearson correlation of the max scores of the module and of the
+  motif across the sequences.
+
+The statistics are accumulated batch by batch, so the memory depends on the batch size and the number of motif hits,
+not on the number of sequences.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python motifOccupancy.py AC_oneHotSeqs.npy AC_seqNames.npy MNN_ranks_AC_params.npy MNN_ranks_AC_.pt jaspar.motif --offset 450 -o motifOccupancy.parquet --cooccurrence motifCooccurrence.tsv
+
+import sys
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+torch=lazyImport.lazyModule("torch")
+F=lazyImport.lazyModule("torch.nn.functional")
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+import mnnNullModel
+import pwm2homer
+import seqNameDict
+import stageProfiler
+
+from typing import Sequence, Tuple
+
+MIN_PROBABILITY=1e-6
+"""
+MIN_PROBABILITY: float
+    Floor of the probabilities of the PWMs before the log-odds.
+"""
+
+OCCUPANCY_COLUMNS=["sequence_name", "motif", "position", "strand", "score"]
+"""
+OCCUPANCY_COLUMNS: list
+    Columns of the sparse occupancy table: one line by motif hit.
+"""
+
+COOCCURRENCE_COLUMNS=[
+    "moduleId", "motif", "nbSeq", "nbModuleHit", "nbMotifHit", "nbCooccurrence", "expectedCooccurrence",
+    "log2Enrichment", "nbOverlap", "correlation"
+]
+"""
+COOCCURRENCE_COLUMNS: list
+    Columns of the co-occurrence table: one line by (module, motif). The counts are numbers of sequences.
+"""
+
+def getLogOddsArray(pwm:npt.NDArray, background:Sequence[float]=(0.25, 0.25, 0.25, 0.25))->npt.NDArray[np.float32]:
+    """
+    Get the log-odds matrix (bits) of a PWM of shape (motifLength, 4) against the background frequencies of ACGT.
+    """
+    return np.log2(np.maximum(pwm, MIN_PROBABILITY)/np.asarray(background)).astype(np.float32)
+
+def getMotifFilterBank(logOddsList:Sequence[npt.NDArray])->torch.Tensor:
+    """
+    Stack the log-odds matrices and their reverse complements in a bank of convolution filters.
+
+    Parameters
+    ----------
+    logOddsList : Sequence[NDArray]
+        The log-odds matrices of the motifs, of shape (motifLength, 4) (ACGT).
+
+    Returns
+    -------
+    torch.Tensor
+        The weights of the filters, of shape (2*nbMotif, 1, maxMotifLength, 4): the forward matrices, then the reverse
+        complements. The matrices are aligned on the first position and padded with zeros.
+    """
+    maxMotifLength=max(len(logOdds) for logOdds in logOddsList)
+    weights=np.zeros((2, len(logOddsList), maxMotifLength, 4), dtype=np.float32)
+    for motifIdx, logOdds in enumerate(logOddsList):
+        weights[0, motifIdx, :len(logOdds)]=logOdds
+        # reverse complement : reversed positions, ACGT -> TGCA
+        weights[1, motifIdx, :len(logOdds)]=logOdds[::-1, ::-1]
+    return torch.from_numpy(weights.reshape(2*len(logOddsList), 1, maxMotifLength, 4))
+
+def scanMotifs(
+    filterBank:torch.Tensor,
+    motifLengths:npt.NDArray[np.integer],
+    oneHotSeqs:npt.NDArray
+)->Tuple[npt.NDArray[np.float32], npt.NDArray[np.bool_]]:
+    """
+    Scan a batch of sequences with a bank of motif filters (see `getMotifFilterBank`), on both strands.
+
+    Parameters
+    ----------
+    filterBank : torch.Tensor
+        The filters of the motifs and of their reverse complements.
+    motifLengths : NDArray[np.integer]
+        The length of each motif.
+    oneHotSeqs : NDArray
+        The one-hot encoded sequences, of shape (nbSeq, seqSize, 4).
+
+    Returns
+    -------
+    Tuple[NDArray[np.float32], NDArray[np.bool_]]
+        The score of the best strand of each motif at each start position, of shape (nbSeq, nbMotif, seqSize) (-inf
+        where the motif does not fit in the sequence), and whether the best strand is the reverse one.
+    """
+    nbFilter, _, maxMotifLength, _=filterBank.shape
+    nbMotif=nbFilter//2
+    seqSize=oneHotSeqs.shape[1]
+    seqs=torch.from_numpy(np.expand_dims(np.asarray(oneHotSeqs, dtype=np.float32), axis=1))
+    with torch.no_grad():
+        # pad the end of the sequences so that every position is a start : (seq#, 2*nbMotif, seqSize)
+        scores=F.conv2d(F.pad(seqs, (0, 0, 0, maxMotifLength-1), "constant", 0), filterBank).squeeze(-1)
+        scores, isReverse=torch.max(scores.reshape(scores.shape[0], 2, nbMotif, seqSize), dim=1)
+    scores=scores.numpy()
+    isReverse=isReverse.numpy().astype(bool)
+    # the starts after seqSize-motifLength are in the padding
+    scores[:, np.arange(seqSize)[None, :]>(seqSize-np.asarray(motifLengths))[:, None]]=-np.inf
+    return scores, isReverse
+
+class CooccurrenceStats:
+    """
+    Co-occurrence statistics of the module hits and the motif hits, accumulated batch by batch.
+
+    Parameters
+    ----------
+    nbModule : int
+        The number of modules.
+    nbMotif : int
+        The number of motifs.
+    """
+    def __init__(self, nbModule:int, nbMotif:int):
+        self.nbSeq=0
+        self.nbModuleHit=np.zeros(nbModule, dtype=np.int64)
+        self.nbMotifHit=np.zeros(nbMotif, dtype=np.int64)
+        self.nbCooccurrence=np.zeros((nbModule, nbMotif), dtype=np.int64)
+        self.nbOverlap=np.zeros((nbModule, nbMotif), dtype=np.int64)
+        # sums of the max scores for the correlations
+        self.moduleSum=np.zeros(nbModule)
+        self.moduleSquareSum=np.zeros(nbModule)
+        self.motifSum=np.zeros(nbMotif)
+        self.motifSquareSum=np.zeros(nbMotif)
+        self.productSum=np.zeros((nbModule, nbMotif))
+
+    def update(
+        self,
+        moduleMax:npt.NDArray,
+        moduleArgMax:npt.NDArray[np.integer],
+        moduleHit:npt.NDArray[np.bool_],
+        filterLengths:npt.NDArray[np.integer],
+        motifMax:npt.NDArray,
+        motifHit:npt.NDArray[np.bool_],
+        hitSeqIdx:npt.NDArray[np.integer],
+        hitMotifIdx:npt.NDArray[np.integer],
+        hitPositions:npt.NDArray[np.integer],
+        motifLengths:npt.NDArray[np.integer]
+    )->None:
+        """
+        Add a batch of sequences.
+
+        Parameters
+        ----------
+        moduleMax, moduleArgMax, moduleHit : NDArray
+            The max score of each module in each sequence, its position and whether it is a hit, of shape
+            (nbSeq, nbModule).
+        filterLengths : NDArray[np.integer]
+            The filter length of each module.
+        motifMax, motifHit : NDArray
+            The max score of each motif in each sequence and whether it is a hit, of shape (nbSeq, nbMotif).
+        hitSeqIdx, hitMotifIdx, hitPositions : NDArray[np.integer]
+            The sequence, the motif and the start of each motif hit of the batch.
+        motifLengths : NDArray[np.integer]
+            The length of each motif.
+        """
+        nbMotif=len(self.nbMotifHit)
+        self.nbSeq+=len(moduleMax)
+        self.nbModuleHit+=np.sum(moduleHit, axis=0)
+        self.nbMotifHit+=np.sum(motifHit, axis=0)
+        self.nbCooccurrence+=(moduleHit.T.astype(np.float32)@motifHit.astype(np.float32)).round().astype(np.int64)
+        moduleMax=np.asarray(moduleMax, dtype=np.float64)
+        motifMax=np.asarray(motifMax, dtype=np.float64)
+        self.moduleSum+=moduleMax.sum(axis=0)
+        self.moduleSquareSum+=np.square(moduleMax).sum(axis=0)
+        self.motifSum+=motifMax.sum(axis=0)
+        self.motifSquareSum+=np.square(motifMax).sum(axis=0)
+        self.productSum+=moduleMax.T@motifMax
+        # sequences where a motif hit overlaps the best window of a module hit
+        for moduleId, filterLength in enumerate(filterLengths):
+            windowStart=moduleArgMax[hitSeqIdx, moduleId]
+            overlapMask=(
+                moduleHit[hitSeqIdx, moduleId]
+                &(hitPositions<windowStart+filterLength)
+                &(hitPositions+motifLengths[hitMotifIdx]>windowStart)
+            )
+            seqMotifPairs=np.unique(hitSeqIdx[overlapMask].astype(np.int64)*nbMotif+hitMotifIdx[overlapMask])
+            self.nbOverlap[moduleId]+=np.bincount(seqMotifPairs%nbMotif, minlength=nbMotif)
+
+    def getDataFrame(self, motifNames:Sequence[str])->pd.DataFrame:
+        """
+        Get the co-occurrence table (see `COOCCURRENCE_COLUMNS`), sorted by module and decreasing enrichment.
+        """
+        nbModule, nbMotif=self.nbCooccurrence.shape
+        nbSeq=max(self.nbSeq, 1)
+        expected=np.outer(self.nbModuleHit, self.nbMotifHit)/nbSeq
+        covariance=self.productSum/nbSeq-np.outer(self.moduleSum, self.motifSum)/nbSeq**2
+        moduleVariance=self.moduleSquareSum/nbSeq-np.square(self.moduleSum/nbSeq)
+        motifVariance=self.motifSquareSum/nbSeq-np.square(self.motifSum/nbSeq)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation=covariance/np.sqrt(np.outer(moduleVariance, motifVariance))
+        cooccurrenceDf=pd.DataFrame(dict(
+            moduleId=np.repeat(np.arange(nbModule), nbMotif),
+            motif=np.tile(np.asarray(motifNames, dtype=object), nbModule),
+            nbSeq=self.nbSeq,
+            nbModuleHit=np.repeat(self.nbModuleHit, nbMotif),
+            nbMotifHit=np.tile(self.nbMotifHit, nbModule),
+            nbCooccurrence=self.nbCooccurrence.ravel(),
+            expectedCooccurrence=expected.ravel(),
+            log2Enrichment=np.log2((self.nbCooccurrence.ravel()+0.5)/(expected.ravel()+0.5)),
+            nbOverlap=self.nbOverlap.ravel(),
+            correlation=correlation.ravel()
+        ), columns=COOCCURRENCE_COLUMNS)
+        return cooccurrenceDf.sort_values(["moduleId", "log2Enrichment"], ascending=[True, False], kind="stable")
+
+def getMotifOccupancy(
+    oneHotSeqs:npt.NDArray,
+    seqNames:npt.NDArray,
+    mnnModel:mnnPseudoModel.Net,
+    motifNames:Sequence[str],
+    pwmList:Sequence[npt.NDArray],
+    motifThresholds:npt.NDArray,
+    background:Sequence[float]=(0.25, 0.25, 0.25, 0.25),
+    moduleThresholds:npt.NDArray=None,
+    batchSize:int=256,
+    offset:int=0
+)->Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Scan the sequences of a class with the motifs and the MNN modules, by batches of sequences.
+
+    Parameters
+    ----------
+    oneHotSeqs : NDArray
+        The one-hot encoded sequences, of shape (nbSeq, seqSize, 4). It can be memory-mapped.
+    seqNames : NDArray
+        The sequence names.
+    mnnModel : mnnPseudoModel.Net
+        The MNN model of the class.
+    motifNames : Sequence[str]
+        The motif names.
+    pwmList : Sequence[NDArray]
+        The PWM of each motif, of shape (motifLength, 4).
+    motifThresholds : NDArray
+        The log-odds threshold (bits) of each motif.
+    background : Sequence[float], optional
+        The background frequencies of ACGT, by default uniform.
+    moduleThresholds : NDArray, optional
+        The hit threshold of each module, by default None (a hit is a score > 0).
+    batchSize : int, optional
+        The number of sequences scanned at once, by default 256.
+    offset : int, optional
+        Added to the positions of the occupancy table, by default 0.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        The sparse occupancy table (see `OCCUPANCY_COLUMNS`) and the co-occurrence table (see `COOCCURRENCE_COLUMNS`).
+    """
+    nbSeq, seqSize, _=np.shape(oneHotSeqs)
+    blockList=mnnPseudoModel.getBlockList(mnnModel)
+    filterLengths=np.asarray(mnnPseudoModel.getFilterLengthList(blockList))
+    moduleThresholds=np.zeros(len(filterLengths), dtype=np.float32) if moduleThresholds is None else np.asarray(moduleThresholds)
+    motifLengths=np.array([len(pwm) for pwm in pwmList])
+    filterBank=getMotifFilterBank([getLogOddsArray(pwm, background) for pwm in pwmList])
+    stats=CooccurrenceStats(len(filterLengths), len(pwmList))
+    hitArrayList=[]
+    for seqStart in range(0, nbSeq, batchSize):
+        batchSeqs=np.asarray(oneHotSeqs[seqStart:seqStart+batchSize])
+        # modules : best score on the valid positions (the end of the results is the padding of the convolution)
+        with torch.no_grad():
+            mnnResultsArray, _=mnnProcess.getBlocksResultsArray(blockList, batchSeqs, filterLengths.tolist())
+        validMask=np.arange(seqSize)[None, :]<=(seqSize-filterLengths)[:, None]
+        mnnResultsArray=np.where(validMask[:, None, :], mnnResultsArray, -np.inf)
+        moduleArgMax=np.argmax(mnnResultsArray, axis=-1).T
+        moduleMax=np.max(mnnResultsArray, axis=-1).T
+        moduleHit=moduleMax>moduleThresholds[None, :]
+        del mnnResultsArray
+        # motifs : best strand at each position
+        motifScores, isReverse=scanMotifs(filterBank, motifLengths, batchSeqs)
+        motifMax=np.max(motifScores, axis=-1)
+        hitSeqIdx, hitMotifIdx, hitPositions=np.nonzero(motifScores>=motifThresholds[None, :, None])
+        stats.update(
+            moduleMax, moduleArgMax, moduleHit, filterLengths, motifMax, motifMax>=motifThresholds[None, :],
+            hitSeqIdx, hitMotifIdx, hitPositions, motifLengths
+        )
+        hitArrayList.append((
+            hitSeqIdx+seqStart, hitMotifIdx, hitPositions,
+            isReverse[hitSeqIdx, hitMotifIdx, hitPositions], motifScores[hitSeqIdx, hitMotifIdx, hitPositions]
+        ))
+        del motifScores, isReverse
+    hitSeqIdx, hitMotifIdx, hitPositions, hitIsReverse, hitScores=(
+        np.concatenate([hitArrays[i] for hitArrays in hitArrayList]) if hitArrayList else np.empty(0, dtype=np.int64)
+        for i in range(5)
+    )
+    occupancyDf=pd.DataFrame(dict(
+        sequence_name=pd.Categorical(np.asarray(seqNames, dtype=str)[hitSeqIdx]),
+        motif=pd.Categorical(np.asarray(motifNames, dtype=object)[hitMotifIdx]),
+        position=(hitPositions+offset).astype(np.int32),
+        strand=pd.Categorical(np.where(hitIsReverse.astype(bool), "-", "+"), categories=["+", "-"]),
+        score=hitScores.astype(np.float32)
+    ), columns=OCCUPANCY_COLUMNS)
+    return occupancyDf, stats.getDataFrame(motifNames)
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Scan the sequences of a class with the known motifs and compute their co-occurrence with the MNN module hits.")
+    parser.add_argument("oneHotSeqFilePath", type=str, help="Path to the file containing the one-hot encoded sequences of the class.")
+    parser.add_argument("seqNames", type=str, help="The sequence names of the class (.npy, or the sequence IDs with --seqNameDict).")
+    parser.add_argument("hParamsPath", type=str, help="Path to the file containing the hyperparameters of the MNN model.")
+    parser.add_argument("paramsPath", type=str, help="Path to the file containing the parameters of the MNN model.")
+    parser.add_argument("motifs", type=str, help="The motifs in the Homer format with their log-odds thresholds (pwm2homer.py).")
+    parser.add_argument("--seqNameDict", type=str, default=None, help="The dictionary of the sequence names (see seqNameDict.py).")
+    parser.add_argument("-b", "--background", type=str, default=None, help="Background file of the log-odds, as pwm2homer.py (default: uniform).")
+    parser.add_argument("--batchSize", type=int, default=256, help="Number of sequences scanned at once (default: 256).")
+    parser.add_argument("--offset", type=int, default=0, help="Added to the positions of the occupancy table (default: 0, 450 in the pipeline as the bed files).")
+    parser.add_argument("-o", "--output", type=str, default="motifOccupancy.parquet", help="Sparse occupancy table, parquet (default: motifOccupancy.parquet).")
+    parser.add_argument("--cooccurrence", type=str, default="motifCooccurrence.tsv", help="Co-occurrence table of the modules and the motifs, TSV (default: motifCooccurrence.tsv).")
+    mnnNullModel.addThresholdArguments(parser)
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("motifOccupancy", args)
+    with profiler.phase("load"):
+        # the sequences are read by batches
+        oneHotSeqs=np.load(args.oneHotSeqFilePath, mmap_mode="r")
+        seqNameDictionary=None if args.seqNameDict is None else seqNameDict.SeqNameDict.load(args.seqNameDict)
+        seqNames=seqNameDict.loadSeqNames(args.seqNames, seqNameDictionary)
+        del seqNameDictionary
+        mnnModel=mnnPseudoModel.load_model(args.hParamsPath, args.paramsPath)
+        with open(args.motifs) as motifFile:
+            motifNames, pwmList, motifThresholds=pwm2homer.readHomerMotifFile(motifFile)
+        background=(0.25, 0.25, 0.25, 0.25)
+        if args.background is not None:
+            backgroundDict=pwm2homer.readBackgroundFile(args.background)
+            background=tuple(backgroundDict[base] for base in "ACGT")
+        moduleThresholds=mnnNullModel.getArgsThresholds(args, len(mnnPseudoModel.getBlockList(mnnModel)))
+    # the motifs longer than the sequences have no position
+    fitMask=np.array([len(pwm)<=oneHotSeqs.shape[1] for pwm in pwmList], dtype=bool)
+    if not np.all(fitMask):
+        print("{} motifs longer than the sequences are skipped".format(int(np.sum(~fitMask))), file=sys.stderr)
+    motifNames=[name for name, fit in zip(motifNames, fitMask) if fit]
+    pwmList=[pwm for pwm, fit in zip(pwmList, fitMask) if fit]
+    with profiler.phase("scan"):
+        occupancyDf, cooccurrenceDf=getMotifOccupancy(
+            oneHotSeqs,
+            seqNames,
+            mnnModel,
+            motifNames,
+            pwmList,
+            motifThresholds[fitMask],
+            background=background,
+            moduleThresholds=moduleThresholds,
+            batchSize=args.batchSize,
+            offset=args.offset
+        )
+    with profiler.phase("write"):
+        occupancyDf.to_parquet(args.output, index=False)
+        cooccurrenceDf.to_csv(args.cooccurrence, sep="\t", index=False)
+    profiler.addInputs(args.oneHotSeqFilePath, args.seqNames, args.hParamsPath, args.paramsPath, args.motifs, args.seqNameDict, args.background, args.thresholds)
+    profiler.addOutputs(args.output, args.cooccurrence)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 30/01/2024
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '19/02/2024'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -15,25 +17,35 @@ __status__ = 'Prototype'
 __version__ = "0.0.1"
  
 # python plotMnnScore.py --mnnResultsArray mnnResultsArray.npy --moduleId moduleId --mnnHParams mnnHParams  --mnnParams mnnParams --fig OUTPUT_FIGURE_PATH --values OUTPUT_VALUES_PATH --bias
+# python plotMnnScore.py --mnnResultsArray mnnResultsArray.npy --mnnHParams mnnHParams  --mnnParams mnnParams --poolFunction mean median --renderer matplotlib --fig '{moduleId}/moduleActivation_{poolFunction}.svg'
 
 
+import os
 import functools
 import argparse
 import pathlib
 
 import numpy as np
-import seaborn as sns
+import lazyImport
+# non interactive backend : the figures are only written into files. matplotlib reads it at its (lazy) import
+os.environ["MPLBACKEND"]="Agg"
 # import matplotlib as mpl
 # mpl.rcParams['text.usetex'] = True
-import matplotlib.pyplot as plt
+plt=lazyImport.lazyModule("matplotlib.pyplot")
+# seaborn is imported only when needed (renderer "seaborn"), see `drawAxe`
 
-from typing import NewType, Union, Tuple
+from typing import NewType, Union, Tuple, Sequence, Dict
 
 FString=NewType("FString", str)
 PdQuery=NewType("PdQuery", str)
 PathLike=Union[str, pathlib.Path]
 
-import mnnPseudoModel
+mnnPseudoModel=lazyImport.lazyModule("mnnPseudoModel")
+mnnProcess=lazyImport.lazyModule("mnnProcess")
+import positionalProfile
+import chunkedResults
+import mnnNullModel
+import stageProfiler
 
 
 def getMnnModuleResultsIdx(
@@ -85,6 +97,34 @@ def loadMnnModel(
         keysPath=keysPath
     )
 
+@functools.lru_cache(maxsize=4)
+def getModelWeightsView(
+    mnn:mnnPseudoModel.Net,
+    seqSize:int=101
+)->Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the weights of all the modules of a model as numpy arrays. The result is cached (one conversion per model).
+
+    Parameters
+    ----------
+    mnn : mnnPseudoModel.Net
+        The mnn model.
+    seqSize : int, optional
+        The sequence size, by default 101
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        - The position coefficients of the modules, 2D array (module, pos) padded with 0 up to `seqSize`.
+        - The position biases of the modules, 1D array (module).
+        - The weights of the modules, 1D array (module).
+        The arrays are read-only.
+    """
+    posCoefMatrix, posBiasArray, moduleWeightArray=mnnPseudoModel.getModuleWeightArrays(mnn, seqSize)
+    for array in (posCoefMatrix, posBiasArray, moduleWeightArray):
+        array.flags.writeable=False
+    return posCoefMatrix, posBiasArray, moduleWeightArray
+
 def getPosCoefArray(mnn:mnnPseudoModel.Net, moduleId, seqSize=101)->np.ndarray: #1D array of weight (pos)
     """
     Get the position coefficient array for a given module.
@@ -104,14 +144,10 @@ def getPosCoefArray(mnn:mnnPseudoModel.Net, moduleId, seqSize=101)->np.ndarray:
         The position coefficient array for the module.
 
     """
-    moduleList=mnnPseudoModel.getBlockList(mnn)
-    posCoefList=[module.dense.weight.detach().cpu().numpy().flatten() for module in moduleList]
-    posCoef=posCoefList[moduleId]
-    posCoefArray=np.zeros((seqSize))
-    posCoefArray[0:len(posCoef)]=posCoef
-    return posCoefArray
-
-def getPosBias(mnn:mnnPseudoModel.Net, moduleId)->np.ScalarType: #A scalar (float) of bias
+    posCoefMatrix, _, _=getModelWeightsView(mnn, seqSize)
+    return posCoefMatrix[moduleId]
+
+def getPosBias(mnn:mnnPseudoModel.Net, moduleId, seqSize=101)->np.ScalarType: #A scalar (float) of bias
     """
     Get the position bias for a given module.
 
@@ -121,6 +157,8 @@ def getPosBias(mnn:mnnPseudoModel.Net, moduleId)->np.ScalarType: #A scalar (floa
         The mnn model.
     moduleId : int
         The module id.
+    seqSize : int, optional
+        The sequence size, by default 101
 
     Returns
     -------
@@ -128,14 +166,13 @@ def getPosBias(mnn:mnnPseudoModel.Net, moduleId)->np.ScalarType: #A scalar (floa
         The position bias for the module.
 
     """
-    moduleList=mnnPseudoModel.getBlockList(mnn)
-    posBiasList=[module.dense.bias.detach().cpu().numpy() for module in moduleList]
-    posBiasArray=np.asarray(posBiasList).flatten()
+    _, posBiasArray, _=getModelWeightsView(mnn, seqSize)
     return posBiasArray[moduleId]
 
 def getModuleWeight(
     mnn:mnnPseudoModel.Net,
-    moduleId:int
+    moduleId:int,
+    seqSize:int=101
 )->np.ScalarType: #a scalar (float) of weight (module)
     """
     Get the module weight for a given module.
@@ -146,6 +183,8 @@ def getModuleWeight(
         The mnn model.
     moduleId : int
         The module id.
+    seqSize : int, optional
+        The sequence size, by default 101
 
     Returns
     -------
@@ -153,7 +192,8 @@ def getModuleWeight(
         The module weight for the module.
 
     """
-    return mnn.linear.weight.detach().cpu().numpy().flatten()[moduleId]
+    _, _, moduleWeightArray=getModelWeightsView(mnn, seqSize)
+    return moduleWeightArray[moduleId]
 
 poolFunctionDict={
     "mean":np.mean,
@@ -162,17 +202,17 @@ poolFunctionDict={
     "median":np.median
 }
 
-def getMeanPosActivationScore(
+def getPosActivationScore(
     mnnResultsArray:np.ndarray,
     mnn:mnnPseudoModel.Net,
     moduleId:int,
     threshold:float=0,
     bias:bool=False,
-    seqSize:int=101,
-    poolFunction:str="mean"
-)->np.ndarray: #1D array of mean score (pos)
+    seqSize:int=101
+)->np.ndarray: #2D array of score (seq, pos)
     """
-    Get the mean position activation score for a given module.
+    Get the position activation score of each sequence for a given module. `mnnResultsArray` is not modified, so it can 
+    be a read-only memory-mapped array.
 
     Parameters
     ----------
@@ -188,39 +228,160 @@ def getMeanPosActivationScore(
         If True, add the bias, by default False
     seqSize : int, optional
         The sequence size, by default 101
-    poolFunction : str, optional
-        The pooling function, by default "mean". Can be "mean", "max", "min" or "median".
 
     Returns
     -------
     np.ndarray
-        The mean position activation score for the module.
+        The position activation score for the module, 2D array (seq, pos).
+
+    """
+    return applyModuleWeights(mnnResultsArray[moduleId], mnn, moduleId, threshold=threshold, bias=bias, seqSize=seqSize)
+
+def applyModuleWeights(
+    mnnModuleResultsArray:np.ndarray,
+    mnn:mnnPseudoModel.Net,
+    moduleId:int,
+    threshold:float=0,
+    bias:bool=False,
+    seqSize:int=101
+)->np.ndarray: #2D array of score (seq, pos)
+    """
+    Apply the ReLU, the position coefficients, the bias and the module weight on the convolution scores of a module.
+
+    Parameters
+    ----------
+    mnnModuleResultsArray : np.ndarray
+        The mnn results of the module (or of a batch of sequences), 2D array (seq, pos). It is not modified.
+    mnn : mnnPseudoModel.Net
+        The mnn model.
+    moduleId : int
+        The module id.
+    threshold : float, optional
+        The threshold (ReLU), by default 0
+    bias : bool, optional
+        If True, add the bias, by default False
+    seqSize : int, optional
+        The sequence size, by default 101
+
+    Returns
+    -------
+    np.ndarray
+        The position activation score, 2D array (seq, pos).
 
     """
-    x=mnnResultsArray[moduleId]
-    #apply ReLU
-    x[x<threshold]=0
+    x=mnnModuleResultsArray
+    #apply ReLU (in a new array)
+    x=np.where(x<threshold, 0, x)
     #apply position coefficient
-    posCoefArray=getPosCoefArray(mnn, moduleId)
+    posCoefArray=getPosCoefArray(mnn, moduleId, seqSize)
     x*=posCoefArray
     #apply bias if needed 
     if bias:
-        posBias=getPosBias(mnn, moduleId)
+        posBias=getPosBias(mnn, moduleId, seqSize)
         #add the bias, normalize by the sequence size to spread the bias all over the position
         x+=posBias/seqSize
     # apply the module weight
-    moduleWeight=getModuleWeight(mnn, moduleId)
+    moduleWeight=getModuleWeight(mnn, moduleId, seqSize)
     x*=moduleWeight
+    return x
+
+def getMeanPosActivationScore(
+    mnnResultsArray:np.ndarray,
+    mnn:mnnPseudoModel.Net,
+    moduleId:int,
+    threshold:float=0,
+    bias:bool=False,
+    seqSize:int=101,
+    poolFunction:str="mean"
+)->np.ndarray: #1D array of mean score (pos)
+    """
+    Get the mean position activation score for a given module.
+
+    Parameters
+    ----------
+    mnnResultsArray : np.ndarray
+        The mnn results array.
+    mnn : mnnPseudoModel.Net
+        The mnn model.
+    moduleId : int
+        The module id.
+    threshold : float, optional
+        The threshold (ReLU), by default 0
+    bias : bool, optional
+        If True, add the bias, by default False
+    seqSize : int, optional
+        The sequence size, by default 101
+    poolFunction : str, optional
+        The pooling function, by default "mean". Can be "mean", "max", "min" or "median".
+
+    Returns
+    -------
+    np.ndarray
+        The mean position activation score for the module.
+
+    """
+    x=getPosActivationScore(mnnResultsArray, mnn, moduleId, threshold=threshold, bias=bias, seqSize=seqSize)
     #pool the results along the sequence axis
     x=poolFunctionDict[poolFunction](x, axis=0)
     return x
 
+def getChunkedPosActivationProfile(
+    mnnResultsArray:np.ndarray,
+    mnn:mnnPseudoModel.Net,
+    moduleId:int,
+    poolFunctionList:Sequence[str],
+    chunkSize:int=10000,
+    nBins:int=1024,
+    threshold:float=0,
+    bias:bool=False,
+    seqSize:int=101
+)->Dict[str, np.ndarray]:
+    """
+    Pool the position activation score of a module by streaming over batches of sequences (see `positionalProfile`).
+
+    Only a batch of `chunkSize` sequences is in memory. "mean", "min" and "max" are exact, "median" is estimated with 
+    an error bounded by `(max-min)/nBins` at each position.
+
+    Parameters
+    ----------
+    mnnResultsArray : np.ndarray
+        The mnn results array (module, seq, pos). It can be memory-mapped or a `chunkedResults.ChunkedResults`.
+    mnn : mnnPseudoModel.Net
+        The mnn model.
+    moduleId : int
+        The module id.
+    poolFunctionList : Sequence[str]
+        The pooling functions.
+    chunkSize : int, optional
+        The number of sequences by batch, by default 10000
+    nBins : int, optional
+        The number of histogram bins by position for the median, by default 1024
+    threshold : float, optional
+        The threshold (ReLU), by default 0
+    bias : bool, optional
+        If True, add the bias, by default False
+    seqSize : int, optional
+        The sequence size, by default 101
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The pooled score by pooling function, 1D arrays (pos).
+    """
+    def chunkIterableFactory_():
+        # slice the batches from the results array: a chunked results file only reads the chunks of the batch
+        for seqStart in range(0, np.shape(mnnResultsArray)[1], chunkSize):
+            chunk=mnnResultsArray[moduleId, seqStart:seqStart+chunkSize]
+            yield applyModuleWeights(chunk, mnn, moduleId, threshold=threshold, bias=bias, seqSize=seqSize)
+    return positionalProfile.getChunkedPositionalProfile(chunkIterableFactory_, statistics=poolFunctionList, nBins=nBins)
+
 def drawAxe(
     ax:plt.Axes,
     resultsArray:np.ndarray,
     title:str=None,
     xlabel:str="Distance to STR 3' end",
-    ylabel:str=None
+    ylabel:str=None,
+    renderer:str="seaborn"
 )-> plt.Axes:
     """
     Draw an histogram with seaborn.
@@ -237,40 +398,243 @@ def drawAxe(
         The xlabel, by default "Distance to STR 3' end"
     ylabel : str, optional
         The ylabel, by default None
+    renderer : str, optional
+        The library used to draw the bars, by default "seaborn". Can be "seaborn" or "matplotlib". "matplotlib" draws 
+        the same discrete histogram with `ax.bar` without importing seaborn.
     """
     nbPos=len(resultsArray)
     middlePos=nbPos//2
     xValues=np.arange(-middlePos, middlePos+1) #[-50,51[
-    sns.histplot(x=xValues, weights=resultsArray, discrete=True, ax=ax)
+    if renderer=="seaborn":
+        import seaborn as sns
+        sns.histplot(x=xValues, weights=resultsArray, discrete=True, ax=ax)
+    else :
+        # same style as the seaborn discrete histogram : bars of width 1 centered on the positions
+        ax.bar(xValues, resultsArray, width=1, align="center", color="C0", alpha=0.75, edgecolor="white", linewidth=0.5)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     if title is not None :
         ax.set_title(title)
     return ax
 
+def getPoolYLabel(poolFunction:str)->str:
+    """
+    Get the y label of the figure for a pooling function.
+
+    Parameters
+    ----------
+    poolFunction : str
+        The pooling function.
+
+    Returns
+    -------
+    str
+        The y label.
+    """
+    poolName=poolFunction[0].upper()+poolFunction[1:]
+    return f"{poolName} of the positional activation score"
+
+def plotModulesActivationScore(
+    mnnResultsArray:np.ndarray,
+    mnn:mnnPseudoModel.Net,
+    moduleIdList:Sequence[int],
+    poolFunctionList:Sequence[str],
+    figPathTemplate:FString=None,
+    valuesPathTemplate:FString=None,
+    bias:bool=False,
+    renderer:str="seaborn",
+    chunkSize:int=None,
+    nBins:int=1024,
+    thresholds:Sequence[float]=None
+)->None:
+    """
+    Plot the pooled activation score of several modules with several pooling functions.
+
+    The activation score of a module is computed once and pooled with each function of `poolFunctionList`.
+
+    Parameters
+    ----------
+    mnnResultsArray : np.ndarray
+        The mnn results array (module, seq, pos). It is not modified and can be memory-mapped in read-only mode.
+    mnn : mnnPseudoModel.Net
+        The mnn model.
+    moduleIdList : Sequence[int]
+        The module ids.
+    poolFunctionList : Sequence[str]
+        The pooling functions.
+    figPathTemplate : FString, optional
+        Output figure path, formatted with `moduleId` and `poolFunction` keywords, by default None (no figure).
+    valuesPathTemplate : FString, optional
+        Output values path, formatted with `moduleId` and `poolFunction` keywords, by default None (no values).
+    bias : bool, optional
+        If True, add the bias, by default False
+    renderer : str, optional
+        The library used to draw the histograms, by default "seaborn". See `drawAxe`.
+    chunkSize : int, optional
+        If given, stream over batches of `chunkSize` sequences instead of loading the whole module (see 
+        `getChunkedPosActivationProfile`), by default None.
+    nBins : int, optional
+        The number of histogram bins by position for the streamed median, by default 1024.
+    thresholds : Sequence[float], optional
+        The threshold (ReLU) of each module, from the null model (see `mnnNullModel`), by default None (0).
+    """
+    seqSize=mnnResultsArray.shape[-1]
+    for moduleId in moduleIdList:
+        threshold=0 if thresholds is None else thresholds[moduleId]
+        if chunkSize is None:
+            x=getPosActivationScore(mnnResultsArray, mnn, moduleId, threshold=threshold, bias=bias, seqSize=seqSize)
+            pooledDict={poolFunction:poolFunctionDict[poolFunction](x, axis=0) for poolFunction in poolFunctionList}
+            del x
+        else :
+            pooledDict=getChunkedPosActivationProfile(mnnResultsArray, mnn, moduleId, poolFunctionList, chunkSize=chunkSize, nBins=nBins, threshold=threshold, bias=bias, seqSize=seqSize)
+        writePooledActivationScore(moduleId, pooledDict, figPathTemplate=figPathTemplate, valuesPathTemplate=valuesPathTemplate, renderer=renderer)
+
+def plotSummaryActivationScore(
+    summary:Dict[str, np.ndarray],
+    moduleIdList:Sequence[int],
+    poolFunctionList:Sequence[str],
+    figPathTemplate:FString=None,
+    valuesPathTemplate:FString=None,
+    bias:bool=False,
+    renderer:str="seaborn"
+)->None:
+    """
+    Plot the pooled activation score of several modules from an activation summary (`getMnnResults.py --summary`), 
+    without the results array nor the model.
+
+    Parameters
+    ----------
+    summary : Dict[str, np.ndarray]
+        The activation summary (see `mnnProcess.getActivationSummary`).
+    moduleIdList : Sequence[int]
+        The module ids.
+    poolFunctionList : Sequence[str]
+        The pooling functions, among `mnnProcess.SUMMARY_POOL_FUNCTIONS`.
+    figPathTemplate : FString, optional
+        Output figure path, formatted with `moduleId` and `poolFunction` keywords, by default None (no figure).
+    valuesPathTemplate : FString, optional
+        Output values path, formatted with `moduleId` and `poolFunction` keywords, by default None (no values).
+    bias : bool, optional
+        If True, use the score with the bias, by default False
+    renderer : str, optional
+        The library used to draw the histograms, by default "seaborn". See `drawAxe`.
+    """
+    for moduleId in moduleIdList:
+        pooledDict={
+            poolFunction:summary[mnnProcess.getSummaryActivationKey(poolFunction, bias=bias)][moduleId]
+                for poolFunction in poolFunctionList
+        }
+        writePooledActivationScore(moduleId, pooledDict, figPathTemplate=figPathTemplate, valuesPathTemplate=valuesPathTemplate, renderer=renderer)
+
+def writePooledActivationScore(
+    moduleId:int,
+    pooledDict:Dict[str, np.ndarray],
+    figPathTemplate:FString=None,
+    valuesPathTemplate:FString=None,
+    renderer:str="seaborn"
+)->None:
+    """
+    Write the figure and the values of the pooled activation scores of a module.
+
+    Parameters
+    ----------
+    moduleId : int
+        The module id.
+    pooledDict : Dict[str, np.ndarray]
+        The pooled activation score (1D array (pos)) by pooling function.
+    figPathTemplate : FString, optional
+        Output figure path, formatted with `moduleId` and `poolFunction` keywords, by default None (no figure).
+    valuesPathTemplate : FString, optional
+        Output values path, formatted with `moduleId` and `poolFunction` keywords, by default None (no values).
+    renderer : str, optional
+        The library used to draw the histograms, by default "seaborn". See `drawAxe`.
+    """
+    for poolFunction, resultsArray in pooledDict.items():
+        if figPathTemplate is not None:
+            figPath=pathlib.Path(str(figPathTemplate).format(moduleId=moduleId, poolFunction=poolFunction))
+            figPath.parent.mkdir(parents=True, exist_ok=True)
+            fig, ax = plt.subplots()
+            drawAxe(ax, resultsArray, ylabel=getPoolYLabel(poolFunction), renderer=renderer)
+            fig.savefig(figPath)
+            plt.close(fig)
+        if valuesPathTemplate is not None:
+            valuesPath=pathlib.Path(str(valuesPathTemplate).format(moduleId=moduleId, poolFunction=poolFunction))
+            valuesPath.parent.mkdir(parents=True, exist_ok=True)
+            np.save(valuesPath, resultsArray)
+
 def main():
     parser = argparse.ArgumentParser(description='Plot the MNN score for a given module.')
-    parser.add_argument('--mnnResultsArray', type=pathlib.Path, required=True, help='Path to the mnn results array.')
-    parser.add_argument('--moduleId', type=int, required=True, help='The module ID.')
-    parser.add_argument('--mnnHParams', type=pathlib.Path, required=True, help='Path to the mnn hyperparameters.')
-    parser.add_argument('--mnnParams', type=pathlib.Path, required=True, help='Path to the mnn parameters.')
+    inputGroup = parser.add_mutually_exclusive_group(required=True)
+    inputGroup.add_argument('--mnnResultsArray', type=pathlib.Path, help='Path to the mnn results array (.npy or chunked, see chunkedResults.py).')
+    inputGroup.add_argument('--summary', type=pathlib.Path, help='Path to the activation summary (getMnnResults.py --summary). The model is not needed.')
+    parser.add_argument('--moduleId', type=int, nargs="+", default=None, help='The module ID(s). Default: all the modules.')
+    parser.add_argument('--mnnHParams', type=pathlib.Path, default=None, help='Path to the mnn hyperparameters. Required with --mnnResultsArray.')
+    parser.add_argument('--mnnParams', type=pathlib.Path, default=None, help='Path to the mnn parameters. Required with --mnnResultsArray.')
     parser.add_argument('--bias', action='store_true', help='Add the bias to the score.')
-    parser.add_argument('--fig', type=pathlib.Path, default=None, help='Output figure path.')
-    parser.add_argument('--values', type=pathlib.Path, default=None, help='Output values path.')
-    parser.add_argument('--poolFunction', type=str, default="mean", help='The pooling function. Can be "mean", "max", "min" or "median".')
+    parser.add_argument('--fig', type=str, default=None, help='Output figure path. With several modules or pooling functions, it should contain the "{moduleId}" and "{poolFunction}" fields.')
+    parser.add_argument('--values', type=str, default=None, help='Output values path. With several modules or pooling functions, it should contain the "{moduleId}" and "{poolFunction}" fields.')
+    parser.add_argument('--poolFunction', type=str, nargs="+", default=["mean"], choices=list(poolFunctionDict.keys()), help='The pooling function(s). Can be "mean", "max", "min" or "median".')
+    parser.add_argument('--renderer', type=str, default="seaborn", choices=["seaborn", "matplotlib"], help='Library used to draw the histograms (default: seaborn). "matplotlib" is faster.')
+    parser.add_argument('--chunkSize', type=int, default=None, help='Stream over batches of CHUNKSIZE sequences to bound the memory. The median is then approximated (see --nBins). Default: the whole module is loaded.')
+    parser.add_argument('--nBins', type=int, default=1024, help='Number of histogram bins by position for the streamed median. The error is lower than (max-min)/NBINS at each position (default: 1024).')
+    mnnNullModel.addThresholdArguments(parser)
+    stageProfiler.addProfileArguments(parser)
     args = parser.parse_args()
-    poolName=args.poolFunction
-    poolName=poolName[0].upper()+poolName[1:]
-    ylabel=f"{poolName} of the positional activation score"
-    mnnResultsArray=np.load(args.mnnResultsArray)
-    mnn=loadMnnModel(args.mnnHParams, args.mnnParams)
-    resultsArray=getMeanPosActivationScore(mnnResultsArray, mnn, args.moduleId, bias=args.bias, poolFunction=args.poolFunction)
-    if args.fig is not None:
-        fig, ax = plt.subplots()
-        drawAxe(ax, resultsArray, ylabel=ylabel)
-        plt.savefig(args.fig)
-    if args.values is not None:
-        np.save(args.values, resultsArray)
+    profiler=stageProfiler.StageProfiler.fromArgs("plotMnnScore", args)
+    profiler.addInputs(args.mnnResultsArray, args.summary, args.mnnHParams, args.mnnParams)
+    poolFunctionList=args.poolFunction
+    if args.summary is not None:
+        summary=dict(np.load(args.summary))
+        nbModule=summary["hitCount"].shape[0]
+        if not set(poolFunctionList).issubset(mnnProcess.SUMMARY_POOL_FUNCTIONS):
+            parser.error("the summary only contains the pooling functions {}".format(", ".join(mnnProcess.SUMMARY_POOL_FUNCTIONS)))
+        if args.thresholds is not None:
+            parser.error("the summary is computed with a threshold of 0, --thresholds requires --mnnResultsArray")
+    else :
+        if args.mnnHParams is None or args.mnnParams is None:
+            parser.error("--mnnHParams and --mnnParams are required with --mnnResultsArray")
+        # the array is only read : memory-map it (or read the chunks of a chunked file), a module is read when it is needed.
+        mnnResultsArray=chunkedResults.loadMnnResultsArray(args.mnnResultsArray, mmap_mode="r")
+        nbModule=mnnResultsArray.shape[0]
+    moduleIdList=args.moduleId if args.moduleId is not None else list(range(nbModule))
+    if len(moduleIdList)*len(poolFunctionList) > 1:
+        for template in (args.fig, args.values):
+            if template is not None and ("{moduleId}" not in template or "{poolFunction}" not in template):
+                parser.error("--fig and --values should contain the '{moduleId}' and '{poolFunction}' fields with several modules or pooling functions.")
+    if args.summary is not None:
+        with profiler.phase("pool and plot"):
+            plotSummaryActivationScore(
+                summary,
+                moduleIdList,
+                poolFunctionList,
+                figPathTemplate=args.fig,
+                valuesPathTemplate=args.values,
+                bias=args.bias,
+                renderer=args.renderer
+            )
+    else :
+        with profiler.phase("load model"):
+            mnn=loadMnnModel(args.mnnHParams, args.mnnParams)
+        with profiler.phase("pool and plot"):
+            plotModulesActivationScore(
+                mnnResultsArray,
+                mnn,
+                moduleIdList,
+                poolFunctionList,
+                figPathTemplate=args.fig,
+                valuesPathTemplate=args.values,
+                bias=args.bias,
+                renderer=args.renderer,
+                chunkSize=args.chunkSize,
+                nBins=args.nBins,
+                thresholds=mnnNullModel.getArgsThresholds(args, nbModule)
+            )
+    profiler.addOutputs(*[
+        str(template).format(moduleId=moduleId, poolFunction=poolFunction)
+        for template in (args.fig, args.values) if template is not None
+        for moduleId in moduleIdList for poolFunction in poolFunctionList
+    ])
+    profiler.write()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
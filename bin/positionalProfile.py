@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compute positional profiles (mean, std, min, max and quantiles by position) by streaming over batches of sequences.
+
+The moments (mean, std), the min and the max are exact. The quantiles are estimated with a fixed-bin histogram per
+position, built in a second pass over the batches once the min and the max of each position are known. With `nBins`
+bins, the error of a quantile at a position is bounded by `(max-min)/nBins` of this position, compared to
+`np.quantile(..., method="linear")`. The memory used is `O(batchSize*nbPos + nbPos*nBins)`, whatever the number of
+sequences.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+import numpy as np
+
+from typing import Callable, Iterable, Sequence, Dict, Tuple, Union
+
+ChunkIterableFactory=Callable[[], Iterable[np.ndarray]]
+
+QUANTILE_ALIASES={
+    "median":0.5,
+}
+"""
+QUANTILE_ALIASES: dict
+    Statistic names corresponding to a quantile. Other quantiles are named "q<value>", for example "q0.25".
+"""
+
+MOMENT_STATISTICS=("mean", "std", "min", "max", "count")
+"""
+MOMENT_STATISTICS: tuple
+    Statistics computed exactly in a single pass.
+"""
+
+def iterSequenceChunks(array:np.ndarray, chunkSize:int=10000)->Iterable[np.ndarray]:
+    """
+    Iterate over batches of sequences of a 2D array (seq, pos).
+
+    Parameters
+    ----------
+    array : np.ndarray
+        The 2D array (seq, pos). It can be memory-mapped.
+    chunkSize : int, optional
+        The number of sequences by batch, by default 10000.
+
+    Yields
+    ------
+    np.ndarray
+        A 2D array (chunkSize, pos).
+    """
+    for start in range(0, array.shape[0], chunkSize):
+        yield array[start:start+chunkSize]
+
+def parseQuantileName(statistic:str)->Union[float, None]:
+    """
+    Get the quantile corresponding to a statistic name.
+
+    Parameters
+    ----------
+    statistic : str
+        The statistic name: "median" or "q<value>" (e.g. "q0.9").
+
+    Returns
+    -------
+    float or None
+        The quantile in [0,1], None if the statistic is not a quantile.
+
+    Raises
+    ------
+    ValueError
+        If the statistic is unknown or the quantile is not in [0,1].
+    """
+    if statistic in MOMENT_STATISTICS:
+        return None
+    if statistic in QUANTILE_ALIASES:
+        return QUANTILE_ALIASES[statistic]
+    if statistic.startswith("q"):
+        quantile=float(statistic[1:])
+        if not 0<=quantile<=1:
+            raise ValueError("quantile should be in [0,1] : {}".format(statistic))
+        return quantile
+    raise ValueError("unknown statistic : {}".format(statistic))
+
+def getChunkedMoments(
+    chunkIterable:Iterable[np.ndarray]
+)->Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the exact count, mean, variance, min and max by position over batches of sequences.
+
+    The batches are merged with the parallel algorithm of Chan et al. (mean and sum of squared deviations), which is
+    numerically stable.
+
+    Parameters
+    ----------
+    chunkIterable : Iterable[np.ndarray]
+        Batches of sequences, 2D arrays (seq, pos).
+
+    Returns
+    -------
+    Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        The number of sequences, and the mean, the (population) variance, the min and the max by position (1D arrays).
+    """
+    count=0
+    mean=m2=minArray=maxArray=None
+    for chunk in chunkIterable:
+        chunk=np.asarray(chunk, dtype=np.float64)
+        chunkCount=chunk.shape[0]
+        if chunkCount==0:
+            continue
+        chunkMean=chunk.mean(axis=0)
+        chunkM2=((chunk-chunkMean)**2).sum(axis=0)
+        if count==0:
+            mean, m2=chunkMean, chunkM2
+            minArray, maxArray=chunk.min(axis=0), chunk.max(axis=0)
+        else :
+            total=count+chunkCount
+            delta=chunkMean-mean
+            mean=mean+delta*(chunkCount/total)
+            m2=m2+chunkM2+delta**2*(count*chunkCount/total)
+            minArray=np.minimum(minArray, chunk.min(axis=0))
+            maxArray=np.maximum(maxArray, chunk.max(axis=0))
+        count+=chunkCount
+    if count==0:
+        return 0, np.array([]), np.array([]), np.array([]), np.array([])
+    return count, mean, m2/count, minArray, maxArray
+
+def getChunkedHistogram(
+    chunkIterable:Iterable[np.ndarray],
+    minArray:np.ndarray,
+    maxArray:np.ndarray,
+    nBins:int=1024
+)->np.ndarray:
+    """
+    Count the values by position in `nBins` bins of equal width between the min and the max of each position.
+
+    Parameters
+    ----------
+    chunkIterable : Iterable[np.ndarray]
+        Batches of sequences, 2D arrays (seq, pos).
+    minArray : np.ndarray
+        The min by position.
+    maxArray : np.ndarray
+        The max by position.
+    nBins : int, optional
+        The number of bins by position, by default 1024.
+
+    Returns
+    -------
+    np.ndarray
+        The counts, 2D array (pos, bin).
+    """
+    nbPos=len(minArray)
+    binWidth=getBinWidth(minArray, maxArray, nBins)
+    counts=np.zeros(nbPos*nBins, dtype=np.int64)
+    posOffset=np.arange(nbPos)*nBins
+    for chunk in chunkIterable:
+        chunk=np.asarray(chunk, dtype=np.float64)
+        binIdx=np.floor((chunk-minArray)/binWidth).astype(np.int64)
+        np.clip(binIdx, 0, nBins-1, out=binIdx)
+        counts+=np.bincount((binIdx+posOffset).ravel(), minlength=nbPos*nBins)
+    return counts.reshape(nbPos, nBins)
+
+def getBinWidth(minArray:np.ndarray, maxArray:np.ndarray, nBins:int)->np.ndarray:
+    """
+    Get the width of the histogram bins of each position. Constant positions get a width of 1 (a single bin is used).
+    """
+    binWidth=(maxArray-minArray)/nBins
+    return np.where(binWidth>0, binWidth, 1.0)
+
+def getHistogramQuantile(
+    counts:np.ndarray,
+    minArray:np.ndarray,
+    binWidth:np.ndarray,
+    quantile:float
+)->np.ndarray:
+    """
+    Estimate a quantile by position from the histograms.
+
+    The two order statistics around the quantile rank (as `np.quantile(..., method="linear")`) are located in their
+    bin, placed by linear interpolation of their rank inside the bin, and interpolated. Each order statistic is in its
+    bin, so the error is lower than the width of a bin.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        The counts, 2D array (pos, bin).
+    minArray : np.ndarray
+        The min by position.
+    binWidth : np.ndarray
+        The bin width by position.
+    quantile : float
+        The quantile in [0,1].
+
+    Returns
+    -------
+    np.ndarray
+        The estimated quantile by position.
+    """
+    nbPos=counts.shape[0]
+    count=int(counts[0].sum())
+    cumCounts=np.cumsum(counts, axis=1)
+    rank=quantile*(count-1)
+    lowRank=int(np.floor(rank))
+    highRank=min(lowRank+1, count-1)
+    fraction=rank-lowRank
+    posIdx=np.arange(nbPos)
+    def getOrderStatistic_(k:int)->np.ndarray:
+        # first bin where the cumulative count is above k (0-based rank)
+        binIdx=np.sum(cumCounts<=k, axis=1)
+        binCount=counts[posIdx, binIdx]
+        before=cumCounts[posIdx, binIdx]-binCount
+        # place the value at the center of its rank inside the bin
+        inBin=(k-before+0.5)/binCount
+        return minArray+(binIdx+inBin)*binWidth
+    lowValue=getOrderStatistic_(lowRank)
+    highValue=getOrderStatistic_(highRank)
+    return lowValue+(highValue-lowValue)*fraction
+
+def getChunkedPositionalProfile(
+    chunkIterableFactory:ChunkIterableFactory,
+    statistics:Sequence[str]=("mean",),
+    nBins:int=1024
+)->Dict[str, np.ndarray]:
+    """
+    Compute positional statistics by streaming over batches of sequences.
+
+    Parameters
+    ----------
+    chunkIterableFactory : Callable[[], Iterable[np.ndarray]]
+        Return a new iterable over the batches of sequences (2D arrays (seq, pos)). It is called once, or twice if a
+        quantile is requested.
+    statistics : Sequence[str], optional
+        The statistics to compute, by default ("mean",). Available : "count", "mean", "std", "min", "max", "median"
+        and "q<value>" (e.g. "q0.9").
+    nBins : int, optional
+        The number of histogram bins by position for the quantiles, by default 1024. The error of a quantile is bounded
+        by `(max-min)/nBins`.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The statistics by name, 1D arrays (pos).
+    """
+    quantileDict={statistic:parseQuantileName(statistic) for statistic in statistics}
+    count, mean, variance, minArray, maxArray=getChunkedMoments(chunkIterableFactory())
+    profileDict={
+        "count":np.full(len(mean), count),
+        "mean":mean,
+        "std":np.sqrt(variance),
+        "min":minArray,
+        "max":maxArray,
+    }
+    quantileStatistics=[statistic for statistic, quantile in quantileDict.items() if quantile is not None]
+    if count==0:
+        profileDict.update({statistic:np.array([]) for statistic in quantileStatistics})
+    elif len(quantileStatistics)>0:
+        counts=getChunkedHistogram(chunkIterableFactory(), minArray, maxArray, nBins=nBins)
+        binWidth=getBinWidth(minArray, maxArray, nBins)
+        for statistic in quantileStatistics:
+            quantile=getHistogramQuantile(counts, minArray, binWidth, quantileDict[statistic])
+            # the estimation can not be outside of the observed values
+            profileDict[statistic]=np.clip(quantile, minArray, maxArray)
+    return {statistic:profileDict[statistic] for statistic in statistics}
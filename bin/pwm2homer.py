@@ -8,24 +8,31 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 07/13/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '07/13/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
 __status__ = 'Prototype'
 __version__ = "0.0.1"
 
+import sys
 import argparse
-from Bio import motifs
-from Bio.motifs import jaspar
+import functools
+import io
+import lazyImport
+motifs=lazyImport.lazyModule("Bio.motifs")
+jaspar=lazyImport.lazyModule("Bio.motifs.jaspar")
 import numpy as np
-import pandas as pd
+pd=lazyImport.lazyModule("pandas")
 import multiprocessing
+import stageProfiler
 try:
     cpus = multiprocessing.cpu_count()
 except NotImplementedError:
     cpus = 2   # arbitrary default
 
-from typing import IO, List
+from typing import IO, List, Iterable, Iterator, Generator
 
 def getHomerLogOdd(
     motif:motifs.Motif,
@@ -260,6 +267,107 @@ def readMotifFile(handle:IO, format:str="MINIMAL")->list[motifs.Motif]:
     motifList:list[motifs.Motif]=motifs.parse(handle, format)
     return motifList
 
+def readHomerMotifFile(handle:IO)->tuple[list[str], list[np.ndarray], np.ndarray]:
+    """
+    Read motifs in the Homer format written by `motif2homerString`.
+
+    Parameters
+    ----------
+    handle : IO
+        The file handle to read from.
+
+    Returns
+    -------
+    tuple[list[str], list[np.ndarray], np.ndarray]
+        The names of the motifs, their PWM (arrays of shape (motifLength, 4), columns in the order ACGT) and their
+        log-odds thresholds.
+    """
+    nameList=[]
+    pwmList=[]
+    thresholdList=[]
+    rowList=None
+    for line in handle:
+        line=line.strip()
+        if not line:
+            continue
+        if line.startswith(">"):
+            # header : >consensus  name  logOddThreshold
+            fields=line[1:].split("\t")
+            nameList.append(fields[1] if len(fields)>1 else fields[0])
+            thresholdList.append(float(fields[2]) if len(fields)>2 else np.nan)
+            rowList=[]
+            pwmList.append(rowList)
+        elif rowList is not None:
+            rowList.append([float(value) for value in line.split()])
+    return nameList, [np.asarray(rows, dtype=np.float64).reshape(-1, 4) for rows in pwmList], np.asarray(thresholdList, dtype=np.float64)
+
+def readBackgroundFile(path:str)->dict[str, float]:
+    """
+    Read a background file: tab separated (getBackground.py) or space separated (MEME fasta-get-markov), the comment
+    lines are skipped.
+    """
+    # with `sep=r"\s+|\t"` we can read tab separated file produce by getBackground.py and space separated file produce by MEME fasta-get-markov. We need to skip comment line.
+    return pd.read_csv(path, sep=r"\s+|\t", engine="python", header=None, index_col=0, comment='#')[1].to_dict()
+
+def iterMemeMotifTexts(lines:Iterable[str])->Generator[str, None, None]:
+    """
+    Split a MEME (MINIMAL) stream into standalone single motif records.
+
+    The header (version, alphabet, strands, background) seen before the first motif is prepended to each motif, so every 
+    record can be parsed on its own. A new "MEME version" line starts a new header, so concatenated files with or 
+    without their header (`requestJasparDatabase.py -a`) are both supported.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        The lines of the MEME stream (a file handle, stdin...). Lines are consumed lazily.
+
+    Yields
+    ------
+    str
+        A MEME record containing the header and a single motif.
+    """
+    headerLines=[]
+    motifLines=None
+    for line in lines:
+        if line.startswith("MEME version"):
+            if motifLines is not None:
+                yield "".join(headerLines+motifLines)
+                motifLines=None
+            headerLines=[line]
+        elif line.startswith("MOTIF"):
+            if motifLines is not None:
+                yield "".join(headerLines+motifLines)
+            motifLines=[line]
+        elif motifLines is None:
+            headerLines.append(line)
+        else:
+            motifLines.append(line)
+    if motifLines is not None:
+        yield "".join(headerLines+motifLines)
+
+def readMotifStream(handle:IO, format:str="MINIMAL")->Generator[motifs.Motif, None, None]:
+    """
+    Read motifs from a MEME stream, one motif at a time.
+
+    Unlike `readMotifFile`, the motifs are yielded as soon as they are read in `handle`, without waiting for the end of 
+    the file.
+
+    Parameters
+    ----------
+    handle : IO
+        The file handle to read from.
+    format : str, optional
+        The format of the input file. Default is "MINIMAL". Only "MEME" and "MINIMAL" are supported.
+
+    Yields
+    ------
+    Bio.motifs.Motif
+        The motifs read from the stream.
+    """
+    for motifTxt in iterMemeMotifTexts(handle):
+        yield from motifs.parse(io.StringIO(motifTxt), format)
+
 def setPseudoCounts(motifList: List[motifs.Motif]):
     """
     Set pseudocounts for a list of motifs.
@@ -317,6 +425,51 @@ def motif2homerString(motif:motifs.Motif):
 def motifList2homerString(motifList:list[motifs.Motif]):
     return "".join([motif2homerString(motif) for motif in motifList])
 
+def _motif2homerStringWithThreshold(
+    motif:motifs.Motif,
+    method:str="fpr",
+    thresholdKwargs:dict=None
+)->str:
+    """
+    Compute the log-odds threshold of a motif and return its Homer representation (worker of `streamMotif2homerString`).
+    """
+    thresholdKwargs={} if thresholdKwargs is None else thresholdKwargs
+    motif.logOddThreshold=getLogOddThreshold(motif, method=method, **thresholdKwargs)
+    return motif2homerString(motif)
+
+def streamMotif2homerString(
+    motifIterable:Iterable[motifs.Motif],
+    method:str="fpr",
+    processes:int=cpus,
+    **kwargs
+)->Iterator[str]:
+    """
+    Compute the log-odds thresholds of a stream of motifs and yield their Homer representation.
+
+    The motifs are sent to the workers as soon as they are read from `motifIterable`, so reading (network, pipe...) and 
+    threshold computation overlap. The Homer records are yielded in the order of `motifIterable`, as soon as all the 
+    previous motifs are done.
+
+    Parameters
+    ----------
+    motifIterable : Iterable[Bio.motifs.Motif]
+        The motifs to convert. Pseudocounts and background should already be set.
+    method : str, optional
+        The method to use for threshold calculation (default is "fpr").
+    processes : int, optional
+        Number of worker processes (default is the number of CPUs).
+    **kwargs : dict, optional
+        Additional keyword arguments for the threshold calculation function.
+
+    Yields
+    ------
+    str
+        The Homer representation of each motif.
+    """
+    worker=functools.partial(_motif2homerStringWithThreshold, method=method, thresholdKwargs=kwargs)
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(worker, motifIterable, chunksize=1)
+
 def parseArgs() -> argparse.Namespace:
     """
     Parse command-line arguments.
@@ -337,8 +490,13 @@ def parseArgs() -> argparse.Namespace:
     parser.add_argument("--eps", type=float, default=0.01, help="A small constant subtracted to the score (default: 0.01, homer)")
     parser.add_argument("--pValue", type=float, default=0.05, help="Desired p-value for threshold calculation (default: 0.05)")
     parser.add_argument("--precision", type=int, default=10 ** 3, help="Precision parameter for threshold calculation (default: 1000)")
+    parser.add_argument("--stream", action="store_true", help="Convert the motifs while they are read (e.g. piped from requestJasparDatabase.py). Only for MEME and MINIMAL formats.")
+    stageProfiler.addProfileArguments(parser)
 
-    return parser.parse_args()
+    args=parser.parse_args()
+    if args.stream and args.format not in ("MEME", "MINIMAL"):
+        parser.error("--stream is only available for MEME and MINIMAL formats")
+    return args
 
 def main():
     # get arguments of the cli
@@ -352,29 +510,58 @@ def main():
     eps=args.eps
     pValue=args.pValue
     precision=args.precision
-    # read motifs from input (stdin or file)
-    motifList = readMotifFile(input, format=format)
-    # set pseudocounts to avoid issues
-    setPseudoCounts(motifList)
-    # set background if given
+    profiler=stageProfiler.StageProfiler.fromArgs("pwm2homer", args)
+    profiler.addInputs(None if input is sys.stdin else input.name, backgroundFilePath)
+    background=None
     if backgroundFilePath is not None :
-        # with `sep=r"\s+|\t"` we can read tab separated file produce by getBackground.py and space separated file produce by MEME fasta-get-markov. We need to skip comment line.
-        background=pd.read_csv(backgroundFilePath, sep=r"\s+|\t", engine="python", header=None, index_col=0, comment='#')[1].to_dict()
-        setBackground(motifList,background)
-    # compute logOffThreshold et set on motifs
-    thresholdList=getLogOddThresholdList(
-        motifList,
-        method=method,
-        mismatch=mismatch,
-        eps=eps,
-        pValue=pValue,
-        precision=precision,
-    )
-    setLogOddThreshold(motifList, thresholdList)
-    # print homer format into output (stdout or file)
-    homerString = motifList2homerString(motifList)
-    output.write(homerString)
-    output.flush()
+        background=readBackgroundFile(backgroundFilePath)
+    if args.stream :
+        # set pseudocounts and background on each motif as soon as it is read, then send it to the workers
+        def prepareMotif_(motif:motifs.Motif)->motifs.Motif:
+            motif.pseudocounts=jaspar.calculate_pseudocounts(motif)
+            if background is not None :
+                motif.background=background
+            return motif
+        motifIterable=map(prepareMotif_, readMotifStream(input, format=format))
+        # reading and threshold computation overlap : a single phase
+        with profiler.phase("read and threshold computation"):
+            for homerString in streamMotif2homerString(
+                motifIterable,
+                method=method,
+                mismatch=mismatch,
+                eps=eps,
+                pValue=pValue,
+                precision=precision,
+            ):
+                output.write(homerString)
+            output.flush()
+    else :
+        # read motifs from input (stdin or file)
+        with profiler.phase("read motifs"):
+            motifList = readMotifFile(input, format=format)
+            # set pseudocounts to avoid issues
+            setPseudoCounts(motifList)
+            # set background if given
+            if background is not None :
+                setBackground(motifList,background)
+        # compute logOffThreshold et set on motifs
+        with profiler.phase("threshold computation"):
+            thresholdList=getLogOddThresholdList(
+                motifList,
+                method=method,
+                mismatch=mismatch,
+                eps=eps,
+                pValue=pValue,
+                precision=precision,
+            )
+            setLogOddThreshold(motifList, thresholdList)
+        # print homer format into output (stdout or file)
+        with profiler.phase("write"):
+            homerString = motifList2homerString(motifList)
+            output.write(homerString)
+            output.flush()
+    profiler.addOutputs(None if output is sys.stdout else output.name)
+    profiler.write()
 
     
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
 Date : 06/22/2023
 """
 
+from __future__ import annotations
+
 __authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
 __date__ = '06/22/2023'
 __email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
@@ -17,7 +19,9 @@ __version__ = "0.0.1"
 import sys
 import argparse
 import re
-import requests
+import lazyImport
+requests=lazyImport.lazyModule("requests")
+import stageProfiler
 
 from typing import Generator, Sequence, Optional, Dict, Any
 API_URL="https://jaspar.elixir.no/api/v1/"
@@ -266,6 +270,7 @@ def parseArgs() -> argparse.Namespace:
     parser.add_argument("-f", "--outputFormat", type=str, default="jaspar", help="Format of the output, by default \"jaspar\". Available formats are : \"json\", \"jsonp\", \"jaspar\", \"meme\", \"transfac\", \"pfm\" and \"yaml\" ") #bed not supported
     parser.add_argument("-a", "--cat", action="store_true", help="Use this option if you want to use the output to complete an existing file. It will remove the header of the first matrix")
     parser.add_argument("-u", "--apiUrl", type=str, default=None, help="API URL. Use 'https://jaspar2020.genereg.net/api/v1/' if you want to get access to POLII collection.")
+    stageProfiler.addProfileArguments(parser)
     return parser.parse_args()
 
 def main():
@@ -282,6 +287,7 @@ def main():
     outputFormat=args.outputFormat
     cat=args.cat
     apiUrl=args.apiUrl
+    profiler=stageProfiler.StageProfiler.fromArgs("requestJasparDatabase", args)
     # get an explicit API URL for the release.
     if apiUrl is None:
         apiUrl=getApiUrl(release)
@@ -299,8 +305,11 @@ def main():
         cat=cat,
         apiUrl=apiUrl
     )
-    for matrixTxt in motifMatrixTxtGenerator :
-        print(matrixTxt)
+    with profiler.phase("request motifs"):
+        for matrixTxt in motifMatrixTxtGenerator :
+            # flush each motif so that a piped consumer (pwm2homer.py --stream) can start without waiting for the whole database
+            print(matrixTxt, flush=True)
+    profiler.write()
 
 if __name__ == '__main__':
     main()
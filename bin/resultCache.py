@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed cache of output files, shared between runs and work directories.
+
+An entry is a directory `<cacheDir>/<key>/` where the key is the sha256 of the content of the input files (see
+`getFilesKey`). It holds one file by artifact (e.g. "mnnResultsArray.npy"). The cached files are read-only and are
+exported with a hardlink, a reflink (copy-on-write clone) or a copy, in this order of preference. The entries are
+evicted in least recently used order when the cache is above its size budget.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+import os
+import re
+import stat
+import shutil
+import hashlib
+import tempfile
+import importlib.util
+
+from typing import Dict, Iterable, List, Union
+
+CACHE_VERSION="1"
+"""
+CACHE_VERSION: str
+    Part of every key. Change it when the format of the cached files changes.
+"""
+
+ACCESS_FILE=".lastAccess"
+"""
+ACCESS_FILE: str
+    File of an entry whose modification time is the last access to the entry (LRU order).
+"""
+
+SIZE_UNITS={"": 1, "K": 1<<10, "M": 1<<20, "G": 1<<30, "T": 1<<40}
+"""
+SIZE_UNITS: dict
+    Multipliers of the size suffixes of `parseSize`.
+"""
+
+FICLONE=0x40049409
+"""
+FICLONE: int
+    Linux ioctl request cloning a file (reflink) on copy-on-write file systems (btrfs, xfs, ...).
+"""
+
+def parseSize(size:Union[int, str])->int:
+    """
+    Parse a size in bytes, with an optional suffix K, M, G or T (powers of 1024), e.g. "50G".
+
+    Raises
+    ------
+    ValueError
+        If the size can not be parsed.
+    """
+    if isinstance(size, int):
+        return size
+    match=re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", size, flags=re.IGNORECASE)
+    if match is None:
+        raise ValueError("invalid size : {}".format(size))
+    return int(float(match.group(1))*SIZE_UNITS[match.group(2).upper()])
+
+def getFilesKey(paths:Iterable[os.PathLike], extra:Iterable[str]=(), bufferSize:int=1<<20)->str:
+    """
+    Get the key of a list of files: the sha256 of their content (in order) and of extra strings (e.g. options
+    changing the outputs).
+
+    Parameters
+    ----------
+    paths : Iterable[PathLike]
+        The input files.
+    extra : Iterable[str], optional
+        Extra strings, by default ().
+    bufferSize : int, optional
+        Size of the blocks read, by default 1 MiB.
+
+    Returns
+    -------
+    str
+        The hexadecimal key.
+    """
+    checksum=hashlib.sha256(CACHE_VERSION.encode())
+    for path in paths:
+        # the sizes separate the contents of consecutive files
+        checksum.update(str(os.path.getsize(path)).encode()+b"\0")
+        with open(path, "rb") as inputFile:
+            for buffer in iter(lambda: inputFile.read(bufferSize), b""):
+                checksum.update(buffer)
+    for value in extra:
+        checksum.update(b"\0"+str(value).encode())
+    return checksum.hexdigest()
+
+def getModuleSourcePaths(moduleNames:Iterable[str])->List[str]:
+    """
+    Get the source files of modules, without importing them, to put the code computing the outputs in a key (see
+    `getFilesKey`): the static `__version__` strings do not change with the code.
+
+    Raises
+    ------
+    ImportError
+        If a module is not found.
+    """
+    sourcePaths=[]
+    for moduleName in moduleNames:
+        spec=importlib.util.find_spec(moduleName)
+        if spec is None or spec.origin is None or not os.path.isfile(spec.origin):
+            raise ImportError("no source file for the module {}".format(moduleName))
+        sourcePaths.append(spec.origin)
+    return sourcePaths
+
+def getEntryDir(cacheDir:os.PathLike, key:str)->str:
+    """
+    Get the directory of a cache entry.
+    """
+    return os.path.join(cacheDir, key)
+
+def touchEntry(entryDir:os.PathLike)->None:
+    """
+    Mark an entry as used now.
+    """
+    with open(os.path.join(entryDir, ACCESS_FILE), "a"):
+        pass
+    os.utime(os.path.join(entryDir, ACCESS_FILE))
+
+def getCachedArtifacts(cacheDir:os.PathLike, key:str, artifactNames:Iterable[str])->Union[Dict[str, str], None]:
+    """
+    Look for the artifacts of a key in the cache.
+
+    Parameters
+    ----------
+    cacheDir : PathLike
+        The cache directory.
+    key : str
+        The key (see `getFilesKey`).
+    artifactNames : Iterable[str]
+        The names of the artifacts needed.
+
+    Returns
+    -------
+    Dict[str, str] or None
+        The path of each artifact in the cache, None if one of them is missing (cache miss).
+    """
+    entryDir=getEntryDir(cacheDir, key)
+    artifactPaths={artifactName:os.path.join(entryDir, artifactName) for artifactName in artifactNames}
+    if not all(os.path.isfile(artifactPath) for artifactPath in artifactPaths.values()):
+        return None
+    try:
+        touchEntry(entryDir)
+    except OSError:
+        # evicted meanwhile
+        return None
+    return artifactPaths
+
+def reflinkFile(srcPath:os.PathLike, dstPath:os.PathLike)->None:
+    """
+    Clone a file (copy-on-write), if the file system supports it.
+
+    Raises
+    ------
+    OSError
+        If the clone is not supported.
+    """
+    import fcntl
+    with open(srcPath, "rb") as srcFile, open(dstPath, "wb") as dstFile:
+        try:
+            fcntl.ioctl(dstFile.fileno(), FICLONE, srcFile.fileno())
+        except OSError:
+            dstFile.close()
+            os.remove(dstPath)
+            raise
+
+def exportFile(srcPath:os.PathLike, dstPath:os.PathLike)->str:
+    """
+    Export a cached file, replacing the destination: with a hardlink, else a reflink, else a copy.
+
+    Parameters
+    ----------
+    srcPath : PathLike
+        The cached file.
+    dstPath : PathLike
+        The destination.
+
+    Returns
+    -------
+    str
+        The method used: "hardlink", "reflink" or "copy".
+    """
+    if os.path.lexists(dstPath):
+        os.remove(dstPath)
+    try:
+        os.link(srcPath, dstPath)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        reflinkFile(srcPath, dstPath)
+        return "reflink"
+    except (OSError, ImportError):
+        pass
+    shutil.copyfile(srcPath, dstPath)
+    return "copy"
+
+def storeArtifacts(cacheDir:os.PathLike, key:str, artifactPaths:Dict[str, os.PathLike])->None:
+    """
+    Store files in the entry of a key. The files are copied in a temporary file of the cache and renamed, so a
+    concurrent reader never sees a partial file. The existing artifacts of the entry are kept.
+
+    Parameters
+    ----------
+    cacheDir : PathLike
+        The cache directory.
+    key : str
+        The key (see `getFilesKey`).
+    artifactPaths : Dict[str, PathLike]
+        The path of the file of each artifact.
+    """
+    entryDir=getEntryDir(cacheDir, key)
+    os.makedirs(entryDir, exist_ok=True)
+    for artifactName, artifactPath in artifactPaths.items():
+        cachedPath=os.path.join(entryDir, artifactName)
+        if os.path.isfile(cachedPath):
+            continue
+        tmpFd, tmpPath=tempfile.mkstemp(dir=entryDir, prefix=".{}.".format(artifactName))
+        os.close(tmpFd)
+        try:
+            shutil.copyfile(artifactPath, tmpPath)
+            # a cached file can be hardlinked in many work directories : it must not be modified
+            os.chmod(tmpPath, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmpPath, cachedPath)
+        finally:
+            if os.path.lexists(tmpPath):
+                os.remove(tmpPath)
+    touchEntry(entryDir)
+
+def getEntrySize(entryDir:os.PathLike)->int:
+    """
+    Get the size in bytes of the files of an entry.
+    """
+    with os.scandir(entryDir) as entries:
+        return sum(entry.stat(follow_symlinks=False).st_size for entry in entries if entry.is_file(follow_symlinks=False))
+
+def getEntryLastAccess(entryDir:os.PathLike)->float:
+    """
+    Get the last access time of an entry (0 if it was never marked).
+    """
+    try:
+        return os.stat(os.path.join(entryDir, ACCESS_FILE)).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+def evictCache(cacheDir:os.PathLike, maxSize:int, keepKeys:Iterable[str]=())->List[str]:
+    """
+    Remove the least recently used entries until the cache size is below `maxSize`.
+
+    Parameters
+    ----------
+    cacheDir : PathLike
+        The cache directory.
+    maxSize : int
+        The size budget in bytes.
+    keepKeys : Iterable[str], optional
+        Keys which are not evicted (e.g. the entry which has just been stored), by default ().
+
+    Returns
+    -------
+    List[str]
+        The evicted keys.
+    """
+    keepKeys=set(keepKeys)
+    entryList=[]
+    with os.scandir(cacheDir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                entryList.append((getEntryLastAccess(entry.path), entry.name, getEntrySize(entry.path)))
+    cacheSize=sum(entrySize for _, _, entrySize in entryList)
+    evictedKeys=[]
+    for _, key, entrySize in sorted(entryList):
+        if cacheSize<=maxSize:
+            break
+        if key in keepKeys:
+            continue
+        shutil.rmtree(getEntryDir(cacheDir, key), ignore_errors=True)
+        cacheSize-=entrySize
+        evictedKeys.append(key)
+    return evictedKeys
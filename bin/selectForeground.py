@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Select a ranked and capped foreground of a module for HOMER.
+
+The positive hits of a frequently firing module are many and often near-duplicates (overlapping windows, repeated STR
+contexts). The hits (bed file of the module and its fasta file, in the same order as written by `bedtools getfasta`)
+are streamed once, the score of a fasta record is the one of the bed line of the same interval (the intervals skipped
+by `bedtools getfasta` are skipped):
+    - a min-heap keeps the `maxCandidates` best scores, the exact duplicate sequences are collapsed into one candidate
+      on the fly (with the best score);
+    - the candidates are visited by decreasing score and clustered on their k-mers (MinHash sketches, banded LSH): a
+      candidate whose estimated Jaccard similarity with a kept sequence is >= `minSimilarity` is collapsed into it;
+    - at most `maxForeground` sequences are kept.
+The multiplicity of each kept sequence (number of hits collapsed into it) is written in a table so that the enrichment
+statistics can be weighted.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python selectForeground.py positiveHits.bed positiveHits.fasta -o foreground.fasta --multiplicity foregroundMultiplicity.tsv --maxForeground 5000
+
+import sys
+import heapq
+import argparse
+import itertools
+
+import numpy as np
+import numpy.typing as npt
+
+import stageProfiler
+
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+BASE_IDX=np.full(256, -1, dtype=np.int8)
+for baseIdx, base in enumerate("ACGT"):
+    BASE_IDX[ord(base)]=baseIdx
+    BASE_IDX[ord(base.lower())]=baseIdx
+"""
+BASE_IDX: NDArray[np.int8]
+    Index of each ASCII character in the alphabet A, C, G, T (soft-masked bases included), -1 for the other characters.
+"""
+
+MULTIPLICITY_COLUMNS=["name", "score", "nbHit", "nbSequence"]
+"""
+MULTIPLICITY_COLUMNS: list
+    Columns of the multiplicity table: the fasta header of the kept sequence, its score, the number of hits and the
+    number of distinct sequences collapsed into it.
+"""
+
+class Candidate:
+    """
+    A distinct sequence in the heap of the best hits.
+    """
+    __slots__=("score", "order", "name", "seq", "nbHit", "valid")
+
+    def __init__(self, score:float, order:int, name:str, seq:str, nbHit:int=1):
+        self.score=score
+        self.order=order
+        self.name=name
+        self.seq=seq
+        self.nbHit=nbHit
+        self.valid=True
+
+    def key(self)->Tuple[float, int]:
+        # the lowest score first, the latest hit first among equal scores
+        return (self.score, -self.order)
+
+def readFasta(fastaFile:TextIO)->Iterator[Tuple[str, str]]:
+    """
+    Iterate over the (header without '>', sequence) of a fasta file.
+    """
+    name=None
+    seqParts=[]
+    for line in fastaFile:
+        line=line.rstrip("\n")
+        if line.startswith(">"):
+            if name is not None:
+                yield name, "".join(seqParts)
+            name=line[1:]
+            seqParts=[]
+        elif line:
+            seqParts.append(line)
+    if name is not None:
+        yield name, "".join(seqParts)
+
+def readBedScores(bedFile:TextIO)->Iterator[Tuple[str, float]]:
+    """
+    Iterate over the (interval as "chrom:start-end", score in the 5th column) of a bed file.
+    """
+    for line in bedFile:
+        if line.strip():
+            fields=line.split("\t")
+            yield "{}:{}-{}".format(fields[0], fields[1], fields[2]), float(fields[4])
+
+def getFastaInterval(name:str)->str:
+    """
+    Get the interval "chrom:start-end" of a fasta header of `bedtools getfasta`, without the name (`-name`) and the
+    strand (`-s`).
+    """
+    interval=name.rsplit("::", 1)[-1]
+    if interval.endswith(("(+)", "(-)", "(.)")):
+        interval=interval[:-3]
+    return interval
+
+class ScoredFasta:
+    """
+    Iterate over the (score, header, sequence) of the fasta records, the score taken from the bed line of the same
+    interval. Both files are in the same order: the bed lines without fasta record (skipped by `bedtools getfasta`,
+    e.g. out of the reference) are skipped and counted.
+
+    Parameters
+    ----------
+    bedFile : TextIO
+        The bed file of the hits.
+    fastaFile : TextIO
+        The fasta file of the hits.
+    """
+    def __init__(self, bedFile:TextIO, fastaFile:TextIO):
+        self.bedRecords=readBedScores(bedFile)
+        self.fastaRecords=readFasta(fastaFile)
+        self.nbSkippedBed=0
+
+    def __iter__(self)->Iterator[Tuple[float, str, str]]:
+        for name, seq in self.fastaRecords:
+            interval=getFastaInterval(name)
+            for bedInterval, score in self.bedRecords:
+                if bedInterval==interval:
+                    break
+                self.nbSkippedBed+=1
+            else:
+                raise ValueError("the fasta record {} has no bed line (the fasta file should follow the bed file)".format(name))
+            yield score, name, seq
+
+class TopCandidates:
+    """
+    Streaming top-k of the distinct sequences by score. The exact duplicates are collapsed into one candidate which
+    keeps the best score and counts the hits. A replaced entry is invalidated in the heap and skipped when popped.
+
+    Parameters
+    ----------
+    maxCandidates : int
+        The number of candidates kept.
+    """
+    def __init__(self, maxCandidates:int):
+        self.maxCandidates=maxCandidates
+        self.heap=[]
+        self.bySeq:Dict[str, Candidate]={}
+        self.order=itertools.count()
+        self.nbHit=0
+        self.nbDroppedHit=0
+
+    def _push(self, candidate:Candidate)->None:
+        self.bySeq[candidate.seq]=candidate
+        heapq.heappush(self.heap, (candidate.key(), candidate))
+        if len(self.heap)>2*self.maxCandidates:
+            # drop the invalidated entries
+            self.heap=[item for item in self.heap if item[1].valid]
+            heapq.heapify(self.heap)
+
+    def _popMin(self)->Candidate:
+        while True:
+            candidate=heapq.heappop(self.heap)[1]
+            if candidate.valid:
+                return candidate
+
+    def _peekMin(self)->Candidate:
+        while not self.heap[0][1].valid:
+            heapq.heappop(self.heap)
+        return self.heap[0][1]
+
+    def add(self, score:float, name:str, seq:str)->None:
+        """
+        Add a hit.
+        """
+        self.nbHit+=1
+        order=next(self.order)
+        seq=seq.upper()
+        duplicate=self.bySeq.get(seq)
+        if duplicate is not None:
+            if score>duplicate.score:
+                duplicate.valid=False
+                self._push(Candidate(score, order, name, seq, nbHit=duplicate.nbHit+1))
+            else:
+                duplicate.nbHit+=1
+            return
+        if len(self.bySeq)>=self.maxCandidates:
+            if (score, -order)<=self._peekMin().key():
+                self.nbDroppedHit+=1
+                return
+            evicted=self._popMin()
+            del self.bySeq[evicted.seq]
+            self.nbDroppedHit+=evicted.nbHit
+        self._push(Candidate(score, order, name, seq))
+
+    def getRanked(self)->List[Candidate]:
+        """
+        Get the candidates by decreasing score.
+        """
+        return sorted(self.bySeq.values(), key=Candidate.key, reverse=True)
+
+def getKmerCodes(seq:str, kmerSize:int)->npt.NDArray[np.int64]:
+    """
+    Get the integer code of each k-mer of a sequence, the k-mers with a base other than A, C, G or T are skipped.
+    """
+    baseIdx=BASE_IDX[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)].astype(np.int64)
+    nbKmer=len(baseIdx)-kmerSize+1
+    if nbKmer<=0:
+        return np.empty(0, dtype=np.int64)
+    codes=np.zeros(nbKmer, dtype=np.int64)
+    for offset in range(kmerSize):
+        codes=codes*4+baseIdx[offset:offset+nbKmer]
+    # number of invalid bases in each k-mer
+    invalidCumSum=np.concatenate([[0], np.cumsum(baseIdx<0)])
+    validMask=(invalidCumSum[kmerSize:]-invalidCumSum[:nbKmer])==0
+    return codes[validMask]
+
+def getMinHashParameters(nbHash:int, seed:int=0)->Tuple[npt.NDArray[np.uint64], npt.NDArray[np.uint64]]:
+    """
+    Draw the parameters of the hash functions h(x)=a*x+b (mod 2^64), a odd.
+    """
+    rng=np.random.default_rng(seed)
+    hashMul=rng.integers(1, 2**63, size=nbHash, dtype=np.uint64)*np.uint64(2)+np.uint64(1)
+    hashAdd=rng.integers(0, 2**63, size=nbHash, dtype=np.uint64)
+    return hashMul, hashAdd
+
+def getMinHashSketch(
+    kmerCodes:npt.NDArray[np.int64],
+    hashMul:npt.NDArray[np.uint64],
+    hashAdd:npt.NDArray[np.uint64]
+)->npt.NDArray[np.uint64]:
+    """
+    Get the MinHash sketch of a set of k-mers: the min of each hash function over the k-mers. An empty set gets the
+    max value for all the hash functions.
+    """
+    if len(kmerCodes)==0:
+        return np.full(len(hashMul), np.iinfo(np.uint64).max, dtype=np.uint64)
+    # the multiplication wraps around (mod 2^64)
+    hashes=kmerCodes.astype(np.uint64)[:, None]*hashMul[None, :]+hashAdd[None, :]
+    return np.min(hashes, axis=0)
+
+def clusterCandidates(
+    rankedCandidates:List[Candidate],
+    maxForeground:int,
+    kmerSize:int=6,
+    nbHash:int=32,
+    bandSize:int=4,
+    minSimilarity:float=0.5
+)->List[Tuple[Candidate, int, int]]:
+    """
+    Collapse the near-duplicate candidates, visited by decreasing score, into the best one and keep at most
+    `maxForeground` sequences.
+
+    Parameters
+    ----------
+    rankedCandidates : List[Candidate]
+        The candidates by decreasing score.
+    maxForeground : int
+        The max number of kept sequences.
+    kmerSize : int, optional
+        The size of the k-mers of the sketches, by default 6.
+    nbHash : int, optional
+        The number of hash functions of the sketches, by default 32.
+    bandSize : int, optional
+        The number of hash functions by LSH band, by default 4. Two sequences are compared only if they share a band.
+    minSimilarity : float, optional
+        The min estimated Jaccard similarity of the k-mers of near-duplicates, by default 0.5. 1 or more collapses
+        only the exact duplicates.
+
+    Returns
+    -------
+    List[Tuple[Candidate, int, int]]
+        The kept candidates by decreasing score, with the number of hits and of distinct sequences collapsed into them.
+    """
+    if minSimilarity>1:
+        return [(candidate, candidate.nbHit, 1) for candidate in rankedCandidates[:maxForeground]]
+    hashMul, hashAdd=getMinHashParameters(nbHash)
+    nbBand=nbHash//bandSize
+    keptCandidates:List[Candidate]=[]
+    keptSketches=np.empty((maxForeground, nbHash), dtype=np.uint64)
+    keptNbHit=[]
+    keptNbSeq=[]
+    buckets:Dict[Tuple[int, bytes], List[int]]={}
+    for candidate in rankedCandidates:
+        sketch=getMinHashSketch(getKmerCodes(candidate.seq, kmerSize), hashMul, hashAdd)
+        bandKeys=[(band, sketch[band*bandSize:(band+1)*bandSize].tobytes()) for band in range(nbBand)]
+        neighborIdx=np.unique([keptIdx for bandKey in bandKeys for keptIdx in buckets.get(bandKey, ())]).astype(np.intp)
+        if len(neighborIdx)>0:
+            similarities=np.mean(keptSketches[neighborIdx]==sketch[None, :], axis=1)
+            bestIdx=np.argmax(similarities)
+            if similarities[bestIdx]>=minSimilarity:
+                keptNbHit[neighborIdx[bestIdx]]+=candidate.nbHit
+                keptNbSeq[neighborIdx[bestIdx]]+=1
+                continue
+        if len(keptCandidates)>=maxForeground:
+            continue
+        keptIdx=len(keptCandidates)
+        keptCandidates.append(candidate)
+        keptSketches[keptIdx]=sketch
+        keptNbHit.append(candidate.nbHit)
+        keptNbSeq.append(1)
+        for bandKey in bandKeys:
+            buckets.setdefault(bandKey, []).append(keptIdx)
+    return list(zip(keptCandidates, keptNbHit, keptNbSeq))
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Rank the positive hits of a module by score, collapse the duplicates and near-duplicates and cap the foreground of HOMER.")
+    parser.add_argument("bed", type=str, help="The bed file of the hits of the module (score in the 5th column).")
+    parser.add_argument("fasta", type=str, help="The fasta file of the hits, in the order of the bed file (bedtools getfasta).")
+    parser.add_argument("-o", "--output", type=str, default="foreground.fasta", help="The output fasta file (default: foreground.fasta).")
+    parser.add_argument("--multiplicity", type=str, default="foregroundMultiplicity.tsv", help="The output table of the multiplicities of the kept sequences (default: foregroundMultiplicity.tsv).")
+    parser.add_argument("--maxForeground", type=int, default=5000, help="Max number of sequences of the foreground (default: 5000).")
+    parser.add_argument("--maxCandidates", type=int, default=None, help="Number of distinct best sequences kept while streaming, before the near-duplicate clustering (default: 4*maxForeground).")
+    parser.add_argument("--kmerSize", type=int, default=6, help="Size of the k-mers of the MinHash sketches (default: 6).")
+    parser.add_argument("--nbHash", type=int, default=32, help="Number of hash functions of the MinHash sketches (default: 32).")
+    parser.add_argument("--bandSize", type=int, default=4, help="Number of hash functions by LSH band (default: 4).")
+    parser.add_argument("--minSimilarity", type=float, default=0.5, help="Min estimated Jaccard similarity of the k-mers of near-duplicates, more than 1 to collapse only the exact duplicates (default: 0.5).")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("selectForeground", args)
+    maxCandidates=args.maxCandidates if args.maxCandidates is not None else 4*args.maxForeground
+    with profiler.phase("stream top candidates"):
+        topCandidates=TopCandidates(maxCandidates)
+        with open(args.bed) as bedFile, open(args.fasta) as fastaFile:
+            scoredFasta=ScoredFasta(bedFile, fastaFile)
+            for score, name, seq in scoredFasta:
+                topCandidates.add(score, name, seq)
+        rankedCandidates=topCandidates.getRanked()
+    with profiler.phase("cluster"):
+        keptCandidates=clusterCandidates(
+            rankedCandidates,
+            args.maxForeground,
+            kmerSize=args.kmerSize,
+            nbHash=args.nbHash,
+            bandSize=args.bandSize,
+            minSimilarity=args.minSimilarity
+        )
+    with profiler.phase("write"):
+        with open(args.output, "w") as outputFile:
+            for candidate, _, _ in keptCandidates:
+                outputFile.write(">{}\n{}\n".format(candidate.name, candidate.seq))
+        with open(args.multiplicity, "w") as multiplicityFile:
+            multiplicityFile.write("\t".join(MULTIPLICITY_COLUMNS)+"\n")
+            for candidate, nbHit, nbSeq in keptCandidates:
+                multiplicityFile.write("{}\t{}\t{}\t{}\n".format(candidate.name, candidate.score, nbHit, nbSeq))
+    print("{} hits, {} distinct candidates, {} kept sequences ({} hits dropped by the top-k, {} bed lines without sequence)".format(
+        topCandidates.nbHit, len(rankedCandidates), len(keptCandidates), topCandidates.nbDroppedHit, scoredFasta.nbSkippedBed
+    ), file=sys.stderr)
+    profiler.addInputs(args.bed, args.fasta)
+    profiler.addOutputs(args.output, args.multiplicity)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dictionary of the sequence names, built once from `hg38all_names_raw.npy`.
+
+A sequence is identified by its row in the names array (int32 sequence ID). The dictionary keeps the names as ASCII
+bytes (1 byte by character instead of 4 for the numpy unicode arrays) and the fields of the `motifId;seq;strand`
+headers already parsed: the STR sequence and the strand as categorical codes, and the canonical STR class of each
+sequence, with the rule of `filterSeqNameAndOneHotSeq.filterSeqNames` (a sequence of the minus strand belongs to the
+reverse complement of its STR sequence).
+
+The stages carry the int32 IDs (`<strClass>_seqNames.npy` then holds IDs) and only turn them into names when they
+write the BED files or the score matrix (`loadSeqNames`, `SeqNameDict.getNames`).
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+from __future__ import annotations
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+# python seqNameDict.py hg38all_names_raw.npy -o seqNameDict.npz
+
+import os
+import argparse
+
+import numpy as np
+import numpy.typing as npt
+import lazyImport
+pd=lazyImport.lazyModule("pandas")
+
+from miscFct import splitEStrHeader, rcDnaSeq
+import stageProfiler
+
+from typing import Sequence, Union
+
+SEQ_ID_DTYPE=np.int32
+"""
+SEQ_ID_DTYPE: np.dtype
+    Type of the sequence IDs.
+"""
+
+def isSeqIdArray(array:np.ndarray)->bool:
+    """
+    Whether an array of sequences holds sequence IDs (integers) and not names.
+    """
+    return np.issubdtype(np.asarray(array).dtype, np.integer)
+
+class SeqNameDict:
+    """
+    Dictionary of the sequence names. Use `SeqNameDict.fromNames` to build it and `SeqNameDict.load` to read it.
+
+    Parameters
+    ----------
+    names : NDArray[np.bytes_]
+        The ASCII sequence names, the ID of a sequence is its index.
+    seqCodes : NDArray[np.integer]
+        The code of the STR sequence of each sequence in `seqCategories`.
+    seqCategories : NDArray[np.str_]
+        The STR sequences.
+    strandCodes : NDArray[np.integer]
+        The code of the strand of each sequence in `strandCategories`.
+    strandCategories : NDArray[np.str_]
+        The strands.
+    strClassCodes : NDArray[np.integer]
+        The code of the canonical STR class of each sequence in `strClassCategories`.
+    strClassCategories : NDArray[np.str_]
+        The STR classes.
+    """
+    def __init__(
+        self,
+        names:npt.NDArray[np.bytes_],
+        seqCodes:npt.NDArray[np.integer],
+        seqCategories:npt.NDArray[np.str_],
+        strandCodes:npt.NDArray[np.integer],
+        strandCategories:npt.NDArray[np.str_],
+        strClassCodes:npt.NDArray[np.integer],
+        strClassCategories:npt.NDArray[np.str_]
+    ):
+        self.names=names
+        self.seqCodes=seqCodes
+        self.seqCategories=seqCategories
+        self.strandCodes=strandCodes
+        self.strandCategories=strandCategories
+        self.strClassCodes=strClassCodes
+        self.strClassCategories=strClassCategories
+        self._nameIndex=None
+
+    @classmethod
+    def fromNames(cls, seqNamesArray:Sequence[str])->"SeqNameDict":
+        """
+        Build the dictionary of an array of `motifId;seq;strand` names. The headers are parsed once.
+        """
+        seqNamesArray=np.asarray(seqNamesArray)
+        seqHeaderDf=splitEStrHeader(seqNamesArray)
+        seqCategorical=pd.Categorical(seqHeaderDf["seq"])
+        strandCategorical=pd.Categorical(seqHeaderDf["strand"])
+        # canonical class: the reverse complement of the categories is computed once by STR sequence
+        seqCategories=np.asarray(seqCategorical.categories, dtype=str)
+        isMinus=np.asarray(strandCategorical.categories=="-")[strandCategorical.codes]
+        strClassCategorical=pd.Categorical(np.concatenate([seqCategories, [rcDnaSeq(seq) for seq in seqCategories]]))
+        seqToStrClass=strClassCategorical.codes[:len(seqCategories)]
+        rcSeqToStrClass=strClassCategorical.codes[len(seqCategories):]
+        strClassCodes=np.where(isMinus, rcSeqToStrClass[seqCategorical.codes], seqToStrClass[seqCategorical.codes])
+        return cls(
+            names=seqNamesArray.astype(np.bytes_),
+            seqCodes=seqCategorical.codes,
+            seqCategories=seqCategories,
+            strandCodes=strandCategorical.codes,
+            strandCategories=np.asarray(strandCategorical.categories, dtype=str),
+            strClassCodes=strClassCodes.astype(np.min_scalar_type(len(strClassCategorical.categories))),
+            strClassCategories=np.asarray(strClassCategorical.categories, dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path:Union[str, os.PathLike])->"SeqNameDict":
+        """
+        Load a dictionary saved with `SeqNameDict.save`.
+        """
+        with np.load(path) as npz:
+            return cls(**{key:npz[key] for key in npz.files})
+
+    def save(self, path:Union[str, os.PathLike])->None:
+        """
+        Save the dictionary in a `.npz` file.
+        """
+        np.savez(
+            path,
+            names=self.names,
+            seqCodes=self.seqCodes,
+            seqCategories=self.seqCategories,
+            strandCodes=self.strandCodes,
+            strandCategories=self.strandCategories,
+            strClassCodes=self.strClassCodes,
+            strClassCategories=self.strClassCategories
+        )
+
+    def __len__(self)->int:
+        return len(self.names)
+
+    def getNames(self, seqIds:npt.ArrayLike)->npt.NDArray[np.str_]:
+        """
+        Get the names of sequence IDs.
+        """
+        return self.names[np.asarray(seqIds)].astype(str)
+
+    def getIds(self, seqNames:Sequence[str])->npt.NDArray[np.integer]:
+        """
+        Get the IDs of sequence names, -1 for the names which are not in the dictionary.
+        """
+        if self._nameIndex is None:
+            self._nameIndex=pd.Index(self.names.astype(str))
+        return self._nameIndex.get_indexer(np.asarray(seqNames, dtype=str)).astype(SEQ_ID_DTYPE)
+
+    def getStrClasses(self, seqIds:npt.ArrayLike=None)->npt.NDArray[np.str_]:
+        """
+        Get the canonical STR class of sequence IDs (by default of all the sequences).
+        """
+        strClassCodes=self.strClassCodes if seqIds is None else self.strClassCodes[np.asarray(seqIds)]
+        return self.strClassCategories[strClassCodes]
+
+    def getClassMask(self, strClass:str, seqIds:npt.ArrayLike=None)->npt.NDArray[np.bool_]:
+        """
+        Get the mask of the sequence IDs (by default of all the sequences) of a STR class.
+        """
+        strClassCodes=self.strClassCodes if seqIds is None else self.strClassCodes[np.asarray(seqIds)]
+        codeIdx=np.flatnonzero(self.strClassCategories==strClass)
+        if len(codeIdx)==0:
+            return np.zeros(len(strClassCodes), dtype=bool)
+        return strClassCodes==codeIdx[0]
+
+    def getClassSizes(self, seqIds:npt.ArrayLike=None)->pd.Series:
+        """
+        Count the distinct sequences of each STR class among sequence IDs (by default all the sequences).
+        """
+        strClassCodes=self.strClassCodes if seqIds is None else self.strClassCodes[np.unique(seqIds)]
+        counts=np.bincount(strClassCodes, minlength=len(self.strClassCategories))
+        classSizes=pd.Series(counts, index=self.strClassCategories)
+        return classSizes[classSizes>0].sort_values(ascending=False)
+
+def loadSeqNames(path:Union[str, os.PathLike], seqNameDict:Union[None, SeqNameDict]=None)->np.ndarray:
+    """
+    Load a `.npy` file of sequence names or IDs. The IDs are turned into names with the dictionary if it is given.
+    """
+    seqNames=np.load(path)
+    if seqNameDict is not None and isSeqIdArray(seqNames):
+        return seqNameDict.getNames(seqNames)
+    return seqNames
+
+def decodeBedChrom(bedDf:pd.DataFrame, seqNameDict:Union[None, SeqNameDict]=None)->pd.DataFrame:
+    """
+    Replace the sequence IDs of the `chrom` column of a BED DataFrame by their names. Only the written rows are
+    decoded.
+    """
+    if seqNameDict is None or len(bedDf)==0:
+        return bedDf
+    bedDf["chrom"]=seqNameDict.getNames(bedDf["chrom"].astype(SEQ_ID_DTYPE).to_numpy())
+    return bedDf
+
+def parseArgs() -> argparse.Namespace:
+    """
+    Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Build the dictionary of the sequence names (IDs, parsed headers and canonical STR classes).")
+    parser.add_argument("seqNames", type=str, help="The sequence names (.npy, hg38all_names_raw.npy).")
+    parser.add_argument("-o", "--output", type=str, default="seqNameDict.npz", help="The output dictionary (.npz). Default: seqNameDict.npz")
+    stageProfiler.addProfileArguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parseArgs()
+    profiler=stageProfiler.StageProfiler.fromArgs("seqNameDict", args)
+    with profiler.phase("load names"):
+        seqNamesArray=np.load(args.seqNames)
+    with profiler.phase("parse headers"):
+        seqNameDict=SeqNameDict.fromNames(seqNamesArray)
+        del seqNamesArray
+    with profiler.phase("save"):
+        seqNameDict.save(args.output)
+    profiler.addInputs(args.seqNames)
+    profiler.addOutputs(args.output)
+    profiler.write()
+
+if __name__ == "__main__":
+    main()
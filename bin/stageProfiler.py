@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Profile the phases of a script (wall time, CPU time and peak RSS) and the sizes of its inputs and outputs, and write
+the report as JSON (`--profile`). The reports of all the tasks are joined in a table by `aggregateProfiles.py`.
+
+Usage in a script:
+
+    parser=argparse.ArgumentParser(...)
+    stageProfiler.addProfileArguments(parser)
+    args=parser.parse_args()
+    profiler=stageProfiler.StageProfiler.fromArgs("myScript", args)
+    with profiler.phase("load names"):
+        ...
+    profiler.addInputs(args.input)
+    profiler.write()
+
+The report goes to the path given to `--profile`, e.g. next to the outputs of the script. The pipeline writes the
+reports of all its tasks to a single directory (`profileDir` option) instead of next to the outputs of each task: the
+outputs stay in the hashed work directory of the task and each process publishes its own, while the aggregator needs
+all the reports of the run, including those of the tasks whose outputs are not published or were cleaned.
+
+Auteur : Mathys Grapotte, Christophe Vroland and Charles Lecellier
+Date : 10/19/2026
+"""
+
+__authors__ = ("Mathys Grapotte", "Christophe Vroland", "Charles Lecellier")
+__date__ = '10/19/2026'
+__email__ = ("mathysgrapotte@gmail.com", 'christophe@cvroland.com', "charles.lecellier@igmm.cnrs.fr")
+__status__ = 'Prototype'
+__version__ = "0.0.1"
+
+import os
+import json
+import time
+import socket
+import argparse
+import datetime
+import resource
+import contextlib
+
+from typing import Dict, Iterator, List, Union
+
+PROFILE_VERSION=1
+"""
+PROFILE_VERSION: int
+    Version of the report format.
+"""
+
+def getCpuTimes()->Dict[str, float]:
+    """
+    Get the CPU time (user+system, seconds) of the process and of its waited children (e.g. joined worker pools).
+    """
+    selfUsage=resource.getrusage(resource.RUSAGE_SELF)
+    childrenUsage=resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpuTime":selfUsage.ru_utime+selfUsage.ru_stime,
+        "childrenCpuTime":childrenUsage.ru_utime+childrenUsage.ru_stime,
+    }
+
+def getMaxRssKb()->int:
+    """
+    Get the peak resident memory of the process so far (kB).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def getRssKb()->Union[int, None]:
+    """
+    Get the current resident memory of the process (kB), None if it is not available (no /proc).
+    """
+    try:
+        with open("/proc/self/statm") as statmFile:
+            return int(statmFile.read().split()[1])*os.sysconf("SC_PAGE_SIZE")//1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+def getPathSize(path:Union[str, os.PathLike])->Union[int, None]:
+    """
+    Get the size in bytes of a file, or of the files of a directory. None if the path does not exist.
+    """
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(dirPath, fileName))
+            for dirPath, _, fileNameList in os.walk(path) for fileName in fileNameList
+        )
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return None
+
+class StageProfiler:
+    """
+    Record the resources used by the named phases of a stage.
+
+    Parameters
+    ----------
+    stage : str
+        The stage name (usually the script name).
+    labels : Dict[str, str], optional
+        Labels of the task (e.g. strClass, moduleId), written in the report.
+    outputPath : PathLike, optional
+        Path of the JSON report, by default None (`write` does nothing).
+    """
+    def __init__(self, stage:str, labels:Dict[str, str]=None, outputPath:Union[str, os.PathLike]=None):
+        self.stage=stage
+        self.labels={} if labels is None else dict(labels)
+        self.outputPath=outputPath
+        self.phases:List[Dict]=[]
+        self.inputs:Dict[str, int]={}
+        self.outputs:Dict[str, int]={}
+        self.startDate=datetime.datetime.now().isoformat(timespec="seconds")
+        self._start=time.perf_counter()
+        self._startCpuTimes=getCpuTimes()
+
+    @classmethod
+    def fromArgs(cls, stage:str, args:argparse.Namespace)->"StageProfiler":
+        """
+        Build a profiler from the arguments added by `addProfileArguments`.
+        """
+        return cls(stage, labels=dict(args.profileLabel), outputPath=args.profile)
+
+    @property
+    def enabled(self)->bool:
+        """
+        Whether the report is written.
+        """
+        return self.outputPath is not None
+
+    @contextlib.contextmanager
+    def phase(self, name:str)->Iterator[None]:
+        """
+        Context manager recording a phase: wall time, CPU times, peak RSS at the end of the phase and its increase
+        during the phase, and current RSS at the end.
+        """
+        startMaxRssKb=getMaxRssKb()
+        startCpuTimes=getCpuTimes()
+        start=time.perf_counter()
+        try:
+            yield
+        finally:
+            endCpuTimes=getCpuTimes()
+            maxRssKb=getMaxRssKb()
+            self.phases.append({
+                "phase":name,
+                "wallTime":time.perf_counter()-start,
+                "cpuTime":endCpuTimes["cpuTime"]-startCpuTimes["cpuTime"],
+                "childrenCpuTime":endCpuTimes["childrenCpuTime"]-startCpuTimes["childrenCpuTime"],
+                "maxRssKb":maxRssKb,
+                "maxRssIncreaseKb":maxRssKb-startMaxRssKb,
+                "rssKb":getRssKb(),
+            })
+
+    def addInputs(self, *paths:Union[str, os.PathLike, None])->None:
+        """
+        Record the sizes of input files or directories (missing paths and None are ignored).
+        """
+        self._addSizes(self.inputs, paths)
+
+    def addOutputs(self, *paths:Union[str, os.PathLike, None])->None:
+        """
+        Record the sizes of output files or directories (missing paths and None are ignored).
+        """
+        self._addSizes(self.outputs, paths)
+
+    @staticmethod
+    def _addSizes(sizeDict:Dict[str, int], paths)->None:
+        for path in paths:
+            if path is None:
+                continue
+            size=getPathSize(path)
+            if size is not None:
+                sizeDict[str(path)]=size
+
+    def getReport(self)->Dict:
+        """
+        Get the report: stage, labels, host, total resources, phases, inputs and outputs sizes.
+        """
+        endCpuTimes=getCpuTimes()
+        return {
+            "version":PROFILE_VERSION,
+            "stage":self.stage,
+            "labels":self.labels,
+            "host":socket.gethostname(),
+            "pid":os.getpid(),
+            "startDate":self.startDate,
+            "wallTime":time.perf_counter()-self._start,
+            "cpuTime":endCpuTimes["cpuTime"]-self._startCpuTimes["cpuTime"],
+            "childrenCpuTime":endCpuTimes["childrenCpuTime"]-self._startCpuTimes["childrenCpuTime"],
+            "maxRssKb":getMaxRssKb(),
+            "phases":self.phases,
+            "inputs":self.inputs,
+            "outputs":self.outputs,
+        }
+
+    def write(self)->None:
+        """
+        Write the JSON report, if the profiler is enabled.
+        """
+        if not self.enabled:
+            return
+        outputDir=os.path.dirname(self.outputPath)
+        if outputDir!="":
+            os.makedirs(outputDir, exist_ok=True)
+        with open(self.outputPath, "w") as reportFile:
+            json.dump(self.getReport(), reportFile, indent=1)
+
+def parseLabel(label:str)->tuple:
+    """
+    Parse a "key=value" label.
+    """
+    key, separator, value=label.partition("=")
+    if separator=="" or key=="":
+        raise argparse.ArgumentTypeError("a label should be KEY=VALUE : {}".format(label))
+    return key, value
+
+def addProfileArguments(parser:argparse.ArgumentParser)->None:
+    """
+    Add the `--profile` and `--profileLabel` options shared by the scripts.
+    """
+    parser.add_argument("--profile", type=str, default=None, help="Write a JSON report of the phases of the script (wall time, CPU time, peak RSS) and of the sizes of its inputs and outputs to this path. Default: no report")
+    parser.add_argument("--profileLabel", type=parseLabel, nargs="+", action="extend", default=[], metavar="KEY=VALUE", help="Labels of the report (e.g. strClass=AC moduleId=3).")
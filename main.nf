@@ -1,20 +1,26 @@
-include {LIST_STR_CLASS} from './modules/listStrClass.nf'
-include {LIST_STR_MODULE} from './modules/listModule.nf'
+include {MNN_MODEL_CATALOG} from './modules/mnnModelCatalog.nf'
 include {REQUEST_JASPAR_DATABASE} from './modules/requestJasparDatabase.nf'
 include {MEME_TO_HOMER_FORMAT} from './modules/memeToHomerFormat.nf'
+include {REQUEST_JASPAR_DATABASE_HOMER} from './modules/requestJasparDatabaseHomer.nf'
 include {RENAME_SEQ_IN_FASTA} from './modules/renameSeqIn1001ncFasta.nf'
+include {BUILD_SEQ_NAME_DICT} from './modules/buildSeqNameDict.nf'
 include {PREFILTRE_SEQ_NAMES_AND_ONE_HOT} from './modules/prefiltreSeqNameAndOneHitsSeq.nf'
 include{GET_SEQ_NAMES_AND_ONE_HOT_BY_STR_CLASS} from './modules/getSeqNameAndOneHotSeqByStrClass.nf'
+include {ESTIMATE_MEMORY} from './modules/estimateMemory.nf'
+include {MNN_NULL_MODEL} from './modules/mnnNullModel.nf'
+include {MNN_FILTER_PVALUES} from './modules/mnnFilterPvalue.nf'
+include {ANALYZE_STR_CLASS} from './modules/analyzeStrClass.nf'
 include {COMPUTE_MNN_RESULTS} from './modules/computeMnnResults.nf'
 include {GET_STR_CLASS_BED_FILES} from './modules/getStrClassBedFiles.nf'
 include {GET_STR_MODULE_HITS_BED} from './modules/getStrModuleHitsBed.nf'
 include {GET_FASTA_BEDTOOLS as GET_FASTA_BEDTOOLS_STRMODULEHITS} from './modules/getFastaBedtools.nf'
 include {GET_FASTA_BEDTOOLS as GET_FASTA_BEDTOOLS_STRMODULENONHITS} from './modules/getFastaBedtools.nf'
 include {GET_FASTA_BEDTOOLS as GET_FASTA_BEDTOOLS_STRMODULEOTHERHITS} from './modules/getFastaBedtools.nf'
+include {SELECT_FOREGROUND} from './modules/selectForeground.nf'
+include {KMER_PRESCREEN} from './modules/kmerPrescreen.nf'
 include {GET_FAIDX_SAMTOOLS} from './modules/getFaidxSamtools.nf'
 include {GET_STR_MODULE_NON_HITS_BED} from './modules/getStrModuleNonHitsBed.nf'
 include {GET_STR_MODULE_OTHER_HITS_BED} from './modules/getStrModuleOtherHitsBed.nf'
-include {GET_HOMER_LEN_PARAM} from './modules/getHomerLenParams.nf'
 include {FIND_MOTIFS_HOMER as FIND_MOTIFS_HOMER_NONHITS} from './modules/findMotifsHomer.nf'
 include {FIND_MOTIFS_HOMER as FIND_MOTIFS_HOMER_OTHERHITS} from './modules/findMotifsHomer.nf'
 include {PARSE_HOMER_RESULTS as PARSE_HOMER_RESULTS_NONHITSBG} from './modules/parseHomerResults.nf'
@@ -22,17 +28,47 @@ include {PARSE_HOMER_RESULTS as PARSE_HOMER_RESULTS_OTHERHITSBG} from './modules
 include {CONCATE_HOMER_RESULTS as CONCATE_HOMER_RESULTS_NONHITSBG} from './modules/concateHomerResults.nf'
 include {CONCATE_HOMER_RESULTS as CONCATE_HOMER_RESULTS_OTHERHITSBG} from './modules/concateHomerResults.nf'
 include {PLOT_MNN_SCORE as PLOT_MNN_SCORE_MEAN; PLOT_MNN_SCORE as PLOT_MNN_SCORE_MEDIAN} from './modules/plotMnnScore.nf'
+include {PLOT_MNN_SCORE_CLASS} from './modules/plotMnnScoreClass.nf'
+include {PLOT_MNN_SCORE_SUMMARY} from './modules/plotMnnScoreSummary.nf'
+include {GET_MNN_HIT_PFM} from './modules/getMnnHitPfm.nf'
+include {MOTIF_OCCUPANCY} from './modules/motifOccupancy.nf'
+include {FILTER_MOTIF_COMPARISON} from './modules/filterMotifComparison.nf'
+
+// homer option len : "5,6,...,filterLength" if filterLength>=5 else filterLength. Smallest motif in jaspar custom : 5
+def getHomerLenParam(int filterLength) {
+    return filterLength>=5 ? (5..filterLength).join(',') : "${filterLength}"
+}
+
+// estimated cost of a HOMER job, as bin/homerScheduler.py : (foreground bytes + background bytes) x sum of the motif lengths
+def getHomerCost(foregroundFasta, backgroundFasta, String lenParam) {
+    return (foregroundFasta.size()+backgroundFasta.size())*lenParam.tokenize(',').collect{ it as long }.sum()
+}
+
+// wait for all the HOMER jobs [strClass, moduleId, foreground, background, lenParam] and emit them by decreasing cost
+// (longest first), each with its threads : maxThreads for the most expensive job, in proportion to the cost for the others.
+// toList() is a barrier : no HOMER job starts before the fasta files of all the modules of all the classes are ready,
+// the price of the global longest-first order (without homerMaxThreads, each job starts as soon as its inputs are ready)
+def scheduleHomerJobs(homerJobs, int maxThreads) {
+    return homerJobs.toList().flatMap { jobList ->
+        def costs=jobList.collect { getHomerCost(it[2], it[3], it[4]) }
+        def maxCost=costs.max() ?: 0
+        [jobList, costs].transpose().sort { -it[1] }.collect { job, cost ->
+            job + [maxCost>0 ? Math.min(maxThreads, Math.max(1, Math.ceil(maxThreads*cost/maxCost) as int)) : 1]
+        }
+    }
+}
 
 workflow{
     /* 
-    ## Get the list of classes and moduleIds
+    ## Get the list of classes and moduleIds from the catalog of the models
     */
     mnnModelsDir=Channel.fromPath(params.mnnModelsDir, type:'dir')
-    strClassListPath=LIST_STR_CLASS(mnnModelsDir)
-    strClass=strClassListPath.splitText().map{it -> it.trim()}
-    strModuleListPath=LIST_STR_MODULE(strClassListPath, mnnModelsDir)
-    //strClassModule=strModuleListPath.splitCsv(sep:'\t', header:['class', 'moduleId'])
-    strClassModule=strModuleListPath.splitCsv(sep:'\t')
+    previousModelCatalog=file("${params.resultsDir}/modelCatalog/mnnModelCatalog.json")
+    (mnnModelCatalog, strClassCatalog, strModuleCatalog)=MNN_MODEL_CATALOG(mnnModelsDir, previousModelCatalog.exists() ? previousModelCatalog : [])
+    strClassRows=strClassCatalog.splitCsv(sep:'\t', header:true)
+    strModuleRows=strModuleCatalog.splitCsv(sep:'\t', header:true)
+    strClass=strClassRows.map{it -> it.strClass}
+    strClassModule=strModuleRows.map{it -> [it.strClass, it.moduleId]}
 
     /* 
     ## create results directory
@@ -42,8 +78,13 @@ workflow{
     /*
     ## get the jaspar database
     */
-    jasparDatabase=REQUEST_JASPAR_DATABASE()
-    jasparDatabaseHomer=MEME_TO_HOMER_FORMAT(jasparDatabase)
+    if (params.streamJasparToHomer) {
+        // download and convert in a single streaming process
+        jasparDatabaseHomer=REQUEST_JASPAR_DATABASE_HOMER()
+    } else {
+        jasparDatabase=REQUEST_JASPAR_DATABASE()
+        jasparDatabaseHomer=MEME_TO_HOMER_FORMAT(jasparDatabase)
+    }
 
     /*
     ## Prepare the fasta files of 1001 bp sequences
@@ -59,37 +100,88 @@ workflow{
     oneHotSeqFile=Channel.fromPath(params.oneHotSeqFile).first()
     seqNameFile=Channel.fromPath(params.seqNameFile).first()
     mergedResultsFile=Channel.fromPath(params.mergedResultsFile).first()
+    // dictionary of the sequence names: the next stages carry int32 sequence IDs instead of the names
+    seqNameDict=params.seqNameDict ? BUILD_SEQ_NAME_DICT(seqNameFile) : []
     // prefiltre the input files
-    (prefilteredSeqNameFile,prefilteredOneHotSeqFile)=PREFILTRE_SEQ_NAMES_AND_ONE_HOT(seqNameFile, oneHotSeqFile, mergedResultsFile)
+    (prefilteredSeqNameFile,prefilteredOneHotSeqFile)=PREFILTRE_SEQ_NAMES_AND_ONE_HOT(seqNameFile, oneHotSeqFile, mergedResultsFile, seqNameDict)
 
     // XXX: Nexflow does not ensure the order of the (output) channels, so we need to keep all the channels indexed by strClass
-    mnnModelParams=strClass.map(strClass -> [strClass, file("${params.mnnModelsDir}/MNN_ranks_${strClass}_.pt")])
-    mnnModelHParams=strClass.map(strClass -> [strClass, file("${params.mnnModelsDir}/MNN_ranks_${strClass}_params.npy")])
+    mnnModelParams=strClassRows.map(it -> [it.strClass, file(it.paramsPath)])
+    mnnModelHParams=strClassRows.map(it -> [it.strClass, file(it.hParamsPath)])
+    // memory estimates of the heavy processes by strClass : [strClass, row of memoryEstimate.tsv], [strClass, [:]] if not estimated
+    if (params.estimateMemory) {
+        memoryEstimate=ESTIMATE_MEMORY(prefilteredSeqNameFile, prefilteredOneHotSeqFile, strClassCatalog, seqNameDict).splitCsv(sep:'\t', header:true).map(it -> [it.strClass, it])
+    } else {
+        memoryEstimate=strClass.map(it -> [it, [:]])
+    }
     // get seqNameFile and oneHotSeqFile grouped by strClass
-    (strSeqNameFile, strOneHotSeqFile)=GET_SEQ_NAMES_AND_ONE_HOT_BY_STR_CLASS(strClass, prefilteredSeqNameFile, prefilteredOneHotSeqFile, mergedResultsFile)
+    (strSeqNameFile, strOneHotSeqFile)=GET_SEQ_NAMES_AND_ONE_HOT_BY_STR_CLASS(memoryEstimate, prefilteredSeqNameFile, prefilteredOneHotSeqFile, mergedResultsFile, seqNameDict)
     //join input channel by strClass 
-    // computeMnnResultsJoinedParameters : [strClass, mnnModelHParams, mnnModelParams, strSeqNameFile]
-    computeMnnResultsJoinedParameters = strClass.join(mnnModelHParams).join(mnnModelParams).join(strSeqNameFile).join(strOneHotSeqFile)
-    mnnResultsArray=COMPUTE_MNN_RESULTS(computeMnnResultsJoinedParameters)
-    // plot MNN module Activation Score
-    strIntermediatePlotMnnScoreParameters = mnnResultsArray.join(mnnModelHParams).join(mnnModelParams)
-    strPlotMnnScoreParameters=strIntermediatePlotMnnScoreParameters.cross(strClassModule).map(it -> [it[1][0], it[1][1], it[0][1], it[0][2], it[0][3]]) //join and remap to get tuples (strClass, ModuleId, mnnResultsArray)
-    mnnActivationScorePlot=PLOT_MNN_SCORE_MEAN(strPlotMnnScoreParameters, "mean")
-    mnnActivationScorePlotMedian=PLOT_MNN_SCORE_MEDIAN(strPlotMnnScoreParameters, "median")
-    
+    // computeMnnResultsJoinedParameters : [strClass, mnnModelHParams, mnnModelParams, strSeqNameFile, strOneHotSeqFile, memoryEstimate]
+    computeMnnResultsJoinedParameters = strClass.join(mnnModelHParams).join(mnnModelParams).join(strSeqNameFile).join(strOneHotSeqFile).join(memoryEstimate)
+    // module hit thresholds from dinucleotide shuffles of the sequences : [strClass, mnnNullThresholds.tsv], [strClass, []] if a hit is a score > 0
+    if (params.nullModelFpr) {
+        nullThresholds=MNN_NULL_MODEL(strClass.join(mnnModelHParams).join(mnnModelParams).join(strOneHotSeqFile))
+    } else {
+        nullThresholds=strClass.map(it -> [it, []])
+    }
+    // exact score distributions of the module filters under the base frequencies of the class : [strClass, mnnFilterPvalues.npz], [strClass, []] if the hits have no p-value
+    if (params.filterPvalues || params.maxPvalue) {
+        filterPvalues=MNN_FILTER_PVALUES(strClass.join(mnnModelHParams).join(mnnModelParams).join(strOneHotSeqFile))
+    } else {
+        filterPvalues=strClass.map(it -> [it, []])
+    }
+    if (params.fusedClassAnalysis) {
+        // inference, bed files, plots and PFM of each class in a single process: the dense results array is neither staged nor published
+        (strPositiveHits, strNegativeHits, mnnActivationScorePlots, mnnHitPfm, mnnResultsArray, mnnActivationSummary, mnnScoreMatrix)=ANALYZE_STR_CLASS(computeMnnResultsJoinedParameters.join(nullThresholds).join(filterPvalues), seqNameDict)
+    } else {
+        (mnnResultsArray, mnnActivationSummary, mnnScoreMatrix)=COMPUTE_MNN_RESULTS(computeMnnResultsJoinedParameters, seqNameDict)
+        // plot MNN module Activation Score
+        strIntermediatePlotMnnScoreParameters = mnnResultsArray.join(mnnModelHParams).join(mnnModelParams).join(memoryEstimate)
+        if (params.activationSummary) {
+            // plot from the summary computed during the inference
+            mnnActivationScorePlots=PLOT_MNN_SCORE_SUMMARY(mnnActivationSummary, "mean median")
+        } else if (params.plotMnnScorePerClass) {
+            // a single process per class for all the modules and the pooling functions
+            mnnActivationScorePlots=PLOT_MNN_SCORE_CLASS(strIntermediatePlotMnnScoreParameters, "mean median")
+        } else {
+            strPlotMnnScoreParameters=strIntermediatePlotMnnScoreParameters.cross(strClassModule).map(it -> [it[1][0], it[1][1], it[0][1], it[0][2], it[0][3], it[0][4]]) //join and remap to get tuples (strClass, ModuleId, mnnResultsArray, modelHParams, modelParams, memoryEstimate)
+            mnnActivationScorePlot=PLOT_MNN_SCORE_MEAN(strPlotMnnScoreParameters, "mean")
+            mnnActivationScorePlotMedian=PLOT_MNN_SCORE_MEDIAN(strPlotMnnScoreParameters, "median")
+        }
+        // position frequency matrix of the hits of each module
+        if (params.mnnHitPfm) {
+            mnnHitPfm=GET_MNN_HIT_PFM(mnnResultsArray.join(strOneHotSeqFile).join(mnnModelHParams).join(mnnModelParams))
+        }
+    }
+    // occupancy of the known motifs in the sequences of each class and its co-occurrence with the module hits
+    if (params.motifOccupancy) {
+        (motifOccupancy, motifCooccurrence)=MOTIF_OCCUPANCY(strClass.join(mnnModelHParams).join(mnnModelParams).join(strSeqNameFile).join(strOneHotSeqFile).join(nullThresholds), jasparDatabaseHomer, seqNameDict)
+    }
+    // learned filters of all the classes against the JASPAR motifs and each other, in a single process : [[strClass], [hParams], [params]]
+    if (params.filterMotifComparison) {
+        filterModels=strClass.join(mnnModelHParams).join(mnnModelParams).toList().map(it -> it.transpose())
+        (filterMotifMatches, filterClusters)=FILTER_MOTIF_COMPARISON(filterModels, jasparDatabaseHomer)
+    }
 
 
     /*
     ## Get the fasta files of background sequences and foreground sequences
     */
     // get the "positive" and the "negative" bed files for each STR class. For sorting purpose, the blockId is store in the name column of the bed file.
-    getStrClassBedFilesJoinedParameters = strClass.join(strSeqNameFile).join(mnnResultsArray).join(mnnModelHParams).join(mnnModelParams)
-    (strPositiveHits, strNegativeHits) = GET_STR_CLASS_BED_FILES(getStrClassBedFilesJoinedParameters)
+    if (!params.fusedClassAnalysis) {
+        getStrClassBedFilesJoinedParameters = strClass.join(strSeqNameFile).join(mnnResultsArray).join(mnnModelHParams).join(mnnModelParams).join(memoryEstimate).join(nullThresholds).join(filterPvalues)
+        (strPositiveHits, strNegativeHits) = GET_STR_CLASS_BED_FILES(getStrClassBedFilesJoinedParameters, seqNameDict)
+    }
     // now we have general foreground and background bed files, we can make foreground and background for each module
     // Foreground : positive hits for each (strClass,module)
     getStrModuleHitsBedParameters=strPositiveHits.cross(strClassModule).map(it -> [it[1][0], it[1][1], it[0][1]]) //join and remap to get tuples (strClass, ModuleId, strPositiveHits)
     strModuleHitsBed=GET_STR_MODULE_HITS_BED(getStrModuleHitsBedParameters)
     strModuleHitsFasta=GET_FASTA_BEDTOOLS_STRMODULEHITS(strModuleHitsBed, hipStr1001bpFasta, hipStr1001bpFaidx)
+    if (params.homerMaxForeground) {
+        // best hits by score, duplicates and near-duplicates collapsed, at most homerMaxForeground sequences
+        (strModuleHitsFasta, strModuleForegroundMultiplicity)=SELECT_FOREGROUND(strModuleHitsBed.join(strModuleHitsFasta, by:[0,1]))
+    }
     strModuleHitsFastaNonEmpty=strModuleHitsFasta.filter(it -> !it[2].isEmpty())
     // Background : non hits for each (strClass,module)
     getStrModuleNonHitsBedParameters=strNegativeHits.cross(strClassModule).map(it -> [it[1][0], it[1][1], it[0][1]]) //join and remap to get tuples (strClass, ModuleId, strNegativeHits)
@@ -105,14 +197,24 @@ workflow{
     /*
     ## Use Homer to find motif
     */
-    // get the homer len param for each Module
-    homerLenParam=GET_HOMER_LEN_PARAM(strModuleHitsFasta)
+    // get the homer len param for each Module from its filter length
+    homerLenParam=strModuleRows.map(it -> [it.strClass, it.moduleId, getHomerLenParam(it.filterLength as int)])
+    if (params.kmerPrescreen) {
+        // k-mer enrichment of the hits of all the modules of a class in one pass : the modules without enriched k-mer are not run by HOMER
+        kmerPrescreen=KMER_PRESCREEN(strPositiveHits.join(strSeqNameFile).join(strOneHotSeqFile).join(mnnModelHParams).join(mnnModelParams), seqNameDict)
+        kmerPrescreenRows=kmerPrescreen.splitCsv(sep:'\t', header:true, elem:1).map(it -> [it[0], it[1].moduleId, it[1]])
+        // the modules without tested k-mer are not screened and keep all their lengths, with kmerPrescreenReduceLengths the others keep only the lengths with an enriched k-mer
+        homerLenParam=homerLenParam.join(kmerPrescreenRows, by:[0,1]).filter(it -> it[3].enriched=="True" || it[3].screened=="False").map(it -> [it[0], it[1], params.kmerPrescreenReduceLengths && it[3].screened=="True" ? it[3].homerLen : it[2]])
+    }
     // call with strModuleNonHitsFastaNonEmpty (posision where module doesn't hit) as background
     findMotifsHomerNonHitParams=strClassModule.join(strModuleHitsFastaNonEmpty, by:[0,1]).join(strModuleNonHitsFastaNonEmpty, by:[0,1]).join(homerLenParam, by:[0,1])
+    // threads of each job : by estimated cost and longest first with homerMaxThreads, else 1
+    findMotifsHomerNonHitParams=params.homerMaxThreads ? scheduleHomerJobs(findMotifsHomerNonHitParams, params.homerMaxThreads as int) : findMotifsHomerNonHitParams.map(it -> it + [1])
     nonHitsHomerResultsFolders=FIND_MOTIFS_HOMER_NONHITS(findMotifsHomerNonHitParams, jasparDatabaseHomer, "nonHitsBg")
     // call with strModuleOtherHitsFastaNonEmpty (position where module doesn't hit but other module does) as background
     findMotifsHomerOtherHitsParams=strClassModule.join(strModuleHitsFastaNonEmpty, by:[0,1]).join(strModuleOtherHitsFastaNonEmpty, by:[0,1]).join(homerLenParam, by:[0,1])
-    otherHitsHomerResultsFolders=FIND_MOTIFS_HOMER_OTHERHITS(findMotifsHomerNonHitParams, jasparDatabaseHomer, "otherHitsBg")
+    findMotifsHomerOtherHitsParams=params.homerMaxThreads ? scheduleHomerJobs(findMotifsHomerOtherHitsParams, params.homerMaxThreads as int) : findMotifsHomerOtherHitsParams.map(it -> it + [1])
+    otherHitsHomerResultsFolders=FIND_MOTIFS_HOMER_OTHERHITS(findMotifsHomerOtherHitsParams, jasparDatabaseHomer, "otherHitsBg")
 
     /*
     ## Parse Homer results
@@ -0,0 +1,31 @@
+process ANALYZE_STR_CLASS{
+    // only the compact outputs are published: the bed files are consumed by the next processes, the dense results array is kept only with params.keepMnnResultsArray
+    publishDir "$params.resultsDir/$strClass", mode: 'copy', pattern: "{*/moduleActivation_*.svg,*/mnnHitPfm.txt,mnnResultsArray.{npy,mnnc},mnnActivationSummary.npz,mnnScoreMatrix.parquet}"
+
+    input:
+    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strSeqNameFile), path(strOneHotSeqFile), val(memoryEstimate), path(nullThresholds, stageAs: "nullModel/*"), path(filterPvalues, stageAs: "filterPvalue/*") // nullThresholds: mnnNullThresholds.tsv or [], filterPvalues: mnnFilterPvalues.npz or []
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
+
+    output:
+    tuple val(strClass), path("positiveMnnHits.bed")
+    tuple val(strClass), path("negativeMnnHits.bed")
+    tuple val(strClass), path("*/moduleActivation_*.svg")
+    tuple val(strClass), path("*/mnnHitPfm.txt"), optional: true
+    tuple val(strClass), path("mnnResultsArray.{npy,mnnc}"), optional: true
+    tuple val(strClass), path("mnnActivationSummary.npz"), optional: true
+    tuple val(strClass), path("mnnScoreMatrix.parquet"), optional: true
+
+    script:
+    def thresholdArgs = nullThresholds ? "--thresholds ${nullThresholds} --fpr ${params.nullModelFpr}" : ""
+    def pvalueArgs = !filterPvalues ? "" : params.maxPvalue ? "--filterPvalues ${filterPvalues} --maxPvalue ${params.maxPvalue}" : "--filterPvalues ${filterPvalues}"
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def resultsArrayArgs = !params.keepMnnResultsArray ? "" : params.mnnResultsChunkSize ? "--mnnResultsArray mnnResultsArray.mnnc --chunkSize ${params.mnnResultsChunkSize} --chunkDtype ${params.mnnResultsChunkDtype}" : "--mnnResultsArray mnnResultsArray.npy"
+    def summaryArgs = params.activationSummary ? "--summary mnnActivationSummary.npz" : ""
+    def pfmArgs = params.mnnHitPfm ? "--mnnHitPfm mnnHitPfm.txt" : ""
+    def scoreMatrixArgs = params.scoreMatrix ? "--scoreMatrix mnnScoreMatrix.parquet" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    // inference, bed files (as GET_STR_CLASS_BED_FILES) and plots (as PLOT_MNN_SCORE_CLASS) in a single process: the results array stays in memory
+    """
+    analyzeStrClass.py ${strOneHotSeqFile} ${strSeqNameFile} ${mnnModelHParams} ${mnnModelParams} --outputDir . --margin 0 --offset 450 --allNegHits --compactHits ${params.compactHits} --fig '{moduleId}/moduleActivation_{poolFunction}.svg' --poolFunction mean median --renderer matplotlib ${resultsArrayArgs} ${summaryArgs} ${pfmArgs} ${scoreMatrixArgs} ${dictArgs} ${thresholdArgs} ${pvalueArgs} ${profileArgs}
+    """
+}
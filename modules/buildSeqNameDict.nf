@@ -0,0 +1,14 @@
+process BUILD_SEQ_NAME_DICT{
+
+    input:
+    path seqNameFile
+
+    output:
+    path "seqNameDict.npz"
+
+    script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json" : ""
+    """
+    seqNameDict.py ${seqNameFile} -o seqNameDict.npz ${profileArgs}
+    """
+}
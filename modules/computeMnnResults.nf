@@ -2,13 +2,23 @@ process COMPUTE_MNN_RESULTS{
     publishDir "$params.resultsDir/$strClass", mode: 'copy'
 
     input:
-    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strSeqNameFile), path(strOneHotSeqFile)
+    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strSeqNameFile), path(strOneHotSeqFile), val(memoryEstimate)
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
 
     output:
-    tuple val(strClass), path("mnnResultsArray.npy")
+    tuple val(strClass), path("mnnResultsArray.{npy,mnnc}")
+    tuple val(strClass), path("mnnActivationSummary.npz"), optional: true
+    tuple val(strClass), path("mnnScoreMatrix.parquet"), optional: true
 
     script:
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def resultsArrayArgs = params.mnnResultsChunkSize ? "--output mnnResultsArray.mnnc --chunkSize ${params.mnnResultsChunkSize} --chunkDtype ${params.mnnResultsChunkDtype}" : "--output mnnResultsArray.npy"
+    def summaryArgs = params.activationSummary ? "--summary mnnActivationSummary.npz" : ""
+    def incrementalArgs = params.incrementalStoreDir ? "--incrementalStore ${params.incrementalStoreDir}/${strClass}" : ""
+    def cacheArgs = params.resultCacheDir ? "--cacheDir ${params.resultCacheDir} --cacheMaxSize ${params.resultCacheMaxSize}" : ""
+    def scoreMatrixArgs = params.scoreMatrix ? "--scoreMatrix mnnScoreMatrix.parquet" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
     """
-    getMnnResults.py ${strOneHotSeqFile} ${strSeqNameFile} ${mnnModelHParams} ${mnnModelParams} --output mnnResultsArray.npy
+    getMnnResults.py ${strOneHotSeqFile} ${strSeqNameFile} ${mnnModelHParams} ${mnnModelParams} ${resultsArrayArgs} ${cacheArgs} ${incrementalArgs} ${summaryArgs} ${scoreMatrixArgs} ${dictArgs} ${profileArgs}
     """
 }
@@ -0,0 +1,21 @@
+process ESTIMATE_MEMORY{
+    publishDir "$params.resultsDir/memoryEstimate", mode: 'copy'
+
+    input:
+    path seqNameFile
+    path oneHotSeqFile
+    path strClassCatalog
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
+
+    output:
+    path "memoryEstimate.tsv"
+
+    script:
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def chunkArgs = params.plotMnnScoreChunkSize ? "--plotChunkSize ${params.plotMnnScoreChunkSize}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json" : ""
+    // only the header of the one-hot array is read
+    """
+    memoryEstimate.py ${seqNameFile} ${oneHotSeqFile} ${strClassCatalog} -o memoryEstimate.tsv --margin ${params.memoryEstimateMargin} ${chunkArgs} ${dictArgs} ${profileArgs}
+    """
+}
@@ -0,0 +1,22 @@
+process FILTER_MOTIF_COMPARISON{
+    publishDir "$params.resultsDir/filterComparison", mode: 'copy'
+
+    input:
+    tuple val(strClassList), path(mnnModelHParamsList, stageAs: "model*/*"), path(mnnModelParamsList, stageAs: "model*/*") // the models of all the classes
+    path jasparDatabaseHomer
+
+    output:
+    path "filterMotifMatches.tsv"
+    path "filterClusters.tsv"
+
+    script:
+    // a single model is staged as a path, not a list
+    def hParamsList = mnnModelHParamsList instanceof List ? mnnModelHParamsList : [mnnModelHParamsList]
+    def paramsList = mnnModelParamsList instanceof List ? mnnModelParamsList : [mnnModelParamsList]
+    def modelArgs = [strClassList, hParamsList, paramsList].transpose().collect{ "--model ${it[0]} ${it[1]} ${it[2]}" }.join(" ")
+    def clusterArgs = params.filterClusterMinSimilarity!=null ? "--clusterMinSimilarity ${params.filterClusterMinSimilarity}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json" : ""
+    """
+    filterMotifComparison.py ${jasparDatabaseHomer} ${modelArgs} --metric ${params.filterMotifMetric} --topN ${params.filterMotifTopN} -o filterMotifMatches.tsv --clusters filterClusters.tsv ${clusterArgs} ${profileArgs}
+    """
+}
@@ -2,7 +2,7 @@ process FIND_MOTIFS_HOMER{
     publishDir "$params.resultsDir/$strClass/$moduleId/$subName", mode: 'copy'
 
     input:
-    tuple val(strClass), val(moduleId), path(foregroundFasta), path(backgroundFasta), val(lenParam)
+    tuple val(strClass), val(moduleId), path(foregroundFasta), path(backgroundFasta), val(lenParam), val(homerThreads) // homerThreads: threads of the job (see conf/homerScheduler.config)
     path(jasparDatabaseHomer)
     val subName 
 
@@ -14,6 +14,6 @@ process FIND_MOTIFS_HOMER{
 
     """
     mkdir p "${outDir}"
-    findMotifs.pl ${foregroundFasta} fasta ${outDir} -fasta ${backgroundFasta} -len ${lenParam} -norevopp -mcheck ${jasparDatabaseHomer} -mknown ${jasparDatabaseHomer} 
+    findMotifs.pl ${foregroundFasta} fasta ${outDir} -fasta ${backgroundFasta} -len ${lenParam} -norevopp -mcheck ${jasparDatabaseHomer} -mknown ${jasparDatabaseHomer} -p ${task.cpus}
     """
 }
\ No newline at end of file
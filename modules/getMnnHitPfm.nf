@@ -0,0 +1,16 @@
+process GET_MNN_HIT_PFM{
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnResultsArray), path(strOneHotSeqFile), path(modelHParams), path(modelParams)
+
+    output:
+    tuple val(strClass), path("*/mnnHitPfm.txt")
+
+    script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    // one PFM by module, written in "${moduleId}/" next to the HOMER results of the module
+    """
+    getMnnHitPfm.py ${mnnResultsArray} ${strOneHotSeqFile} ${modelHParams} ${modelParams} --outputDir . --fileName mnnHitPfm.txt ${profileArgs}
+    """
+}
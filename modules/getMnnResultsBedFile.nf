@@ -12,7 +12,8 @@ process GET_MNN_RESULTS_BEDFILE{
     path "${strResultsDir}/negativeMnnHits.bed"
 
     script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
     """
-    mnnResultBedFilsGenerator.py --outputDir ${strResultsDir} ${mnnResultsArray} ${mnnSeqNames} ${modelHParams} ${modelParams} --margin 0 --offset 450 --allNegHits
+    mnnResultBedFilsGenerator.py --outputDir ${strResultsDir} ${mnnResultsArray} ${mnnSeqNames} ${modelHParams} ${modelParams} --margin 0 --offset 450 --allNegHits ${profileArgs}
     """
 }
\ No newline at end of file
@@ -2,17 +2,20 @@ process GET_SEQ_NAMES_AND_ONE_HOT_BY_STR_CLASS{
     publishDir "$params.resultsDir/$strClass", mode: 'copy'
 
     input:
-        val strClass
+        tuple val(strClass), val(memoryEstimate) // memoryEstimate: row of memoryEstimate.tsv or [:] (see conf/estimateMemory.config)
         path seqNameFile
         path oneHotSeqFile
         path mergedResultsFile
+        path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
 
     output:
         tuple val(strClass), path("${strClass}_seqNames.npy")
         tuple val(strClass), path("${strClass}_oneHotSeqs.npy")
 
     script:
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
     """
-    filterSeqNameAndOneHotSeq.py ${seqNameFile} ${oneHotSeqFile} ${mergedResultsFile} ${strClass}_seqNames.npy ${strClass}_oneHotSeqs.npy --strClass ${strClass}
+    filterSeqNameAndOneHotSeq.py ${seqNameFile} ${oneHotSeqFile} ${mergedResultsFile} ${strClass}_seqNames.npy ${strClass}_oneHotSeqs.npy --strClass ${strClass} ${dictArgs} ${profileArgs}
     """
 }
\ No newline at end of file
@@ -1,14 +1,19 @@
 process GET_STR_CLASS_BED_FILES{
 
     input:
-    tuple val(strClass), path(strClassSeqNames), path(mnnResultsArray), path(modelHParams), path(modelParams)
+    tuple val(strClass), path(strClassSeqNames), path(mnnResultsArray), path(modelHParams), path(modelParams), val(memoryEstimate), path(nullThresholds, stageAs: "nullModel/*"), path(filterPvalues, stageAs: "filterPvalue/*") // nullThresholds: mnnNullThresholds.tsv or [], filterPvalues: mnnFilterPvalues.npz or []
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
 
     output:
     tuple val(strClass), path("positiveMnnHits.bed")
     tuple val(strClass), path("negativeMnnHits.bed")
 
     script:
+    def thresholdArgs = nullThresholds ? "--thresholds ${nullThresholds} --fpr ${params.nullModelFpr}" : ""
+    def pvalueArgs = !filterPvalues ? "" : params.maxPvalue ? "--filterPvalues ${filterPvalues} --maxPvalue ${params.maxPvalue}" : "--filterPvalues ${filterPvalues}"
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
     """
-    mnnResultBedFilsGenerator.py --outputDir . ${mnnResultsArray} ${strClassSeqNames} ${modelHParams} ${modelParams} --margin 0 --offset 450 --allNegHits
+    mnnResultBedFilsGenerator.py --outputDir . ${mnnResultsArray} ${strClassSeqNames} ${modelHParams} ${modelParams} --margin 0 --offset 450 --allNegHits --compactHits ${params.compactHits} ${dictArgs} ${thresholdArgs} ${pvalueArgs} ${profileArgs}
     """
 }
\ No newline at end of file
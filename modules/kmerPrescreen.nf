@@ -0,0 +1,17 @@
+process KMER_PRESCREEN{
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(positiveHitsBed), path(strClassSeqNames), path(strOneHotSeqFile), path(mnnModelHParams), path(mnnModelParams)
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
+
+    output:
+    tuple val(strClass), path("kmerPrescreen.tsv")
+
+    script:
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    """
+    kmerPrescreen.py ${positiveHitsBed} ${strClassSeqNames} ${strOneHotSeqFile} ${mnnModelHParams} ${mnnModelParams} --offset 450 --gaps ${params.kmerPrescreenGaps} --alpha ${params.kmerPrescreenAlpha} --minFold ${params.kmerPrescreenMinFold} -o kmerPrescreen.tsv ${dictArgs} ${profileArgs}
+    """
+}
@@ -7,7 +7,8 @@ process MEME_TO_HOMER_FORMAT{
     path "${memeFile.baseName}.motif"
 
     script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel motifFile=${memeFile.baseName}" : ""
     """
-    pwm2homer.py -i ${memeFile} -m fpr --pValue 0.0001 -o ${memeFile.baseName}.motif
+    pwm2homer.py -i ${memeFile} -m fpr --pValue 0.0001 -o ${memeFile.baseName}.motif ${profileArgs}
     """
 }
\ No newline at end of file
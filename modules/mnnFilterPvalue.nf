@@ -0,0 +1,15 @@
+process MNN_FILTER_PVALUES{
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strOneHotSeqFile)
+
+    output:
+    tuple val(strClass), path("mnnFilterPvalues.npz")
+
+    script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    """
+    mnnFilterPvalue.py ${strOneHotSeqFile} ${mnnModelHParams} ${mnnModelParams} -o mnnFilterPvalues.npz ${profileArgs}
+    """
+}
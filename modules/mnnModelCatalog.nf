@@ -0,0 +1,21 @@
+process MNN_MODEL_CATALOG{
+    publishDir "$params.resultsDir/modelCatalog", mode: 'copy'
+    // always refreshed: only the models whose files changed since the previous catalog are loaded
+    cache false
+
+    input:
+    path mnnModelsDir // Channel.fromPath(${mnnModelsDir})
+    path previousCatalog, stageAs: "previous/*" // previous mnnModelCatalog.json or []
+
+    output:
+    path "mnnModelCatalog.json"
+    path "strClassCatalog.tsv"
+    path "strModuleCatalog.tsv"
+
+    script:
+    def previousArgs = previousCatalog ? "--previous ${previousCatalog}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json" : ""
+    """
+    mnnModelCatalog.py ${mnnModelsDir} --json mnnModelCatalog.json --classes strClassCatalog.tsv --modules strModuleCatalog.tsv ${previousArgs} ${profileArgs}
+    """
+}
@@ -0,0 +1,16 @@
+process MNN_NULL_MODEL{
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strOneHotSeqFile)
+
+    output:
+    tuple val(strClass), path("mnnNullThresholds.tsv")
+
+    script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    // the seed is fixed so that -resume gives the same thresholds
+    """
+    mnnNullModel.py ${strOneHotSeqFile} ${mnnModelHParams} ${mnnModelParams} -o mnnNullThresholds.tsv --fpr ${params.nullModelFpr} --nbShuffle ${params.nullModelShuffles} --seed 0 ${profileArgs}
+    """
+}
@@ -0,0 +1,20 @@
+process MOTIF_OCCUPANCY{
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnModelHParams), path(mnnModelParams), path(strSeqNameFile), path(strOneHotSeqFile), path(nullThresholds, stageAs: "nullModel/*") // nullThresholds: mnnNullThresholds.tsv or []
+    path jasparDatabaseHomer
+    path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
+
+    output:
+    tuple val(strClass), path("motifOccupancy.parquet")
+    tuple val(strClass), path("motifCooccurrence.tsv")
+
+    script:
+    def thresholdArgs = nullThresholds ? "--thresholds ${nullThresholds} --fpr ${params.nullModelFpr}" : ""
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    """
+    motifOccupancy.py ${strOneHotSeqFile} ${strSeqNameFile} ${mnnModelHParams} ${mnnModelParams} ${jasparDatabaseHomer} --offset 450 --batchSize ${params.motifOccupancyBatchSize} -o motifOccupancy.parquet --cooccurrence motifCooccurrence.tsv ${dictArgs} ${thresholdArgs} ${profileArgs}
+    """
+}
@@ -9,7 +9,10 @@ process PARSE_HOMER_RESULTS{
     tuple val(strClass), val(moduleId), path("${subName}_homerResults.csv")
 
     script:
+    // with a warm worker on the node (see bin/mnnWorker.py), the script runs in it, or in the task if the worker is absent
+    def command = params.workerSocket ? "mnnTools.py --worker ${params.workerSocket} homerResultsToCsv" : "homerResultsToCsv.py"
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass} moduleId=${moduleId} subName=${subName}" : ""
     """
-    homerResultsToCsv.py ${homerResultsDir} -o "${subName}_homerResults.csv" --strClass ${strClass} --moduleId ${moduleId}
+    ${command} ${homerResultsDir} -o "${subName}_homerResults.csv" --strClass ${strClass} --moduleId ${moduleId} ${profileArgs}
     """
 }
\ No newline at end of file
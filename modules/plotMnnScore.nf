@@ -3,14 +3,18 @@ process PLOT_MNN_SCORE{
     publishDir "$params.resultsDir/$strClass/$moduleId", mode: 'copy'
 
     input:
-    tuple val(strClass), val(moduleId), path(mnnResultsArray), path(modelHParams), path(modelParams)
+    tuple val(strClass), val(moduleId), path(mnnResultsArray), path(modelHParams), path(modelParams), val(memoryEstimate)
     val poolFunction
 
     output:
     tuple val(strClass), val(moduleId), path("moduleActivation_${poolFunction}.svg")
 
     script:
+    def chunkArgs = params.plotMnnScoreChunkSize ? "--chunkSize ${params.plotMnnScoreChunkSize}" : ""
+    // with a warm worker on the node (see bin/mnnWorker.py), the script runs in it, or in the task if the worker is absent
+    def command = params.workerSocket ? "mnnTools.py --worker ${params.workerSocket} plotMnnScore" : "plotMnnScore.py"
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass} moduleId=${moduleId} poolFunction=${poolFunction}" : ""
     """
-    plotMnnScore.py --mnnResultsArray ${mnnResultsArray} --moduleId ${moduleId} --mnnHParams ${modelHParams} --mnnParams ${modelParams} --fig moduleActivation_${poolFunction}.svg --poolFunction ${poolFunction}
+    ${command} --mnnResultsArray ${mnnResultsArray} --moduleId ${moduleId} --mnnHParams ${modelHParams} --mnnParams ${modelParams} --fig moduleActivation_${poolFunction}.svg --poolFunction ${poolFunction} ${chunkArgs} ${profileArgs}
     """
 }
\ No newline at end of file
@@ -0,0 +1,19 @@
+process PLOT_MNN_SCORE_CLASS{
+    errorStrategy 'ignore'
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnResultsArray), path(modelHParams), path(modelParams), val(memoryEstimate)
+    val poolFunctions
+
+    output:
+    tuple val(strClass), path("*/moduleActivation_*.svg")
+
+    script:
+    def chunkArgs = params.plotMnnScoreChunkSize ? "--chunkSize ${params.plotMnnScoreChunkSize}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    // all the modules and all the pooling functions of the class in a single process. The figures are written in "${moduleId}/" as with PLOT_MNN_SCORE.
+    """
+    plotMnnScore.py --mnnResultsArray ${mnnResultsArray} --mnnHParams ${modelHParams} --mnnParams ${modelParams} --fig '{moduleId}/moduleActivation_{poolFunction}.svg' --poolFunction ${poolFunctions} --renderer matplotlib ${chunkArgs} ${profileArgs}
+    """
+}
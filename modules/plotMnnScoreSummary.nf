@@ -0,0 +1,18 @@
+process PLOT_MNN_SCORE_SUMMARY{
+    errorStrategy 'ignore'
+    publishDir "$params.resultsDir/$strClass", mode: 'copy'
+
+    input:
+    tuple val(strClass), path(mnnActivationSummary)
+    val poolFunctions
+
+    output:
+    tuple val(strClass), path("*/moduleActivation_*.svg")
+
+    script:
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass}" : ""
+    // plot from the activation summary computed by COMPUTE_MNN_RESULTS : the results array and the model are not needed.
+    """
+    plotMnnScore.py --summary ${mnnActivationSummary} --fig '{moduleId}/moduleActivation_{poolFunction}.svg' --poolFunction ${poolFunctions} --renderer matplotlib ${profileArgs}
+    """
+}
@@ -4,13 +4,16 @@ process PREFILTRE_SEQ_NAMES_AND_ONE_HOT{
         path seqNameFile
         path oneHotSeqFile
         path mergedResultsFile
+        path seqNameDict, stageAs: "seqNameDict/*" // seqNameDict.npz or []
 
     output:
        path "prefiltered_seqNames.npy"
        path "prefiltered_oneHotSeqs.npy"
 
     script:
+    def dictArgs = seqNameDict ? "--seqNameDict ${seqNameDict}" : ""
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json" : ""
     """
-    filterSeqNameAndOneHotSeq.py ${seqNameFile} ${oneHotSeqFile} ${mergedResultsFile} prefiltered_seqNames.npy prefiltered_oneHotSeqs.npy
+    filterSeqNameAndOneHotSeq.py ${seqNameFile} ${oneHotSeqFile} ${mergedResultsFile} prefiltered_seqNames.npy prefiltered_oneHotSeqs.npy ${dictArgs} ${profileArgs}
     """
 }
\ No newline at end of file
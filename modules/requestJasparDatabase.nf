@@ -6,9 +6,11 @@ process REQUEST_JASPAR_DATABASE{
     path "jasparMotif_custom_r2022_cCore_gVertebrates_fMeme.txt" 
 
     script:
+    def profileArgsCore = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}_core.profile.json --profileLabel release=2022 collection=CORE" : ""
+    def profileArgsPolII = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}_polII.profile.json --profileLabel release=2020 collection=POLII" : ""
     """
-    requestJasparDatabase.py -r 2022 -c CORE -g Vertebrates -V latest -f meme > jasparMotif_r2022_cCore_gVertebrates_fMeme.txt
-    requestJasparDatabase.py -r 2020 -c POLII  -V latest -u "https://jaspar2020.genereg.net/api/v1/" -f meme -a >jasparMotif_r2020_cPolII_fMeme_a.txt
+    requestJasparDatabase.py -r 2022 -c CORE -g Vertebrates -V latest -f meme ${profileArgsCore} > jasparMotif_r2022_cCore_gVertebrates_fMeme.txt
+    requestJasparDatabase.py -r 2020 -c POLII  -V latest -u "https://jaspar2020.genereg.net/api/v1/" -f meme -a ${profileArgsPolII} >jasparMotif_r2020_cPolII_fMeme_a.txt
     cat jasparMotif_r2022_cCore_gVertebrates_fMeme.txt jasparMotif_r2020_cPolII_fMeme_a.txt > jasparMotif_custom_r2022_cCore_gVertebrates_fMeme.txt
     """
 }
\ No newline at end of file
@@ -0,0 +1,20 @@
+process REQUEST_JASPAR_DATABASE_HOMER{
+
+    input:
+
+    output:
+    path "jasparMotif_custom_r2022_cCore_gVertebrates_fMeme.motif"
+
+    script:
+    def profileArgsCore = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}_core.profile.json --profileLabel release=2022 collection=CORE" : ""
+    def profileArgsPolII = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}_polII.profile.json --profileLabel release=2020 collection=POLII" : ""
+    def profileArgsHomer = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}_pwm2homer.profile.json" : ""
+    // the motifs are converted by pwm2homer.py while they are downloaded : network latency and threshold computation overlap.
+    """
+    set -o pipefail
+    {
+        requestJasparDatabase.py -r 2022 -c CORE -g Vertebrates -V latest -f meme ${profileArgsCore}
+        requestJasparDatabase.py -r 2020 -c POLII  -V latest -u "https://jaspar2020.genereg.net/api/v1/" -f meme -a ${profileArgsPolII}
+    } | pwm2homer.py --stream -m fpr --pValue 0.0001 -o jasparMotif_custom_r2022_cCore_gVertebrates_fMeme.motif ${profileArgsHomer}
+    """
+}
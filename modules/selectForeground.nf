@@ -0,0 +1,18 @@
+process SELECT_FOREGROUND{
+    publishDir "$params.resultsDir/$strClass/$moduleId", mode: 'copy'
+
+    input:
+    tuple val(strClass), val(moduleId), path(positiveHitsBed), path(positiveHitsFasta)
+
+    output:
+    tuple val(strClass), val(moduleId), path("foreground.fasta")
+    tuple val(strClass), val(moduleId), path("foregroundMultiplicity.tsv")
+
+    script:
+    // with a warm worker on the node (see bin/mnnWorker.py), the script runs in it, or in the task if the worker is absent
+    def command = params.workerSocket ? "mnnTools.py --worker ${params.workerSocket} selectForeground" : "selectForeground.py"
+    def profileArgs = params.profileDir ? "--profile ${params.profileDir}/${task.process}_${task.index}.profile.json --profileLabel strClass=${strClass} --profileLabel moduleId=${moduleId}" : ""
+    """
+    ${command} ${positiveHitsBed} ${positiveHitsFasta} -o foreground.fasta --multiplicity foregroundMultiplicity.tsv --maxForeground ${params.homerMaxForeground} --minSimilarity ${params.homerForegroundMinSimilarity} ${profileArgs}
+    """
+}
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""
+Make the scripts of `bin/` importable by the tests (run `python -m pytest tests` from the repository root).
+"""
+
+import sys
+import pathlib
+
+BIN_DIR=pathlib.Path(__file__).resolve().parent.parent / "bin"
+sys.path.insert(0, str(BIN_DIR))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+np=pytest.importorskip("numpy")
+
+import chunkedResults
+
+def test_roundTrip(tmp_path):
+    mnnResultsArray=np.arange(2*5*4, dtype=np.float32).reshape(2, 5, 4)
+    path=tmp_path / "mnnResultsArray.mnnc"
+    chunkedResults.writeChunkedResults(path, mnnResultsArray, chunkSize=2)
+    with chunkedResults.ChunkedResults(path) as results:
+        np.testing.assert_array_equal(results[:, 1:4], mnnResultsArray[:, 1:4])
+
+@pytest.mark.parametrize("content", [b"", chunkedResults.MAGIC, chunkedResults.MAGIC+chunkedResults.FOOTER.pack(1<<20, chunkedResults.MAGIC)])
+def test_truncatedFile(tmp_path, content):
+    # shorter than the footer, or with an index longer than the file
+    path=tmp_path / "mnnResultsArray.mnnc"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        chunkedResults.ChunkedResults(path)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+np=pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import getMnnResults
+
+def getResultsArray(seqNames, seqSize:int=5):
+    # the results of a sequence are its name code, on 2 blocks
+    codes=np.asarray([int(seqName[1:]) for seqName in seqNames], dtype=np.float32)
+    return np.broadcast_to(codes[None, :, None], (2, len(seqNames), seqSize)).copy()
+
+def test_storeRoundTrip(tmp_path):
+    seqNames=np.asarray(["s1", "s2", "s3"])
+    getMnnResults.saveIncrementalStore(tmp_path, seqNames, getResultsArray(seqNames))
+    storedSeqNames, storedResultsArray=getMnnResults.loadIncrementalStore(tmp_path, 5)
+    assert list(storedSeqNames)==list(seqNames)
+    np.testing.assert_array_equal(storedResultsArray, getResultsArray(seqNames))
+    # a single run in the store
+    assert len(os.listdir(tmp_path))==3
+
+def test_storeInterruptedUpdate(tmp_path):
+    seqNames=np.asarray(["s1", "s2", "s3"])
+    getMnnResults.saveIncrementalStore(tmp_path, seqNames, getResultsArray(seqNames))
+    # an update killed before its commit: same number of sequences, other names
+    newSeqNames=np.asarray(["s4", "s5", "s6"])
+    np.save(tmp_path / getMnnResults.INCREMENTAL_RESULTS_FILE.format(runId="killed"), getResultsArray(newSeqNames))
+    storedSeqNames, storedResultsArray=getMnnResults.loadIncrementalStore(tmp_path, 5)
+    assert list(storedSeqNames)==list(seqNames)
+    np.testing.assert_array_equal(storedResultsArray, getResultsArray(seqNames))
+    # the next update removes the files of the killed run
+    getMnnResults.saveIncrementalStore(tmp_path, newSeqNames, getResultsArray(newSeqNames))
+    assert not any("killed" in fileName for fileName in os.listdir(tmp_path))
+    assert list(getMnnResults.loadIncrementalStore(tmp_path, 5)[0])==list(newSeqNames)
+
+def test_storeOtherSeqSize(tmp_path):
+    seqNames=np.asarray(["s1", "s2"])
+    getMnnResults.saveIncrementalStore(tmp_path, seqNames, getResultsArray(seqNames, seqSize=5))
+    assert getMnnResults.loadIncrementalStore(tmp_path, 7)==(None, None)
+
+def test_missingStore(tmp_path):
+    assert getMnnResults.loadIncrementalStore(tmp_path / "missing", 5)==(None, None)
+
+def test_incrementalResults(tmp_path, monkeypatch):
+    computedSeqNames=[]
+    def fakeGetMnnResults(oneHotSeqs, mnnModel):
+        computedSeqNames.extend("s{}".format(code) for code in oneHotSeqs[:, 0, 0])
+        resultsArray=getResultsArray(["s{}".format(code) for code in oneHotSeqs[:, 0, 0]])
+        return resultsArray, resultsArray.max(axis=-1)
+    monkeypatch.setattr(getMnnResults, "getMnnResults", fakeGetMnnResults)
+    seqNames=np.asarray(["s1", "s2", "s3"])
+    getMnnResults.saveIncrementalStore(tmp_path, seqNames, getResultsArray(seqNames))
+    storedSeqNames, storedResultsArray=getMnnResults.loadIncrementalStore(tmp_path, 5)
+    # s2 is dropped, s4 is new
+    newSeqNames=np.asarray(["s3", "s4", "s1"])
+    oneHotSeqs=np.asarray([[[3]], [[4]], [[1]]])
+    mnnResultsArray, mnnMaxResultsArray, nbComputed=getMnnResults.getIncrementalMnnResults(newSeqNames, oneHotSeqs, None, storedSeqNames, storedResultsArray)
+    assert nbComputed==1 and computedSeqNames==["s4"]
+    np.testing.assert_array_equal(mnnResultsArray, getResultsArray(newSeqNames))
+    np.testing.assert_array_equal(mnnMaxResultsArray, [[3, 4, 1], [3, 4, 1]])
+
+def test_cacheKeyFollowsSource(tmp_path, monkeypatch):
+    inputPaths=[]
+    for name in ["oneHotSeqs.npy", "names.npy", "hParams.txt", "params.pth"]:
+        (tmp_path / name).write_bytes(name.encode())
+        inputPaths.append(tmp_path / name)
+    sourceDir=tmp_path / "src"
+    sourceDir.mkdir()
+    (sourceDir / "fakeMnnProcess.py").write_text("VALUE=1\n")
+    monkeypatch.syspath_prepend(str(sourceDir))
+    monkeypatch.setattr(getMnnResults, "RESULT_SOURCE_MODULES", getMnnResults.RESULT_SOURCE_MODULES+("fakeMnnProcess",))
+    key=getMnnResults.getResultCacheKey(*inputPaths)
+    assert getMnnResults.getResultCacheKey(*inputPaths)==key
+    # same version string, other code
+    (sourceDir / "fakeMnnProcess.py").write_text("VALUE=2\n")
+    assert getMnnResults.getResultCacheKey(*inputPaths)!=key
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import os
+import asyncio
+
+import homerScheduler
+
+def getPlan(tmp_path, nbJob:int, maxThreads:int):
+    jobs=[]
+    for jobId in range(nbJob):
+        foreground=tmp_path / "foreground{}.fa".format(jobId)
+        background=tmp_path / "background{}.fa".format(jobId)
+        foreground.write_text(">seq\nACGT\n")
+        background.write_text(">seq\nACGT\n")
+        jobs.append(dict(name="job{}".format(jobId), foreground=str(foreground), background=str(background), len="5,6", outDir=str(tmp_path / "out{}".format(jobId))))
+    return homerScheduler.getPlan(jobs, maxThreads)
+
+def runPlan(plan, maxThreads:int):
+    # a deadlock fails the test instead of hanging it
+    return asyncio.run(asyncio.wait_for(homerScheduler.runPlan(plan, maxThreads, "jaspar.motifs"), timeout=30))
+
+def test_missingCommandReleasesThreads(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "emptyBin"))
+    # each job takes all the threads: the second one starts only if the first one hands them back
+    plan=getPlan(tmp_path, 3, 2)
+    assert [job["threads"] for job in plan]==[2, 2, 2]
+    results=runPlan(plan, 2)
+    assert [job["returnCode"] for job in results]==[127, 127, 127]
+
+def test_runPlanReturnCodes(tmp_path, monkeypatch):
+    binDir=tmp_path / "fakeBin"
+    binDir.mkdir()
+    fakeHomer=binDir / "findMotifs.pl"
+    # fails on the job of out1, succeeds on the others
+    fakeHomer.write_text("#!/bin/sh\ncase \"$3\" in *out1) exit 3;; esac\nexit 0\n")
+    fakeHomer.chmod(0o755)
+    monkeypatch.setenv("PATH", "{}{}{}".format(binDir, os.pathsep, os.environ["PATH"]))
+    results=runPlan(getPlan(tmp_path, 3, 2), 2)
+    assert {job["name"]:job["returnCode"] for job in results}=={"job0":0, "job1":3, "job2":0}
+    assert all((tmp_path / "out{}".format(jobId) / "homer.log").exists() for jobId in range(3))
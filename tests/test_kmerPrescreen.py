@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+np=pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import kmerPrescreen
+
+def getPlantedInputs(motif:str, nbSeq:int=200, seqSize:int=40, motifStart:int=10):
+    # random sequences with the motif planted in half of them, the hits of module 0 on the motif
+    rng=np.random.default_rng(0)
+    baseIdxSeqs=rng.integers(0, 4, size=(nbSeq, seqSize))
+    hitSeqs=np.arange(0, nbSeq, 2)
+    baseIdxSeqs[hitSeqs, motifStart:motifStart+len(motif)]=[kmerPrescreen.ALPHABET.index(base) for base in motif]
+    coverage=kmerPrescreen.getHitCoverage(hitSeqs, np.full(len(hitSeqs), motifStart), np.full(len(hitSeqs), motifStart+len(motif)), nbSeq, seqSize)
+    return baseIdxSeqs, coverage
+
+def test_shortFilterIsTested():
+    # a 4 bases filter next to a 12 bases one: its 4-mers are tested even with minLength=5
+    baseIdxSeqs, coverage=getPlantedInputs("ACGT")
+    emptyCoverage=np.zeros_like(coverage)
+    prescreenDf=kmerPrescreen.getModulePrescreen(baseIdxSeqs, [coverage, emptyCoverage], [4, 12], minLength=5)
+    shortRow=prescreenDf.iloc[0]
+    assert bool(shortRow["screened"]) and bool(shortRow["enriched"])
+    assert shortRow["bestKmer"]=="ACGT" and shortRow["homerLen"]=="4"
+
+def test_moduleWithoutHitIsNotScreened():
+    baseIdxSeqs, coverage=getPlantedInputs("ACGTAC")
+    prescreenDf=kmerPrescreen.getModulePrescreen(baseIdxSeqs, [coverage, np.zeros_like(coverage)], [6, 6], minLength=5)
+    assert prescreenDf["screened"].tolist()==[True, False]
+    assert prescreenDf["enriched"].tolist()==[True, False]
+
+def test_longKmersAreRejected():
+    baseIdxSeqs=np.zeros((2, 40), dtype=np.int64)
+    kmerPrescreen.getKmerCodes(baseIdxSeqs, kmerPrescreen.MAX_KMER_LENGTH)
+    with pytest.raises(ValueError):
+        kmerPrescreen.getKmerCodes(baseIdxSeqs, kmerPrescreen.MAX_KMER_LENGTH+1)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+np=pytest.importorskip("numpy")
+pd=pytest.importorskip("pandas")
+pytest.importorskip("torch")
+
+import mnnResultBedFilsGenerator
+
+def getInputs():
+    mnnResultsArray=np.zeros((2, 3, 20), dtype=np.float32)
+    mnnResultsArray[0, 0, 2:5]=[1., 3., 2.]
+    mnnResultsArray[1, 1, 10]=4.
+    mnnResultsArray[0, 2, 7]=0.5
+    # scores on a grid 0, 1, ..., 4 with the p-value 10^-score
+    distributions={
+        "scoreMin":np.zeros(2),
+        "scoreStep":np.ones(2),
+        "survival":np.tile(10.**-np.arange(5), (2, 1)),
+    }
+    return mnnResultsArray, [4, 6], np.asarray(["seqA", "seqB", "seqC"]), distributions
+
+def writeBed(bedDf)->pd.DataFrame:
+    # as the scripts, then read back as a generic tab separated file
+    bedFile=io.StringIO()
+    bedDf.to_csv(bedFile, sep="\t", index=False, header=False)
+    bedFile.seek(0)
+    return pd.read_csv(bedFile, sep="\t", header=None)
+
+@pytest.mark.parametrize("compaction", ["none", "merge"])
+def test_pvalueColumnLayout(compaction):
+    mnnResultsArray, filterLengthList, seqNames, distributions=getInputs()
+    posBedDf, _=mnnResultBedFilsGenerator.generateMnnResultBedFiles(
+        mnnResultsArray, filterLengthList, seqNames=seqNames, allNegHits=True, compaction=compaction, distributions=distributions
+    )
+    bedDf=writeBed(posBedDf)
+    # BED8+1 in both layouts: integer thickStart and thickEnd inside the hit, the p-value 9th
+    assert bedDf.shape[1]==9
+    assert all(pd.api.types.is_integer_dtype(bedDf[column]) for column in (1, 2, 6, 7))
+    assert ((bedDf[1]<=bedDf[6]) & (bedDf[6]<=bedDf[7]) & (bedDf[7]<=bedDf[2])).all()
+    np.testing.assert_allclose(bedDf[8], 10.**-np.rint(bedDf[4]))
+    if compaction=="none":
+        assert (bedDf[6]==bedDf[1]).all() and (bedDf[7]==bedDf[2]).all()
+
+def test_noPvalueLayout():
+    mnnResultsArray, filterLengthList, seqNames, _=getInputs()
+    posBedDf, _=mnnResultBedFilsGenerator.generateMnnResultBedFiles(mnnResultsArray, filterLengthList, seqNames=seqNames, allNegHits=True)
+    # BED6 without p-value and without compaction
+    assert writeBed(posBedDf).shape[1]==6
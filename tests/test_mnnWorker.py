@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import signal
+import subprocess
+
+import mnnWorker
+from conftest import BIN_DIR
+
+# a worker whose model loader and subcommand are fakes: the loader logs the pid of each real loading
+WORKER_CODE="""
+import os
+import sys
+import types
+sys.path.insert(0, {binDir!r})
+
+def load_model(paramsPath, keysPath):
+    with open({loadLogPath!r}, "a") as loadLog:
+        loadLog.write("{{}}\\n".format(os.getpid()))
+    return {{"params":paramsPath, "keys":keysPath}}
+
+def main():
+    import mnnPseudoModel
+    model=mnnPseudoModel.load_model(sys.argv[1], sys.argv[2])
+    print(os.getpid(), model["params"])
+
+sys.modules["mnnPseudoModel"]=types.ModuleType("mnnPseudoModel")
+sys.modules["mnnPseudoModel"].load_model=load_model
+sys.modules["fakeLoadModel"]=types.ModuleType("fakeLoadModel")
+sys.modules["fakeLoadModel"].main=main
+
+import mnnTools
+import mnnWorker
+mnnTools.SUBCOMMANDS["fakeLoadModel"]="Load a model."
+mnnWorker.serve({socketPath!r}, 2, mnnWorker.installCaches(4, 0))
+"""
+
+def test_secondRequestUsesCachedModel(tmp_path, capfd):
+    socketPath=str(tmp_path / "worker.sock")
+    loadLogPath=tmp_path / "loads.txt"
+    paramsPath=tmp_path / "model.npy"
+    keysPath=tmp_path / "model.pth"
+    paramsPath.write_bytes(b"params")
+    keysPath.write_bytes(b"keys")
+    # the symbolic link staged by Nextflow in another task hits the same entry
+    paramsLink=tmp_path / "link.npy"
+    paramsLink.symlink_to(paramsPath)
+    code=WORKER_CODE.format(binDir=str(BIN_DIR), loadLogPath=str(loadLogPath), socketPath=socketPath)
+    worker=subprocess.Popen([sys.executable, "-c", code])
+    try:
+        deadline=time.monotonic()+30
+        while not os.path.exists(socketPath):
+            assert worker.poll() is None and time.monotonic()<deadline
+            time.sleep(0.05)
+        for requestParamsPath in (paramsPath, paramsLink, paramsPath):
+            assert mnnWorker.runRemote(socketPath, "fakeLoadModel", [str(requestParamsPath), str(keysPath)])==0
+        childPids=[line.split()[0] for line in capfd.readouterr().out.splitlines()]
+        # loaded by the child of the first request, then by the worker before the next fork, and not anymore
+        assert loadLogPath.read_text().split()==[childPids[0], str(worker.pid)]
+        # each request ran in its own child
+        assert len(set(childPids))==3 and str(worker.pid) not in childPids
+        # a modified model is loaded again
+        keysPath.write_bytes(b"new keys")
+        os.utime(keysPath, ns=(time.time_ns(), time.time_ns()+10**9))
+        assert mnnWorker.runRemote(socketPath, "fakeLoadModel", [str(paramsPath), str(keysPath)])==0
+        childPid=capfd.readouterr().out.split()[0]
+        assert loadLogPath.read_text().split()[2]==childPid
+    finally:
+        worker.send_signal(signal.SIGINT)
+        worker.wait(timeout=30)
+
+def test_lruCacheEviction():
+    cache=mnnWorker.LruCache(2)
+    loads=[]
+    for key in ["a", "b", "a", "c", "b"]:
+        cache.get(key, lambda: loads.append(key) or key, [key])
+    # "b" is the least recently used when "c" comes in
+    assert loads==["a", "b", "c", "b"]
+    assert list(cache.entries)==["c", "b"]
+    assert (cache.nbHit, cache.nbMiss)==(1, 4)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import selectForeground
+
+BED="".join("seq{0}\t{1}\t{2}\t0\t{3}\t+\n".format(*line) for line in [(1, 10, 20, 5.), (2, 10, 20, 7.), (3, 30, 40, 2.)])
+
+def test_scoresFollowSkippedIntervals():
+    # seq2 is not in the reference: bedtools getfasta skips it
+    fasta=">seq1:10-20\nACGTACGTAC\n>seq3:30-40\nTTTTGGGGCC\n"
+    scoredFasta=selectForeground.ScoredFasta(io.StringIO(BED), io.StringIO(fasta))
+    assert list(scoredFasta)==[(5., "seq1:10-20", "ACGTACGTAC"), (2., "seq3:30-40", "TTTTGGGGCC")]
+    assert scoredFasta.nbSkippedBed==1
+
+def test_namedAndStrandedHeaders():
+    fasta=">0::seq2:10-20(+)\nACGTACGTAC\n"
+    assert [score for score, _, _ in selectForeground.ScoredFasta(io.StringIO(BED), io.StringIO(fasta))]==[7.]
+
+def test_fastaWithoutBedLine():
+    fasta=">seq3:30-40\nTTTTGGGGCC\n>seq1:10-20\nACGTACGTAC\n"
+    with pytest.raises(ValueError):
+        list(selectForeground.ScoredFasta(io.StringIO(BED), io.StringIO(fasta)))